@@ -0,0 +1,104 @@
+"""
+Endpoints d'administration : diagnostic des performances du processus.
+
+Profilage statistique à la demande (process entier ou worker d'entraînement)
+et comparaison de snapshots mémoire `tracemalloc`. Ces endpoints n'existent
+(404) que si `ADMIN_TOKEN` est configuré ; chaque appel doit alors fournir
+l'en-tête ``X-Admin-Token``.
+"""
+from typing import Dict, Any, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from backend.config import settings
+from backend.services.profiling_service import MEMORY_KEY_TYPES, profiling_service
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Vérifie le jeton d'administration (endpoints désactivés sans jeton configuré)."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not profiling_service.authorized(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Jeton d'administration invalide")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+def _profile_response(profile: Dict[str, Any], format: str):
+    if format == "collapsed":
+        return PlainTextResponse(profile["collapsed"], headers={"X-Profile-Id": profile["id"]})
+    return {key: value for key, value in profile.items() if key != "collapsed"}
+
+@router.post("/profile")
+async def run_profile(
+    duration: float = Query(10.0, gt=0, description="Durée de l'échantillonnage (secondes)"),
+    interval_ms: Optional[float] = Query(None, gt=0, le=1000, description="Période d'échantillonnage"),
+    training_id: Optional[str] = Query(None, description="Limiter au thread d'un entraînement"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$")
+):
+    """
+    Profile le processus pendant `duration` secondes.
+
+    Le format ``collapsed`` (une pile par ligne) s'ouvre directement dans
+    speedscope ou se convertit en flamegraph (``flamegraph.pl``) ; ``json``
+    donne les fonctions les plus échantillonnées.
+    """
+    try:
+        profile = await profiling_service.profile(duration, interval_ms, training_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return _profile_response(profile, format)
+
+@router.get("/profiles")
+async def list_profiles():
+    """Profils conservés (à la demande et requêtes profilées par en-tête)."""
+    return {"profiles": profiling_service.list_profiles(), "stats": profiling_service.get_stats()}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = Query("collapsed", pattern="^(collapsed|json)$")):
+    """Récupère un profil conservé."""
+    profile = profiling_service.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profil {profile_id} non trouvé")
+    return _profile_response(profile, format)
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: Optional[int] = Query(None, ge=1, le=100)):
+    """Active le suivi des allocations (tracemalloc)."""
+    return profiling_service.start_memory_tracing(frames)
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """Désactive le suivi des allocations et oublie les snapshots."""
+    return profiling_service.stop_memory_tracing()
+
+@router.get("/memory")
+async def memory_status():
+    """État du suivi des allocations et snapshots conservés."""
+    return profiling_service.memory_status()
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot():
+    """Prend un snapshot des allocations."""
+    try:
+        return profiling_service.take_snapshot()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(
+    base: str = Query(..., description="Snapshot de référence"),
+    target: Optional[str] = Query(None, description="Snapshot comparé (nouveau snapshot si absent)"),
+    key_type: str = Query("lineno", description=f"Regroupement: {', '.join(MEMORY_KEY_TYPES)}"),
+    limit: int = Query(25, ge=1, le=500)
+):
+    """Compare deux snapshots : lignes dont l'allocation a le plus varié."""
+    try:
+        return profiling_service.diff_snapshots(base, target, key_type, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -4,6 +4,7 @@ Endpoints API REST pour la gestion des archives.
 
 Fournit les opérations CRUD sur les archives,
 ainsi que la sauvegarde automatique et la reprise de sessions.
+La création, l'optimisation et la validation sont des tâches de fond.
 """
 
 import os
@@ -13,6 +14,7 @@ from fastapi import APIRouter, HTTPException, status, Query, Body, File, UploadF
 from pydantic import BaseModel, Field
 
 from backend.services.archive_service import archive_service
+from backend.services.job_service import job_service
 from backend.services.websocket_service import websocket_manager
 
 router = APIRouter()
@@ -30,12 +32,35 @@ class ArchiveRestore(BaseModel):
     """Modèle pour la restauration d'archive."""
     archive_path: str = Field(..., description="Chemin vers l'archive")
     target_dir: str = Field(..., description="Répertoire cible pour la restauration")
+    members: Optional[List[str]] = Field(None, description="Membres à restaurer (défaut: tous)")
 
 class ArchiveCompare(BaseModel):
     """Modèle pour la comparaison d'archives."""
     archive_path1: str = Field(..., description="Chemin vers la première archive")
     archive_path2: str = Field(..., description="Chemin vers la deuxième archive")
 
+class ArchiveOptimize(BaseModel):
+    """Modèle pour l'optimisation d'archive."""
+    archive_path: str = Field(..., description="Chemin vers l'archive")
+    optimization_level: str = Field("balanced", pattern="^(minimal|balanced|aggressive)$", description="Niveau d'optimisation")
+
+class ArchiveValidate(BaseModel):
+    """Modèle pour la validation d'archive."""
+    archive_path: str = Field(..., description="Chemin vers l'archive")
+
+class ArchiveValidateBatch(BaseModel):
+    """Modèle pour la validation d'un répertoire d'archives."""
+    directory: Optional[str] = Field(None, description="Répertoire des archives (défaut: répertoire des archives)")
+    pattern: str = Field("*.zip", description="Motif des fichiers à valider")
+    max_workers: Optional[int] = Field(
+        None, ge=1, le=64, description="Processus de validation, plafonnés au nombre de cœurs (défaut: 1)"
+    )
+
+class ArchiveStore(BaseModel):
+    """Modèle pour l'ajout d'une archive au magasin dédupliqué."""
+    archive_path: str = Field(..., description="Chemin vers l'archive")
+    archive_id: Optional[str] = Field(None, description="Identifiant dans le magasin (défaut: nom du fichier)")
+
 class CleanupConfig(BaseModel):
     """Modèle pour la configuration du nettoyage."""
     max_age_days: int = Field(30, ge=1, le=365, description="Âge maximum en jours")
@@ -73,48 +98,168 @@ async def list_archives(
             detail=f"Erreur lors de la liste des archives: {e}"
         )
 
-@router.post("/", response_model=Dict[str, Any])
+async def _notify_archive_created(job: Dict[str, Any]):
+    """Notifie la création d'une archive une fois sa tâche terminée."""
+    result = job.get("result") or {}
+    await websocket_manager.broadcast_experiment_update({
+        "type": "archive_created",
+        "experiment_id": job["params"].get("experiment_id"),
+        "archive_name": result.get("archive_name"),
+        "archive_path": result.get("archive_path")
+    })
+
+job_service.add_listener("archive_create", _notify_archive_created)
+
+@router.post("/", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
 async def create_archive(archive_data: ArchiveCreate):
     """
-    Crée une nouvelle archive.
+    Crée une nouvelle archive (tâche de fond).
     
     Args:
         archive_data: Données pour la création de l'archive
         
     Returns:
-        Informations sur l'archive créée
+        Tâche de création (suivie via /api/v1/jobs/{id})
     """
-    try:
-        result = archive_service.create_archive(
-            experiment_id=archive_data.experiment_id,
-            model_path=archive_data.model_path,
-            metrics=archive_data.metrics,
-            config=archive_data.config,
-            tags=archive_data.tags
+    return job_service.submit("archive_create", archive_data.dict())
+
+@router.post("/optimize", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def optimize_archive(request: ArchiveOptimize):
+    """
+    Optimise la compression d'une archive (tâche de fond).
+    
+    Args:
+        request: Archive et niveau d'optimisation
+        
+    Returns:
+        Tâche d'optimisation
+    """
+    if not os.path.exists(request.archive_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archive non trouvée: {request.archive_path}"
         )
+    return job_service.submit("archive_optimize", request.dict())
+
+@router.post("/validate", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def validate_archive(request: ArchiveValidate):
+    """
+    Valide une archive (tâche de fond).
+    
+    Args:
+        request: Archive à valider
         
-        if not result.get("success", False):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result.get("message", "Erreur inconnue lors de la création de l'archive")
-            )
+    Returns:
+        Tâche de validation
+    """
+    if not os.path.exists(request.archive_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archive non trouvée: {request.archive_path}"
+        )
+    return job_service.submit("archive_validate", request.dict())
+
+@router.post("/validate/batch", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def validate_archive_directory(request: ArchiveValidateBatch):
+    """
+    Valide en place toutes les archives d'un répertoire (tâche de fond).
+    
+    Args:
+        request: Répertoire, motif et nombre de processus
         
-        # Notifier via WebSocket
-        await websocket_manager.broadcast_experiment_update({
-            "type": "archive_created",
-            "experiment_id": archive_data.experiment_id,
-            "archive_name": result.get("archive_name"),
-            "archive_path": result.get("archive_path")
-        })
+    Returns:
+        Tâche de validation ; son résultat contient le rapport du lot
+    """
+    if request.directory and not os.path.isdir(request.directory):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Répertoire non trouvé: {request.directory}"
+        )
+    return job_service.submit("archive_validate_batch", request.dict())
+
+def _store_call(function, *args):
+    """Appelle une opération du magasin (503 s'il est désactivé)."""
+    try:
+        return function(*args)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+@router.get("/store", response_model=Dict[str, Any])
+async def list_stored_archives():
+    """Archives du magasin dédupliqué et volume réellement stocké."""
+    return {
+        "archives": _store_call(archive_service.list_stored_archives),
+        "statistics": _store_call(archive_service.get_store_statistics)
+    }
+
+@router.post("/store", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def store_archive(request: ArchiveStore):
+    """
+    Ajoute une archive ZIP au magasin dédupliqué (tâche de fond).
+    
+    Args:
+        request: Archive à ajouter et identifiant optionnel
         
-        return result
+    Returns:
+        Tâche d'ajout
+    """
+    if not os.path.exists(request.archive_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archive non trouvée: {request.archive_path}"
+        )
+    _store_call(archive_service.get_store_statistics)
+    return job_service.submit("archive_store_import", request.dict())
+
+@router.post("/store/gc", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def collect_store_garbage():
+    """Supprime les blocs qui ne sont plus référencés (tâche de fond)."""
+    _store_call(archive_service.get_store_statistics)
+    return job_service.submit("archive_store_gc", {})
+
+@router.post("/store/{archive_id}/export", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def export_stored_archive(archive_id: str):
+    """Reconstruit une archive du magasin en ZIP autonome (tâche de fond)."""
+    if not any(entry["id"] == archive_id for entry in _store_call(archive_service.list_stored_archives)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archive absente du magasin: {archive_id}"
+        )
+    return job_service.submit("archive_store_export", {"archive_id": archive_id})
+
+@router.delete("/store/{archive_id}", response_model=Dict[str, Any])
+async def delete_stored_archive(archive_id: str):
+    """Retire une archive du magasin ; ses blocs sont libérés par le ramasse-miettes."""
+    if not _store_call(archive_service.delete_stored_archive, archive_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Archive absente du magasin: {archive_id}"
+        )
+    return {"success": True, "archive_id": archive_id}
+
+@router.get("/best", response_model=List[Dict[str, Any]])
+async def get_best_archives(
+    limit: int = Query(10, ge=1, le=100, description="Nombre maximum d'archives à retourner")
+):
+    """
+    Récupère les meilleures archives.
+    
+    Args:
+        limit: Nombre maximum de résultats
+        
+    Returns:
+        Liste des meilleures archives
+    """
+    try:
+        # Requête indexée sur le catalogue des archives (score = win_rate)
+        archives = archive_service.get_best_archives(limit=limit)
+        
+        return archives
         
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de la création de l'archive: {e}"
+            detail=f"Erreur lors de la récupération des meilleures archives: {e}"
         )
 
 @router.get("/{archive_path:path}", response_model=Dict[str, Any])
@@ -183,7 +328,8 @@ async def restore_archive(restore_data: ArchiveRestore):
         
         result = archive_service.restore_session(
             archive_path=restore_data.archive_path,
-            target_dir=restore_data.target_dir
+            target_dir=restore_data.target_dir,
+            members=restore_data.members
         )
         
         if not result.get("success", False):
@@ -378,7 +524,8 @@ async def upload_archive(
                 detail=f"Archive invalide: {validation_result.errors}"
             )
         
-        # Extraire les métadonnées
+        # Cataloguer l'archive et extraire les métadonnées
+        archive_service.archive_service.register_archive(file_path)
         metadata = archive_service.archive_service.extract_metadata(file_path)
         
         # Enregistrer la version
@@ -400,7 +547,7 @@ async def upload_archive(
             "success": True,
             "archive_path": file_path,
             "archive_name": filename,
-            "version_id": version_info.get("version_id"),
+            "version_id": version_info.session_id if version_info else None,
             "validation_result": validation_result.is_valid,
             "message": f"Archive uploadée avec succès: {filename}"
         }
@@ -413,49 +560,5 @@ async def upload_archive(
             detail=f"Erreur lors de l'upload de l'archive: {e}"
         )
 
-@router.get("/best", response_model=List[Dict[str, Any]])
-async def get_best_archives(
-    limit: int = Query(10, ge=1, le=100, description="Nombre maximum d'archives à retourner")
-):
-    """
-    Récupère les meilleures archives.
-    
-    Args:
-        limit: Nombre maximum de résultats
-        
-    Returns:
-        Liste des meilleures archives
-    """
-    try:
-        # Utiliser le gestionnaire de versions
-        best_versions = archive_service.version_manager.get_best_versions(limit=limit)
-        
-        # Ajouter des informations supplémentaires
-        archives = []
-        for version in best_versions:
-            archive_path = version["archive_path"]
-            
-            # Obtenir des informations supplémentaires
-            archive_info = archive_service.archive_service.get_archive_info(archive_path)
-            
-            archives.append({
-                "archive_path": archive_path,
-                "archive_name": os.path.basename(archive_path),
-                "version_id": version.get("version_id"),
-                "tags": version.get("tags", []),
-                "created_at": version.get("created_at"),
-                "metadata": version.get("metadata", {}),
-                "size_mb": archive_info.get("size_mb", 0),
-                "score": version.get("score", 0)
-            })
-        
-        return archives
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de la récupération des meilleures archives: {e}"
-        )
-
 # Import datetime pour la route upload
 from datetime import datetime
\ No newline at end of file
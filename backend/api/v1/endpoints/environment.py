@@ -5,11 +5,12 @@ Fournit les opérations pour configurer, réinitialiser
 et interagir avec les environnements Pac-Man.
 """
 from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query
 
 from backend.config import AllParameters, GameParameters
-from backend.models.experiment import GameState
+from backend.models.experiment import GameState, SimulationCreate
 from backend.services.environment_service import environment_service
+from backend.services.simulation_service import simulation_service
 from backend.services.websocket_service import websocket_manager
 
 router = APIRouter()
@@ -82,9 +83,14 @@ async def create_multiagent_env(game_params: GameParameters):
     }
 
 @router.post("/simulate/step", response_model=Dict[str, Any])
-async def simulate_step(environment_type: str = "configurable", steps: int = 1):
+async def simulate_step(
+    environment_type: str = "configurable",
+    steps: int = 1,
+    encoding: str = Query("full", pattern="^(full|bitmap|rle)$",
+                          description="Encodage de la grille (full, bitmap ou rle)")
+):
     """Simule un ou plusieurs steps dans un environnement."""
-    # Créer un environnement temporaire pour la simulation
+    # Paramètres de la simulation (instances réutilisées via le pool)
     game_params = GameParameters(
         grid_size=10,
         num_ghosts=2,
@@ -93,52 +99,43 @@ async def simulate_step(environment_type: str = "configurable", steps: int = 1):
         pellet_density=0.7
     )
     
-    if environment_type == "configurable":
-        env = environment_service.create_configurable_env(game_params)
-    elif environment_type == "multiagent":
-        env = environment_service.create_multiagent_env(game_params)
-    else:
+    if environment_type not in ("configurable", "multiagent"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Type d'environnement invalide: {environment_type}"
         )
     
-    if env is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Impossible de créer l'environnement de simulation"
-        )
-    
-    # Réinitialiser l'environnement
-    if hasattr(env, 'reset'):
-        env.reset()
-    
-    # Simuler les steps
-    states = []
-    for step in range(steps):
-        # Action aléatoire pour la simulation
-        import random
-        if environment_type == "configurable":
-            action = random.randint(0, 3)
-            obs, reward, terminated, truncated, info = env.step(action)
-        else:
-            # Pour multi-agent, actions pour tous les agents
-            actions = {}
-            for agent in env.agents:
-                actions[agent] = random.randint(0, 3)
-            obs, rewards, terminations, truncations, infos = env.step(actions)
+    # Emprunter un environnement prêt au pool (déjà réinitialisé)
+    with environment_service.checkout_env(environment_type, game_params) as env:
+        if env is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Impossible de créer l'environnement de simulation"
+            )
         
-        # Extraire l'état
-        game_state = environment_service.get_game_state(env, environment_type)
-        if game_state:
-            states.append(game_state.dict())
-    
-    # Nettoyer
-    if hasattr(env, 'close'):
-        env.close()
+        # Simuler les steps
+        states = []
+        for step in range(steps):
+            # Action aléatoire pour la simulation
+            import random
+            if environment_type == "configurable":
+                action = random.randint(0, 3)
+                obs, reward, terminated, truncated, info = env.step(action)
+            else:
+                # Pour multi-agent, actions pour tous les agents
+                actions = {}
+                for agent in env.agents:
+                    actions[agent] = random.randint(0, 3)
+                obs, rewards, terminations, truncations, infos = env.step(actions)
+            
+            # Extraire l'état (extraction vectorisée, sans modèle Pydantic)
+            game_state = environment_service.get_game_state_dict(env, environment_type, encoding)
+            if game_state:
+                states.append(game_state)
     
     return {
         "environment_type": environment_type,
+        "encoding": encoding,
         "steps_simulated": steps,
         "states": states,
         "final_state": states[-1] if states else None
@@ -147,7 +144,7 @@ async def simulate_step(environment_type: str = "configurable", steps: int = 1):
 @router.get("/visualization/state", response_model=GameState)
 async def get_visualization_state(environment_type: str = "configurable"):
     """Génère un état de visualisation pour le frontend."""
-    # Créer un environnement temporaire
+    # Paramètres de la visualisation (instances réutilisées via le pool)
     game_params = GameParameters(
         grid_size=12,
         num_ghosts=3,
@@ -156,10 +153,11 @@ async def get_visualization_state(environment_type: str = "configurable"):
         pellet_density=0.6
     )
     
-    if environment_type == "configurable":
-        env = environment_service.create_configurable_env(game_params)
-    else:
-        env = environment_service.create_multiagent_env(game_params)
+    if environment_type != "configurable":
+        environment_type = "multiagent"
+    
+    with environment_service.checkout_env(environment_type, game_params) as env:
+        game_state = environment_service.get_game_state(env, environment_type) if env is not None else None
     
     if env is None:
         # Retourner un état simulé si l'environnement n'est pas disponible
@@ -209,23 +207,88 @@ async def get_visualization_state(environment_type: str = "configurable"):
             step=0,
             episode=0
         )
-    else:
-        # Extraire l'état réel
-        game_state = environment_service.get_game_state(env, environment_type)
-        if hasattr(env, 'close'):
-            env.close()
-        
-        if game_state is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Impossible d'extraire l'état du jeu"
-            )
+    elif game_state is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Impossible d'extraire l'état du jeu"
+        )
     
     # Diffuser via WebSocket pour les clients abonnés
     await websocket_manager.broadcast_game_state(game_state.dict())
     
     return game_state
 
+@router.post("/simulations", response_model=Dict[str, Any], status_code=status.HTTP_201_CREATED)
+async def create_simulation(config: SimulationCreate):
+    """Crée une simulation en direct avancée par l'ordonnanceur côté serveur."""
+    try:
+        simulation = await simulation_service.create_simulation(config)
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        **simulation.to_dict(),
+        "channel": "game_state",
+        "message": "Simulation créée, états publiés sur le canal game_state"
+    }
+
+@router.get("/simulations", response_model=Dict[str, Any])
+async def list_simulations():
+    """Liste les simulations en direct et les statistiques de l'ordonnanceur."""
+    return {
+        "simulations": simulation_service.list_simulations(),
+        "stats": simulation_service.get_stats()
+    }
+
+@router.get("/simulations/{simulation_id}/state", response_model=Dict[str, Any])
+async def get_simulation_state(simulation_id: str):
+    """Récupère le dernier état publié d'une simulation (compte comme activité)."""
+    simulation = simulation_service.get_simulation(simulation_id)
+    if simulation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Simulation {simulation_id} non trouvée"
+        )
+    
+    return {
+        **simulation.to_dict(),
+        "state": simulation.last_state
+    }
+
+@router.post("/simulations/{simulation_id}/heartbeat", response_model=Dict[str, Any])
+async def simulation_heartbeat(simulation_id: str):
+    """Signale qu'une simulation est toujours regardée (évite son éviction)."""
+    simulation = simulation_service.get_simulation(simulation_id)
+    if simulation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Simulation {simulation_id} non trouvée"
+        )
+    
+    return {"simulation_id": simulation_id, "alive": True}
+
+@router.delete("/simulations/{simulation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_simulation(simulation_id: str):
+    """Arrête une simulation en direct."""
+    if not simulation_service.remove_simulation(simulation_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Simulation {simulation_id} non trouvée"
+        )
+
+@router.get("/pool/stats", response_model=Dict[str, Any])
+async def get_environment_pool_stats():
+    """Récupère les statistiques du pool d'environnements pré-initialisés."""
+    return environment_service.get_pool_stats()
+
 @router.get("/capabilities", response_model=Dict[str, Any])
 async def get_environment_capabilities():
     """Récupère les capacités des environnements disponibles."""
@@ -5,29 +5,17 @@ Fournit les opérations pour calculer, analyser et visualiser
 les scores d'intelligence des agents IA Pac-Man.
 """
 
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, status, Query, Body
 from pydantic import BaseModel, Field
 
-# Import des modules d'intelligence
-import sys
-import os
+from backend.services.intelligence_service import INTELLIGENCE_MODULES_AVAILABLE, calculate_report
+from backend.services.job_service import job_service
 
-# Ajouter le répertoire intelligence au path
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../../..'))
-
-try:
-    from intelligence.intelligence_calculator import IntelligenceCalculator, create_episode_metrics_from_backend
-    from intelligence.metrics_analyzer import MetricsAnalyzer
-    from intelligence.baseline_comparator import BaselineComparator
-    from intelligence.difficulty_adjuster import DifficultyAdjuster, EnvironmentDifficulty
-    from intelligence.recommendations_generator import RecommendationsGenerator
-    from intelligence.visualization_generator import VisualizationGenerator
-    INTELLIGENCE_MODULES_AVAILABLE = True
-except ImportError as e:
-    logging.warning(f"Modules d'intelligence non disponibles: {e}")
-    INTELLIGENCE_MODULES_AVAILABLE = False
+if not INTELLIGENCE_MODULES_AVAILABLE:
+    logging.warning("Modules d'intelligence non disponibles (numpy/scipy manquants)")
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -102,83 +90,8 @@ async def calculate_intelligence_score(
         )
     
     try:
-        # Convertir les données d'épisodes
-        episode_dicts = [episode.dict() for episode in request.episodes]
-        episodes = create_episode_metrics_from_backend(episode_dicts)
-        
-        # Initialiser le calculateur
-        calculator = IntelligenceCalculator(
-            baseline_winrate=request.baseline_winrate,
-            baseline_reward=request.baseline_reward
-        )
-        
-        # Calculer le facteur de difficulté
-        env_params = request.environment_params
-        difficulty_adjuster = DifficultyAdjuster()
-        env_difficulty = EnvironmentDifficulty(
-            grid_size=env_params.get("grid_size", 10),
-            num_ghosts=env_params.get("num_ghosts", 2),
-            power_pellets=env_params.get("power_pellets", 2),
-            pellet_density=env_params.get("pellet_density", 0.7),
-            ghost_speed=env_params.get("ghost_speed", 1.0),
-            pacman_speed=env_params.get("pacman_speed", 1.0),
-            episode_time_limit=env_params.get("episode_time_limit", 1000)
-        )
-        
-        difficulty_factor = difficulty_adjuster.calculate_difficulty_factor(env_difficulty)
-        
-        # Calculer le score d'intelligence
-        intelligence_result = calculator.calculate_intelligence_score(
-            episodes=episodes,
-            difficulty_factor=difficulty_factor
-        )
-        
-        # Analyser les métriques
-        analyzer = MetricsAnalyzer()
-        metrics_result = analyzer.analyze_performance(
-            episodes=episode_dicts,
-            agent_type=request.agent_type
-        )
-        
-        # Comparer avec les baselines
-        baseline_comparator = BaselineComparator()
-        baseline_result = baseline_comparator.compare_with_baselines(
-            agent_metrics=metrics_result['basic_statistics'],
-            environment_params=env_params
-        )
-        
-        # Générer des recommandations
-        recommendations_generator = RecommendationsGenerator()
-        recommendations_result = recommendations_generator.generate_recommendations(
-            intelligence_score=intelligence_result,
-            metrics_analysis=metrics_result,
-            baseline_comparison=baseline_result,
-            difficulty_profile=difficulty_adjuster.create_difficulty_profile(env_difficulty)
-        )
-        
-        # Générer les visualisations
-        visualization_generator = VisualizationGenerator()
-        visualizations_result = visualization_generator.generate_intelligence_dashboard(
-            intelligence_score=intelligence_result,
-            metrics_analysis=metrics_result,
-            baseline_comparison=baseline_result,
-            recommendations=recommendations_result
-        )
-        
-        return {
-            "intelligence_score": intelligence_result,
-            "metrics_analysis": metrics_result,
-            "baseline_comparison": baseline_result,
-            "recommendations": recommendations_result,
-            "visualizations": visualizations_result,
-            "summary": {
-                "overall_score": intelligence_result['overall_score'],
-                "performance_level": _classify_performance_level(intelligence_result['overall_score']),
-                "key_strengths": _extract_key_strengths(intelligence_result),
-                "key_weaknesses": _extract_key_weaknesses(intelligence_result),
-                "improvement_potential": recommendations_result.get('total_potential_impact', 0.0)
-            }
-        }
+        # Calcul exécuté hors de la boucle d'événements
+        return await asyncio.to_thread(calculate_report, request.dict())
         
     except Exception as e:
         logger.error(f"Erreur lors du calcul d'intelligence: {e}", exc_info=True)
@@ -187,6 +100,24 @@ async def calculate_intelligence_score(
             detail=f"Erreur lors du calcul d'intelligence: {str(e)}"
         )
 
+@router.post("/calculate/batch", status_code=status.HTTP_202_ACCEPTED)
+async def calculate_intelligence_scores_batch(
+    requests: List[IntelligenceCalculationRequest] = Body(..., min_length=1, description="Requêtes de calcul")
+):
+    """
+    Calcule les rapports d'intelligence d'un lot d'agents en tâche de fond.
+    
+    Retourne la tâche créée ; son avancement et ses résultats sont
+    disponibles via `/api/v1/jobs/{job_id}` et le canal WebSocket `jobs`.
+    """
+    if not INTELLIGENCE_MODULES_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Modules d'intelligence non disponibles"
+        )
+    
+    return job_service.submit("intelligence_batch", {"requests": [request.dict() for request in requests]})
+
 @router.post("/analyze-metrics", response_model=Dict[str, Any])
 async def analyze_metrics(
     episodes: List[Dict[str, Any]] = Body(..., description="Données d'épisodes"),
@@ -204,6 +135,7 @@ async def analyze_metrics(
         )
     
     try:
+        from intelligence.metrics_analyzer import MetricsAnalyzer
         analyzer = MetricsAnalyzer()
         result = analyzer.analyze_performance(episodes, agent_type)
         return result
@@ -231,6 +163,7 @@ async def compare_with_baselines(
         )
     
     try:
+        from intelligence.baseline_comparator import BaselineComparator
         comparator = BaselineComparator()
         result = comparator.compare_with_baselines(agent_metrics, environment_params)
         return result
@@ -259,6 +192,7 @@ async def adjust_difficulty_score(
         )
     
     try:
+        from intelligence.difficulty_adjuster import DifficultyAdjuster, EnvironmentDifficulty
         adjuster = DifficultyAdjuster()
         env_difficulty = EnvironmentDifficulty(
             grid_size=environment_params.grid_size,
@@ -302,6 +236,7 @@ async def generate_recommendations(
         )
     
     try:
+        from intelligence.recommendations_generator import RecommendationsGenerator
         generator = RecommendationsGenerator()
         result = generator.generate_recommendations(
             intelligence_score=intelligence_score,
@@ -336,6 +271,7 @@ async def generate_visualizations(
         )
     
     try:
+        from intelligence.visualization_generator import VisualizationGenerator
         generator = VisualizationGenerator()
         result = generator.generate_intelligence_dashboard(
             intelligence_score=intelligence_score,
@@ -365,6 +301,7 @@ async def list_available_baselines():
         )
     
     try:
+        from intelligence.baseline_comparator import BaselineComparator
         comparator = BaselineComparator()
         # Exposer les baselines via une méthode publique si elle existe
         # Pour l'instant, retourner un message
@@ -379,57 +316,3 @@ async def list_available_baselines():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la récupération des baselines: {str(e)}"
         )
-
-# Fonctions utilitaires
-def _classify_performance_level(score: float) -> str:
-    """Classe le niveau de performance."""
-    if score >= 80:
-        return "excellent"
-    elif score >= 60:
-        return "good"
-    elif score >= 40:
-        return "average"
-    elif score >= 20:
-        return "poor"
-    else:
-        return "very_poor"
-
-def _extract_key_strengths(intelligence_result: Dict[str, Any]) -> List[str]:
-    """Extrait les points forts à partir du résultat d'intelligence."""
-    strengths = []
-    components = intelligence_result.get('components', {})
-    
-    for component, value in components.items():
-        if value >= 70:  # Seuil pour point fort
-            if component == 'winrate':
-                strengths.append(f"Taux de victoire élevé ({value:.1f}%)")
-            elif component == 'reward_normalized':
-                strengths.append(f"Récompenses importantes ({value:.1f}%)")
-            elif component == 'survival_normalized':
-                strengths.append(f"Bonne survie ({value:.1f}%)")
-            elif component == 'efficiency':
-                strengths.append(f"Efficacité de collecte élevée ({value:.1f}%)")
-            elif component == 'consistency':
-                strengths.append(f"Consistance excellente ({value:.1f}%)")
-    
-    return strengths if strengths else ["Aucun point fort significatif identifié"]
-
-def _extract_key_weaknesses(intelligence_result: Dict[str, Any]) -> List[str]:
-    """Extrait les points faibles à partir du résultat d'intelligence."""
-    weaknesses = []
-    components = intelligence_result.get('components', {})
-    
-    for component, value in components.items():
-        if value <= 30:  # Seuil pour point faible
-            if component == 'winrate':
-                weaknesses.append(f"Taux de victoire faible ({value:.1f}%)")
-            elif component == 'reward_normalized':
-                weaknesses.append(f"Récompenses insuffisantes ({value:.1f}%)")
-            elif component == 'survival_normalized':
-                weaknesses.append(f"Survie courte ({value:.1f}%)")
-            elif component == 'efficiency':
-                weaknesses.append(f"Efficacité de collecte faible ({value:.1f}%)")
-            elif component == 'consistency':
-                weaknesses.append(f"Manque de consistance ({value:.1f}%)")
-    
-    return weaknesses if weaknesses else ["Aucun point faible significatif identifié"]
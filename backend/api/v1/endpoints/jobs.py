@@ -0,0 +1,47 @@
+"""
+Endpoints de suivi des tâches de fond.
+
+Les endpoints longs (conversion / export ONNX, archives, scores d'intelligence
+par lot) répondent ``202`` avec une tâche ; son état se suit ici par polling
+ou sur le canal WebSocket ``jobs``.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from backend.services.job_service import job_service
+
+router = APIRouter()
+
+@router.get("/")
+async def list_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", description="Filtrer par statut"),
+    job_type: Optional[str] = Query(None, description="Filtrer par type de tâche"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Liste les tâches, les plus récentes en premier."""
+    jobs = job_service.list_jobs(status=status_filter, job_type=job_type, limit=limit)
+    return {"jobs": jobs, "count": len(jobs)}
+
+@router.get("/types")
+async def get_job_types():
+    """Types de tâches disponibles et concurrence par famille."""
+    return job_service.get_types()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """État, avancement et résultat d'une tâche."""
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tâche {job_id} non trouvée")
+    return job
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Annule une tâche encore en attente."""
+    try:
+        return job_service.cancel(job_id)
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Tâche {job_id} non trouvée")
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
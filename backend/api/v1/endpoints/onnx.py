@@ -7,6 +7,9 @@ Fournit des endpoints REST pour:
 - Optimiser et valider les modèles ONNX
 - Vérifier la compatibilité
 - Gérer les exports
+
+Conversion, export, optimisation et validation sont exécutés en tâche de
+fond : ces endpoints répondent 202 avec la tâche (voir /api/v1/jobs).
 """
 
 import os
@@ -16,13 +19,18 @@ import shutil
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from fastapi.responses import FileResponse, JSONResponse
 
+from backend.config import settings
+from backend.services.job_service import job_service
 from backend.services.onnx_export_service import onnx_export_service
 
 router = APIRouter()
 
+# Taille des blocs de recopie des modèles uploadés
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 @router.get("/")
 async def get_onnx_info():
@@ -49,16 +57,15 @@ async def get_onnx_info():
     }
 
 
-@router.post("/convert")
+@router.post("/convert", status_code=202)
 async def convert_model(
-    background_tasks: BackgroundTasks,
     model_file: UploadFile = File(...),
     algorithm: str = Form("auto"),
     include_metadata: bool = Form(True),
     output_name: Optional[str] = Form(None)
 ):
     """
-    Convertit un modèle Stable-Baselines3 en ONNX.
+    Convertit un modèle Stable-Baselines3 en ONNX (tâche de fond).
     
     Args:
         model_file: Fichier .zip du modèle SB3
@@ -67,7 +74,7 @@ async def convert_model(
         output_name: Nom personnalisé pour l'export
         
     Returns:
-        Résultats de la conversion
+        Tâche de conversion (suivie via /api/v1/jobs/{id})
     """
     # Vérifier l'extension du fichier
     if not model_file.filename.endswith('.zip'):
@@ -76,43 +83,32 @@ async def convert_model(
             detail="Le fichier doit être un fichier .zip de modèle Stable-Baselines3"
         )
     
-    # Créer un fichier temporaire
-    temp_dir = tempfile.mkdtemp()
-    temp_model_path = Path(temp_dir) / model_file.filename
+    # Recopier l'upload par blocs (supprimé par la tâche une fois converti)
+    upload_root = Path(settings.JOB_UPLOAD_DIR)
+    upload_root.mkdir(parents=True, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(dir=upload_root)
+    temp_model_path = Path(temp_dir) / Path(model_file.filename).name
     
     try:
-        # Sauvegarder le fichier uploadé
         with open(temp_model_path, 'wb') as f:
-            content = await model_file.read()
-            f.write(content)
-        
-        # Convertir le modèle
-        result = onnx_export_service.convert_model(
-            model_path=str(temp_model_path),
-            algorithm=algorithm,
-            output_name=output_name,
-            include_metadata=include_metadata
-        )
-        
-        if not result.get("success", False):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Erreur lors de la conversion: {result.get('error', 'Erreur inconnue')}"
-            )
-        
-        # Nettoyer le fichier temporaire
-        background_tasks.add_task(shutil.rmtree, temp_dir)
+            while chunk := await model_file.read(_UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
         
-        return result
+        return job_service.submit("onnx_convert", {
+            "model_path": str(temp_model_path),
+            "algorithm": algorithm,
+            "output_name": output_name,
+            "include_metadata": include_metadata,
+            "cleanup_dir": temp_dir
+        })
         
     except Exception as e:
         # Nettoyer en cas d'erreur
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        shutil.rmtree(temp_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/export/{platform}")
+@router.post("/export/{platform}", status_code=202)
 async def export_for_platform(
     platform: str,
     onnx_model_path: str = Form(...),
@@ -127,7 +123,7 @@ async def export_for_platform(
         platform_config: Configuration JSON pour la plateforme
         
     Returns:
-        Résultats de l'export
+        Tâche d'export (suivie via /api/v1/jobs/{id})
     """
     # Vérifier que le fichier existe
     if not os.path.exists(onnx_model_path):
@@ -147,23 +143,14 @@ async def export_for_platform(
                 detail="Configuration invalide (doit être du JSON)"
             )
     
-    # Exporter pour la plateforme
-    result = onnx_export_service.export_for_platform(
-        onnx_model_path=onnx_model_path,
-        platform=platform,
-        platform_config=config_dict
-    )
-    
-    if not result.get("success", False):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de l'export: {result.get('error', 'Erreur inconnue')}"
-        )
-    
-    return result
+    return job_service.submit("onnx_export", {
+        "onnx_model_path": onnx_model_path,
+        "platform": platform,
+        "platform_config": config_dict
+    })
 
 
-@router.post("/export-all")
+@router.post("/export-all", status_code=202)
 async def export_for_all_platforms(
     onnx_model_path: str = Form(...),
     platforms: Optional[str] = Form(None)
@@ -176,7 +163,7 @@ async def export_for_all_platforms(
         platforms: Liste JSON des plateformes (défaut: toutes)
         
     Returns:
-        Résultats de l'export multi-plateforme
+        Tâche d'export multi-plateforme
     """
     # Vérifier que le fichier existe
     if not os.path.exists(onnx_model_path):
@@ -196,22 +183,13 @@ async def export_for_all_platforms(
                 detail="Liste de plateformes invalide (doit être du JSON)"
             )
     
-    # Exporter pour toutes les plateformes
-    result = onnx_export_service.export_for_all_platforms(
-        onnx_model_path=onnx_model_path,
-        platforms=platforms_list
-    )
-    
-    if not result.get("success", False):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de l'export multi-plateforme: {result.get('error', 'Erreur inconnue')}"
-        )
-    
-    return result
+    return job_service.submit("onnx_export_all", {
+        "onnx_model_path": onnx_model_path,
+        "platforms": platforms_list
+    })
 
 
-@router.post("/optimize")
+@router.post("/optimize", status_code=202)
 async def optimize_model(
     onnx_model_path: str = Form(...),
     optimizations: Optional[str] = Form(None),
@@ -226,7 +204,7 @@ async def optimize_model(
         validate: Valider l'exactitude après optimisation
         
     Returns:
-        Résultats de l'optimisation
+        Tâche d'optimisation
     """
     # Vérifier que le fichier existe
     if not os.path.exists(onnx_model_path):
@@ -246,23 +224,14 @@ async def optimize_model(
                 detail="Liste d'optimisations invalide (doit être du JSON)"
             )
     
-    # Optimiser le modèle
-    result = onnx_export_service.optimize_model(
-        onnx_model_path=onnx_model_path,
-        optimizations=optimizations_list,
-        validate=validate
-    )
-    
-    if not result.get("success", False):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de l'optimisation: {result.get('error', 'Erreur inconnue')}"
-        )
-    
-    return result
+    return job_service.submit("onnx_optimize", {
+        "onnx_model_path": onnx_model_path,
+        "optimizations": optimizations_list,
+        "validate": validate
+    })
 
 
-@router.post("/validate")
+@router.post("/validate", status_code=202)
 async def validate_model(
     onnx_model_path: str = Form(...),
     platforms: Optional[str] = Form(None),
@@ -277,7 +246,7 @@ async def validate_model(
         performance_test: Inclure les tests de performance
         
     Returns:
-        Résultats de la validation
+        Tâche de validation
     """
     # Vérifier que le fichier existe
     if not os.path.exists(onnx_model_path):
@@ -297,20 +266,11 @@ async def validate_model(
                 detail="Liste de plateformes invalide (doit être du JSON)"
             )
     
-    # Valider le modèle
-    result = onnx_export_service.validate_model(
-        onnx_model_path=onnx_model_path,
-        platforms=platforms_list,
-        performance_test=performance_test
-    )
-    
-    if not result.get("success", False):
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erreur lors de la validation: {result.get('error', 'Erreur inconnue')}"
-        )
-    
-    return result
+    return job_service.submit("onnx_validate", {
+        "onnx_model_path": onnx_model_path,
+        "platforms": platforms_list,
+        "performance_test": performance_test
+    })
 
 
 @router.post("/check-compatibility")
@@ -4,104 +4,106 @@ Endpoints API REST pour la visualisation du jeu.
 Fournit les opérations pour générer des frames de visualisation,
 récupérer des états de jeu, et gérer les paramètres de rendu.
 """
+import asyncio
 import base64
-import io
 from typing import Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Request
 from fastapi.responses import Response
 
-from backend.config import VisualizationParameters
+from backend.config import GameParameters, VisualizationParameters
+from backend.services.environment_service import environment_service
+from backend.models.experiment import EpisodeVideoExportRequest
+from backend.services.frame_service import frame_service
+from backend.services.job_service import job_service
+from backend.services.simulation_service import simulation_service
+from backend.services.timeline_service import timeline_service
+from backend.services.video_export_service import video_export_service
 from backend.services.websocket_service import websocket_manager
+from backend.utils.state_encoding import grid_from_state
 
 router = APIRouter()
 
+def _resolve_state(simulation_id: Optional[str], environment_type: str,
+                   grid_size: int, num_ghosts: int) -> Dict[str, Any]:
+    """État à rendre : celui d'une simulation en direct, ou d'un environnement neuf."""
+    if simulation_id:
+        simulation = simulation_service.get_simulation(simulation_id)
+        if simulation is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Simulation {simulation_id} non trouvée"
+            )
+        if simulation.last_state is not None:
+            return simulation.last_state
+        return environment_service.get_game_state_dict(simulation.env, simulation.environment_type, "bitmap")
+    
+    game_params = GameParameters(grid_size=grid_size, num_ghosts=num_ghosts)
+    with environment_service.checkout_env(environment_type, game_params) as env:
+        state = environment_service.get_game_state_dict(env, environment_type, "bitmap") if env is not None else None
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Impossible de créer l'environnement à rendre"
+        )
+    return state
+
+def _cell_size(state: Dict[str, Any], width: int, height: int, cell_size: Optional[int]) -> int:
+    """Taille de cellule explicite, ou déduite des dimensions d'image demandées."""
+    if cell_size:
+        return cell_size
+    rows, cols = grid_from_state(state).shape
+    return max(4, min(width // cols, height // rows))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vérifie si l'en-tête If-None-Match désigne l'ETag courant."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def _render(state: Dict[str, Any], cell_size: int, format: str, quality: int,
+            show_grid: bool, show_stats: bool):
+    """Rend un état via le service de frames (erreurs converties en HTTP)."""
+    try:
+        return frame_service.render_state(state, cell_size, format, quality, show_grid, show_stats)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la génération de la frame: {str(e)}"
+        )
+
 @router.get("/frame", responses={
     200: {
-        "content": {"image/png": {}},
-        "description": "Retourne une image PNG de la frame de visualisation"
-    }
+        "content": {"image/png": {}, "image/jpeg": {}, "image/webp": {}},
+        "description": "Retourne l'image de la frame de visualisation"
+    },
+    304: {"description": "Frame inchangée (If-None-Match)"}
 })
 async def get_visualization_frame(
+    request: Request,
+    simulation_id: Optional[str] = Query(None, description="Simulation en direct à rendre"),
+    environment_type: str = Query("configurable", pattern="^(configurable|multiagent)$"),
     width: int = Query(400, ge=100, le=1920, description="Largeur de l'image"),
     height: int = Query(400, ge=100, le=1080, description="Hauteur de l'image"),
+    cell_size: Optional[int] = Query(None, ge=4, le=128, description="Taille d'une cellule (prioritaire sur width/height)"),
     grid_size: int = Query(10, ge=5, le=30, description="Taille de la grille"),
+    num_ghosts: int = Query(2, ge=1, le=4, description="Nombre de fantômes"),
+    format: str = Query("png", pattern="^(png|jpeg|webp)$", description="Format de l'image"),
+    quality: int = Query(85, ge=10, le=100, description="Qualité JPEG / WebP"),
     show_grid: bool = Query(True, description="Afficher la grille"),
     show_stats: bool = Query(True, description="Afficher les statistiques")
 ):
-    """Génère une frame de visualisation du jeu Pac-Man."""
-    try:
-        # Dans une implémentation réelle, on utiliserait un moteur de rendu
-        # Pour l'instant, on génère une image simple avec Pillow ou on retourne une image factice
-        
-        # Vérifier si Pillow est disponible
-        try:
-            from PIL import Image, ImageDraw, ImageFont
-            HAS_PILLOW = True
-        except ImportError:
-            HAS_PILLOW = False
-        
-        if HAS_PILLOW:
-            # Créer une image avec Pillow
-            image = Image.new('RGB', (width, height), color='black')
-            draw = ImageDraw.Draw(image)
-            
-            # Dessiner une grille simple
-            cell_size = min(width, height) // grid_size
-            
-            if show_grid:
-                # Lignes verticales
-                for x in range(0, width, cell_size):
-                    draw.line([(x, 0), (x, height)], fill='gray', width=1)
-                # Lignes horizontales
-                for y in range(0, height, cell_size):
-                    draw.line([(0, y), (width, y)], fill='gray', width=1)
-            
-            # Dessiner Pac-Man (cercle jaune)
-            pacman_x = width // 2
-            pacman_y = height // 2
-            pacman_radius = cell_size // 2 - 2
-            draw.ellipse(
-                [(pacman_x - pacman_radius, pacman_y - pacman_radius),
-                 (pacman_x + pacman_radius, pacman_y + pacman_radius)],
-                fill='yellow'
-            )
-            
-            # Dessiner des fantômes (cercles colorés)
-            ghost_colors = ['red', 'pink', 'cyan', 'orange']
-            for i, color in enumerate(ghost_colors[:3]):
-                ghost_x = pacman_x + (i - 1) * cell_size * 2
-                ghost_y = pacman_y
-                draw.ellipse(
-                    [(ghost_x - pacman_radius, ghost_y - pacman_radius),
-                     (ghost_x + pacman_radius, ghost_y + pacman_radius)],
-                    fill=color
-                )
-            
-            if show_stats:
-                # Ajouter du texte de statistiques
-                try:
-                    font = ImageFont.load_default()
-                    stats_text = f"Grid: {grid_size}x{grid_size} | Score: 0 | Lives: 3"
-                    draw.text((10, 10), stats_text, fill='white', font=font)
-                except:
-                    pass
-            
-            # Convertir en PNG
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr.seek(0)
-            
-            return Response(content=img_byte_arr.getvalue(), media_type="image/png")
-        else:
-            # Retourner une image PNG factice (1x1 pixel noir)
-            fake_image = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
-            return Response(content=fake_image, media_type="image/png")
-            
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de la génération de la frame: {str(e)}"
-        )
+    """Génère une frame de visualisation d'un environnement ou d'une simulation en direct."""
+    state = _resolve_state(simulation_id, environment_type, grid_size, num_ghosts)
+    size = _cell_size(state, width, height, cell_size)
+    data, etag, media_type = _render(state, size, format, quality, show_grid, show_stats)
+    
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
 
 @router.post("/config", response_model=VisualizationParameters)
 async def update_visualization_config(config: VisualizationParameters):
@@ -169,16 +171,18 @@ async def get_visualization_performance():
         memory_mb = 0
         cpu_percent = 0
     
+    frame_stats = frame_service.get_stats()
     return {
         "performance": {
-            "frame_generation_time_ms": 16.7,  # 60 FPS
+            "frame_generation_time_ms": frame_stats["avg_render_time_ms"],
             "memory_usage_mb": round(memory_mb, 2),
             "cpu_usage_percent": round(cpu_percent, 1),
             "active_websocket_connections": len(websocket_manager.active_connections)
         },
+        "frame_cache": frame_stats,
         "limits": {
             "max_frame_size": "1920x1080",
-            "supported_formats": ["PNG", "JPEG"],
+            "supported_formats": [f.upper() for f in frame_stats["formats"]],
             "max_fps": 60
         }
     }
@@ -190,39 +194,98 @@ async def get_visualization_performance():
     }
 })
 async def export_frame_as_base64(
+    simulation_id: Optional[str] = Query(None, description="Simulation en direct à rendre"),
+    environment_type: str = Query("configurable", pattern="^(configurable|multiagent)$"),
     width: int = Query(200, ge=50, le=800),
-    height: int = Query(200, ge=50, le=800)
+    height: int = Query(200, ge=50, le=800),
+    cell_size: Optional[int] = Query(None, ge=4, le=128),
+    grid_size: int = Query(10, ge=5, le=30),
+    num_ghosts: int = Query(2, ge=1, le=4),
+    format: str = Query("png", pattern="^(png|jpeg|webp)$"),
+    quality: int = Query(85, ge=10, le=100)
 ):
     """Exporte une frame de visualisation encodée en base64."""
+    state = _resolve_state(simulation_id, environment_type, grid_size, num_ghosts)
+    size = _cell_size(state, width, height, cell_size)
+    data, etag, media_type = _render(state, size, format, quality, False, False)
+    rows, cols = grid_from_state(state).shape
+    
+    return {
+        "format": format,
+        "width": cols * size,
+        "height": rows * size,
+        "etag": etag,
+        "data": f"data:{media_type};base64,{base64.b64encode(data).decode('utf-8')}",
+        "size_bytes": len(data)
+    }
+
+@router.post("/export/episodes", response_model=Dict[str, Any], status_code=status.HTTP_202_ACCEPTED)
+async def export_episodes_video(request: EpisodeVideoExportRequest):
+    """
+    Exporte des épisodes en vidéo (GIF ou MP4), hors ligne (tâche de fond).
+
+    Les épisodes enregistrés (`actions`) sont rejoués ; sinon la politique
+    (ou des actions aléatoires) joue `episodes` parties, l'une après
+    l'autre dans le processus de la tâche. `policy_path` doit se trouver
+    sous MODELS_DIR et `archive_path` dans le répertoire des archives.
+
+    Returns:
+        Tâche d'export (suivie via /api/v1/jobs/{id}) ; son résultat liste les vidéos
+    """
     try:
-        # Générer une image simple
-        from PIL import Image, ImageDraw
-        image = Image.new('RGB', (width, height), color='navy')
-        draw = ImageDraw.Draw(image)
-        
-        # Dessiner un Pac-Man simple
-        center_x, center_y = width // 2, height // 2
-        radius = min(width, height) // 4
-        draw.ellipse(
-            [(center_x - radius, center_y - radius),
-             (center_x + radius, center_y + radius)],
-            fill='yellow'
-        )
-        
-        # Convertir en base64
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_base64 = base64.b64encode(img_byte_arr.getvalue()).decode('utf-8')
-        
-        return {
-            "format": "png",
-            "width": width,
-            "height": height,
-            "data": f"data:image/png;base64,{img_base64}",
-            "size_bytes": len(img_byte_arr.getvalue())
-        }
-    except Exception as e:
+        video_export_service.check_request(request)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return job_service.submit("video_export", request.dict())
+
+@router.get("/replay/{session_id}/episodes", response_model=Dict[str, Any])
+async def list_replay_episodes(session_id: str):
+    """Liste les épisodes stockés dans la timeline de rejeu d'une session."""
+    try:
+        episodes = await asyncio.to_thread(timeline_service.list_episodes, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"session_id": session_id, "episodes": episodes}
+
+@router.get("/replay/{session_id}/frames", response_model=Dict[str, Any])
+async def get_replay_frames(
+    session_id: str,
+    episode: int = Query(..., ge=0),
+    start_step: int = Query(0, ge=0),
+    end_step: Optional[int] = Query(None, ge=0)
+):
+    """
+    Récupère une plage de frames d'un épisode stocké (steps inclus).
+
+    La réponse est limitée à `REPLAY_MAX_FRAMES_PER_REQUEST` frames ;
+    `next_step` indique où reprendre si la plage a été tronquée.
+    """
+    try:
+        frames = await asyncio.to_thread(timeline_service.get_frames, session_id, episode, start_step, end_step)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    truncated = len(frames) >= timeline_service.max_frames_per_request and (
+        end_step is None or frames[-1]["step"] < end_step
+    )
+    return {
+        "session_id": session_id,
+        "episode": episode,
+        "frames": frames,
+        "next_step": frames[-1]["step"] + 1 if truncated else None
+    }
+
+@router.delete("/replay/{session_id}")
+async def delete_replay_timeline(session_id: str):
+    """Supprime la timeline de rejeu d'une session."""
+    try:
+        deleted = timeline_service.delete_session(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not deleted:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de l'export de la frame: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Timeline {session_id} non trouvée"
+        )
+    return {"message": f"Timeline {session_id} supprimée"}
@@ -12,11 +12,16 @@ from typing import Dict, Any
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 from backend.config import settings
-from backend.api.v1.endpoints import experiments, training, environment, visualization, archives, intelligence, onnx
-from backend.services.websocket_service import WebSocketManager
+from backend.api.v1.endpoints import experiments, training, environment, visualization, archives, intelligence, onnx, admin, jobs
+from backend.services.websocket_service import websocket_manager
+from backend.services.job_service import job_service
+from backend.services.retention_service import retention_service
+from backend.services.simulation_service import simulation_service
+from backend.utils.error_handling import log_requests_middleware
+from backend.utils.instrumentation import CONTENT_TYPE, registry
 
 # Configuration du logging
 logging.basicConfig(
@@ -29,19 +34,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Gestionnaire de WebSocket global
-websocket_manager = WebSocketManager()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application."""
     # Démarrage
     logger.info("Démarrage de l'application FastAPI")
     # Initialiser les services
-    # ...
+    retention_service.start()
+    await simulation_service.start()
+    await job_service.start()
     yield
     # Arrêt
     logger.info("Arrêt de l'application FastAPI")
+    await job_service.stop()
+    await simulation_service.stop()
+    retention_service.stop()
     await websocket_manager.disconnect_all()
 
 # Création de l'application FastAPI
@@ -63,6 +70,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Journalisation et latence des requêtes (métriques par route)
+app.middleware("http")(log_requests_middleware)
+
 # Inclusion des routeurs
 app.include_router(experiments.router, prefix="/api/v1/experiments", tags=["experiments"])
 app.include_router(training.router, prefix="/api/v1/training", tags=["training"])
@@ -71,6 +81,8 @@ app.include_router(visualization.router, prefix="/api/v1/visualization", tags=["
 app.include_router(archives.router, prefix="/api/v1/archives", tags=["archives"])
 app.include_router(intelligence.router, prefix="/api/v1/intelligence", tags=["intelligence"])
 app.include_router(onnx.router, prefix="/api/v1/onnx", tags=["onnx"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -86,7 +98,8 @@ async def root():
             "visualization": "/api/v1/visualization",
             "archives": "/api/v1/archives",
             "intelligence": "/api/v1/intelligence",
-            "onnx": "/api/v1/onnx"
+            "onnx": "/api/v1/onnx",
+            "metrics": "/metrics"
         }
     }
 
@@ -95,6 +108,11 @@ async def health_check():
     """Endpoint de santé pour les vérifications de l'infrastructure."""
     return {"status": "healthy", "timestamp": asyncio.get_event_loop().time()}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques internes au format texte Prometheus."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Endpoint WebSocket pour les mises à jour temps réel."""
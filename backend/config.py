@@ -26,7 +26,71 @@ class Settings(BaseSettings):
     
     # Stable-Baselines3
     SB3_ALGORITHMS: List[str] = ["DQN", "PPO", "A2C", "SAC", "TD3"]
-    
+
+    # Rétention des métriques (compaction des sessions terminées)
+    METRICS_RETENTION_HOURS: int = 168  # Résolution complète conservée 7 jours
+    METRICS_BUCKET_EPISODES: int = 10  # Taille d'un bucket d'agrégation (en épisodes)
+    METRICS_PURGE_BATCH_SIZE: int = 5000  # Lignes brutes supprimées par transaction
+    METRICS_RETENTION_INTERVAL_SECONDS: int = 3600  # Période du passage de rétention
+
+    # Pool d'environnements pré-initialisés
+    ENV_POOL_MAX_SIZE: int = 32  # Instances inactives conservées au total
+    ENV_POOL_MAX_IDLE_PER_KEY: int = 4  # Instances inactives par configuration
+
+    # Simulations en direct
+    SIMULATION_MAX_SESSIONS: int = 500  # Simulations simultanées par processus
+    SIMULATION_IDLE_TIMEOUT_SECONDS: int = 60  # Éviction sans heartbeat ni lecture d'état
+    SIMULATION_MAX_POLICIES: int = 4  # Modèles de politique gardés en mémoire (LRU)
+
+    # Diffusion WebSocket
+    WEBSOCKET_KEYFRAME_INTERVAL: int = 30  # Trames entre deux trames clés (flux binaire game_state)
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256  # Messages en attente par client
+    WEBSOCKET_OVERFLOW_POLICY: str = "drop_oldest"  # drop_oldest, coalesce ou disconnect
+    WEBSOCKET_IDLE_TIMEOUT_SECONDS: int = 120  # Fermeture sans message ni ping du client
+    WEBSOCKET_IDLE_SWEEP_INTERVAL_SECONDS: int = 15  # Période du balayage des connexions inactives
+    WEBSOCKET_CONFLATION_WINDOWS: Dict[str, float] = {"metrics": 0.1}  # Fenêtre (s) par canal, 0 = pas de conflation
+
+    # Rendu des frames de visualisation
+    FRAME_CACHE_MAX_ENTRIES: int = 512  # Frames encodées gardées en cache (LRU)
+
+    # Export vidéo hors ligne des épisodes
+    VIDEO_EXPORT_MAX_WORKERS: int = 4  # Processus de rendu / encodage en parallèle (hors tâches de fond, séquentielles)
+    VIDEO_EXPORT_MAX_EPISODES: int = 100  # Épisodes par demande d'export
+
+    # Timeline de rejeu des épisodes
+    REPLAY_TIMELINE_DIR: str = "experiments/timelines"  # Un fichier de frames + un index par session
+    REPLAY_KEYFRAME_INTERVAL: int = 30  # Frames entre deux trames clés stockées
+    REPLAY_MAX_FRAMES_PER_REQUEST: int = 1000  # Frames renvoyées par requête de plage
+
+    # Diagnostic (profilage et mémoire, endpoints /api/v1/admin)
+    ADMIN_TOKEN: str = ""  # Jeton exigé dans l'en-tête X-Admin-Token (vide = endpoints d'administration et profilage désactivés)
+    PROFILING_HEADER: str = "X-Profile"  # En-tête qui déclenche le profilage d'une requête
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0  # Période d'échantillonnage des piles
+    PROFILING_MAX_DURATION_SECONDS: float = 120.0  # Durée maximale d'un profilage à la demande
+    PROFILING_MAX_STORED: int = 20  # Profils conservés pour consultation
+    TRACEMALLOC_FRAMES: int = 10  # Profondeur des tracebacks d'allocation
+    TRACEMALLOC_MAX_SNAPSHOTS: int = 10  # Snapshots mémoire conservés
+
+    # Magasin d'archives dédupliqué par contenu
+    ARCHIVE_STORE_DIR: str = "experiments/store"  # Blocs et manifestes ("" = désactivé)
+    ARCHIVE_STORE_GC_MIN_AGE_SECONDS: float = 3600.0  # Âge minimal d'un bloc orphelin supprimé
+
+    # Compression des membres d'archive
+    ARCHIVE_COMPRESSION_CODEC: str = "deflate"  # Codec des membres compressibles (deflate, bz2, lzma)
+    ARCHIVE_COMPRESSION_WORKERS: Optional[int] = None  # Threads de compression des gros membres (None = nombre de cœurs)
+
+    # Catalogue des archives (listing, meilleures archives, nettoyage)
+    ARCHIVE_CATALOG_SYNC_INTERVAL: float = 30.0  # Secondes minimum entre deux rapprochements avec le disque
+
+    # Checkpoints des sauvegardes automatiques stockés en delta (opt-in)
+    ARCHIVE_CHECKPOINT_STORE_DIR: str = ""  # Magasin des checkpoints ("" = désactivé, modèle complet dans l'archive)
+
+    # Tâches de fond (ONNX, archives, intelligence) exécutées dans un pool de processus
+    JOB_MAX_WORKERS: int = 2  # Processus du pool partagé par tous les types de tâches
+    JOB_CONCURRENCY: Dict[str, int] = {"onnx": 1, "archive": 2, "intelligence": 2, "video": 1}  # Tâches simultanées par famille
+    JOB_PROGRESS_POLL_SECONDS: float = 0.5  # Période de diffusion de l'avancement (canal jobs)
+    JOB_UPLOAD_DIR: str = "experiments/uploads"  # Fichiers reçus en attente de traitement
+
     class Config:
         env_file = ".env"
         case_sensitive = False
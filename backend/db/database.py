@@ -7,15 +7,32 @@ des expériences, sessions et métriques.
 import sqlite3
 import json
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from contextlib import contextmanager
 
 from backend.config import settings
+from backend.utils.instrumentation import SIZE_BUCKETS, registry
 
 logger = logging.getLogger(__name__)
 
+# Statuts de session dont les métriques peuvent être compactées
+COMPACTABLE_SESSION_STATUSES = ("completed", "error")
+
+DB_WRITE_SECONDS = registry.histogram(
+    "pacman_db_write_seconds", "Durée des écritures SQLite (transaction comprise)", ("operation",)
+)
+DB_WRITE_ROWS = registry.histogram(
+    "pacman_db_write_rows", "Lignes écrites par transaction SQLite", ("operation",), buckets=SIZE_BUCKETS
+)
+
+def _observe_write(operation: str, start: float, rows: int):
+    """Enregistre la durée et la taille d'une écriture."""
+    DB_WRITE_SECONDS.labels(operation).observe(time.perf_counter() - start)
+    DB_WRITE_ROWS.labels(operation).observe(max(rows, 0))
+
 class DatabaseManager:
     """Gestionnaire de base de données SQLite."""
     
@@ -28,7 +45,14 @@ class DatabaseManager:
         """Initialise la base de données avec les tables nécessaires."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
+
+            # Vacuum incrémental : sur une base existante, le mode ne prend effet
+            # qu'après un VACUUM complet, exécuté une seule fois (migration)
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                logger.info(f"Passage en vacuum incrémental (VACUUM unique): {self.db_path}")
+                cursor.execute("VACUUM")
+
             # Table des expériences
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS experiments (
@@ -78,12 +102,63 @@ class DatabaseManager:
                 )
             """)
             
+            # Table des agrégats de métriques (sessions compactées)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS metric_aggregates (
+                    session_id TEXT NOT NULL,
+                    metric_type TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    bucket_end INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    mean REAL NOT NULL,
+                    min REAL NOT NULL,
+                    max REAL NOT NULL,
+                    first_timestamp TIMESTAMP NOT NULL,
+                    last_timestamp TIMESTAMP NOT NULL,
+                    PRIMARY KEY (session_id, metric_type, bucket_start),
+                    FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+                )
+            """)
+
+            # Journal de compaction (une ligne par session compactée)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS metrics_compaction (
+                    session_id TEXT PRIMARY KEY,
+                    bucket_episodes INTEGER NOT NULL,
+                    raw_rows INTEGER NOT NULL,
+                    aggregate_rows INTEGER NOT NULL,
+                    purged_rows INTEGER NOT NULL DEFAULT 0,
+                    compacted_at TIMESTAMP NOT NULL,
+                    purged_at TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
+                )
+            """)
+
+            # Table des tâches de fond (conversions ONNX, archives, scores d'intelligence)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT,
+                    created_at TIMESTAMP NOT NULL,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            """)
+
             # Index pour améliorer les performances
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_experiments_status ON experiments(status)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_experiment_id ON sessions(experiment_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status_updated ON sessions(status, updated_at)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_session_id ON metrics(session_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)")
-            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)")
+
             conn.commit()
         
         logger.info(f"Base de données initialisée: {self.db_path}")
@@ -108,11 +183,14 @@ class DatabaseManager:
     
     def execute_update(self, query: str, params: Tuple = ()) -> int:
         """Exécute une requête UPDATE/INSERT/DELETE et retourne le nombre de lignes affectées."""
+        start = time.perf_counter()
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             conn.commit()
-            return cursor.rowcount
+        operation = query.split(None, 1)[0].lower() if query.strip() else "unknown"
+        _observe_write(operation, start, cursor.rowcount)
+        return cursor.rowcount
     
     def insert_experiment(self, experiment_data: Dict[str, Any]) -> str:
         """Insère une nouvelle expérience dans la base de données."""
@@ -227,7 +305,212 @@ class DatabaseManager:
         """
         
         return self.execute_query(query, (cutoff_time,))
-    
+
+    def get_compactable_sessions(self, older_than_hours: int, limit: int = 100) -> List[str]:
+        """Liste les sessions terminées dont les métriques brutes peuvent être compactées."""
+        from datetime import timedelta
+        cutoff_time = (datetime.now() - timedelta(hours=older_than_hours)).isoformat()
+
+        placeholders = ", ".join("?" for _ in COMPACTABLE_SESSION_STATUSES)
+        query = f"""
+            SELECT s.id FROM sessions s
+            WHERE s.status IN ({placeholders})
+              AND s.updated_at < ?
+              AND NOT EXISTS (SELECT 1 FROM metrics_compaction c WHERE c.session_id = s.id)
+              AND EXISTS (SELECT 1 FROM metrics m WHERE m.session_id = s.id)
+            ORDER BY s.updated_at ASC
+            LIMIT ?
+        """
+        params = (*COMPACTABLE_SESSION_STATUSES, cutoff_time, limit)
+        return [row["id"] for row in self.execute_query(query, params)]
+
+    def compact_session_metrics(self, session_id: str, bucket_episodes: int) -> Optional[Dict[str, Any]]:
+        """
+        Agrège les métriques brutes d'une session en buckets de N épisodes.
+
+        Les agrégats (moyenne, min, max, nombre) et l'entrée du journal de
+        compaction sont écrits dans une seule transaction. Les lignes brutes
+        restent en place jusqu'à leur purge incrémentale par
+        `purge_compacted_metrics`.
+
+        Returns:
+            Résumé de la compaction, ou None si la session est déjà compactée
+            ou n'a pas de métriques.
+        """
+        if bucket_episodes < 1:
+            raise ValueError("bucket_episodes doit être au moins 1")
+
+        start = time.perf_counter()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(
+                    "SELECT 1 FROM metrics_compaction WHERE session_id = ?", (session_id,)
+                )
+                if cursor.fetchone():
+                    conn.rollback()
+                    return None
+
+                cursor.execute("SELECT COUNT(*) FROM metrics WHERE session_id = ?", (session_id,))
+                raw_rows = cursor.fetchone()[0]
+                if raw_rows == 0:
+                    conn.rollback()
+                    return None
+
+                cursor.execute("""
+                    INSERT OR REPLACE INTO metric_aggregates
+                    (session_id, metric_type, bucket_start, bucket_end, count, mean, min, max,
+                     first_timestamp, last_timestamp)
+                    SELECT session_id, metric_type,
+                           (episode / ?) * ?, (episode / ?) * ? + ? - 1,
+                           COUNT(*), AVG(value), MIN(value), MAX(value),
+                           MIN(timestamp), MAX(timestamp)
+                    FROM metrics
+                    WHERE session_id = ?
+                    GROUP BY metric_type, episode / ?
+                """, (bucket_episodes, bucket_episodes, bucket_episodes, bucket_episodes,
+                      bucket_episodes, session_id, bucket_episodes))
+                aggregate_rows = cursor.rowcount
+
+                cursor.execute("""
+                    INSERT INTO metrics_compaction
+                    (session_id, bucket_episodes, raw_rows, aggregate_rows, compacted_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (session_id, bucket_episodes, raw_rows, aggregate_rows, datetime.now().isoformat()))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        _observe_write("compact", start, aggregate_rows)
+        logger.info(f"Métriques compactées pour la session {session_id}: "
+                    f"{raw_rows} lignes -> {aggregate_rows} agrégats")
+        return {
+            "session_id": session_id,
+            "bucket_episodes": bucket_episodes,
+            "raw_rows": raw_rows,
+            "aggregate_rows": aggregate_rows
+        }
+
+    def purge_compacted_metrics(self, batch_size: int = 5000) -> int:
+        """
+        Supprime un lot de lignes brutes déjà compactées.
+
+        Chaque appel ne tient le verrou d'écriture que le temps d'un lot,
+        ce qui laisse les écritures concurrentes (insert_metric) progresser
+        entre deux lots. Les pages libérées sont rendues au système via
+        `PRAGMA incremental_vacuum`.
+
+        Returns:
+            Nombre de lignes supprimées (0 lorsqu'il n'y a plus rien à purger).
+        """
+        start = time.perf_counter()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT session_id FROM metrics_compaction
+                WHERE purged_at IS NULL
+                ORDER BY compacted_at ASC
+                LIMIT 1
+            """)
+            row = cursor.fetchone()
+            if row is None:
+                return 0
+            session_id = row["session_id"]
+
+            cursor.execute("""
+                DELETE FROM metrics WHERE id IN (
+                    SELECT id FROM metrics WHERE session_id = ? LIMIT ?
+                )
+            """, (session_id, batch_size))
+            deleted = cursor.rowcount
+
+            if deleted < batch_size:
+                cursor.execute("""
+                    UPDATE metrics_compaction
+                    SET purged_rows = purged_rows + ?, purged_at = ?
+                    WHERE session_id = ?
+                """, (deleted, datetime.now().isoformat(), session_id))
+            else:
+                cursor.execute("""
+                    UPDATE metrics_compaction
+                    SET purged_rows = purged_rows + ?
+                    WHERE session_id = ?
+                """, (deleted, session_id))
+            conn.commit()
+
+            cursor.execute("PRAGMA incremental_vacuum").fetchall()
+
+        _observe_write("purge", start, deleted)
+        return deleted
+
+    def get_session_metric_aggregates(self, session_id: str,
+                                      metric_type: str = None) -> List[Dict[str, Any]]:
+        """Récupère les agrégats de métriques d'une session compactée."""
+        if metric_type:
+            query = """
+                SELECT * FROM metric_aggregates
+                WHERE session_id = ? AND metric_type = ?
+                ORDER BY bucket_start ASC
+            """
+            params = (session_id, metric_type)
+        else:
+            query = """
+                SELECT * FROM metric_aggregates
+                WHERE session_id = ?
+                ORDER BY metric_type ASC, bucket_start ASC
+            """
+            params = (session_id,)
+
+        return self.execute_query(query, params)
+
+    def insert_job(self, job: Dict[str, Any]):
+        """Enregistre une nouvelle tâche de fond."""
+        self.execute_update("""
+            INSERT INTO jobs (id, job_type, status, params, progress, message, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (job["id"], job["job_type"], job["status"], json.dumps(job.get("params", {})),
+              job.get("progress", 0.0), job.get("message"), job["created_at"]))
+
+    def update_job(self, job_id: str, **fields) -> bool:
+        """Met à jour les colonnes d'une tâche (`result` et `params` sont encodés en JSON)."""
+        if not fields:
+            return False
+        for key in ("result", "params"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], default=str)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        return self.execute_update(
+            f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+        ) > 0
+
+    @staticmethod
+    def _decode_job(row: Dict[str, Any]) -> Dict[str, Any]:
+        row["params"] = json.loads(row["params"]) if row["params"] else {}
+        row["result"] = json.loads(row["result"]) if row["result"] else None
+        return row
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Récupère une tâche par son ID."""
+        results = self.execute_query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._decode_job(results[0]) if results else None
+
+    def list_jobs(self, status: str = None, job_type: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Liste les tâches, les plus récentes en premier."""
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if job_type:
+            conditions.append("job_type = ?")
+            params.append(job_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self.execute_query(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+        )
+        return [self._decode_job(row) for row in rows]
+
     def backup_database(self, backup_path: str = None) -> str:
         """Crée une sauvegarde de la base de données."""
         if not backup_path:
@@ -267,6 +550,30 @@ class DatabaseManager:
                 stats["database_size_mb"] = db_file.stat().st_size / (1024 * 1024)
             else:
                 stats["database_size_mb"] = 0
+
+            # Pages libres (récupérables par vacuum incrémental)
+            page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+            freelist_count = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            stats["free_space_mb"] = freelist_count * page_size / (1024 * 1024)
+
+            # Rétention : agrégats et taux de compaction
+            cursor.execute("SELECT COUNT(*) FROM metric_aggregates")
+            stats["metric_aggregates_count"] = cursor.fetchone()[0]
+
+            cursor.execute("""
+                SELECT COUNT(*), COALESCE(SUM(raw_rows), 0), COALESCE(SUM(aggregate_rows), 0),
+                       COALESCE(SUM(purged_rows), 0), COUNT(purged_at)
+                FROM metrics_compaction
+            """)
+            compacted, raw_rows, aggregate_rows, purged_rows, purged_sessions = cursor.fetchone()
+            stats["retention"] = {
+                "compacted_sessions": compacted,
+                "fully_purged_sessions": purged_sessions,
+                "pending_purge_rows": raw_rows - purged_rows,
+                "raw_rows_compacted": raw_rows,
+                "aggregate_rows": aggregate_rows,
+                "compaction_ratio": raw_rows / aggregate_rows if aggregate_rows else None
+            }
             
             # Dernière mise à jour
             cursor.execute("SELECT MAX(updated_at) as last_update FROM experiments")
@@ -9,7 +9,7 @@ from typing import List, Optional, Dict, Any
 from uuid import uuid4
 from pydantic import BaseModel, Field, validator
 
-from backend.config import AllParameters
+from backend.config import AllParameters, GameParameters, VisualizationParameters
 
 class ExperimentBase(BaseModel):
     """Base commune pour une expérience."""
@@ -138,6 +138,54 @@ class GameState(BaseModel):
     step: int = Field(0, description="Step actuel dans l'épisode")
     episode: int = Field(0, description="Épisode actuel")
 
+class SimulationCreate(BaseModel):
+    """Données requises pour créer une simulation en direct."""
+    environment_type: str = Field("configurable", pattern="^(configurable|multiagent)$")
+    game: GameParameters = Field(default_factory=GameParameters)
+    visualization: VisualizationParameters = Field(default_factory=VisualizationParameters)
+    policy_path: Optional[str] = Field(
+        None,
+        description="Modèle Stable-Baselines3 pilotant Pac-Man, sous MODELS_DIR (aléatoire si absent)"
+    )
+    policy_algorithm: str = Field("DQN", description="Algorithme SB3 du modèle de politique")
+    state_encoding: str = Field(
+        "full",
+        pattern="^(full|bitmap|rle)$",
+        description="Encodage de la grille dans les états publiés (full, bitmap ou rle)"
+    )
+    record_timeline: bool = Field(
+        False,
+        description="Conserver les états dans la timeline de rejeu de la simulation"
+    )
+
+class EpisodeVideoExportRequest(BaseModel):
+    """Demande d'export vidéo hors ligne d'épisodes (rejoués ou joués par une politique)."""
+    environment_type: str = Field("configurable", pattern="^(configurable|multiagent)$")
+    game: GameParameters = Field(default_factory=GameParameters)
+    episodes: int = Field(4, ge=1, description="Nombre d'épisodes à jouer (ignoré si `actions` est fourni)")
+    seeds: Optional[List[int]] = Field(None, description="Graine de chaque épisode (par défaut 0, 1, 2...)")
+    actions: Optional[List[List[List[int]]]] = Field(
+        None,
+        description="Épisodes enregistrés à rejouer : par épisode, une liste d'actions par step "
+                    "(Pac-Man puis fantômes)"
+    )
+    policy_path: Optional[str] = Field(None, description="Modèle Stable-Baselines3 pilotant Pac-Man (sous MODELS_DIR)")
+    policy_algorithm: str = Field("DQN", description="Algorithme SB3 du modèle de politique")
+    max_steps: int = Field(500, ge=1, le=10000, description="Nombre maximal de steps par épisode")
+    format: str = Field("gif", pattern="^(gif|mp4)$")
+    fps: int = Field(10, ge=1, le=60)
+    cell_size: int = Field(12, ge=4, le=64, description="Taille d'une cellule en pixels")
+    show_grid: bool = False
+    archive_path: Optional[str] = Field(
+        None,
+        description="Archive de session du répertoire des archives : les vidéos sont écrites à côté "
+                    "(sinon dans EXPERIMENTS_DIR/videos)"
+    )
+    workers: Optional[int] = Field(
+        None, ge=1, le=32,
+        description="Processus de rendu (défaut et plafond: VIDEO_EXPORT_MAX_WORKERS ; un seul dans une tâche de fond)"
+    )
+
 class WebSocketMessage(BaseModel):
     """Message WebSocket standardisé."""
     type: str = Field(..., description="Type de message (game_state, metrics, session_update, error)")
@@ -8,15 +8,17 @@ Intègre le système d'archivage intelligent avec l'API REST.
 import os
 import json
 import shutil
-from datetime import datetime
+from dataclasses import asdict
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 
 from backend.config import settings
-from experiments.archive_service import IntelligentArchiveService, ArchiveConfig
+from backend.utils.instrumentation import track_job
+from experiments.archive_service import IntelligentArchiveService, ArchiveConfig, ArchiveMetadata
 from experiments.metadata_generator import IntelligentMetadataGenerator
-from experiments.session_resumer import SessionResumer
-from experiments.version_manager import VersionManager
+from experiments.session_resumer import ResumeConfig, SessionResumer
+from experiments.version_manager import VersionFilter, VersionManager
 from experiments.compression_optimizer import CompressionOptimizer
 from experiments.archive_validator import ArchiveValidator
 
@@ -44,13 +46,20 @@ class ArchiveService:
             include_metrics=True,
             include_config=True,
             backup_to_cloud=False,
-            cloud_endpoint=None
+            cloud_endpoint=None,
+            chunk_store_dir=settings.ARCHIVE_STORE_DIR or None,
+            compression_codec=settings.ARCHIVE_COMPRESSION_CODEC,
+            compression_workers=settings.ARCHIVE_COMPRESSION_WORKERS,
+            catalog_sync_interval=settings.ARCHIVE_CATALOG_SYNC_INTERVAL,
+            checkpoint_store_dir=settings.ARCHIVE_CHECKPOINT_STORE_DIR or None
         )
         
         # Initialiser les composants
         self.archive_service = IntelligentArchiveService(config=archive_config)
         self.metadata_generator = IntelligentMetadataGenerator()
-        self.session_resumer = SessionResumer()
+        self.session_resumer = SessionResumer(ResumeConfig(
+            checkpoint_store_dir=settings.ARCHIVE_CHECKPOINT_STORE_DIR or None
+        ))
         self.version_manager = VersionManager()
         self.compression_optimizer = CompressionOptimizer()
         self.archive_validator = ArchiveValidator()
@@ -79,47 +88,33 @@ class ArchiveService:
             Informations sur l'archive créée
         """
         try:
-            # Préparer les métadonnées
-            metadata = {
-                "experiment_id": experiment_id,
-                "timestamp": datetime.now().isoformat(),
-                "metrics": metrics or {},
-                "config": config or {},
-                "tags": tags or []
-            }
+            metadata = self._build_metadata(experiment_id, metrics or {}, config or {}, tags or [])
             
-            # Créer l'archive
-            archive_info = self.archive_service.create_archive(
-                model_path=model_path,
-                metadata=metadata,
-                tags=tags
-            )
+            # Écriture en une passe : hash, compression et validation calculés au vol
+            result = self.archive_service.write_archive(metadata=metadata, model_path=model_path)
+            if result is None:
+                raise RuntimeError("écriture de l'archive impossible")
             
             # Enregistrer la version
+            metadata_dict = asdict(metadata)
+            metadata_dict["parameters"] = config or {}
             version_info = self.version_manager.register_new_version(
-                archive_path=archive_info["archive_path"],
-                metadata=metadata,
-                tags=tags
-            )
-            
-            # Optimiser la compression
-            optimized_info = self.compression_optimizer.optimize_archive(
-                archive_info["archive_path"]
-            )
-            
-            # Valider l'archive
-            validation_result = self.archive_validator.validate_archive(
-                archive_info["archive_path"]
+                archive_path=result.archive_path,
+                metadata=metadata_dict
             )
             
             return {
                 "success": True,
-                "archive_path": archive_info["archive_path"],
-                "archive_name": archive_info["archive_name"],
-                "version_id": version_info.get("version_id"),
-                "compression_ratio": optimized_info.get("compression_ratio"),
-                "validation_result": validation_result.is_valid,
-                "message": f"Archive créée avec succès: {archive_info['archive_name']}"
+                "archive_path": result.archive_path,
+                "archive_name": os.path.basename(result.archive_path),
+                "archive_hash": result.archive_hash,
+                "merkle_root": result.merkle_root,
+                "version_id": version_info.session_id if version_info else None,
+                "compression_ratio": result.stats.compression_ratio,
+                "compression_stats": asdict(result.stats),
+                "validation_result": result.validation.is_valid,
+                "validation_errors": result.validation.errors,
+                "message": f"Archive créée avec succès: {os.path.basename(result.archive_path)}"
             }
             
         except Exception as e:
@@ -129,6 +124,27 @@ class ArchiveService:
                 "message": f"Erreur lors de la création de l'archive: {e}"
             }
     
+    @staticmethod
+    def _build_metadata(experiment_id: str, metrics: Dict[str, Any],
+                        config: Dict[str, Any], tags: List[str]) -> ArchiveMetadata:
+        """Construit les métadonnées d'archive d'une expérience du backend."""
+        return ArchiveMetadata(
+            session_id=experiment_id,
+            session_number=0,
+            timestamp=datetime.now().isoformat(),
+            model_type=str(config.get("algorithm", config.get("model_type", "unknown"))),
+            agent_type=str(config.get("agent_type", "pacman")),
+            total_episodes=int(metrics.get("total_episodes", metrics.get("episodes", 0)) or 0),
+            win_rate=float(metrics.get("win_rate", 0.0) or 0.0),
+            learning_rate=float(config.get("learning_rate", 0.0003)),
+            gamma=float(config.get("gamma", 0.99)),
+            epsilon=float(config.get("epsilon", config.get("exploration_rate", 0.1))),
+            batch_size=int(config.get("batch_size", 64)),
+            buffer_size=int(config.get("buffer_size", 10000)),
+            tags=list(tags),
+            metrics=metrics
+        )
+    
     def list_archives(self, 
                      filter_tags: Optional[List[str]] = None,
                      min_version: Optional[int] = None,
@@ -145,27 +161,28 @@ class ArchiveService:
             Liste des archives
         """
         try:
-            # Utiliser le gestionnaire de versions pour la recherche
+            # Utiliser le gestionnaire de versions pour la recherche (requête indexée)
             versions = self.version_manager.search_versions(
-                tags=filter_tags,
-                min_version=min_version,
+                VersionFilter(tags=filter_tags, min_session_number=min_version),
                 limit=max_results
             )
             
+            # Tailles et inventaires lus dans le catalogue, en une requête
+            self.archive_service.sync_catalog()
+            entries = self.archive_service.catalog.get_many([version.archive_path for version in versions])
+            
             archives = []
             for version in versions:
-                archive_path = version["archive_path"]
-                
-                # Obtenir des informations supplémentaires
-                archive_info = self.archive_service.get_archive_info(archive_path)
+                archive_path = version.archive_path
+                archive_info = entries.get(archive_path, {})
                 
                 archives.append({
                     "archive_path": archive_path,
                     "archive_name": os.path.basename(archive_path),
-                    "version_id": version.get("version_id"),
-                    "tags": version.get("tags", []),
-                    "created_at": version.get("created_at"),
-                    "metadata": version.get("metadata", {}),
+                    "version_id": version.session_id,
+                    "tags": version.tags,
+                    "created_at": datetime.strptime(version.timestamp, "%Y%m%d_%H%M%S").isoformat(),
+                    "metadata": asdict(version),
                     "size_mb": archive_info.get("size_mb", 0),
                     "file_count": archive_info.get("file_count", 0)
                 })
@@ -221,13 +238,89 @@ class ArchiveService:
                 "message": f"Erreur lors de la récupération des informations: {e}"
             }
     
-    def restore_session(self, archive_path: str, target_dir: str) -> Dict[str, Any]:
+    def optimize_archive(self, archive_path: str, optimization_level: str = "balanced") -> Dict[str, Any]:
+        """
+        Optimise la compression d'une archive existante.
+        
+        Args:
+            archive_path: Chemin vers l'archive
+            optimization_level: Niveau d'optimisation (minimal, balanced, aggressive)
+            
+        Returns:
+            Statistiques de compression
+        """
+        try:
+            stats = self.compression_optimizer.optimize_archive(archive_path, optimization_level)
+            if stats is None:
+                return {
+                    "success": False,
+                    "error": "Optimisation impossible",
+                    "message": f"Erreur lors de l'optimisation de l'archive: {archive_path}"
+                }
+            return {"success": True, "archive_path": archive_path, "stats": asdict(stats)}
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Erreur lors de l'optimisation de l'archive: {e}"
+            }
+    
+    def validate_archive(self, archive_path: str) -> Dict[str, Any]:
+        """
+        Valide l'intégrité, la structure et le contenu d'une archive.
+        
+        Args:
+            archive_path: Chemin vers l'archive
+            
+        Returns:
+            Résultat de la validation
+        """
+        try:
+            validation_result = self.archive_validator.validate_archive(archive_path)
+            return {"success": True, "validation_result": asdict(validation_result)}
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Erreur lors de la validation de l'archive: {e}"
+            }
+    
+    def validate_directory(self, directory: Optional[str] = None, pattern: str = "*.zip",
+                           max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Valide en place toutes les archives d'un répertoire (pool de processus).
+        
+        Args:
+            directory: Répertoire des archives (défaut: répertoire des archives)
+            pattern: Motif des fichiers à valider
+            max_workers: Processus du pool (None = nombre de cœurs)
+            
+        Returns:
+            Rapport de validation du lot
+        """
+        try:
+            report = self.archive_validator.validate_directory(directory or self.base_dir, pattern, max_workers)
+            return {"success": True, "report": report}
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Erreur lors de la validation du répertoire: {e}"
+            }
+    
+    @track_job("archive_restore")
+    def restore_session(self, archive_path: str, target_dir: str,
+                        members: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Restaure une session à partir d'une archive.
         
         Args:
             archive_path: Chemin vers l'archive
             target_dir: Répertoire cible pour la restauration
+            members: Membres à restaurer (défaut: tous)
             
         Returns:
             Informations sur la restauration
@@ -236,7 +329,8 @@ class ArchiveService:
             # Utiliser le système de reprise de sessions
             resume_info = self.session_resumer.load_archive(
                 archive_path=archive_path,
-                target_dir=target_dir
+                target_dir=target_dir,
+                members=members
             )
             
             return {
@@ -254,6 +348,31 @@ class ArchiveService:
                 "message": f"Erreur lors de la restauration de la session: {e}"
             }
     
+    def get_best_archives(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Récupère les meilleures archives (score du catalogue).
+        
+        Args:
+            limit: Nombre maximum de résultats
+            
+        Returns:
+            Liste des meilleures archives
+        """
+        archives = []
+        for entry in self.archive_service.get_best_archives(limit):
+            metadata = entry["metadata"]
+            archives.append({
+                "archive_path": entry["path"],
+                "archive_name": entry["filename"],
+                "version_id": metadata.get("session_id"),
+                "tags": metadata.get("tags", []),
+                "created_at": metadata.get("timestamp", entry["modified"]),
+                "metadata": metadata,
+                "size_mb": entry["size_mb"],
+                "score": entry["score"]
+            })
+        return archives
+    
     def compare_sessions(self, archive_path1: str, archive_path2: str) -> Dict[str, Any]:
         """
         Compare deux sessions.
@@ -368,49 +487,23 @@ class ArchiveService:
             Informations sur le nettoyage
         """
         try:
-            # Obtenir les archives
-            archives = self.list_archives(max_results=1000)
-            
-            # Filtrer par âge
-            old_archives = []
-            for archive in archives:
-                created_at = archive.get("created_at")
-                if not created_at:
-                    continue
-                
-                # Convertir la date
-                try:
-                    if isinstance(created_at, str):
-                        archive_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    else:
-                        continue
-                    
-                    age_days = (datetime.now() - archive_date).days
-                    
-                    if age_days > max_age_days:
-                        old_archives.append(archive)
-                        
-                except Exception:
-                    continue
+            # Requêtes indexées sur le catalogue (aucune archive n'est rouverte)
+            self.archive_service.sync_catalog(force=True)
+            catalog = self.archive_service.catalog
+            old_archives = catalog.older_than(self.base_dir, datetime.now() - timedelta(days=max_age_days))
             
             # Conserver les meilleures archives
-            best_archives = self.version_manager.get_best_versions(limit=keep_best)
-            best_paths = [arch["archive_path"] for arch in best_archives]
+            best_paths = [entry["path"] for entry in catalog.best(self.base_dir, keep_best)]
             
             # Supprimer les anciennes archives (sauf les meilleures)
             deleted = []
-            for archive in old_archives:
-                archive_path = archive["archive_path"]
-                
+            for archive_path in old_archives:
                 # Ne pas supprimer les meilleures archives
                 if archive_path in best_paths:
                     continue
                 
-                try:
-                    os.remove(archive_path)
+                if self.archive_service.delete_archive(archive_path):
                     deleted.append(archive_path)
-                except Exception as e:
-                    pass
             
             return {
                 "success": True,
@@ -427,5 +520,91 @@ class ArchiveService:
                 "message": f"Erreur lors du nettoyage des archives: {e}"
             }
 
+    # ------------------------------------------------------------------
+    # Magasin dédupliqué
+    # ------------------------------------------------------------------
+    
+    def _require_store(self):
+        if self.archive_service.chunk_store is None:
+            raise RuntimeError("Magasin d'archives désactivé (ARCHIVE_STORE_DIR vide)")
+        return self.archive_service.chunk_store
+    
+    def store_archive(self, archive_path: str, archive_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ajoute une archive ZIP existante au magasin dédupliqué.
+        
+        Args:
+            archive_path: Chemin vers l'archive
+            archive_id: Identifiant dans le magasin (défaut: nom du fichier)
+            
+        Returns:
+            Manifeste (sans la liste des blocs) et statistiques du magasin
+        """
+        try:
+            manifest = self._require_store().import_zip(archive_path, archive_id)
+            return {
+                "success": True,
+                "archive_id": manifest["id"],
+                "file_count": len(manifest["files"]),
+                "size": manifest["size"],
+                "store": self._require_store().get_statistics()
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Erreur lors de l'ajout au magasin: {e}"
+            }
+    
+    def export_stored_archive(self, archive_id: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Reconstruit une archive du magasin en ZIP autonome (pour le partage).
+        
+        Args:
+            archive_id: Identifiant dans le magasin
+            output_path: Chemin du ZIP (défaut: <ARCHIVE_DIR>/exports/<id>.zip)
+            
+        Returns:
+            Chemin, hash et validation de l'archive exportée
+        """
+        try:
+            output_path = output_path or os.path.join(self.base_dir, "exports", f"{archive_id}.zip")
+            result = self._require_store().export_zip(archive_id, output_path)
+            return {
+                "success": True,
+                "archive_path": result.archive_path,
+                "archive_hash": result.archive_hash,
+                "validation_result": result.validation.is_valid,
+                "compression_stats": asdict(result.stats)
+            }
+            
+        except KeyError:
+            return {"success": False, "error": f"Archive absente du magasin: {archive_id}"}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "message": f"Erreur lors de l'export de l'archive: {e}"
+            }
+    
+    def list_stored_archives(self) -> List[Dict[str, Any]]:
+        """Archives présentes dans le magasin dédupliqué."""
+        return self._require_store().list_archives()
+    
+    def delete_stored_archive(self, archive_id: str) -> bool:
+        """Retire une archive du magasin (ses blocs sont libérés au prochain ramasse-miettes)."""
+        return self._require_store().delete_archive(archive_id)
+    
+    def collect_store_garbage(self, min_age_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Supprime les blocs du magasin qui ne sont plus référencés."""
+        if min_age_seconds is None:
+            min_age_seconds = settings.ARCHIVE_STORE_GC_MIN_AGE_SECONDS
+        return {"success": True, **self._require_store().collect_garbage(min_age_seconds)}
+    
+    def get_store_statistics(self) -> Dict[str, Any]:
+        """Volume logique et volume réellement stocké par le magasin."""
+        return self._require_store().get_statistics()
+
 # Instance globale du service
 archive_service = ArchiveService()
\ No newline at end of file
@@ -4,31 +4,161 @@ Service d'intégration des environnements Pac-Man existants.
 Adapte les environnements configurable_env.py et multiagent_env.py
 pour l'API backend avec validation des paramètres.
 """
+import hashlib
+import json
 import logging
 import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple, List
+
+import numpy as np
 
 # Ajout du chemin src pour importer les environnements existants
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-try:
+if TYPE_CHECKING:
     from pacman_env.configurable_env import PacManConfigurableEnv
     from pacman_env.multiagent_env import PacManMultiAgentEnv
-    from pacman_env.multiagent_wrappers import SingleAgentWrapper
-    IMPORT_SUCCESS = True
-except ImportError as e:
-    logging.warning(f"Impossible d'importer les environnements Pac-Man: {e}")
-    PacManConfigurableEnv = None
-    PacManMultiAgentEnv = None
-    SingleAgentWrapper = None
-    IMPORT_SUCCESS = False
-
-from backend.config import AllParameters, GameParameters
+
+from backend.config import AllParameters, GameParameters, settings
 from backend.models.experiment import GameState
+from backend.utils.lazy_imports import modules_available
+from backend.utils.state_encoding import (
+    EMPTY, WALL, DOT, POWER_PELLET, GRID_ENCODINGS, encode_grid
+)
 
 logger = logging.getLogger(__name__)
 
+# Les environnements (gymnasium, pettingzoo) sont importés à la première
+# création ; seule la présence des dépendances est vérifiée au démarrage
+IMPORT_SUCCESS = modules_available("gymnasium", "pettingzoo", "pacman_env.configurable_env")
+if not IMPORT_SUCCESS:
+    logging.warning("Impossible d'importer les environnements Pac-Man (gymnasium/pettingzoo manquants)")
+
+def environment_fingerprint(env_type: str, game_params: GameParameters, **kwargs) -> str:
+    """Calcule une empreinte canonique (type + paramètres de jeu + options) d'un environnement."""
+    canonical = json.dumps(
+        {"env_type": env_type, "game": game_params.dict(), "kwargs": kwargs},
+        sort_keys=True,
+        default=repr
+    )
+    return f"{env_type}:{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+
+class EnvironmentPool:
+    """
+    Pool d'environnements pré-initialisés, indexé par empreinte de configuration.
+
+    Les instances rendues au pool sont réinitialisées immédiatement afin
+    d'être prêtes à l'emploi (grille, points et positions déjà calculés) au
+    prochain emprunt. La construction et la validation des paramètres ne
+    sont donc payées qu'une seule fois par configuration. Le nombre total
+    d'instances inactives est borné, les configurations les moins
+    récemment utilisées étant évincées en premier.
+    """
+
+    def __init__(self, max_size: int = 32, max_idle_per_key: int = 4):
+        """Initialise un pool vide avec ses limites de taille."""
+        self.max_size = max_size
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.checked_out = 0
+
+    def acquire(self, key: str) -> Optional[Any]:
+        """Emprunte une instance prête pour cette empreinte (None si aucune)."""
+        with self._lock:
+            instances = self._idle.get(key)
+            if instances:
+                env = instances.pop()
+                if not instances:
+                    del self._idle[key]
+                else:
+                    self._idle.move_to_end(key)
+                self.hits += 1
+                self.checked_out += 1
+                return env
+            self.misses += 1
+            self.checked_out += 1
+            return None
+
+    def release(self, key: str, env: Any):
+        """Rend une instance au pool après l'avoir réinitialisée."""
+        try:
+            env.reset()
+        except Exception as e:
+            logger.warning(f"Environnement non réutilisable ({key}), fermeture: {e}")
+            self.discard(env)
+            return
+
+        evicted = []
+        with self._lock:
+            self.checked_out -= 1
+            instances = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(instances) >= self.max_idle_per_key:
+                evicted.append(env)
+            else:
+                instances.append(env)
+
+            # Éviction LRU lorsque le pool dépasse sa taille maximale
+            while self._idle_count() > self.max_size:
+                oldest_key, oldest = next(iter(self._idle.items()))
+                evicted.append(oldest.pop(0))
+                if not oldest:
+                    del self._idle[oldest_key]
+            self.evictions += len(evicted)
+
+        for instance in evicted:
+            self._close(instance)
+
+    def discard(self, env: Any = None):
+        """Signale qu'un emprunt ne sera pas rendu au pool ; ferme l'instance si elle est fournie."""
+        with self._lock:
+            self.checked_out -= 1
+        if env is not None:
+            self._close(env)
+
+    def clear(self):
+        """Ferme et retire toutes les instances inactives."""
+        with self._lock:
+            instances = [env for envs in self._idle.values() for env in envs]
+            self._idle.clear()
+        for env in instances:
+            self._close(env)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retourne les statistiques d'utilisation du pool."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "idle_instances": self._idle_count(),
+                "configurations": len(self._idle),
+                "checked_out": self.checked_out,
+                "max_size": self.max_size,
+                "max_idle_per_key": self.max_idle_per_key,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+    def _idle_count(self) -> int:
+        return sum(len(envs) for envs in self._idle.values())
+
+    @staticmethod
+    def _close(env: Any):
+        if hasattr(env, 'close'):
+            try:
+                env.close()
+            except Exception:
+                pass
+
 class EnvironmentService:
     """Service pour la gestion des environnements de jeu."""
     
@@ -36,15 +166,20 @@ class EnvironmentService:
         """Initialise le service avec les environnements disponibles."""
         self.environments = {}
         self.active_sessions = {}
+        self.pool = EnvironmentPool(
+            max_size=settings.ENV_POOL_MAX_SIZE,
+            max_idle_per_key=settings.ENV_POOL_MAX_IDLE_PER_KEY
+        )
         
         if not IMPORT_SUCCESS:
             logger.error("Les environnements Pac-Man ne sont pas disponibles. "
                         "Vérifiez que le code source est dans src/pacman_env/")
     
-    def create_configurable_env(self, game_params: GameParameters, **kwargs) -> Optional[PacManConfigurableEnv]:
+    def create_configurable_env(self, game_params: GameParameters, **kwargs) -> Optional["PacManConfigurableEnv"]:
         """Crée un environnement Pac-Man configurable à partir des paramètres."""
-        if PacManConfigurableEnv is None:
+        if not IMPORT_SUCCESS:
             return None
+        from pacman_env.configurable_env import PacManConfigurableEnv
         
         # Conversion des paramètres de jeu vers les arguments de l'environnement
         # Calcul du nombre de points basé sur la densité
@@ -76,10 +211,11 @@ class EnvironmentService:
                    f"{game_params.num_ghosts} fantômes, {num_dots} points")
         return env
     
-    def create_multiagent_env(self, game_params: GameParameters, **kwargs) -> Optional[PacManMultiAgentEnv]:
+    def create_multiagent_env(self, game_params: GameParameters, **kwargs) -> Optional["PacManMultiAgentEnv"]:
         """Crée un environnement Pac-Man multi-agent à partir des paramètres."""
-        if PacManMultiAgentEnv is None:
+        if not IMPORT_SUCCESS:
             return None
+        from pacman_env.multiagent_env import PacManMultiAgentEnv
         
         # Calcul du nombre de points
         total_cells = game_params.grid_size * game_params.grid_size
@@ -119,128 +255,148 @@ class EnvironmentService:
                    f"{game_params.num_ghosts} fantômes, {game_params.power_pellets} power pellets")
         return env
     
-    def create_single_agent_wrapper(self, multiagent_env: PacManMultiAgentEnv, agent_id: str):
+    def acquire_env(self, env_type: str, game_params: GameParameters, **kwargs) -> Tuple[str, Any]:
+        """
+        Emprunte au pool un environnement réinitialisé pour cette configuration.
+
+        L'environnement n'est construit que si aucune instance n'est
+        disponible. L'appelant doit le rendre via `release_env` avec la clé
+        retournée.
+
+        Returns:
+            (clé du pool, environnement) ; l'environnement vaut None si le type
+            est inconnu ou si les environnements ne sont pas disponibles.
+        """
+        key = environment_fingerprint(env_type, game_params, **kwargs)
+        env = self.pool.acquire(key)
+        if env is None:
+            try:
+                if env_type == "configurable":
+                    env = self.create_configurable_env(game_params, **kwargs)
+                elif env_type == "multiagent":
+                    env = self.create_multiagent_env(game_params, **kwargs)
+                if env is not None:
+                    env.reset()
+            except BaseException:
+                # Construction échouée : l'emprunt ne sera jamais rendu
+                self.pool.discard(env)
+                raise
+            if env is None:
+                self.pool.discard()
+        return key, env
+
+    def release_env(self, key: str, env: Any):
+        """Rend au pool un environnement emprunté via `acquire_env`."""
+        if env is not None:
+            self.pool.release(key, env)
+
+    @contextmanager
+    def checkout_env(self, env_type: str, game_params: GameParameters, **kwargs):
+        """
+        Emprunte un environnement pour la durée d'un bloc `with`.
+
+        Produit None si l'environnement ne peut pas être créé ; sinon
+        l'instance est rendue au pool (et réinitialisée) à la sortie du bloc.
+        """
+        key, env = self.acquire_env(env_type, game_params, **kwargs)
+        try:
+            yield env
+        finally:
+            self.release_env(key, env)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Retourne les statistiques du pool d'environnements."""
+        return self.pool.get_stats()
+
+    def create_single_agent_wrapper(self, multiagent_env: "PacManMultiAgentEnv", agent_id: str):
         """Crée un wrapper single-agent pour un environnement multi-agent."""
-        if SingleAgentWrapper is None or multiagent_env is None:
+        if not IMPORT_SUCCESS or multiagent_env is None:
             return None
+        from pacman_env.multiagent_wrappers import SingleAgentWrapper
         
         return SingleAgentWrapper(multiagent_env, agent_id)
     
+    def get_grid_array(self, env) -> np.ndarray:
+        """
+        Construit la grille de codes (-1: mur, 0: vide, 1: point, 2: power pellet)
+        en une seule passe vectorisée sur `env.dots` et le masque des murs.
+        """
+        dots = np.asarray(env.dots)
+        grid = np.where(dots > 0, dots, 0).astype(np.int8)
+        grid[dots < 0] = WALL
+        if env.walls:
+            rows, cols = np.asarray(env.walls, dtype=np.intp).T
+            grid[rows, cols] = WALL
+        return grid
+
+    def get_game_state_dict(self, env, env_type: str = "configurable",
+                            encoding: str = "full") -> Optional[Dict[str, Any]]:
+        """
+        Extrait l'état du jeu sous forme de dictionnaire sérialisable.
+
+        Avec ``encoding="full"``, le dictionnaire a la structure de `GameState`
+        (grille en listes imbriquées, listes de points). Avec ``"bitmap"`` ou
+        ``"rle"``, la grille et les points sont remplacés par une clé
+        ``grid_encoded`` (voir `backend.utils.state_encoding`).
+        """
+        if env is None or not hasattr(env, 'dots') or env.dots is None:
+            return None
+        if env_type not in ("configurable", "multiagent"):
+            return None
+        if encoding not in GRID_ENCODINGS:
+            raise ValueError(f"Encodage de grille inconnu: {encoding}")
+
+        grid = self.get_grid_array(env)
+        if env_type != "multiagent":
+            # Pas de power pellets dans l'environnement configurable
+            grid[grid == POWER_PELLET] = EMPTY
+
+        vulnerable = getattr(env, 'vulnerable_ghosts', set()) if env_type == "multiagent" else set()
+        state = {
+            "pacman": {
+                "x": int(env.pacman_pos[1]),
+                "y": int(env.pacman_pos[0]),
+                "direction": "right"  # À déterminer
+            },
+            "ghosts": [
+                {
+                    "x": int(c),
+                    "y": int(r),
+                    "color": f"ghost_{i}",
+                    "mode": "vulnerable" if i in vulnerable else "normal"
+                }
+                for i, (r, c) in enumerate(env.ghost_positions)
+            ],
+            "score": 0,  # À calculer
+            "lives": int(env.current_lives),
+            "step": int(env.current_step),
+            "episode": 0
+        }
+
+        if encoding == "full":
+            state["grid"] = grid.tolist()
+            state["pellets"] = [{"x": c, "y": r} for r, c in np.argwhere(grid == DOT).tolist()]
+            state["power_pellets"] = [
+                {"x": c, "y": r} for r, c in np.argwhere(grid == POWER_PELLET).tolist()
+            ]
+        else:
+            state["grid_encoded"] = encode_grid(grid, encoding)
+
+        return state
+
     def get_game_state(self, env, env_type: str = "configurable") -> Optional[GameState]:
         """Extrait l'état du jeu depuis un environnement pour la visualisation."""
-        if env is None:
-            return None
-        
         try:
-            if env_type == "configurable" and hasattr(env, 'dots'):
-                # Pour PacManConfigurableEnv
-                grid_size = env.size
-                grid = []
-                for r in range(grid_size):
-                    row = []
-                    for c in range(grid_size):
-                        if (r, c) in env.walls:
-                            row.append(-1)  # Mur
-                        elif env.dots[r, c] == 1:
-                            row.append(1)   # Point
-                        else:
-                            row.append(0)   # Vide
-                    grid.append(row)
-                
-                pacman = {
-                    "x": env.pacman_pos[1],
-                    "y": env.pacman_pos[0],
-                    "direction": "right"  # À déterminer
-                }
-                
-                ghosts = []
-                for i, (r, c) in enumerate(env.ghost_positions):
-                    ghosts.append({
-                        "x": c,
-                        "y": r,
-                        "color": f"ghost_{i}",
-                        "mode": "normal"
-                    })
-                
-                # Points restants
-                pellets = []
-                for r in range(grid_size):
-                    for c in range(grid_size):
-                        if env.dots[r, c] == 1:
-                            pellets.append({"x": c, "y": r})
-                
-                return GameState(
-                    grid=grid,
-                    pacman=pacman,
-                    ghosts=ghosts,
-                    pellets=pellets,
-                    power_pellets=[],  # Pas de power pellets dans configurable
-                    score=0,  # À calculer
-                    lives=env.current_lives,
-                    step=env.current_step,
-                    episode=0
-                )
-                
-            elif env_type == "multiagent" and hasattr(env, 'dots'):
-                # Pour PacManMultiAgentEnv
-                grid_size = env.size
-                grid = []
-                for r in range(grid_size):
-                    row = []
-                    for c in range(grid_size):
-                        if (r, c) in env.walls:
-                            row.append(-1)
-                        elif env.dots[r, c] == 1:
-                            row.append(1)
-                        elif env.dots[r, c] == 2:
-                            row.append(2)  # Power pellet
-                        else:
-                            row.append(0)
-                    grid.append(row)
-                
-                pacman = {
-                    "x": env.pacman_pos[1],
-                    "y": env.pacman_pos[0],
-                    "direction": "right"
-                }
-                
-                ghosts = []
-                for i, (r, c) in enumerate(env.ghost_positions):
-                    mode = "vulnerable" if i in getattr(env, 'vulnerable_ghosts', set()) else "normal"
-                    ghosts.append({
-                        "x": c,
-                        "y": r,
-                        "color": f"ghost_{i}",
-                        "mode": mode
-                    })
-                
-                pellets = []
-                for r in range(grid_size):
-                    for c in range(grid_size):
-                        if env.dots[r, c] == 1:
-                            pellets.append({"x": c, "y": r})
-                
-                power_pellets = []
-                for (r, c) in getattr(env, 'power_pellet_positions', []):
-                    power_pellets.append({"x": c, "y": r})
-                
-                return GameState(
-                    grid=grid,
-                    pacman=pacman,
-                    ghosts=ghosts,
-                    pellets=pellets,
-                    power_pellets=power_pellets,
-                    score=0,
-                    lives=env.current_lives,
-                    step=env.current_step,
-                    episode=0
-                )
-                
+            state = self.get_game_state_dict(env, env_type)
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction de l'état du jeu: {e}")
-        
-        return None
-    
+            return None
+
+        if state is None:
+            return None
+        # Données produites par le service : la validation Pydantic est superflue
+        return GameState.construct(**state)
+
     def validate_parameters(self, parameters: AllParameters) -> Tuple[bool, str]:
         """Valide les paramètres de jeu pour s'assurer qu'ils sont cohérents."""
         game = parameters.game
@@ -0,0 +1,183 @@
+"""
+Service de rendu des frames de visualisation.
+
+Rend un état de jeu (environnement ou simulation en direct) en image avec le
+moteur de tuiles NumPy de `pacman_env.rendering`, l'encode en PNG, JPEG ou
+WebP, et garde les images encodées dans un cache LRU. La clé du cache est une
+empreinte de l'état et des options de rendu ; elle sert aussi d'ETag, ce qui
+permet aux clients de revalider une frame avec ``If-None-Match``.
+"""
+import hashlib
+import io
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+# Ajout du chemin src pour importer le moteur de rendu des environnements
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from pacman_env.rendering import render_frame
+
+from backend.config import settings
+from backend.utils.state_encoding import grid_from_state
+
+try:
+    from PIL import Image, ImageDraw, ImageFont, features
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+logger = logging.getLogger(__name__)
+
+# Formats d'image : type MIME et nom du format Pillow
+FRAME_FORMATS = {
+    "png": ("image/png", "PNG"),
+    "jpeg": ("image/jpeg", "JPEG"),
+    "webp": ("image/webp", "WEBP"),
+}
+
+def state_agents(state: Dict[str, Any]) -> Tuple[Tuple[int, int], list, list]:
+    """Positions (ligne, colonne) de Pac-Man et des fantômes, et indices des fantômes vulnérables."""
+    pacman = state["pacman"]
+    ghosts = [(int(g["y"]), int(g["x"])) for g in state.get("ghosts", [])]
+    vulnerable = [i for i, g in enumerate(state.get("ghosts", [])) if g.get("mode") == "vulnerable"]
+    return (int(pacman["y"]), int(pacman["x"])), ghosts, vulnerable
+
+class FrameRenderService:
+    """Rendu, encodage et cache des frames de visualisation."""
+
+    def __init__(self, max_entries: int = None):
+        """Initialise le service avec un cache vide."""
+        self.max_entries = max_entries or settings.FRAME_CACHE_MAX_ENTRIES
+        self._cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.render_time_total = 0.0
+
+    def supported_formats(self) -> list:
+        """Formats d'image disponibles avec l'installation courante."""
+        if not HAS_PILLOW:
+            return ["png"]
+        formats = ["png", "jpeg"]
+        if features.check("webp"):
+            formats.append("webp")
+        return formats
+
+    def frame_etag(self, grid: np.ndarray, agents: Tuple, options: Tuple) -> str:
+        """Empreinte d'un état et des options de rendu (utilisée comme ETag)."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(grid, dtype=np.int8).tobytes())
+        digest.update(repr((grid.shape, agents, options)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def render_state(self, state: Dict[str, Any], cell_size: int = 16, format: str = "png",
+                     quality: int = 85, show_grid: bool = False,
+                     show_stats: bool = False) -> Tuple[bytes, str, str]:
+        """
+        Rend et encode un état de jeu.
+
+        Args:
+            state: État au format `GameState` (grille complète ou encodée)
+            cell_size: Taille d'une cellule en pixels
+            format: "png", "jpeg" ou "webp"
+            quality: Qualité JPEG / WebP
+            show_grid: Tracer les lignes de la grille
+            show_stats: Incruster step, score et vies
+
+        Returns:
+            Tuple (image encodée, ETag, type MIME)
+        """
+        if format not in self.supported_formats():
+            raise ValueError(f"Format d'image non supporté: {format}")
+
+        grid = grid_from_state(state)
+        agents = state_agents(state)
+        stats = (int(state.get("step", 0)), int(state.get("score", 0)), int(state.get("lives", 0)))
+        options = (cell_size, format, quality if format != "png" else None, show_grid,
+                   stats if show_stats else None)
+        etag = self.frame_etag(grid, agents, options)
+        media_type = FRAME_FORMATS[format][0]
+
+        with self._lock:
+            cached = self._cache.get(etag)
+            if cached is not None:
+                self._cache.move_to_end(etag)
+                self.hits += 1
+                return cached[0], etag, cached[1]
+            self.misses += 1
+
+        start = time.perf_counter()
+        frame = render_frame(grid, agents[0], agents[1], agents[2], cell_size, show_grid)
+        data = self._encode(frame, format, quality, stats if show_stats else None)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.render_time_total += elapsed
+            self._cache[etag] = (data, media_type)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return data, etag, media_type
+
+    def _encode(self, frame: np.ndarray, format: str, quality: int, stats: Tuple = None) -> bytes:
+        """Encode une frame RGB dans le format demandé."""
+        if not HAS_PILLOW:
+            return _encode_png(frame)
+
+        image = Image.fromarray(frame, "RGB")
+        if stats is not None:
+            step, score, lives = stats
+            ImageDraw.Draw(image).text(
+                (4, 2), f"Step: {step} | Score: {score} | Lives: {lives}",
+                fill="white", font=ImageFont.load_default()
+            )
+
+        buffer = io.BytesIO()
+        if format == "png":
+            image.save(buffer, format="PNG", compress_level=3)
+        else:
+            image.save(buffer, format=FRAME_FORMATS[format][1], quality=quality)
+        return buffer.getvalue()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du cache et du temps de rendu."""
+        with self._lock:
+            return {
+                "cached_frames": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "avg_render_time_ms": round(self.render_time_total / self.misses * 1000, 3) if self.misses else None,
+                "formats": self.supported_formats()
+            }
+
+    def clear_cache(self):
+        """Vide le cache des frames encodées."""
+        with self._lock:
+            self._cache.clear()
+
+def _encode_png(frame: np.ndarray) -> bytes:
+    """Encodeur PNG minimal (zlib) utilisé lorsque Pillow n'est pas installé."""
+    import struct
+    import zlib
+
+    height, width, _ = frame.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = frame.reshape(height, width * 3)
+
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return (struct.pack(">I", len(payload)) + tag + payload
+                + struct.pack(">I", zlib.crc32(tag + payload) & 0xFFFFFFFF))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 3)) + chunk(b"IEND", b""))
+
+# Instance singleton du service
+frame_service = FrameRenderService()
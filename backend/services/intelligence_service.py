@@ -0,0 +1,201 @@
+"""
+Service de calcul des scores d'intelligence.
+
+Regroupe le calcul complet d'un rapport (score, analyse des métriques,
+comparaison aux baselines, recommandations, visualisations) pour qu'il puisse
+être exécuté hors de la boucle d'événements : dans un thread pour une requête
+isolée, ou dans le pool de tâches de fond pour un lot de rapports.
+"""
+import logging
+import os
+import sys
+from typing import Dict, Any, Callable, List, Optional
+
+from backend.utils.lazy_imports import modules_available
+
+# Ajouter la racine du projet (paquet intelligence) au path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+
+logger = logging.getLogger(__name__)
+
+# Les modules d'intelligence (numpy, scipy) sont importés au premier calcul ;
+# seule leur présence est vérifiée au démarrage
+INTELLIGENCE_MODULES_AVAILABLE = modules_available("numpy", "scipy", "intelligence")
+
+# Valeurs par défaut d'une requête de calcul (cf. IntelligenceCalculationRequest)
+_DEFAULTS = {
+    "environment_params": {"grid_size": 10, "num_ghosts": 2, "power_pellets": 2, "pellet_density": 0.7},
+    "agent_type": "pacman",
+    "baseline_winrate": 0.1,
+    "baseline_reward": -100.0
+}
+
+def calculate_report(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcule le rapport d'intelligence complet d'un agent.
+    
+    Args:
+        request: Champs de `IntelligenceCalculationRequest` (épisodes en dictionnaires)
+    """
+    from intelligence.intelligence_calculator import IntelligenceCalculator, create_episode_metrics_from_backend
+    from intelligence.metrics_analyzer import MetricsAnalyzer
+    from intelligence.baseline_comparator import BaselineComparator
+    from intelligence.difficulty_adjuster import DifficultyAdjuster, EnvironmentDifficulty
+    from intelligence.recommendations_generator import RecommendationsGenerator
+    from intelligence.visualization_generator import VisualizationGenerator
+
+    # Convertir les données d'épisodes
+    episode_dicts = [dict(episode) for episode in request["episodes"]]
+    episodes = create_episode_metrics_from_backend(episode_dicts)
+
+    # Initialiser le calculateur
+    calculator = IntelligenceCalculator(
+        baseline_winrate=request.get("baseline_winrate", _DEFAULTS["baseline_winrate"]),
+        baseline_reward=request.get("baseline_reward", _DEFAULTS["baseline_reward"])
+    )
+
+    # Calculer le facteur de difficulté
+    env_params = request.get("environment_params", _DEFAULTS["environment_params"])
+    difficulty_adjuster = DifficultyAdjuster()
+    env_difficulty = EnvironmentDifficulty(
+        grid_size=env_params.get("grid_size", 10),
+        num_ghosts=env_params.get("num_ghosts", 2),
+        power_pellets=env_params.get("power_pellets", 2),
+        pellet_density=env_params.get("pellet_density", 0.7),
+        ghost_speed=env_params.get("ghost_speed", 1.0),
+        pacman_speed=env_params.get("pacman_speed", 1.0),
+        episode_time_limit=env_params.get("episode_time_limit", 1000)
+    )
+
+    difficulty_factor = difficulty_adjuster.calculate_difficulty_factor(env_difficulty)
+
+    # Calculer le score d'intelligence
+    intelligence_result = calculator.calculate_intelligence_score(
+        episodes=episodes,
+        difficulty_factor=difficulty_factor
+    )
+
+    # Analyser les métriques
+    analyzer = MetricsAnalyzer()
+    metrics_result = analyzer.analyze_performance(
+        episodes=episode_dicts,
+        agent_type=request.get("agent_type", _DEFAULTS["agent_type"])
+    )
+
+    # Comparer avec les baselines
+    baseline_comparator = BaselineComparator()
+    baseline_result = baseline_comparator.compare_with_baselines(
+        agent_metrics=metrics_result['basic_statistics'],
+        environment_params=env_params
+    )
+
+    # Générer des recommandations
+    recommendations_generator = RecommendationsGenerator()
+    recommendations_result = recommendations_generator.generate_recommendations(
+        intelligence_score=intelligence_result,
+        metrics_analysis=metrics_result,
+        baseline_comparison=baseline_result,
+        difficulty_profile=difficulty_adjuster.create_difficulty_profile(env_difficulty)
+    )
+
+    # Générer les visualisations
+    visualization_generator = VisualizationGenerator()
+    visualizations_result = visualization_generator.generate_intelligence_dashboard(
+        intelligence_score=intelligence_result,
+        metrics_analysis=metrics_result,
+        baseline_comparison=baseline_result,
+        recommendations=recommendations_result
+    )
+
+    return {
+        "intelligence_score": intelligence_result,
+        "metrics_analysis": metrics_result,
+        "baseline_comparison": baseline_result,
+        "recommendations": recommendations_result,
+        "visualizations": visualizations_result,
+        "summary": {
+            "overall_score": intelligence_result['overall_score'],
+            "performance_level": _classify_performance_level(intelligence_result['overall_score']),
+            "key_strengths": _extract_key_strengths(intelligence_result),
+            "key_weaknesses": _extract_key_weaknesses(intelligence_result),
+            "improvement_potential": recommendations_result.get('total_potential_impact', 0.0)
+        }
+    }
+
+def score_batch(requests: List[Dict[str, Any]],
+                progress: Optional[Callable[[float, str], None]] = None) -> Dict[str, Any]:
+    """
+    Calcule les rapports d'un lot de requêtes.
+    
+    Une requête en erreur n'interrompt pas le lot : son entrée contient
+    l'erreur au lieu du rapport.
+    """
+    reports = []
+    for index, request in enumerate(requests):
+        try:
+            reports.append({"index": index, "success": True, "report": calculate_report(request)})
+        except Exception as e:
+            logger.error(f"Erreur lors du calcul d'intelligence (requête {index}): {e}")
+            reports.append({"index": index, "success": False, "error": str(e)})
+        if progress is not None:
+            progress((index + 1) / len(requests), f"{index + 1}/{len(requests)} rapports calculés")
+    succeeded = sum(1 for report in reports if report["success"])
+    return {
+        "success": succeeded == len(reports),
+        "total": len(reports),
+        "succeeded": succeeded,
+        "reports": reports
+    }
+
+def _classify_performance_level(score: float) -> str:
+    """Classe le niveau de performance."""
+    if score >= 80:
+        return "excellent"
+    elif score >= 60:
+        return "good"
+    elif score >= 40:
+        return "average"
+    elif score >= 20:
+        return "poor"
+    else:
+        return "very_poor"
+
+def _extract_key_strengths(intelligence_result: Dict[str, Any]) -> List[str]:
+    """Extrait les points forts à partir du résultat d'intelligence."""
+    strengths = []
+    components = intelligence_result.get('components', {})
+    
+    for component, value in components.items():
+        if value >= 70:  # Seuil pour point fort
+            if component == 'winrate':
+                strengths.append(f"Taux de victoire élevé ({value:.1f}%)")
+            elif component == 'reward_normalized':
+                strengths.append(f"Récompenses importantes ({value:.1f}%)")
+            elif component == 'survival_normalized':
+                strengths.append(f"Bonne survie ({value:.1f}%)")
+            elif component == 'efficiency':
+                strengths.append(f"Efficacité de collecte élevée ({value:.1f}%)")
+            elif component == 'consistency':
+                strengths.append(f"Consistance excellente ({value:.1f}%)")
+    
+    return strengths if strengths else ["Aucun point fort significatif identifié"]
+
+def _extract_key_weaknesses(intelligence_result: Dict[str, Any]) -> List[str]:
+    """Extrait les points faibles à partir du résultat d'intelligence."""
+    weaknesses = []
+    components = intelligence_result.get('components', {})
+    
+    for component, value in components.items():
+        if value <= 30:  # Seuil pour point faible
+            if component == 'winrate':
+                weaknesses.append(f"Taux de victoire faible ({value:.1f}%)")
+            elif component == 'reward_normalized':
+                weaknesses.append(f"Récompenses insuffisantes ({value:.1f}%)")
+            elif component == 'survival_normalized':
+                weaknesses.append(f"Survie courte ({value:.1f}%)")
+            elif component == 'efficiency':
+                weaknesses.append(f"Efficacité de collecte faible ({value:.1f}%)")
+            elif component == 'consistency':
+                weaknesses.append(f"Manque de consistance ({value:.1f}%)")
+    
+    return weaknesses if weaknesses else ["Aucun point faible significatif identifié"]
@@ -0,0 +1,250 @@
+"""
+Service des tâches de fond.
+
+Les traitements lourds (conversion et export ONNX, création / optimisation /
+validation d'archives, scores d'intelligence par lot, export vidéo) ne
+bloquent plus la requête HTTP : `submit` enregistre la tâche en base et
+retourne immédiatement son identifiant, le travail s'exécute dans un pool de
+processus avec une concurrence bornée par famille de tâches
+(`JOB_CONCURRENCY`).
+
+Les processus écrivent leur avancement dans la table `jobs` ; le service le
+relit périodiquement et le diffuse sur le canal WebSocket `jobs`. L'état et le
+résultat restent en base : ils survivent à un redémarrage, les tâches en
+attente sont alors relancées et celles interrompues en cours marquées en échec.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from backend.config import settings
+from backend.db.database import DatabaseManager, db_manager
+from backend.services.job_tasks import JOB_TYPES, run_job
+from backend.services.websocket_service import websocket_manager
+from backend.utils.instrumentation import JOB_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Statuts des tâches
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+JobListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class JobService:
+    """Soumission, exécution et suivi des tâches de fond."""
+
+    def __init__(self, db: DatabaseManager = None, max_workers: int = None,
+                 concurrency: Dict[str, int] = None, poll_interval: float = None):
+        """Initialise le service ; le pool de processus est créé à la première tâche."""
+        self.db = db or db_manager
+        self.max_workers = max_workers or settings.JOB_MAX_WORKERS
+        self.concurrency = dict(concurrency or settings.JOB_CONCURRENCY)
+        self.poll_interval = poll_interval or settings.JOB_PROGRESS_POLL_SECONDS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running: Dict[str, tuple] = {}  # job_id -> dernier (progress, message) diffusé
+        self._listeners: Dict[str, List[JobListener]] = defaultdict(list)
+        self._progress_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Reprend les tâches laissées par l'exécution précédente."""
+        now = datetime.now().isoformat()
+        for job in self.db.list_jobs(status=RUNNING, limit=10000):
+            self.db.update_job(job["id"], status=FAILED, finished_at=now,
+                               error="Tâche interrompue par un redémarrage du serveur")
+        queued = self.db.list_jobs(status=QUEUED, limit=10000)
+        for job in reversed(queued):
+            self._schedule(job["id"], job["job_type"], job["params"])
+        if queued:
+            logger.info(f"{len(queued)} tâche(s) en attente relancée(s)")
+
+    async def stop(self):
+        """Annule les tâches en attente et arrête le pool de processus."""
+        tasks = list(self._tasks.values())
+        if self._progress_task is not None:
+            tasks.append(self._progress_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._progress_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def add_listener(self, job_type: str, listener: JobListener):
+        """Enregistre une coroutine appelée avec la tâche terminée avec succès."""
+        self._listeners[job_type].append(listener)
+
+    # ------------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------------
+
+    def submit(self, job_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Enregistre une tâche et la planifie ; retourne immédiatement son état."""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Type de tâche inconnu: {job_type}")
+        job = {
+            "id": str(uuid.uuid4()),
+            "job_type": job_type,
+            "status": QUEUED,
+            "params": params,
+            "progress": 0.0,
+            "message": "En attente",
+            "created_at": datetime.now().isoformat()
+        }
+        self.db.insert_job(job)
+        self._schedule(job["id"], job_type, params)
+        return self._public(self.db.get_job(job["id"]))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """État complet d'une tâche (résultat compris)."""
+        job = self.db.get_job(job_id)
+        return self._public(job) if job else None
+
+    def list_jobs(self, status: str = None, job_type: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Liste les tâches, sans leurs paramètres ni leurs résultats."""
+        return [
+            self._public(job, detailed=False)
+            for job in self.db.list_jobs(status=status, job_type=job_type, limit=limit)
+        ]
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Annule une tâche en attente.
+
+        Lève LookupError si la tâche est inconnue et RuntimeError si elle a
+        déjà démarré (un processus du pool ne peut pas être interrompu).
+        """
+        job = self.db.get_job(job_id)
+        if job is None:
+            raise LookupError(job_id)
+        if job["status"] != QUEUED:
+            raise RuntimeError(f"Tâche {job['status']}, seule une tâche en attente peut être annulée")
+        self.db.update_job(job_id, status=CANCELLED, message="Annulée",
+                           finished_at=datetime.now().isoformat())
+        task = self._tasks.pop(job_id, None)
+        if task is not None:
+            task.cancel()
+        return self._public(self.db.get_job(job_id))
+
+    def get_types(self) -> Dict[str, Any]:
+        """Types de tâches, leur famille et la concurrence de chaque famille."""
+        return {
+            "types": {name: family for name, (family, _) in JOB_TYPES.items()},
+            "concurrency": self.concurrency,
+            "max_workers": self.max_workers
+        }
+
+    # ------------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------------
+
+    def _schedule(self, job_id: str, job_type: str, params: Dict[str, Any]):
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(
+            self._run(job_id, job_type, params), name=f"Job-{job_id}"
+        )
+
+    def _semaphore(self, family: str) -> asyncio.Semaphore:
+        if family not in self._semaphores:
+            self._semaphores[family] = asyncio.Semaphore(max(1, self.concurrency.get(family, 1)))
+        return self._semaphores[family]
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def _run(self, job_id: str, job_type: str, params: Dict[str, Any]):
+        family = JOB_TYPES[job_type][0]
+        try:
+            async with self._semaphore(family):
+                self.db.update_job(job_id, status=RUNNING, message="En cours",
+                                   started_at=datetime.now().isoformat())
+                await self._broadcast(job_id)
+                self._running[job_id] = (0.0, "En cours")
+                self._ensure_progress_loop()
+
+                start = time.perf_counter()
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        self._pool(), run_job, job_type, job_id, params, self.db.db_path
+                    )
+                    failed = isinstance(result, dict) and result.get("success") is False
+                    fields = {
+                        "status": FAILED if failed else SUCCEEDED,
+                        "result": result,
+                        "error": result.get("error") if failed else None,
+                        "progress": 1.0
+                    }
+                except Exception as e:
+                    logger.error(f"Erreur tâche {job_type} {job_id}: {e}")
+                    fields = {"status": FAILED, "error": str(e) or type(e).__name__}
+                finally:
+                    self._running.pop(job_id, None)
+
+                JOB_DURATION.labels(job_type, "success" if fields["status"] == SUCCEEDED else "error") \
+                    .observe(time.perf_counter() - start)
+                self.db.update_job(job_id, message="Terminé" if fields["status"] == SUCCEEDED else "Échec",
+                                   finished_at=datetime.now().isoformat(), **fields)
+                job = await self._broadcast(job_id)
+        finally:
+            self._tasks.pop(job_id, None)
+
+        if fields["status"] == SUCCEEDED:
+            for listener in self._listeners.get(job_type, []):
+                try:
+                    await listener(job)
+                except Exception as e:
+                    logger.error(f"Erreur notification tâche {job_id}: {e}")
+
+    async def _broadcast(self, job_id: str) -> Dict[str, Any]:
+        job = self.get_job(job_id)
+        await websocket_manager.broadcast_job_update(self._public(job, detailed=False))
+        return job
+
+    def _ensure_progress_loop(self):
+        if self._progress_task is None or self._progress_task.done():
+            self._progress_task = asyncio.get_running_loop().create_task(
+                self._progress_loop(), name="JobProgress"
+            )
+
+    async def _progress_loop(self):
+        """Diffuse l'avancement écrit en base par les processus tant que des tâches tournent."""
+        while self._running:
+            await asyncio.sleep(self.poll_interval)
+            for job_id, last in list(self._running.items()):
+                job = self.db.get_job(job_id)
+                if job is None or job["status"] != RUNNING:
+                    continue
+                current = (job["progress"], job["message"])
+                if current != last and job_id in self._running:
+                    self._running[job_id] = current
+                    await websocket_manager.broadcast_job_update(self._public(job, detailed=False))
+
+    @staticmethod
+    def _public(job: Dict[str, Any], detailed: bool = True) -> Dict[str, Any]:
+        data = dict(job)
+        data["status_url"] = f"/api/v1/jobs/{job['id']}"
+        if not detailed:
+            data.pop("params", None)
+            data.pop("result", None)
+        return data
+
+# Instance singleton du service
+job_service = JobService()
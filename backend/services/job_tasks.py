@@ -0,0 +1,190 @@
+"""
+Fonctions des tâches de fond, exécutées dans les processus du pool de tâches.
+
+Chaque type de tâche est une fonction ``(params, progress) -> dict`` : `params`
+est le dictionnaire JSON enregistré à la soumission, `progress(fraction,
+message)` publie l'avancement. Le résultat est un dictionnaire JSON ; un
+résultat ``{"success": False, ...}`` marque la tâche en échec.
+
+Ce module est importé par chaque processus du pool : il n'importe les
+services (torch, onnx, archives...) qu'à l'exécution d'une tâche.
+"""
+import shutil
+import time
+from typing import Dict, Any, Callable
+
+Progress = Callable[[float, str], None]
+
+class _ProgressReporter:
+    """Écrit l'avancement d'une tâche en base (au plus toutes les `min_interval` secondes)."""
+
+    def __init__(self, db_path: str, job_id: str, min_interval: float = 0.25):
+        from backend.db.database import DatabaseManager
+
+        self.db = DatabaseManager(db_path)
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    def __call__(self, fraction: float, message: str = None):
+        now = time.monotonic()
+        if fraction < 1.0 and now - self._last < self.min_interval:
+            return
+        self._last = now
+        self.db.update_job(self.job_id, progress=round(min(max(fraction, 0.0), 1.0), 4), message=message)
+
+def onnx_convert(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Conversion d'un modèle Stable-Baselines3 en ONNX."""
+    from backend.services.onnx_export_service import onnx_export_service
+
+    progress(0.05, "Conversion du modèle")
+    try:
+        return onnx_export_service.convert_model(
+            model_path=params["model_path"],
+            algorithm=params.get("algorithm", "auto"),
+            output_name=params.get("output_name"),
+            include_metadata=params.get("include_metadata", True)
+        )
+    finally:
+        # Modèle reçu par upload : supprimé une fois converti
+        if params.get("cleanup_dir"):
+            shutil.rmtree(params["cleanup_dir"], ignore_errors=True)
+
+def onnx_export(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Export d'un modèle ONNX pour une plateforme."""
+    from backend.services.onnx_export_service import onnx_export_service
+
+    progress(0.05, f"Export pour {params['platform']}")
+    return onnx_export_service.export_for_platform(
+        onnx_model_path=params["onnx_model_path"],
+        platform=params["platform"],
+        platform_config=params.get("platform_config")
+    )
+
+def onnx_export_all(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Export d'un modèle ONNX pour plusieurs plateformes."""
+    from backend.services.onnx_export_service import onnx_export_service
+
+    progress(0.05, "Export multi-plateforme")
+    return onnx_export_service.export_for_all_platforms(
+        onnx_model_path=params["onnx_model_path"],
+        platforms=params.get("platforms")
+    )
+
+def onnx_optimize(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Optimisation d'un modèle ONNX."""
+    from backend.services.onnx_export_service import onnx_export_service
+
+    progress(0.05, "Optimisation du modèle")
+    return onnx_export_service.optimize_model(
+        onnx_model_path=params["onnx_model_path"],
+        optimizations=params.get("optimizations"),
+        validate=params.get("validate", True)
+    )
+
+def onnx_validate(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Validation d'un modèle ONNX."""
+    from backend.services.onnx_export_service import onnx_export_service
+
+    progress(0.05, "Validation du modèle")
+    return onnx_export_service.validate_model(
+        onnx_model_path=params["onnx_model_path"],
+        platforms=params.get("platforms"),
+        performance_test=params.get("performance_test", True)
+    )
+
+def archive_create(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Création d'une archive d'expérience."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Création de l'archive")
+    return archive_service.create_archive(
+        experiment_id=params["experiment_id"],
+        model_path=params.get("model_path"),
+        metrics=params.get("metrics"),
+        config=params.get("config"),
+        tags=params.get("tags")
+    )
+
+def archive_optimize(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Optimisation de la compression d'une archive."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Optimisation de l'archive")
+    return archive_service.optimize_archive(params["archive_path"], params.get("optimization_level", "balanced"))
+
+def archive_validate(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Validation d'une archive."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Validation de l'archive")
+    return archive_service.validate_archive(params["archive_path"])
+
+def archive_validate_batch(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Validation en place de toutes les archives d'un répertoire."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Validation des archives du répertoire")
+    return archive_service.validate_directory(params.get("directory"), params.get("pattern", "*.zip"),
+                                              params.get("max_workers"))
+
+def archive_store_import(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Ajout d'une archive au magasin dédupliqué."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Découpage et déduplication")
+    return archive_service.store_archive(params["archive_path"], params.get("archive_id"))
+
+def archive_store_export(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Export d'une archive du magasin en ZIP autonome."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Reconstruction de l'archive")
+    return archive_service.export_stored_archive(params["archive_id"], params.get("output_path"))
+
+def archive_store_gc(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Ramasse-miettes du magasin dédupliqué."""
+    from backend.services.archive_service import archive_service
+
+    progress(0.05, "Suppression des blocs orphelins")
+    return archive_service.collect_store_garbage(params.get("min_age_seconds"))
+
+def intelligence_batch(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Calcul des rapports d'intelligence d'un lot d'agents."""
+    from backend.services.intelligence_service import score_batch
+
+    return score_batch(params["requests"], progress)
+
+def video_export(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Export vidéo d'un lot d'épisodes."""
+    from backend.models.experiment import EpisodeVideoExportRequest
+    from backend.services.video_export_service import video_export_service
+
+    progress(0.05, "Rendu et encodage des épisodes")
+    return video_export_service.export_episodes(EpisodeVideoExportRequest(**params))
+
+# Type de tâche -> (famille de concurrence, fonction)
+JOB_TYPES = {
+    "onnx_convert": ("onnx", onnx_convert),
+    "onnx_export": ("onnx", onnx_export),
+    "onnx_export_all": ("onnx", onnx_export_all),
+    "onnx_optimize": ("onnx", onnx_optimize),
+    "onnx_validate": ("onnx", onnx_validate),
+    "archive_create": ("archive", archive_create),
+    "archive_optimize": ("archive", archive_optimize),
+    "archive_validate": ("archive", archive_validate),
+    "archive_validate_batch": ("archive", archive_validate_batch),
+    "archive_store_import": ("archive", archive_store_import),
+    "archive_store_export": ("archive", archive_store_export),
+    "archive_store_gc": ("archive", archive_store_gc),
+    "intelligence_batch": ("intelligence", intelligence_batch),
+    "video_export": ("video", video_export),
+}
+
+def run_job(job_type: str, job_id: str, params: Dict[str, Any], db_path: str) -> Dict[str, Any]:
+    """Point d'entrée d'une tâche dans un processus du pool."""
+    _, function = JOB_TYPES[job_type]
+    progress = _ProgressReporter(db_path, job_id)
+    result = function(params, progress)
+    progress(1.0, "Terminé")
+    return result
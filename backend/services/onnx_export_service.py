@@ -12,18 +12,13 @@ from typing import Dict, Any, Optional, List
 from pathlib import Path
 import logging
 
-# Import des modules d'export ONNX
-try:
-    from onnx_export.onnx_converter import ONNXConverter, convert_sb3_model
-    from onnx_export.metadata_embedder import MetadataEmbedder
-    from onnx_export.platform_adapter import PlatformAdapter
-    from onnx_export.optimizer import ONNXOptimizer
-    from onnx_export.validator import ONNXValidator
-    from onnx_export.compatibility_checker import CompatibilityChecker
-    ONNX_EXPORT_AVAILABLE = True
-except ImportError as e:
-    logging.warning(f"Modules d'export ONNX non disponibles: {e}")
-    ONNX_EXPORT_AVAILABLE = False
+from backend.utils.lazy_imports import modules_available
+
+# Les modules d'export ONNX (torch, onnx, onnxruntime, stable_baselines3) sont
+# importés au premier export ; seule leur présence est vérifiée au démarrage
+ONNX_EXPORT_AVAILABLE = modules_available("torch", "onnx", "onnxruntime", "stable_baselines3")
+if not ONNX_EXPORT_AVAILABLE:
+    logging.warning("Modules d'export ONNX non disponibles (torch/onnx/onnxruntime/stable_baselines3 manquants)")
 
 
 class ONNXExportService:
@@ -79,6 +74,7 @@ class ONNXExportService:
             }
         
         try:
+            from onnx_export.onnx_converter import convert_sb3_model
             # Créer un répertoire d'export pour ce modèle
             model_name = Path(model_path).stem
             export_dir = self.base_export_dir / model_name
@@ -134,6 +130,7 @@ class ONNXExportService:
             }
         
         try:
+            from onnx_export.platform_adapter import PlatformAdapter
             # Créer un adaptateur pour la plateforme
             adapter = PlatformAdapter(onnx_model_path)
             
@@ -198,6 +195,7 @@ class ONNXExportService:
             platforms = ["pygame", "web", "unity", "generic"]
         
         try:
+            from onnx_export.platform_adapter import PlatformAdapter
             adapter = PlatformAdapter(onnx_model_path)
             
             # Créer un répertoire d'export
@@ -251,6 +249,7 @@ class ONNXExportService:
             }
         
         try:
+            from onnx_export.optimizer import ONNXOptimizer
             optimizer = ONNXOptimizer(onnx_model_path)
             
             # Créer un répertoire pour les optimisations
@@ -302,6 +301,7 @@ class ONNXExportService:
             }
         
         try:
+            from onnx_export.validator import ONNXValidator
             validator = ONNXValidator(onnx_model_path)
             
             # Créer un répertoire pour les rapports
@@ -352,6 +352,7 @@ class ONNXExportService:
             }
         
         try:
+            from onnx_export.compatibility_checker import CompatibilityChecker
             checker = CompatibilityChecker(onnx_model_path)
             
             # Créer un répertoire pour les rapports
@@ -0,0 +1,341 @@
+"""
+Service de diagnostic des performances en production.
+
+- Profilage statistique : un thread échantillonne périodiquement les piles de
+  tous les threads (ou d'un worker d'entraînement) via `sys._current_frames`,
+  sans instrumenter le code profilé. Le résultat est produit au format
+  « collapsed stacks » (une pile par ligne, fonctions séparées par « ; »,
+  suivie du nombre d'échantillons), directement utilisable par flamegraph.pl,
+  speedscope ou inferno.
+- Mémoire : snapshots `tracemalloc` conservés en mémoire et comparés deux à
+  deux pour trouver les lignes qui allouent le plus ou qui fuient.
+
+Une requête HTTP isolée peut aussi être profilée en ajoutant l'en-tête
+`PROFILING_HEADER` : le middleware `log_requests_middleware` renvoie alors
+l'identifiant du profil dans l'en-tête ``X-Profile-Id``.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Clés de regroupement acceptées pour la comparaison de snapshots
+MEMORY_KEY_TYPES = ("lineno", "filename", "traceback")
+
+# Allocations internes à exclure des snapshots
+_MEMORY_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_CWD = os.getcwd()
+
+def _short_path(filename: str) -> str:
+    """Chemin relatif au projet, ou deux derniers composants pour les bibliothèques."""
+    if filename.startswith(_CWD):
+        return os.path.relpath(filename, _CWD)
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    return "/".join(parts[-2:])
+
+class SamplingProfiler:
+    """Profileur statistique : compte les piles observées à intervalle régulier."""
+
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None):
+        """
+        Args:
+            interval: Période d'échantillonnage en secondes
+            thread_ids: Threads à échantillonner (tous si None)
+        """
+        self.interval = interval
+        self.thread_ids: Optional[Set[int]] = set(thread_ids) if thread_ids is not None else None
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[datetime] = None
+        self.duration = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_time = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = datetime.now()
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._start_time
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own)
+
+    def _label(self, code) -> str:
+        """Nom d'une fonction dans les piles (mis en cache par objet code)."""
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self, exclude: Optional[int] = None):
+        """Relève une fois la pile de chaque thread suivi."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude or (self.thread_ids is not None and ident not in self.thread_ids):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Piles au format « collapsed stacks » (entrée de flamegraph.pl)."""
+        return "".join(
+            f"{';'.join(frame.replace(';', ',') for frame in stack)} {count}\n"
+            for stack, count in self.counts.most_common()
+        )
+
+    def top(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Fonctions les plus échantillonnées (temps propre et temps inclusif)."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.counts.items():
+            if len(stack) > 1:
+                own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+        return [
+            {"function": function, "self_samples": own[function], "total_samples": count}
+            for function, count in sorted(total.items(), key=lambda item: (-own[item[0]], -item[1]))[:limit]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "threads": sorted({stack[0] for stack in self.counts})
+        }
+
+class ProfilingService:
+    """Profils à la demande et snapshots mémoire du processus."""
+
+    def __init__(self, sample_interval_ms: float = None, max_duration_seconds: float = None,
+                 max_stored: int = None, tracemalloc_frames: int = None, max_snapshots: int = None):
+        """Initialise le service (aucun échantillonnage tant qu'un profil n'est pas demandé)."""
+        self.sample_interval = (sample_interval_ms or settings.PROFILING_SAMPLE_INTERVAL_MS) / 1000
+        self.max_duration_seconds = max_duration_seconds or settings.PROFILING_MAX_DURATION_SECONDS
+        self.max_stored = max_stored or settings.PROFILING_MAX_STORED
+        self.tracemalloc_frames = tracemalloc_frames or settings.TRACEMALLOC_FRAMES
+        self.max_snapshots = max_snapshots or settings.TRACEMALLOC_MAX_SNAPSHOTS
+        self.profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._profiling = threading.Lock()
+        self._lock = threading.Lock()
+        self._snapshot_counter = 0
+
+    @staticmethod
+    def authorized(token: Optional[str]) -> bool:
+        """Vérifie le jeton d'administration (toujours faux si aucun jeton n'est configuré)."""
+        if not settings.ADMIN_TOKEN:
+            return False
+        return hmac.compare_digest(token or "", settings.ADMIN_TOKEN)
+
+    # ------------------------------------------------------------------
+    # Profilage
+    # ------------------------------------------------------------------
+
+    def _training_threads(self, training_id: str) -> Set[int]:
+        """Thread d'un entraînement en cours."""
+        from backend.services.training_service import training_service
+
+        thread = training_service.active_trainings.get(training_id)
+        if thread is None or not thread.is_alive():
+            raise LookupError(f"Aucun entraînement actif: {training_id}")
+        return {thread.ident}
+
+    async def profile(self, duration: float, interval_ms: float = None,
+                      training_id: str = None) -> Dict[str, Any]:
+        """
+        Profile le processus (ou un worker d'entraînement) pendant `duration` secondes.
+
+        Un seul profilage à la demande à la fois ; l'appel attend la fin de la
+        fenêtre sans bloquer la boucle d'événements.
+        """
+        if not 0 < duration <= self.max_duration_seconds:
+            raise ValueError(f"La durée doit être comprise entre 0 et {self.max_duration_seconds} s")
+        thread_ids = self._training_threads(training_id) if training_id else None
+        if not self._profiling.acquire(blocking=False):
+            raise RuntimeError("Un profilage est déjà en cours")
+        try:
+            interval = interval_ms / 1000 if interval_ms else self.sample_interval
+            profiler = SamplingProfiler(interval, thread_ids).start()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                profiler.stop()
+        finally:
+            self._profiling.release()
+        label = f"training:{training_id}" if training_id else "process"
+        return self._store(profiler, label)
+
+    def start_request_profile(self) -> SamplingProfiler:
+        """Démarre le profil d'une requête (tous les threads, arrêté par le middleware)."""
+        return SamplingProfiler(self.sample_interval).start()
+
+    def finish_request_profile(self, profiler: SamplingProfiler, label: str) -> str:
+        """Arrête le profil d'une requête et retourne son identifiant."""
+        profiler.stop()
+        return self._store(profiler, label)["id"]
+
+    def _store(self, profiler: SamplingProfiler, label: str) -> Dict[str, Any]:
+        profile = {
+            "id": uuid.uuid4().hex[:12],
+            "label": label,
+            **profiler.summary(),
+            "top": profiler.top(),
+            "collapsed": profiler.collapsed()
+        }
+        with self._lock:
+            self.profiles[profile["id"]] = profile
+            while len(self.profiles) > self.max_stored:
+                self.profiles.popitem(last=False)
+        logger.info(f"Profil {profile['id']} ({label}): {profile['samples']} échantillons "
+                    f"en {profile['duration_seconds']} s")
+        return profile
+
+    def get_profile(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self.profiles.get(profile_id)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Profils conservés, sans les piles."""
+        return [
+            {key: value for key, value in profile.items() if key not in ("top", "collapsed")}
+            for profile in list(self.profiles.values())
+        ]
+
+    # ------------------------------------------------------------------
+    # Mémoire
+    # ------------------------------------------------------------------
+
+    def start_memory_tracing(self, frames: int = None) -> Dict[str, Any]:
+        """Active tracemalloc (sans effet s'il est déjà actif)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or self.tracemalloc_frames)
+            logger.info("Suivi des allocations tracemalloc activé")
+        return self.memory_status()
+
+    def stop_memory_tracing(self) -> Dict[str, Any]:
+        """Désactive tracemalloc et libère les snapshots conservés."""
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+        return self.memory_status()
+
+    def memory_status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit(),
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "snapshots": [
+                {key: value for key, value in entry.items() if key != "snapshot"}
+                for entry in list(self.snapshots.values())
+            ]
+        }
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """Prend et conserve un snapshot des allocations."""
+        if not tracemalloc.is_tracing():
+            raise ValueError("Le suivi tracemalloc n'est pas actif")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        with self._lock:
+            self._snapshot_counter += 1
+            snapshot_id = f"snap-{self._snapshot_counter}"
+            entry = {
+                "snapshot_id": snapshot_id,
+                "taken_at": datetime.now().isoformat(),
+                "size_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+                "snapshot": snapshot
+            }
+            self.snapshots[snapshot_id] = entry
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return {key: value for key, value in entry.items() if key != "snapshot"}
+
+    def diff_snapshots(self, base_id: str, target_id: str = None, key_type: str = "lineno",
+                       limit: int = 25) -> Dict[str, Any]:
+        """
+        Compare deux snapshots (le second est pris maintenant s'il n'est pas donné).
+
+        Les lignes sont triées par variation absolue de la mémoire allouée :
+        une croissance persistante entre snapshots successifs signale une fuite.
+        """
+        if key_type not in MEMORY_KEY_TYPES:
+            raise ValueError(f"key_type doit être parmi {MEMORY_KEY_TYPES}")
+        base = self.snapshots.get(base_id)
+        if base is None:
+            raise LookupError(f"Snapshot inconnu: {base_id}")
+        if target_id is None:
+            target_id = self.take_snapshot()["snapshot_id"]
+        target = self.snapshots.get(target_id)
+        if target is None:
+            raise LookupError(f"Snapshot inconnu: {target_id}")
+
+        stats = target["snapshot"].compare_to(base["snapshot"], key_type)
+        return {
+            "base": base_id,
+            "target": target_id,
+            "key_type": key_type,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "count_diff": sum(stat.count_diff for stat in stats),
+            "top": [{
+                "location": (stat.traceback.format() if key_type == "traceback"
+                             else str(stat.traceback[0]) if key_type == "lineno"
+                             else stat.traceback[0].filename),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count
+            } for stat in stats[:limit]]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du service."""
+        return {
+            "profiling_active": self._profiling.locked(),
+            "stored_profiles": len(self.profiles),
+            "sample_interval_ms": self.sample_interval * 1000,
+            "max_duration_seconds": self.max_duration_seconds,
+            "memory_tracing": tracemalloc.is_tracing(),
+            "stored_snapshots": len(self.snapshots)
+        }
+
+# Instance singleton du service
+profiling_service = ProfilingService()
@@ -0,0 +1,123 @@
+"""
+Service de rétention des métriques.
+
+Conserve les métriques à pleine résolution pour les sessions récentes ou
+en cours, et compacte les sessions terminées anciennes en agrégats par
+bucket d'épisodes. La purge des lignes brutes est effectuée en arrière-plan,
+par petits lots, pour ne jamais bloquer les écritures d'entraînement.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from backend.config import settings
+from backend.db.database import DatabaseManager, db_manager
+
+logger = logging.getLogger(__name__)
+
+class MetricsRetentionService:
+    """Service de compaction et de purge incrémentale des métriques."""
+
+    def __init__(self, database: DatabaseManager = None,
+                 retention_hours: int = None,
+                 bucket_episodes: int = None,
+                 purge_batch_size: int = None,
+                 interval_seconds: int = None):
+        """Initialise le service avec la politique de rétention configurée."""
+        self.database = database or db_manager
+        self.retention_hours = retention_hours or settings.METRICS_RETENTION_HOURS
+        self.bucket_episodes = bucket_episodes or settings.METRICS_BUCKET_EPISODES
+        self.purge_batch_size = purge_batch_size or settings.METRICS_PURGE_BATCH_SIZE
+        self.interval_seconds = interval_seconds or settings.METRICS_RETENTION_INTERVAL_SECONDS
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def run_once(self, max_purge_batches: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Exécute un passage complet de rétention.
+
+        1. Compacte chaque session terminée plus ancienne que le seuil.
+        2. Purge les lignes brutes compactées par lots successifs, chaque lot
+           étant une transaction courte.
+
+        Args:
+            max_purge_batches: Nombre maximal de lots purgés pendant ce passage
+                (None = jusqu'à épuisement).
+
+        Returns:
+            Résumé du passage (sessions compactées, lignes purgées).
+        """
+        started_at = datetime.now()
+        compacted = []
+
+        for session_id in self.database.get_compactable_sessions(self.retention_hours):
+            if self._stop_event.is_set():
+                break
+            try:
+                result = self.database.compact_session_metrics(session_id, self.bucket_episodes)
+                if result:
+                    compacted.append(result)
+            except Exception as e:
+                logger.error(f"Erreur lors de la compaction de la session {session_id}: {e}")
+
+        purged_rows = 0
+        batches = 0
+        while not self._stop_event.is_set():
+            if max_purge_batches is not None and batches >= max_purge_batches:
+                break
+            deleted = self.database.purge_compacted_metrics(self.purge_batch_size)
+            if deleted == 0:
+                break
+            purged_rows += deleted
+            batches += 1
+
+        self.last_run = {
+            "started_at": started_at.isoformat(),
+            "duration_seconds": (datetime.now() - started_at).total_seconds(),
+            "compacted_sessions": len(compacted),
+            "raw_rows_compacted": sum(r["raw_rows"] for r in compacted),
+            "aggregate_rows_created": sum(r["aggregate_rows"] for r in compacted),
+            "purged_rows": purged_rows,
+            "purge_batches": batches
+        }
+
+        if compacted or purged_rows:
+            logger.info(f"Rétention des métriques: {len(compacted)} sessions compactées, "
+                        f"{purged_rows} lignes brutes purgées")
+        return self.last_run
+
+    def start(self):
+        """Démarre le passage périodique dans un thread démon."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def retention_loop():
+            """Boucle périodique exécutée dans le thread de rétention."""
+            while not self._stop_event.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Erreur lors du passage de rétention: {e}")
+                self._stop_event.wait(self.interval_seconds)
+
+        self._thread = threading.Thread(target=retention_loop, name="MetricsRetention")
+        self._thread.daemon = True
+        self._thread.start()
+        logger.info(f"Service de rétention des métriques démarré "
+                    f"(seuil: {self.retention_hours}h, bucket: {self.bucket_episodes} épisodes)")
+
+    def stop(self, timeout: float = 5.0):
+        """Arrête le thread de rétention (le lot en cours se termine)."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("Service de rétention des métriques arrêté")
+
+# Instance singleton du service
+retention_service = MetricsRetentionService()
@@ -0,0 +1,428 @@
+"""
+Service de simulations en direct.
+
+Maintient des parties persistantes côté serveur (environnement + politique
+optionnelle) qu'un ordonnanceur asyncio fait avancer à la cadence
+`VisualizationParameters.fps` de chaque simulation. Les simulations partageant
+la même configuration sont avancées ensemble, en un seul appel groupé par tick
+(un seul passage dans le pool de threads et une seule inférence de politique
+pour tout le groupe), puis leurs états sont publiés sur le canal `game_state`
+et, si `record_timeline` est demandé, ajoutés à la timeline de rejeu.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.models.experiment import SimulationCreate
+from backend.services.environment_service import environment_service
+from backend.services.timeline_service import timeline_service
+from backend.services.websocket_service import websocket_manager
+from backend.utils.instrumentation import registry
+from backend.utils.paths import resolve_model_path
+
+logger = logging.getLogger(__name__)
+
+ENV_STEPS = registry.counter(
+    "pacman_env_steps_total", "Steps d'environnement exécutés par les simulations", ("environment_type",)
+)
+STEP_PHASE_SECONDS = registry.histogram(
+    "pacman_env_step_phase_seconds", "Durée des phases d'un step de simulation", ("phase",)
+)
+# Séries gardées en module : le chemin chaud évite la recherche par étiquettes
+_POLICY_PHASE = STEP_PHASE_SECONDS.labels("policy")
+_ENV_PHASE = STEP_PHASE_SECONDS.labels("env_step")
+_STATE_PHASE = STEP_PHASE_SECONDS.labels("state")
+_RECORD_PHASE = STEP_PHASE_SECONDS.labels("record")
+
+class LiveSimulation:
+    """Partie en direct : un environnement emprunté au pool et son état courant."""
+
+    def __init__(self, simulation_id: str, config: SimulationCreate, pool_key: str, env: Any):
+        self.id = simulation_id
+        self.config = config
+        self.environment_type = config.environment_type
+        self.pool_key = pool_key
+        self.env = env
+        self.created_at = datetime.now()
+        self.last_activity = time.monotonic()
+        self.episode = 0
+        self.score = 0.0
+        self.total_steps = 0
+        self.busy = False
+        self.closed = False
+
+        obs, _ = env.reset()
+        self.obs = obs
+        self.last_state: Optional[Dict[str, Any]] = None
+
+    @property
+    def group_key(self) -> Tuple[str, Optional[str], str, int]:
+        """Clé de regroupement : configuration, politique et cadence identiques."""
+        return (self.pool_key, self.config.policy_path,
+                self.config.policy_algorithm, self.config.visualization.fps)
+
+    def touch(self):
+        """Marque la simulation comme regardée."""
+        self.last_activity = time.monotonic()
+
+    def pacman_obs(self) -> np.ndarray:
+        """Observation de Pac-Man (entrée de la politique)."""
+        if self.environment_type == "multiagent":
+            return self.obs["pacman"]
+        return self.obs
+
+    def advance(self, actions: np.ndarray) -> Dict[str, Any]:
+        """Avance la partie d'un step avec une action par agent (Pac-Man en premier)."""
+        start = time.perf_counter()
+        if self.environment_type == "configurable":
+            obs, reward, terminated, truncated, _ = self.env.step(int(actions[0]))
+            done = terminated or truncated
+        else:
+            action_dict = {agent: int(actions[i]) for i, agent in enumerate(self.env.agents)}
+            obs, rewards, terminations, truncations, _ = self.env.step(action_dict)
+            reward = rewards["pacman"]
+            done = terminations["pacman"] or truncations["pacman"]
+
+        self.obs = obs
+        self.score += reward
+        self.total_steps += 1
+        stepped = time.perf_counter()
+        _ENV_PHASE.observe(stepped - start)
+
+        state = environment_service.get_game_state_dict(
+            self.env, self.environment_type, self.config.state_encoding
+        ) or {}
+        state.update({
+            "simulation_id": self.id,
+            "score": int(self.score),
+            "episode": self.episode,
+            "done": bool(done)
+        })
+        _STATE_PHASE.observe(time.perf_counter() - stepped)
+
+        if done:
+            # Nouvelle partie dans le même environnement
+            self.obs, _ = self.env.reset()
+            self.episode += 1
+            self.score = 0.0
+
+        self.last_state = state
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Résumé de la simulation pour l'API."""
+        return {
+            "simulation_id": self.id,
+            "environment_type": self.environment_type,
+            "game": self.config.game.dict(),
+            "fps": self.config.visualization.fps,
+            "policy_path": self.config.policy_path,
+            "episode": self.episode,
+            "total_steps": self.total_steps,
+            "created_at": self.created_at.isoformat(),
+            "idle_seconds": round(time.monotonic() - self.last_activity, 1)
+        }
+
+class _SimulationGroup:
+    """Ensemble de simulations avancées ensemble à la même cadence."""
+
+    def __init__(self, fps: int, now: float):
+        self.interval = 1.0 / fps
+        self.next_tick = now + self.interval
+        self.simulation_ids: List[str] = []
+
+class SimulationService:
+    """Service des simulations en direct et de leur ordonnanceur de ticks."""
+
+    def __init__(self, max_simulations: int = None, idle_timeout_seconds: float = None,
+                 max_policies: int = None, models_dir: str = None):
+        """Initialise le service sans simulation active."""
+        self.max_simulations = max_simulations or settings.SIMULATION_MAX_SESSIONS
+        self.idle_timeout_seconds = idle_timeout_seconds or settings.SIMULATION_IDLE_TIMEOUT_SECONDS
+        self.max_policies = max_policies or settings.SIMULATION_MAX_POLICIES
+        self.models_dir = models_dir or settings.MODELS_DIR
+        self.simulations: Dict[str, LiveSimulation] = {}
+        self.groups: Dict[Tuple, _SimulationGroup] = {}
+        # Politiques chargées, les moins récemment utilisées évincées en premier
+        self.policies: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._policies_lock = threading.Lock()
+        self.ticks = 0
+        self.batched_calls = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Lots en cours d'exécution dans un thread (non interrompus par l'annulation)
+        self._batches: Set[asyncio.Future] = set()
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Démarre l'ordonnanceur de ticks sur la boucle courante."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="SimulationScheduler")
+        logger.info("Ordonnanceur des simulations en direct démarré")
+
+    async def stop(self):
+        """Arrête l'ordonnanceur et rend tous les environnements au pool."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._batches:
+            # Un thread peut encore avancer les environnements : attendre la fin
+            # de son lot avant de les rendre au pool
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        for simulation_id in list(self.simulations):
+            self.remove_simulation(simulation_id)
+        logger.info("Ordonnanceur des simulations en direct arrêté")
+
+    # ------------------------------------------------------------------
+    # Gestion des simulations
+    # ------------------------------------------------------------------
+
+    async def create_simulation(self, config: SimulationCreate) -> LiveSimulation:
+        """Crée une simulation en direct et l'inscrit auprès de l'ordonnanceur."""
+        if len(self.simulations) >= self.max_simulations:
+            raise RuntimeError(f"Nombre maximal de simulations atteint ({self.max_simulations})")
+
+        if config.policy_path:
+            # Charge (et met en cache) la politique avant d'accepter la simulation, hors boucle
+            await asyncio.to_thread(self._get_policy, config.policy_path, config.policy_algorithm)
+
+        pool_key, env = environment_service.acquire_env(config.environment_type, config.game)
+        if env is None:
+            raise RuntimeError("Impossible de créer l'environnement de simulation")
+
+        simulation = LiveSimulation(str(uuid.uuid4()), config, pool_key, env)
+        self.simulations[simulation.id] = simulation
+
+        loop = asyncio.get_running_loop()
+        group = self.groups.get(simulation.group_key)
+        if group is None:
+            group = _SimulationGroup(config.visualization.fps, loop.time())
+            self.groups[simulation.group_key] = group
+        group.simulation_ids.append(simulation.id)
+
+        await self.start()
+        self._wakeup.set()
+
+        logger.info(f"Simulation en direct créée: {simulation.id} "
+                    f"({config.environment_type}, {config.visualization.fps} fps)")
+        return simulation
+
+    def get_simulation(self, simulation_id: str, touch: bool = True) -> Optional[LiveSimulation]:
+        """Récupère une simulation (et la marque comme regardée)."""
+        simulation = self.simulations.get(simulation_id)
+        if simulation is not None and touch:
+            simulation.touch()
+        return simulation
+
+    def list_simulations(self) -> List[Dict[str, Any]]:
+        """Liste les simulations actives."""
+        return [simulation.to_dict() for simulation in self.simulations.values()]
+
+    def remove_simulation(self, simulation_id: str) -> bool:
+        """Retire une simulation ; son environnement retourne au pool."""
+        simulation = self.simulations.pop(simulation_id, None)
+        if simulation is None:
+            return False
+
+        group = self.groups.get(simulation.group_key)
+        if group is not None:
+            if simulation_id in group.simulation_ids:
+                group.simulation_ids.remove(simulation_id)
+            if not group.simulation_ids:
+                del self.groups[simulation.group_key]
+
+        simulation.closed = True
+        websocket_manager.forget_stream(simulation_id)
+        if simulation.config.record_timeline:
+            timeline_service.close_session(simulation_id)
+        if not simulation.busy:
+            environment_service.release_env(simulation.pool_key, simulation.env)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de l'ordonnanceur."""
+        return {
+            "active_simulations": len(self.simulations),
+            "groups": len(self.groups),
+            "max_simulations": self.max_simulations,
+            "idle_timeout_seconds": self.idle_timeout_seconds,
+            "ticks": self.ticks,
+            "batched_calls": self.batched_calls,
+            "scheduler_running": self._task is not None and not self._task.done()
+        }
+
+    # ------------------------------------------------------------------
+    # Ordonnanceur
+    # ------------------------------------------------------------------
+
+    async def _run(self):
+        """Boucle principale : avance chaque groupe lorsque son tick est dû."""
+        loop = asyncio.get_running_loop()
+        while True:
+            self._evict_idle()
+
+            now = loop.time()
+            due = []
+            for key, group in self.groups.items():
+                if group.next_tick <= now:
+                    due.append(key)
+                    group.next_tick += group.interval
+                    if group.next_tick <= now:
+                        # Ticks manqués (surcharge) : on ne rattrape pas
+                        group.next_tick = now + group.interval
+
+            if due:
+                self.ticks += 1
+                await asyncio.gather(*(self._tick_group(key) for key in due))
+
+            next_tick = min((g.next_tick for g in self.groups.values()), default=None)
+            timeout = 1.0 if next_tick is None else max(0.0, next_tick - loop.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick_group(self, group_key: Tuple):
+        """Avance toutes les simulations d'un groupe en un appel, puis publie leurs états."""
+        group = self.groups.get(group_key)
+        if group is None:
+            return
+        simulations = [self.simulations[sid] for sid in group.simulation_ids if sid in self.simulations]
+        if not simulations:
+            return
+
+        for simulation in simulations:
+            simulation.busy = True
+        # Annuler le tick n'arrête pas le thread : les simulations restent
+        # occupées jusqu'à la fin réelle du lot (voir `_finish_batch`)
+        batch = asyncio.ensure_future(asyncio.to_thread(self._step_batch, simulations))
+        self._batches.add(batch)
+        batch.add_done_callback(lambda _: self._finish_batch(batch, simulations))
+        try:
+            states = await asyncio.shield(batch)
+            self.batched_calls += 1
+        except Exception as e:
+            logger.error(f"Erreur lors du tick des simulations: {e}")
+            states = []
+
+        for state in states:
+            await websocket_manager.broadcast_game_state(state)
+
+    def _finish_batch(self, batch: asyncio.Future, simulations: List[LiveSimulation]):
+        """Fin d'un lot : libère ses simulations et rend au pool celles retirées entre-temps."""
+        self._batches.discard(batch)
+        if not batch.cancelled() and batch.exception() is not None:
+            logger.debug(f"Lot de simulations en échec: {batch.exception()}")
+        for simulation in simulations:
+            simulation.busy = False
+            if simulation.closed:
+                environment_service.release_env(simulation.pool_key, simulation.env)
+
+    def _step_batch(self, simulations: List[LiveSimulation]) -> List[Dict[str, Any]]:
+        """Avance un lot de simulations de même configuration (exécuté hors boucle)."""
+        first = simulations[0]
+        num_agents = 1 if first.environment_type == "configurable" else len(first.env.agents)
+        actions = np.random.randint(0, 4, size=(len(simulations), num_agents))
+
+        if first.config.policy_path:
+            policy = self._get_policy(first.config.policy_path, first.config.policy_algorithm)
+            try:
+                with _POLICY_PHASE.time():
+                    batch_obs = np.stack([simulation.pacman_obs() for simulation in simulations])
+                    pacman_actions, _ = policy.predict(batch_obs, deterministic=True)
+                actions[:, 0] = np.asarray(pacman_actions).reshape(-1)
+            except Exception as e:
+                logger.warning(f"Inférence de politique impossible, actions aléatoires: {e}")
+
+        states = []
+        for simulation, row in zip(simulations, actions):
+            if simulation.closed:
+                continue
+            try:
+                state = simulation.advance(row)
+                states.append(state)
+                if simulation.config.record_timeline:
+                    with _RECORD_PHASE.time():
+                        timeline_service.append(simulation.id, state)
+            except Exception as e:
+                logger.error(f"Erreur lors du step de la simulation {simulation.id}: {e}")
+        ENV_STEPS.labels(first.environment_type).inc(len(states))
+        return states
+
+    def _resolve_policy_path(self, policy_path: str) -> str:
+        """
+        Chemin réel d'un modèle, obligatoirement sous `models_dir`.
+
+        Raises:
+            ValueError: chemin hors du répertoire des modèles
+            FileNotFoundError: modèle absent
+        """
+        return resolve_model_path(self.models_dir, policy_path)
+
+    def _get_policy(self, policy_path: str, algorithm: str):
+        """
+        Charge (une fois) un modèle Stable-Baselines3 utilisé comme politique.
+
+        Appel bloquant, exécuté hors de la boucle asyncio. Le cache garde au
+        plus `max_policies` modèles.
+
+        Raises:
+            ValueError: chemin hors de `models_dir`, algorithme inconnu ou modèle illisible
+            FileNotFoundError: modèle absent
+            RuntimeError: Stable-Baselines3 indisponible
+        """
+        key = (self._resolve_policy_path(policy_path), algorithm)
+        with self._policies_lock:
+            if key in self.policies:
+                self.policies.move_to_end(key)
+                return self.policies[key]
+
+        try:
+            import stable_baselines3 as sb3
+        except ImportError:
+            raise RuntimeError("Stable-Baselines3 n'est pas disponible pour charger la politique")
+        algorithm_class = getattr(sb3, algorithm, None)
+        if algorithm_class is None:
+            raise ValueError(f"Algorithme inconnu: {algorithm}")
+        try:
+            policy = algorithm_class.load(key[0], device="cpu")
+        except (zipfile.BadZipFile, KeyError, EOFError) as e:
+            raise ValueError(f"Modèle illisible: {policy_path} ({e})")
+
+        with self._policies_lock:
+            self.policies[key] = policy
+            self.policies.move_to_end(key)
+            while len(self.policies) > self.max_policies:
+                self.policies.popitem(last=False)
+        return policy
+
+    def _evict_idle(self):
+        """Retire les simulations qui ne sont plus regardées."""
+        now = time.monotonic()
+        idle = [sid for sid, simulation in self.simulations.items()
+                if now - simulation.last_activity > self.idle_timeout_seconds]
+        for simulation_id in idle:
+            self.remove_simulation(simulation_id)
+            logger.info(f"Simulation inactive évincée: {simulation_id}")
+
+# Instance singleton du service
+simulation_service = SimulationService()
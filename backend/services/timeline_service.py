@@ -0,0 +1,312 @@
+"""
+Service de timeline de rejeu des épisodes.
+
+Chaque session (simulation en direct, entraînement...) possède deux fichiers
+en ajout seul dans `REPLAY_TIMELINE_DIR` :
+
+- ``<session>.frames`` : les états successifs encodés en trames clés / delta
+  (format binaire de `backend.utils.state_stream`). Une trame clé ouvre chaque
+  épisode, puis revient toutes les `REPLAY_KEYFRAME_INTERVAL` frames ;
+- ``<session>.idx`` : un enregistrement de taille fixe par frame, dans l'ordre
+  d'ajout : clé ``(épisode << 32) | step``, position et longueur de la trame,
+  et numéro d'enregistrement de la trame clé dont elle dépend.
+
+La lecture projette l'index en mémoire (``np.memmap``) : retrouver une frame
+est une recherche dichotomique vectorisée sur les clés (quelques microsecondes,
+même sur des millions de frames), puis une seule lecture contiguë du fichier
+de frames depuis la trame clé, décodée jusqu'à la fin de la plage demandée.
+
+Les plages sont servies par l'API REST et, sur le canal `game_state`, par le
+message client ``{"type": "replay", "session_id": ..., "episode": ...,
+"start_step": ..., "end_step": ...}``.
+"""
+import asyncio
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from fastapi import WebSocket
+
+from backend.config import settings
+from backend.services.websocket_service import websocket_manager
+from backend.utils.state_stream import GameStateStreamDecoder, GameStateStreamEncoder, KEYFRAME
+
+logger = logging.getLogger(__name__)
+
+# Enregistrement de l'index : clé (épisode, step), position, longueur, trame clé
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("offset", "<u8"), ("length", "<u4"), ("keyframe", "<u4")])
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+# Identifiant de flux des trames stockées (la session est déjà donnée par le fichier)
+_STREAM_ID = "t"
+
+def frame_key(episode: int, step: int) -> int:
+    """Clé d'index d'une frame : épisode sur les 32 bits de poids fort, step sur les autres."""
+    return (int(episode) << 32) | int(step)
+
+class _TimelineWriter:
+    """Fichiers ouverts d'une session et état de l'encodeur."""
+
+    def __init__(self, data_path: Path, index_path: Path, keyframe_interval: int):
+        self.lock = threading.Lock()
+        self.data = open(data_path, "ab", buffering=0)
+        self.index = open(index_path, "ab", buffering=0)
+        self.encoder = GameStateStreamEncoder(keyframe_interval)
+        self.data_size = data_path.stat().st_size
+        # Reprise d'une timeline existante : dernière clé et dernière trame clé
+        self.count = index_path.stat().st_size // INDEX_DTYPE.itemsize
+        self.last_key = -1
+        self.last_episode = None
+        self.keyframe = 0
+        if self.count:
+            last = np.fromfile(index_path, dtype=INDEX_DTYPE, count=1,
+                               offset=(self.count - 1) * INDEX_DTYPE.itemsize)[0]
+            self.last_key = int(last["key"])
+            self.last_episode = self.last_key >> 32
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+class _IndexView:
+    """Index projeté en mémoire, rafraîchi quand le fichier a grandi."""
+
+    def __init__(self, index_path: Path):
+        self.path = index_path
+        self.count = 0
+        self.records: Optional[np.ndarray] = None
+
+    def refresh(self) -> Optional[np.ndarray]:
+        count = self.path.stat().st_size // INDEX_DTYPE.itemsize if self.path.exists() else 0
+        if count != self.count:
+            self.records = np.memmap(self.path, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count else None
+            self.count = count
+        return self.records
+
+    def close(self):
+        """Libère la projection de l'index (avant suppression du fichier)."""
+        self.records = None
+        self.count = 0
+
+class ReplayTimelineService:
+    """Stockage en ajout seul et lecture à accès direct des épisodes joués."""
+
+    def __init__(self, base_dir: str = None, keyframe_interval: int = None,
+                 max_frames_per_request: int = None):
+        """Initialise le service (les fichiers sont ouverts à la demande)."""
+        self.base_dir = Path(base_dir or settings.REPLAY_TIMELINE_DIR)
+        self.keyframe_interval = keyframe_interval or settings.REPLAY_KEYFRAME_INTERVAL
+        self.max_frames_per_request = max_frames_per_request or settings.REPLAY_MAX_FRAMES_PER_REQUEST
+        self.writers: Dict[str, _TimelineWriter] = {}
+        self.views: Dict[str, _IndexView] = {}
+        self._lock = threading.Lock()
+        self.frames_appended = 0
+        self.frames_served = 0
+        websocket_manager.register_handler("replay", self.handle_replay_request)
+
+    def _paths(self, session_id: str) -> Tuple[Path, Path]:
+        """Chemins des fichiers de frames et d'index d'une session."""
+        if not _SESSION_ID.match(session_id or ""):
+            raise ValueError(f"Identifiant de session invalide: {session_id}")
+        return self.base_dir / f"{session_id}.frames", self.base_dir / f"{session_id}.idx"
+
+    def _writer(self, session_id: str) -> _TimelineWriter:
+        with self._lock:
+            writer = self.writers.get(session_id)
+            if writer is None:
+                data_path, index_path = self._paths(session_id)
+                self.base_dir.mkdir(parents=True, exist_ok=True)
+                writer = _TimelineWriter(data_path, index_path, self.keyframe_interval)
+                self.writers[session_id] = writer
+            return writer
+
+    def _view(self, session_id: str) -> _IndexView:
+        with self._lock:
+            view = self.views.get(session_id)
+            if view is None:
+                view = _IndexView(self._paths(session_id)[1])
+                self.views[session_id] = view
+            return view
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def append(self, session_id: str, state: Dict[str, Any]):
+        """
+        Ajoute un état à la timeline d'une session.
+
+        Les couples (épisode, step) doivent être strictement croissants ; un
+        état déjà stocké (ou antérieur) est ignoré.
+        """
+        writer = self._writer(session_id)
+        episode = int(state.get("episode", 0))
+        key = frame_key(episode, state.get("step", 0))
+
+        with writer.lock:
+            if key <= writer.last_key:
+                return
+            if episode != writer.last_episode:
+                # Chaque épisode commence par une trame clé (lecture directe d'un épisode)
+                writer.encoder.request_keyframe(_STREAM_ID)
+            frame = writer.encoder.encode({**state, "simulation_id": _STREAM_ID})
+            if frame[3] == KEYFRAME:
+                writer.keyframe = writer.count
+
+            record = np.zeros(1, dtype=INDEX_DTYPE)
+            record[0] = (key, writer.data_size, len(frame), writer.keyframe)
+            # La trame est écrite avant son enregistrement d'index : un lecteur
+            # ne voit jamais d'entrée pointant vers des données incomplètes
+            writer.data.write(frame)
+            writer.index.write(record.tobytes())
+
+            writer.data_size += len(frame)
+            writer.count += 1
+            writer.last_key = key
+            writer.last_episode = episode
+            self.frames_appended += 1
+
+    def close_session(self, session_id: str):
+        """Ferme les fichiers d'écriture d'une session (la timeline reste lisible)."""
+        with self._lock:
+            writer = self.writers.pop(session_id, None)
+        if writer is not None:
+            writer.close()
+
+    def delete_session(self, session_id: str) -> bool:
+        """
+        Supprime la timeline d'une session.
+
+        Les fichiers ouverts par le service (écriture, index projeté) sont
+        fermés avant la suppression, que Windows refuse sinon.
+        """
+        self.close_session(session_id)
+        with self._lock:
+            view = self.views.pop(session_id, None)
+        if view is not None:
+            view.close()
+        deleted = False
+        for path in self._paths(session_id):
+            if path.exists():
+                path.unlink()
+                deleted = True
+        return deleted
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def list_episodes(self, session_id: str) -> List[Dict[str, Any]]:
+        """Épisodes d'une session avec leur nombre de frames et leurs steps extrêmes."""
+        records = self._view(session_id).refresh()
+        if records is None:
+            return []
+        keys = np.asarray(records["key"])
+        episodes, first, counts = np.unique(keys >> np.uint64(32), return_index=True, return_counts=True)
+        steps = keys & np.uint64(0xFFFFFFFF)
+        return [{
+            "episode": int(episode),
+            "frames": int(count),
+            "first_step": int(steps[start]),
+            "last_step": int(steps[start + count - 1])
+        } for episode, start, count in zip(episodes, first, counts)]
+
+    def get_frames(self, session_id: str, episode: int, start_step: int = 0,
+                   end_step: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        États stockés d'un épisode pour les steps ``start_step..end_step`` (inclus).
+
+        Au plus `max_frames_per_request` états sont retournés.
+        """
+        records = self._view(session_id).refresh()
+        if records is None:
+            return []
+        end_step = 0xFFFFFFFF if end_step is None else min(int(end_step), 0xFFFFFFFF)
+        keys = records["key"]
+        first = int(np.searchsorted(keys, frame_key(episode, max(0, start_step)), side="left"))
+        last = int(np.searchsorted(keys, frame_key(episode, end_step), side="right"))
+        last = min(last, first + self.max_frames_per_request)
+        if first >= last:
+            return []
+
+        keyframe = int(records[first]["keyframe"])
+        begin = int(records[keyframe]["offset"])
+        end = int(records[last - 1]["offset"]) + int(records[last - 1]["length"])
+        offsets = np.asarray(records["offset"][keyframe:last]) - begin
+        lengths = np.asarray(records["length"][keyframe:last])
+
+        # Une seule lecture contiguë, sans garder le fichier ouvert
+        with open(self._paths(session_id)[0], "rb") as f:
+            f.seek(begin)
+            data = f.read(end - begin)
+
+        decoder = GameStateStreamDecoder()
+        states = []
+        for i, (offset, length) in enumerate(zip(offsets.tolist(), lengths.tolist())):
+            state = decoder.decode(data[offset:offset + length])
+            if keyframe + i >= first:
+                states.append(self._public_state(session_id, state))
+        self.frames_served += len(states)
+        return states
+
+    @staticmethod
+    def _public_state(session_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        """État décodé au format JSON de l'API."""
+        return {
+            "session_id": session_id,
+            "episode": state["episode"],
+            "step": state["step"],
+            "grid": state["grid"].tolist(),
+            "pacman": state["pacman"],
+            "ghosts": state["ghosts"],
+            "score": state["score"],
+            "lives": state["lives"],
+            "done": state["done"]
+        }
+
+    async def handle_replay_request(self, websocket: WebSocket, data: Dict[str, Any]):
+        """
+        Message client ``replay`` : envoie une plage de frames sur le canal `game_state`.
+
+        La plage est limitée à la place libre dans la file d'envoi du client ;
+        le message ``replay_complete`` final indique le step suivant à demander.
+        """
+        session_id = str(data.get("session_id", ""))
+        try:
+            episode = int(data.get("episode", 0))
+            start_step = int(data.get("start_step", 0))
+            end_step = int(data["end_step"]) if data.get("end_step") is not None else None
+            limit = max(1, websocket_manager.free_slots(websocket) - 1)
+            states = await asyncio.to_thread(self.get_frames, session_id, episode, start_step, end_step)
+        except (TypeError, ValueError) as e:
+            await websocket_manager.send_personal_message({"type": "error", "message": str(e)}, websocket)
+            return
+
+        states = states[:limit]
+        websocket_manager.send_replay(websocket, f"replay:{session_id}", states)
+        last = states[-1]["step"] if states else None
+        complete = not states or (end_step is not None and last >= end_step)
+        await websocket_manager.send_personal_message({
+            "type": "replay_complete",
+            "session_id": session_id,
+            "episode": episode,
+            "frames": len(states),
+            "next_step": None if complete else last + 1
+        }, websocket)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques du service."""
+        return {
+            "base_dir": str(self.base_dir),
+            "open_sessions": len(self.writers),
+            "keyframe_interval": self.keyframe_interval,
+            "frames_appended": self.frames_appended,
+            "frames_served": self.frames_served
+        }
+
+# Instance singleton du service
+timeline_service = ReplayTimelineService()
@@ -12,28 +12,36 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Callable, List
 from concurrent.futures import ThreadPoolExecutor
-
-try:
-    import stable_baselines3 as sb3
-    from stable_baselines3.common.callbacks import BaseCallback
-    from stable_baselines3.common.vec_env import DummyVecEnv
-    SB3_AVAILABLE = True
-except ImportError:
-    logging.warning("Stable-Baselines3 non disponible. L'entraînement RL ne fonctionnera pas.")
-    sb3 = None
-    BaseCallback = object
-    DummyVecEnv = None
-    SB3_AVAILABLE = False
+from functools import lru_cache
 
 from backend.config import AllParameters
 from backend.models.experiment import Session, TrainingMetrics
 from backend.services.environment_service import environment_service
 from backend.services.websocket_service import websocket_manager
+from backend.utils.instrumentation import registry, track_job
+from backend.utils.lazy_imports import modules_available
 
 logger = logging.getLogger(__name__)
 
-class TrainingCallback(BaseCallback):
-    """Callback personnalisé pour collecter les métriques et les envoyer via WebSocket."""
+# Stable-Baselines3 (et torch) n'est importé qu'au lancement d'un entraînement
+SB3_AVAILABLE = modules_available("stable_baselines3")
+if not SB3_AVAILABLE:
+    logging.warning("Stable-Baselines3 non disponible. L'entraînement RL ne fonctionnera pas.")
+
+TRAINING_STEPS = registry.counter(
+    "pacman_training_steps_total", "Timesteps d'entraînement effectués", ("session_id",)
+)
+TRAINING_SPS = registry.gauge(
+    "pacman_training_steps_per_second", "Débit d'entraînement sur le dernier rollout", ("session_id",)
+)
+
+class TrainingCallback:
+    """
+    Callback personnalisé pour collecter les métriques et les envoyer via WebSocket.
+    
+    Les instances sont créées par `create_training_callback`, qui combine cette
+    classe avec `BaseCallback` de Stable-Baselines3 au premier entraînement.
+    """
     
     def __init__(self, session_id: str, websocket_manager, verbose=0):
         super().__init__(verbose)
@@ -42,6 +50,8 @@ class TrainingCallback(BaseCallback):
         self.episode_rewards = []
         self.episode_lengths = []
         self.current_episode = 0
+        self._rollout_timesteps = 0
+        self._rollout_started = time.perf_counter()
     
     def _on_step(self) -> bool:
         """Appelé à chaque step de l'environnement."""
@@ -49,6 +59,15 @@ class TrainingCallback(BaseCallback):
     
     def _on_rollout_end(self) -> None:
         """Appelé à la fin de chaque rollout."""
+        # Débit du rollout (compté ici plutôt qu'à chaque step)
+        now = time.perf_counter()
+        timesteps = self.num_timesteps - self._rollout_timesteps
+        TRAINING_STEPS.labels(self.session_id).inc(max(timesteps, 0))
+        if now > self._rollout_started:
+            TRAINING_SPS.labels(self.session_id).set(timesteps / (now - self._rollout_started))
+        self._rollout_timesteps = self.num_timesteps
+        self._rollout_started = now
+        
         # Récupérer les métriques depuis le modèle
         if hasattr(self.model, 'logger'):
             for key, value in self.model.logger.name_to_value.items():
@@ -73,6 +92,18 @@ class TrainingCallback(BaseCallback):
     def _on_training_end(self) -> None:
         """Appelé à la fin de l'entraînement."""
         logger.info(f"Entraînement terminé pour la session {self.session_id}")
+        TRAINING_SPS.remove(self.session_id)
+        TRAINING_STEPS.remove(self.session_id)
+
+@lru_cache(maxsize=None)
+def _sb3_training_callback_class():
+    """Classe de callback dérivée de `BaseCallback` (import de Stable-Baselines3 différé)."""
+    from stable_baselines3.common.callbacks import BaseCallback
+    return type("TrainingCallback", (TrainingCallback, BaseCallback), {})
+
+def create_training_callback(session_id: str, websocket_manager, verbose=0) -> TrainingCallback:
+    """Crée le callback d'entraînement d'une session."""
+    return _sb3_training_callback_class()(session_id, websocket_manager, verbose)
 
 class TrainingService:
     """Service pour l'entraînement RL asynchrone."""
@@ -89,6 +120,7 @@ class TrainingService:
             logger.warning("Stable-Baselines3 n'est pas disponible. "
                           "L'entraînement RL sera simulé.")
     
+    @track_job("training_pacman")
     def train_pacman(self, session: Session, parameters: AllParameters, 
                     callback: Optional[Callable] = None) -> Dict[str, Any]:
         """Entraîne Pac-Man avec l'algorithme spécifié."""
@@ -101,6 +133,9 @@ class TrainingService:
         
         # Envelopper pour Stable-Baselines3
         if SB3_AVAILABLE:
+            import stable_baselines3 as sb3
+            from stable_baselines3.common.vec_env import DummyVecEnv
+            
             vec_env = DummyVecEnv([lambda: env])
             
             # Sélectionner l'algorithme
@@ -124,7 +159,7 @@ class TrainingService:
             model = algorithm_class("MlpPolicy", vec_env, **model_kwargs)
             
             # Callback personnalisé
-            training_callback = TrainingCallback(
+            training_callback = create_training_callback(
                 session_id=session.id,
                 websocket_manager=websocket_manager
             )
@@ -161,6 +196,7 @@ class TrainingService:
                 "final_reward": 100.0
             }
     
+    @track_job("training_ghosts")
     def train_ghosts(self, session: Session, parameters: AllParameters,
                     ghost_indices: List[int] = None) -> Dict[str, Any]:
         """Entraîne les fantômes avec l'algorithme spécifié."""
@@ -185,6 +221,9 @@ class TrainingService:
                 continue
             
             if SB3_AVAILABLE:
+                import stable_baselines3 as sb3
+                from stable_baselines3.common.vec_env import DummyVecEnv
+                
                 vec_env = DummyVecEnv([lambda: wrapper])
                 algorithm_class = getattr(sb3, session.algorithm_ghosts, sb3.DQN)
                 
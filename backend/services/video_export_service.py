@@ -0,0 +1,355 @@
+"""
+Service d'export vidéo hors ligne des épisodes.
+
+Rejoue des épisodes enregistrés (graine + actions de chaque agent) ou fait
+jouer une politique, sans affichage, puis encode chaque épisode en GIF
+(Pillow) ou en MP4 (imageio, optionnel). Les épisodes sont répartis sur un
+pool de processus : un épisode = une tâche (simulation, rendu et encodage).
+Dans un processus du pool de tâches de fond, les épisodes sont joués l'un
+après l'autre (pas de pool imbriqué).
+
+Chaque partie est jouée à travers `EpisodeRecorder` : l'enregistrement
+compact de l'épisode (graine + actions, quelques centaines d'octets) est
+écrit à côté de la vidéo (``.pacrec``) et permet de reconstruire n'importe
+quel état plus tard.
+
+Pendant la partie, seule la grille des indices de tuile est conservée à
+chaque step ; les images sont composées au moment de l'encodage, en couleurs
+indexées pour le GIF (pas de quantification), en RGB pour le MP4.
+
+Les vidéos sont écrites à côté de l'archive de session
+(``<archive>_videos/``, archive du répertoire des archives seulement), ou
+dans ``EXPERIMENTS_DIR/videos`` sans archive. Le modèle de politique doit se
+trouver sous ``MODELS_DIR``.
+"""
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Ajout du chemin src pour importer le moteur de rendu des environnements
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from pacman_env.recording import EpisodeRecorder, EpisodeRecording
+from pacman_env.rendering import PALETTE, compose_frame, grid_codes, tile_indices
+
+from backend.config import settings, GameParameters
+from backend.models.experiment import EpisodeVideoExportRequest
+from backend.services.environment_service import environment_service
+from backend.utils.paths import resolve_model_path, resolve_under
+
+try:
+    from PIL import Image
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+try:
+    import imageio.v2 as imageio
+    HAS_IMAGEIO = True
+except ImportError:
+    HAS_IMAGEIO = False
+
+logger = logging.getLogger(__name__)
+
+# Type MIME de chaque format vidéo
+VIDEO_FORMATS = {
+    "gif": "image/gif",
+    "mp4": "video/mp4",
+}
+
+# Politiques chargées, par processus de rendu
+_POLICIES: Dict[Tuple[str, str], Any] = {}
+
+def _load_policy(policy_path: str, algorithm: str):
+    """Charge (une fois par processus) un modèle Stable-Baselines3."""
+    key = (policy_path, algorithm)
+    if key not in _POLICIES:
+        try:
+            import stable_baselines3 as sb3
+        except ImportError:
+            raise RuntimeError("Stable-Baselines3 n'est pas disponible pour charger la politique")
+        algorithm_class = getattr(sb3, algorithm, None)
+        if algorithm_class is None:
+            raise ValueError(f"Algorithme inconnu: {algorithm}")
+        _POLICIES[key] = algorithm_class.load(policy_path, device="cpu")
+    return _POLICIES[key]
+
+def _create_env(environment_type: str, game: Dict[str, Any], seed: Optional[int] = None):
+    """Crée un environnement neuf (hors pool), doté de son propre générateur semé par `seed`."""
+    game_params = GameParameters(**game)
+    if environment_type == "multiagent":
+        env = environment_service.create_multiagent_env(game_params, seed=seed)
+    else:
+        env = environment_service.create_configurable_env(game_params, seed=seed)
+    if env is None:
+        raise RuntimeError(f"Environnement {environment_type} indisponible")
+    return env
+
+def _tiles(env, environment_type: str) -> np.ndarray:
+    """Grille des indices de tuile de l'état courant d'un environnement."""
+    vulnerable = env.vulnerable_ghosts if environment_type == "multiagent" else ()
+    return tile_indices(grid_codes(env.dots, env.walls), env.pacman_pos,
+                        env.ghost_positions, vulnerable)
+
+def play_episode(environment_type: str, game: Dict[str, Any], seed: int,
+                 actions: Optional[List[List[int]]] = None,
+                 policy_path: Optional[str] = None, policy_algorithm: str = "DQN",
+                 max_steps: int = 500) -> Tuple[List[np.ndarray], Dict[str, Any], EpisodeRecording]:
+    """
+    Joue un épisode sans rendu d'image.
+
+    La partie passe par `EpisodeRecorder`, qui sème le générateur de
+    l'environnement à partir de `seed` et du numéro de step : rejouer les
+    mêmes actions avec la même graine reproduit l'épisode, même si d'autres
+    threads consomment le générateur global de NumPy. Les actions aléatoires (agents
+    sans politique) viennent d'un générateur séparé.
+
+    Args:
+        environment_type: "configurable" ou "multiagent"
+        game: Paramètres de jeu (`GameParameters` sous forme de dictionnaire)
+        seed: Graine de l'épisode
+        actions: Actions enregistrées, une liste par step (Pac-Man puis fantômes)
+        policy_path: Modèle SB3 pilotant Pac-Man (ignoré si `actions` est fourni)
+        policy_algorithm: Algorithme SB3 du modèle
+        max_steps: Nombre maximal de steps
+
+    Returns:
+        Tuple (indices de tuile par step, y compris l'état initial ; résumé ;
+        enregistrement de l'épisode)
+    """
+    env = _create_env(environment_type, game, seed)
+    recorder = EpisodeRecorder(env)
+    obs, _ = recorder.reset(seed=seed)
+    rng = np.random.default_rng(seed)
+    policy = _load_policy(policy_path, policy_algorithm) if policy_path and actions is None else None
+
+    num_agents = 1 if environment_type == "configurable" else len(env.agents)
+    tiles = [_tiles(env, environment_type)]
+    score = 0.0
+    done = False
+    steps = max_steps if actions is None else min(max_steps, len(actions))
+
+    for step in range(steps):
+        if actions is not None:
+            row = [int(a) for a in actions[step]]
+            if len(row) < num_agents:
+                raise ValueError(f"Step {step}: {len(row)} action(s) pour {num_agents} agent(s)")
+        else:
+            row = rng.integers(0, 4, size=num_agents).tolist()
+            if policy is not None:
+                pacman_obs = obs["pacman"] if environment_type == "multiagent" else obs
+                action, _ = policy.predict(pacman_obs, deterministic=True)
+                row[0] = int(np.asarray(action).reshape(-1)[0])
+
+        if environment_type == "configurable":
+            obs, reward, terminated, truncated, _ = recorder.step(row[0])
+            done = terminated or truncated
+        else:
+            action_dict = {agent: row[i] for i, agent in enumerate(env.agents)}
+            obs, rewards, terminations, truncations, _ = recorder.step(action_dict)
+            reward = rewards["pacman"]
+            done = terminations["pacman"] or truncations["pacman"]
+
+        score += reward
+        tiles.append(_tiles(env, environment_type))
+        if done:
+            break
+
+    env.close()
+    summary = {"seed": seed, "steps": len(tiles) - 1, "score": round(float(score), 2), "done": bool(done)}
+    return tiles, summary, recorder.recording
+
+def encode_video(tiles: List[np.ndarray], path: Path, format: str, fps: int,
+                 cell_size: int, show_grid: bool = False):
+    """Compose les frames d'un épisode et les encode dans `path`."""
+    if format == "gif":
+        if not HAS_PILLOW:
+            raise RuntimeError("Pillow est requis pour l'export GIF")
+        palette = PALETTE.tobytes()
+
+        def images():
+            for indices in tiles:
+                image = Image.fromarray(compose_frame(indices, cell_size, show_grid, indexed=True), "P")
+                image.putpalette(palette)
+                yield image
+
+        frames = images()
+        first = next(frames)
+        # Pillow ne stocke que la zone modifiée d'une frame à l'autre et fusionne
+        # les frames identiques consécutives ; la palette étant fixe, on saute
+        # son optimisation (l'essentiel du temps d'encodage sinon)
+        first.save(path, format="GIF", save_all=True, append_images=frames,
+                   duration=max(1, round(1000 / fps)), loop=0, optimize=False)
+    elif format == "mp4":
+        if not HAS_IMAGEIO:
+            raise RuntimeError("imageio (avec imageio-ffmpeg) est requis pour l'export MP4")
+        with imageio.get_writer(path, format="FFMPEG", fps=fps, codec="libx264",
+                                macro_block_size=2) as writer:
+            for indices in tiles:
+                writer.append_data(PALETTE[compose_frame(indices, cell_size, show_grid, indexed=True)])
+    else:
+        raise ValueError(f"Format vidéo non supporté: {format}")
+
+def _export_episode(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Tâche d'un processus de rendu : joue, rend et encode un épisode."""
+    start = time.perf_counter()
+    tiles, summary, recording = play_episode(
+        job["environment_type"], job["game"], job["seed"], job["actions"],
+        job["policy_path"], job["policy_algorithm"], job["max_steps"]
+    )
+    path = Path(job["path"])
+    encode_video(tiles, path, job["format"], job["fps"], job["cell_size"], job["show_grid"])
+    recording_path = path.with_suffix(".pacrec")
+    recording_path.write_bytes(recording.to_bytes())
+    summary.update({
+        "episode": job["episode"],
+        "path": str(path),
+        "frames": len(tiles),
+        "bytes": path.stat().st_size,
+        "recording": str(recording_path),
+        "seconds": round(time.perf_counter() - start, 3)
+    })
+    return summary
+
+class VideoExportService:
+    """Export vidéo par lots des épisodes, réparti sur un pool de processus."""
+
+    def __init__(self, max_workers: int = None, max_episodes: int = None,
+                 models_dir: str = None, archive_dir: str = None):
+        """Initialise le service."""
+        self.max_workers = max_workers or settings.VIDEO_EXPORT_MAX_WORKERS
+        self.max_episodes = max_episodes or settings.VIDEO_EXPORT_MAX_EPISODES
+        self.models_dir = models_dir or settings.MODELS_DIR
+        self.archive_dir = archive_dir or os.path.join(settings.EXPERIMENTS_DIR, "archives")
+
+    def supported_formats(self) -> List[str]:
+        """Formats vidéo disponibles avec l'installation courante."""
+        formats = []
+        if HAS_PILLOW:
+            formats.append("gif")
+        if HAS_IMAGEIO:
+            formats.append("mp4")
+        return formats
+
+    def output_dir(self, archive_path: Optional[str] = None) -> Path:
+        """
+        Répertoire des vidéos : à côté de l'archive de session, sinon `EXPERIMENTS_DIR/videos`.
+
+        Raises:
+            ValueError: archive hors du répertoire des archives ou introuvable
+        """
+        if archive_path:
+            archive = Path(resolve_under(self.archive_dir, archive_path))
+            if not archive.is_file():
+                raise ValueError(f"Archive introuvable: {archive_path}")
+            return archive.parent / f"{archive.stem}_videos"
+        return Path(settings.EXPERIMENTS_DIR) / "videos"
+
+    def policy_path(self, request: EpisodeVideoExportRequest) -> Optional[str]:
+        """
+        Chemin réel du modèle de politique de la demande (None sans politique).
+
+        Raises:
+            ValueError: modèle hors de `MODELS_DIR`
+            FileNotFoundError: modèle absent
+        """
+        if not request.policy_path or request.actions is not None:
+            return None
+        return resolve_model_path(self.models_dir, request.policy_path)
+
+    def check_request(self, request: EpisodeVideoExportRequest) -> List[int]:
+        """
+        Vérifie une demande avant de la planifier ; retourne la graine de chaque épisode.
+
+        Raises:
+            ValueError: format indisponible, archive ou modèle hors de leur répertoire,
+                archive introuvable ou trop d'épisodes
+            FileNotFoundError: modèle absent
+        """
+        if request.format not in self.supported_formats():
+            raise ValueError(f"Format vidéo non supporté: {request.format}")
+
+        count = len(request.actions) if request.actions is not None else request.episodes
+        if count > self.max_episodes:
+            raise ValueError(f"Trop d'épisodes demandés ({count} > {self.max_episodes})")
+        seeds = list(request.seeds) if request.seeds else list(range(count))
+        if len(seeds) < count:
+            raise ValueError(f"{len(seeds)} graine(s) pour {count} épisode(s)")
+        self.output_dir(request.archive_path)
+        self.policy_path(request)
+        return seeds[:count]
+
+    def export_episodes(self, request: EpisodeVideoExportRequest) -> Dict[str, Any]:
+        """
+        Exporte les épisodes d'une demande (appel bloquant, exécuté par le pool de tâches).
+
+        Returns:
+            Dictionnaire avec le répertoire de sortie et le résumé de chaque épisode
+
+        Raises:
+            ValueError: format indisponible, archive ou modèle hors de leur répertoire,
+                archive introuvable ou trop d'épisodes
+            FileNotFoundError: modèle absent
+        """
+        seeds = self.check_request(request)
+        count = len(seeds)
+        policy_path = self.policy_path(request)
+
+        output_dir = self.output_dir(request.archive_path)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        prefix = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        jobs = [{
+            "episode": i,
+            "environment_type": request.environment_type,
+            "game": request.game.dict(),
+            "seed": int(seeds[i]),
+            "actions": request.actions[i] if request.actions is not None else None,
+            "policy_path": policy_path,
+            "policy_algorithm": request.policy_algorithm,
+            "max_steps": request.max_steps,
+            "format": request.format,
+            "fps": request.fps,
+            "cell_size": request.cell_size,
+            "show_grid": request.show_grid,
+            "path": str(output_dir / f"{prefix}_episode_{i:03d}_seed{seeds[i]}.{request.format}")
+        } for i in range(count)]
+
+        # Le nombre de processus demandé est plafonné par la configuration du service ;
+        # dans un processus du pool de tâches, pas de pool imbriqué (la
+        # concurrence est celle de la famille "video" de JOB_CONCURRENCY)
+        if multiprocessing.parent_process() is not None:
+            workers = 1
+        else:
+            workers = max(1, min(request.workers or self.max_workers, self.max_workers, len(jobs)))
+        start = time.perf_counter()
+        if workers == 1:
+            # Un seul processus : pas de pool (ni coût de démarrage)
+            results = [_export_episode(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_export_episode, jobs))
+        elapsed = time.perf_counter() - start
+
+        logger.info(f"Export vidéo: {len(results)} épisode(s) en {elapsed:.2f}s "
+                    f"({workers} processus) vers {output_dir}")
+        return {
+            "output_dir": str(output_dir),
+            "format": request.format,
+            "media_type": VIDEO_FORMATS[request.format],
+            "workers": workers,
+            "elapsed_seconds": round(elapsed, 3),
+            "total_frames": sum(result["frames"] for result in results),
+            "episodes": results
+        }
+
+# Instance singleton du service
+video_export_service = VideoExportService()
@@ -3,43 +3,202 @@ Service de gestion des connexions WebSocket pour la communication temps réel.
 
 Gère les connexions clients, les abonnements aux canaux,
 et la diffusion des mises à jour (métriques, état du jeu, statuts).
+
+Chaque message diffusé est sérialisé une seule fois puis déposé dans la file
+d'envoi bornée de chaque destinataire ; une tâche d'envoi par connexion vide
+cette file, de sorte qu'un client lent ne retarde ni les autres clients ni le
+producteur (boucle de simulation, thread d'entraînement). Lorsqu'une file est
+pleine, la politique de débordement s'applique : ``drop_oldest`` (le plus
+ancien message en attente est abandonné), ``coalesce`` (un message de même
+clé en attente est remplacé par le plus récent) ou ``disconnect`` (le client
+trop lent est déconnecté). Les connexions inactives sont fermées par une
+tâche de balayage. Sur le canal `game_state`, un client peut s'abonner au
+format binaire (``{"type": "subscribe", "channel": "game_state",
+"format": "binary"}``) : il reçoit alors des trames clés / delta décrites
+dans `backend.utils.state_stream`, et peut demander une trame clé avec
+``{"type": "resync"}`` s'il détecte un trou dans les numéros de séquence.
+
+Les canaux sont conflatés : les abonnés d'un canal sont regroupés par format
+et par cadence, et chaque groupe ne reçoit, par fenêtre, que la dernière
+valeur de chaque clé (session pour `metrics`, simulation pour `game_state`).
+La fenêtre d'un canal vient de `WEBSOCKET_CONFLATION_WINDOWS` ; un client peut
+demander une cadence maximale à l'abonnement (``{"type": "subscribe",
+"channel": "metrics", "max_hz": 5}``). La sérialisation (et l'encodage
+binaire) se fait une fois par groupe et par valeur livrée : le coût côté
+serveur suit la cadence des abonnés, pas celle des producteurs.
+
+D'autres services peuvent traiter des types de messages clients
+supplémentaires via `register_handler` (par exemple ``replay`` pour la
+timeline de rejeu) ; `send_replay` envoie une plage d'états rejoués à un seul
+client, dans le format de son abonnement `game_state`.
 """
 import asyncio
 import json
 import logging
-from typing import Dict, List, Set, Any
+import time
+from collections import deque
+from typing import Dict, List, Set, Any, Awaitable, Callable, Iterable, Optional, Tuple, Union, Hashable
 from datetime import datetime
 
 from fastapi import WebSocket
 
+from backend.config import settings
 from backend.models.experiment import WebSocketMessage
+from backend.utils.instrumentation import registry
+from backend.utils.state_stream import GameStateStreamEncoder
 
 logger = logging.getLogger(__name__)
 
+# Formats de diffusion acceptés par canal lors de l'abonnement
+CHANNEL_FORMATS = {"game_state": ("json", "binary")}
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Champ des données identifiant la valeur conflatée, par canal ; les messages
+# sans clé (canaux d'événements, champ absent) ne sont jamais conflatés
+CONFLATION_KEYS = {"metrics": "session_id", "game_state": "simulation_id", "jobs": "id"}
+
+class _OutboundQueue:
+    """File d'envoi bornée d'une connexion (messages déjà sérialisés)."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: deque = deque()
+        self.pending: Dict[Hashable, list] = {}
+        self.ready = asyncio.Event()
+        self.max_depth = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def full(self) -> bool:
+        return len(self.entries) >= self.maxsize
+    
+    def put(self, payload: Union[str, bytes], key: Optional[Hashable] = None):
+        """Ajoute un message en fin de file."""
+        entry = [key, payload]
+        self.entries.append(entry)
+        if key is not None:
+            self.pending[key] = entry
+        self.max_depth = max(self.max_depth, len(self.entries))
+        self.ready.set()
+    
+    def replace(self, key: Optional[Hashable], payload: Union[str, bytes]) -> bool:
+        """Remplace le message en attente de même clé ; False s'il n'y en a pas."""
+        entry = self.pending.get(key) if key is not None else None
+        if entry is None:
+            return False
+        entry[1] = payload
+        self.coalesced += 1
+        return True
+    
+    def drop_oldest(self) -> Optional[Hashable]:
+        """Abandonne le plus ancien message en attente et retourne sa clé."""
+        key, _ = self._pop()
+        self.dropped += 1
+        return key
+    
+    async def get(self) -> Union[str, bytes]:
+        """Attend et retire le prochain message à envoyer."""
+        while not self.entries:
+            self.ready.clear()
+            await self.ready.wait()
+        return self._pop()[1]
+    
+    def _pop(self) -> list:
+        entry = self.entries.popleft()
+        if entry[0] is not None and self.pending.get(entry[0]) is entry:
+            del self.pending[entry[0]]
+        return entry
+
+class _RateGroup:
+    """Abonnés d'un canal partageant un format et une cadence de livraison."""
+    
+    def __init__(self, channel: str, format: str, interval: float, keyframe_interval: int):
+        self.channel = channel
+        self.format = format
+        self.interval = interval
+        self.key = (channel, format, interval)
+        self.subscribers: Set[WebSocket] = set()
+        self.pending: Dict[Hashable, Dict[str, Any]] = {}
+        self.next_due = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Chaque groupe binaire a ses propres états de référence : les deltas
+        # sont calculés entre les valeurs effectivement livrées au groupe
+        self.encoder = GameStateStreamEncoder(keyframe_interval) if format == "binary" else None
+        self.published = 0
+        self.delivered = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Résumé du groupe pour les statistiques."""
+        return {
+            "format": self.format,
+            "max_hz": round(1.0 / self.interval, 2) if self.interval > 0 else None,
+            "subscribers": len(self.subscribers),
+            "pending": len(self.pending),
+            "published": self.published,
+            "delivered": self.delivered,
+            "conflated": self.published - self.delivered - len(self.pending)
+        }
+
+WS_SEND_SECONDS = registry.histogram(
+    "pacman_websocket_send_seconds", "Durée d'envoi d'un message à un client WebSocket", ("format",)
+)
+_SEND_BINARY = WS_SEND_SECONDS.labels("binary")
+_SEND_TEXT = WS_SEND_SECONDS.labels("json")
+
 class WebSocketManager:
     """Gestionnaire des connexions WebSocket."""
     
-    def __init__(self):
+    def __init__(self, queue_size: int = None, overflow_policy: str = None,
+                 idle_timeout_seconds: float = None, sweep_interval_seconds: float = None):
         """Initialise le gestionnaire avec des collections vides."""
+        self.queue_size = queue_size or settings.WEBSOCKET_SEND_QUEUE_SIZE
+        self.overflow_policy = overflow_policy or settings.WEBSOCKET_OVERFLOW_POLICY
+        if self.overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue: {self.overflow_policy}")
+        self.idle_timeout_seconds = idle_timeout_seconds or settings.WEBSOCKET_IDLE_TIMEOUT_SECONDS
+        self.sweep_interval_seconds = sweep_interval_seconds or settings.WEBSOCKET_IDLE_SWEEP_INTERVAL_SECONDS
+        self.overflow_disconnects = 0
+        self.idle_disconnects = 0
+        self._sweeper: Optional[asyncio.Task] = None
         self.active_connections: List[WebSocket] = []
         self.subscriptions: Dict[str, Set[WebSocket]] = {
             "metrics": set(),
             "game_state": set(),
             "session_updates": set(),
             "experiment_updates": set(),
+            "jobs": set(),
             "errors": set()
         }
         self.connection_info: Dict[WebSocket, Dict[str, Any]] = {}
+        self.conflation_windows: Dict[str, float] = dict(settings.WEBSOCKET_CONFLATION_WINDOWS)
+        self.rate_groups: Dict[Tuple[str, str, float], _RateGroup] = {}
+        self.message_handlers: Dict[str, Callable[[WebSocket, Dict[str, Any]], Awaitable[None]]] = {}
+    
+    def register_handler(self, message_type: str,
+                         handler: Callable[[WebSocket, Dict[str, Any]], Awaitable[None]]):
+        """Associe une coroutine à un type de message client non géré ici."""
+        self.message_handlers[message_type] = handler
     
     async def connect(self, websocket: WebSocket):
         """Accepte une nouvelle connexion WebSocket."""
         await websocket.accept()
         self.active_connections.append(websocket)
+        queue = _OutboundQueue(self.queue_size)
         self.connection_info[websocket] = {
             "connected_at": datetime.now(),
             "subscriptions": set(),
-            "last_activity": datetime.now()
+            "groups": {},
+            "last_activity": datetime.now(),
+            "queue": queue,
+            "sender": asyncio.create_task(self._sender(websocket, queue))
         }
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_idle())
         logger.info(f"Nouvelle connexion WebSocket (total: {len(self.active_connections)})")
     
     def disconnect(self, websocket: WebSocket):
@@ -48,33 +207,64 @@ class WebSocketManager:
             self.active_connections.remove(websocket)
         
         # Retirer de tous les abonnements
-        for channel in self.subscriptions.values():
-            if websocket in channel:
-                channel.remove(websocket)
+        for channel, subscribers in self.subscriptions.items():
+            if websocket in subscribers:
+                subscribers.remove(websocket)
+                self._leave_group(websocket, channel)
         
-        if websocket in self.connection_info:
-            del self.connection_info[websocket]
+        info = self.connection_info.pop(websocket, None)
+        if info is None:
+            return
+        info["sender"].cancel()
         
         logger.info(f"Connexion WebSocket fermée (restantes: {len(self.active_connections)})")
     
     async def disconnect_all(self):
         """Déconnecte tous les clients WebSocket."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
         for websocket in self.active_connections.copy():
-            await websocket.close()
-        self.active_connections.clear()
-        self.subscriptions.clear()
-        self.connection_info.clear()
+            self.disconnect(websocket)
+            await self._close(websocket)
         logger.info("Toutes les connexions WebSocket ont été fermées")
     
-    async def subscribe(self, websocket: WebSocket, channel: str):
-        """Abonne un client à un canal spécifique."""
+    async def subscribe(self, websocket: WebSocket, channel: str, format: str = "json",
+                        max_hz: Optional[float] = None):
+        """
+        Abonne un client à un canal spécifique.
+        
+        Args:
+            format: "json" ou "binary" (canal `game_state` uniquement)
+            max_hz: Cadence maximale de livraison souhaitée par le client
+        """
         if channel not in self.subscriptions:
             logger.warning(f"Tentative d'abonnement à un canal inconnu: {channel}")
             return False
+        if format not in CHANNEL_FORMATS.get(channel, ("json",)):
+            logger.warning(f"Format {format} non supporté sur le canal {channel}")
+            return False
+        if max_hz is not None and max_hz <= 0:
+            logger.warning(f"Cadence maximale invalide: {max_hz}")
+            return False
+        
+        interval = max(self.conflation_windows.get(channel, 0.0), 1.0 / max_hz if max_hz else 0.0)
+        
+        # Un nouvel abonnement au même canal remplace le précédent
+        self._leave_group(websocket, channel)
+        group = self.rate_groups.get((channel, format, interval))
+        if group is None:
+            group = _RateGroup(channel, format, interval, settings.WEBSOCKET_KEYFRAME_INTERVAL)
+            self.rate_groups[group.key] = group
+        group.subscribers.add(websocket)
+        if group.encoder is not None:
+            # Le nouveau client doit commencer par une trame clé
+            group.encoder.request_keyframe()
         
         self.subscriptions[channel].add(websocket)
         if websocket in self.connection_info:
             self.connection_info[websocket]["subscriptions"].add(channel)
+            self.connection_info[websocket]["groups"][channel] = group.key
         
         logger.debug(f"Client abonné au canal {channel}")
         return True
@@ -83,6 +273,7 @@ class WebSocketManager:
         """Désabonne un client d'un canal spécifique."""
         if channel in self.subscriptions and websocket in self.subscriptions[channel]:
             self.subscriptions[channel].remove(websocket)
+            self._leave_group(websocket, channel)
             if websocket in self.connection_info:
                 self.connection_info[websocket]["subscriptions"].discard(channel)
             logger.debug(f"Client désabonné du canal {channel}")
@@ -102,12 +293,19 @@ class WebSocketManager:
         if message_type == "subscribe":
             channel = data.get("channel", "")
             if channel:
-                await self.subscribe(websocket, channel)
-                await self.send_personal_message({
-                    "type": "subscription_confirmed",
-                    "channel": channel,
-                    "timestamp": datetime.now().isoformat()
-                }, websocket)
+                format = data.get("format", "json")
+                try:
+                    max_hz = float(data["max_hz"]) if data.get("max_hz") is not None else None
+                except (TypeError, ValueError):
+                    max_hz = -1.0
+                if await self.subscribe(websocket, channel, format, max_hz):
+                    await self.send_personal_message({
+                        "type": "subscription_confirmed",
+                        "channel": channel,
+                        "format": format,
+                        "max_hz": max_hz,
+                        "timestamp": datetime.now().isoformat()
+                    }, websocket)
         
         elif message_type == "unsubscribe":
             channel = data.get("channel", "")
@@ -119,12 +317,21 @@ class WebSocketManager:
                     "timestamp": datetime.now().isoformat()
                 }, websocket)
         
+        elif message_type == "resync":
+            # Trou détecté dans la séquence binaire : prochaine trame en clé
+            group = self.rate_groups.get(self.connection_info[websocket]["groups"].get("game_state"))
+            if group is not None and group.encoder is not None:
+                group.encoder.request_keyframe(data.get("simulation_id"))
+        
         elif message_type == "ping":
             await self.send_personal_message({
                 "type": "pong",
                 "timestamp": datetime.now().isoformat()
             }, websocket)
         
+        elif message_type in self.message_handlers:
+            await self.message_handlers[message_type](websocket, data)
+        
         else:
             logger.debug(f"Message WebSocket non traité: {message_type}")
     
@@ -136,7 +343,7 @@ class WebSocketManager:
                 data=data,
                 timestamp=datetime.now()
             )
-            await websocket.send_json(message.dict())
+            self._enqueue(websocket, message.json())
         except Exception as e:
             logger.error(f"Erreur lors de l'envoi d'un message personnel: {e}")
     
@@ -147,18 +354,7 @@ class WebSocketManager:
             data=data,
             timestamp=datetime.now()
         )
-        
-        disconnected = []
-        for websocket in self.active_connections:
-            try:
-                await websocket.send_json(message.dict())
-            except Exception as e:
-                logger.error(f"Erreur lors de la diffusion à un client: {e}")
-                disconnected.append(websocket)
-        
-        # Nettoyer les connexions défaillantes
-        for websocket in disconnected:
-            self.disconnect(websocket)
+        self._enqueue_all(self.active_connections.copy(), message.json())
     
     async def broadcast_to_channel(self, channel: str, data: Dict[str, Any]):
         """Diffuse un message aux clients abonnés à un canal spécifique."""
@@ -166,24 +362,175 @@ class WebSocketManager:
             logger.warning(f"Tentative de diffusion sur un canal inconnu: {channel}")
             return
         
-        message = WebSocketMessage(
-            type=data.get("type", channel),
-            data=data,
-            timestamp=datetime.now()
-        )
+        payload = data.get("data")
+        key = payload.get(CONFLATION_KEYS[channel]) if channel in CONFLATION_KEYS and isinstance(payload, dict) else None
+        for group in [g for g in self.rate_groups.values() if g.channel == channel]:
+            self._publish(group, key, data)
+    
+    def send_replay(self, websocket: WebSocket, stream_id: str, states: List[Dict[str, Any]]):
+        """
+        Envoie une plage d'états rejoués à un client, hors groupes de diffusion.
         
-        disconnected = []
-        for websocket in self.subscriptions[channel].copy():
+        Un abonné binaire de `game_state` reçoit un flux dédié (`stream_id`)
+        commençant par une trame clé ; les autres reçoivent des messages
+        JSON ``replay_state``.
+        """
+        info = self.connection_info.get(websocket)
+        if info is None:
+            return
+        group_key = info["groups"].get("game_state")
+        if group_key is not None and group_key[1] == "binary":
+            encoder = GameStateStreamEncoder(settings.WEBSOCKET_KEYFRAME_INTERVAL)
+            for state in states:
+                self._enqueue(websocket, encoder.encode({**state, "simulation_id": stream_id}))
+        else:
+            for state in states:
+                self._enqueue(websocket, WebSocketMessage(
+                    type="replay_state", data=state, timestamp=datetime.now()
+                ).json())
+    
+    def free_slots(self, websocket: WebSocket) -> int:
+        """Places libres dans la file d'envoi d'un client."""
+        info = self.connection_info.get(websocket)
+        return 0 if info is None else info["queue"].maxsize - len(info["queue"])
+    
+    def forget_stream(self, stream_id: str):
+        """Oublie les états de référence binaires d'une simulation terminée."""
+        for group in self.rate_groups.values():
+            if group.encoder is not None:
+                group.encoder.forget(stream_id)
+    
+    def _leave_group(self, websocket: WebSocket, channel: str):
+        """Retire un client de son groupe de cadence sur un canal."""
+        for group in [g for g in self.rate_groups.values() if g.channel == channel]:
+            group.subscribers.discard(websocket)
+            if not group.subscribers:
+                if group.timer is not None:
+                    group.timer.cancel()
+                del self.rate_groups[group.key]
+    
+    def _publish(self, group: _RateGroup, key: Optional[Hashable], data: Dict[str, Any]):
+        """Publie une valeur vers un groupe : livrée tout de suite ou conflatée jusqu'à échéance."""
+        group.published += 1
+        if group.interval <= 0 or key is None:
+            self._deliver(group, key, data)
+            return
+        
+        group.pending[key] = data
+        if group.timer is None:
+            loop = asyncio.get_running_loop()
+            delay = group.next_due - loop.time()
+            if delay <= 0:
+                self._flush_group(group)
+            else:
+                group.timer = loop.call_later(delay, self._flush_group, group)
+    
+    def _flush_group(self, group: _RateGroup):
+        """Livre la dernière valeur de chaque clé en attente dans un groupe."""
+        group.timer = None
+        pending, group.pending = group.pending, {}
+        if not pending or self.rate_groups.get(group.key) is not group:
+            return
+        for key, data in pending.items():
+            self._deliver(group, key, data)
+        group.next_due = asyncio.get_running_loop().time() + group.interval
+    
+    def _deliver(self, group: _RateGroup, key: Optional[Hashable], data: Dict[str, Any]):
+        """Sérialise une valeur une fois pour le groupe et la dépose dans la file de chaque abonné."""
+        if group.encoder is not None:
             try:
-                await websocket.send_json(message.dict())
+                payload = group.encoder.encode(data["data"])
             except Exception as e:
-                logger.error(f"Erreur lors de la diffusion sur le canal {channel}: {e}")
-                disconnected.append(websocket)
+                logger.error(f"Erreur lors de l'encodage binaire de l'état du jeu: {e}")
+                return
+            queue_key = (group.channel, "binary", str(key or "default"), group.key)
+        else:
+            payload = WebSocketMessage(
+                type=data.get("type", group.channel),
+                data=data,
+                timestamp=datetime.now()
+            ).json()
+            queue_key = (group.channel, key) if key is not None else None
+        group.delivered += 1
+        self._enqueue_all(group.subscribers.copy(), payload, queue_key)
+    
+    def _enqueue_all(self, websockets: Iterable[WebSocket], payload: Union[str, bytes],
+                     key: Optional[Hashable] = None):
+        """Dépose une charge déjà sérialisée dans la file de plusieurs clients."""
+        for websocket in websockets:
+            self._enqueue(websocket, payload, key)
+    
+    def _enqueue(self, websocket: WebSocket, payload: Union[str, bytes],
+                 key: Optional[Hashable] = None):
+        """Dépose un message dans la file d'un client en appliquant la politique de débordement."""
+        info = self.connection_info.get(websocket)
+        if info is None:
+            return
+        queue = info["queue"]
+        
+        if queue.full():
+            if self.overflow_policy == "disconnect":
+                logger.warning("Client WebSocket trop lent, déconnexion (file d'envoi saturée)")
+                self.overflow_disconnects += 1
+                self.disconnect(websocket)
+                asyncio.create_task(self._close(websocket))
+                return
+            if self.overflow_policy == "coalesce" and queue.replace(key, payload):
+                self._on_lost(key)
+                return
+            self._on_lost(queue.drop_oldest())
         
-        # Nettoyer les connexions défaillantes
-        for websocket in disconnected:
+        queue.put(payload, key)
+    
+    def _on_lost(self, key: Optional[Hashable]):
+        """Un message abandonné ou remplacé : une trame delta perdue impose une trame clé."""
+        if isinstance(key, tuple) and key[:2] == ("game_state", "binary"):
+            group = self.rate_groups.get(key[3])
+            if group is not None:
+                group.encoder.request_keyframe(key[2])
+    
+    async def _sender(self, websocket: WebSocket, queue: _OutboundQueue):
+        """Tâche d'envoi d'une connexion : vide sa file dans l'ordre."""
+        try:
+            while True:
+                payload = await queue.get()
+                start = time.perf_counter()
+                if isinstance(payload, bytes):
+                    await websocket.send_bytes(payload)
+                    _SEND_BINARY.observe(time.perf_counter() - start)
+                else:
+                    await websocket.send_text(payload)
+                    _SEND_TEXT.observe(time.perf_counter() - start)
+                queue.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi à un client WebSocket: {e}")
             self.disconnect(websocket)
     
+    async def _sweep_idle(self):
+        """Ferme périodiquement les connexions sans activité (messages, pings)."""
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            now = datetime.now()
+            idle = [
+                websocket for websocket, info in self.connection_info.items()
+                if (now - info["last_activity"]).total_seconds() > self.idle_timeout_seconds
+            ]
+            for websocket in idle:
+                logger.info("Connexion WebSocket inactive fermée")
+                self.idle_disconnects += 1
+                self.disconnect(websocket)
+                await self._close(websocket)
+    
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        """Ferme une connexion en ignorant les erreurs (client déjà parti)."""
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+    
     async def broadcast_metrics(self, metrics_data: Dict[str, Any]):
         """Diffuse des métriques d'entraînement aux clients abonnés."""
         await self.broadcast_to_channel("metrics", {
@@ -193,7 +540,12 @@ class WebSocketManager:
         })
     
     async def broadcast_game_state(self, game_state: Dict[str, Any]):
-        """Diffuse l'état du jeu aux clients abonnés."""
+        """
+        Diffuse l'état du jeu aux clients abonnés.
+        
+        Les abonnés binaires reçoivent une trame clé / delta encodée une seule
+        fois par groupe ; les abonnés JSON reçoivent le message complet habituel.
+        """
         await self.broadcast_to_channel("game_state", {
             "type": "game_state",
             "data": game_state,
@@ -216,6 +568,14 @@ class WebSocketManager:
             "timestamp": datetime.now().isoformat()
         })
     
+    async def broadcast_job_update(self, job_data: Dict[str, Any]):
+        """Diffuse l'état d'une tâche de fond aux clients abonnés."""
+        await self.broadcast_to_channel("jobs", {
+            "type": "job_update",
+            "data": job_data,
+            "timestamp": datetime.now().isoformat()
+        })
+    
     async def broadcast_error(self, error_data: Dict[str, Any]):
         """Diffuse une erreur aux clients abonnés."""
         await self.broadcast_to_channel("errors", {
@@ -226,12 +586,54 @@ class WebSocketManager:
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """Retourne des statistiques sur les connexions WebSocket."""
+        encoders = [g.encoder for g in self.rate_groups.values() if g.encoder is not None]
+        clients = []
+        for websocket, info in self.connection_info.items():
+            queue = info["queue"]
+            client = getattr(websocket, "client", None)
+            clients.append({
+                "client": f"{client.host}:{client.port}" if client else None,
+                "subscriptions": sorted(info["subscriptions"]),
+                "queue_depth": len(queue),
+                "max_queue_depth": queue.max_depth,
+                "sent": queue.sent,
+                "dropped": queue.dropped,
+                "coalesced": queue.coalesced,
+                "idle_seconds": round((datetime.now() - info["last_activity"]).total_seconds(), 1)
+            })
+        
         return {
             "total_connections": len(self.active_connections),
+            "outbound_queues": {
+                "queue_size": self.queue_size,
+                "overflow_policy": self.overflow_policy,
+                "idle_timeout_seconds": self.idle_timeout_seconds,
+                "queued": sum(c["queue_depth"] for c in clients),
+                "dropped": sum(c["dropped"] for c in clients),
+                "coalesced": sum(c["coalesced"] for c in clients),
+                "overflow_disconnects": self.overflow_disconnects,
+                "idle_disconnects": self.idle_disconnects,
+                "clients": clients
+            },
             "subscriptions": {
                 channel: len(subscribers) 
                 for channel, subscribers in self.subscriptions.items()
             },
+            "game_state_stream": {
+                "streams": sum(len(e.streams) for e in encoders),
+                "keyframe_interval": settings.WEBSOCKET_KEYFRAME_INTERVAL,
+                **{
+                    name: sum(e.stats[name] for e in encoders)
+                    for name in ("keyframes", "deltas", "keyframe_bytes", "delta_bytes")
+                }
+            },
+            "conflation": {
+                channel: {
+                    "window_seconds": self.conflation_windows.get(channel, 0.0),
+                    "groups": [g.to_dict() for g in self.rate_groups.values() if g.channel == channel]
+                }
+                for channel in self.subscriptions
+            },
             "connection_info": {
                 "oldest": min(
                     (info["connected_at"] for info in self.connection_info.values()),
@@ -244,5 +646,17 @@ class WebSocketManager:
             }
         }
 
+    def queued_messages(self) -> int:
+        """Nombre total de messages en attente dans les files d'envoi."""
+        return sum(len(info["queue"]) for info in list(self.connection_info.values()))
+
 # Instance singleton du gestionnaire
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager()
+
+# Jauges calculées à la collecte, sans coût sur le chemin d'envoi
+registry.gauge(
+    "pacman_websocket_connections", "Connexions WebSocket actives"
+).set_function(lambda: len(websocket_manager.active_connections))
+registry.gauge(
+    "pacman_websocket_queue_depth", "Messages en attente dans les files d'envoi WebSocket"
+).set_function(websocket_manager.queued_messages)
\ No newline at end of file
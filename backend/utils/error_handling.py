@@ -6,14 +6,26 @@ des middlewares de validation et des helpers pour
 gérer les erreurs de manière cohérente dans l'API.
 """
 import logging
+import time
 import traceback
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
+from backend.config import settings
+from backend.services.profiling_service import profiling_service
+from backend.utils.instrumentation import registry
+
 logger = logging.getLogger(__name__)
 
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "pacman_http_request_seconds", "Latence des requêtes HTTP par route", ("method", "route")
+)
+HTTP_REQUESTS = registry.counter(
+    "pacman_http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+)
+
 class ExperimentError(Exception):
     """Exception personnalisée pour les erreurs liées aux expériences."""
     
@@ -41,12 +53,21 @@ class EnvironmentError(Exception):
         self.details = details or {}
         super().__init__(self.message)
 
-class ValidationErrorWithDetails(ValidationError):
-    """Extension de ValidationError avec des détails supplémentaires."""
+class ValidationErrorWithDetails(ValueError):
+    """
+    Erreur de validation avec des détails supplémentaires.
+    
+    Le ValidationError de pydantic 2 ne peut plus être dérivé : cette classe
+    en reprend l'interface utile (`errors()`).
+    """
     
     def __init__(self, errors: list, model_name: str = None):
-        super().__init__(errors, model_name)
+        super().__init__(f"{len(errors)} erreur(s) de validation pour {model_name or 'le modèle'}")
+        self._errors = errors
         self.model_name = model_name
+    
+    def errors(self) -> list:
+        return self._errors
 
 async def validation_exception_handler(request: Request, exc: ValidationError):
     """Gestionnaire d'exceptions pour les erreurs de validation Pydantic."""
@@ -221,12 +242,40 @@ def validate_integer(value: float, field_name: str) -> int:
 
 # Middleware pour logger les requêtes et réponses
 async def log_requests_middleware(request: Request, call_next):
-    """Middleware pour logger les requêtes entrantes et les réponses."""
+    """
+    Middleware pour logger les requêtes entrantes et les réponses.
+    
+    Mesure aussi la latence par route et, si l'en-tête `PROFILING_HEADER`
+    vaut 1/true (et que le jeton d'administration est valide), profile la
+    requête : l'identifiant du profil est renvoyé dans ``X-Profile-Id``.
+    """
     # Logger la requête
     logger.info(f"Requête: {request.method} {request.url.path}")
     
+    profiler = None
+    if (request.headers.get(settings.PROFILING_HEADER, "").lower() in ("1", "true", "yes")
+            and profiling_service.authorized(request.headers.get("X-Admin-Token"))):
+        profiler = profiling_service.start_request_profile()
+    
     # Exécuter la requête
-    response = await call_next(request)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # Étiquette par gabarit de route (/sessions/{id}) : cardinalité bornée
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        HTTP_REQUEST_SECONDS.labels(request.method, route_path).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, route_path, status_code).inc()
+        if profiler is not None:
+            profile_id = profiling_service.finish_request_profile(
+                profiler, f"request:{request.method} {request.url.path}"
+            )
+    
+    if profiler is not None:
+        response.headers["X-Profile-Id"] = profile_id
     
     # Logger la réponse
     logger.info(f"Réponse: {response.status_code} pour {request.method} {request.url.path}")
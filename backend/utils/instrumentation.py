@@ -0,0 +1,312 @@
+"""
+Instrumentation interne du backend : compteurs, jauges et histogrammes.
+
+Registre minimal, sans dépendance externe, exposé au format texte de
+Prometheus (``GET /metrics``). Chaque série (métrique + valeurs d'étiquettes)
+est un petit objet mis en cache : le chemin chaud se réduit à une recherche
+dans un dictionnaire (évitable en gardant la série) puis une addition sous
+verrou. Les histogrammes ont des buckets fixes (recherche dichotomique).
+
+Les jauges peuvent être calculées au moment de la collecte
+(`Gauge.set_function`), par exemple la profondeur des files WebSocket, ce qui
+ne coûte rien entre deux collectes.
+
+Usage ::
+
+    STEPS = registry.counter("pacman_env_steps_total", "Steps exécutés", ("environment_type",))
+    STEPS.labels("configurable").inc()
+
+    LATENCY = registry.histogram("pacman_db_write_seconds", "Durée des écritures", ("operation",))
+    with LATENCY.labels("update").time():
+        ...
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Type MIME du format texte d'exposition Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets par défaut (secondes) : de la demi-milliseconde à 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets des tâches longues (archives, exports ONNX)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+# Buckets des tailles de lots (nombre de lignes)
+SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+def _format_value(value: float) -> str:
+    """Valeur numérique au format Prometheus."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class _CounterValue:
+    """Série d'un compteur."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Un compteur ne peut que croître")
+        with self._lock:
+            self.value += amount
+
+class _GaugeValue:
+    """Série d'une jauge (valeur fixée ou calculée à la collecte)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Calcule la valeur à chaque collecte plutôt qu'à chaque événement."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return self.value
+
+class _HistogramValue:
+    """Série d'un histogramme à buckets fixes."""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        """Observe la durée (en secondes) du bloc."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class _Metric:
+    """Métrique nommée : une série par combinaison de valeurs d'étiquettes."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Série correspondant aux valeurs d'étiquettes (positionnelles ou nommées)."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: étiquettes attendues {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        """Supprime une série (ex. session terminée)."""
+        with self._lock:
+            self._children.pop(tuple(str(value) for value in values), None)
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def _render_samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    """Compteur monotone."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def _render_samples(self):
+        for key, child in self._series():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+class Gauge(_Metric):
+    """Jauge (valeur instantanée)."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def _render_samples(self):
+        for key, child in self._series():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+class Histogram(_Metric):
+    """Histogramme à buckets fixes (cumulés à l'exposition)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_samples(self):
+        names = self.labelnames + ("le",)
+        for key, child in self._series():
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+class MetricsRegistry:
+    """Registre des métriques du processus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà enregistrée avec un autre type")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Compteur (créé au premier appel, partagé ensuite)."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Jauge (créée au premier appel, partagée ensuite)."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Histogramme (créé au premier appel, partagé ensuite)."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Toutes les métriques au format texte d'exposition Prometheus."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+# Instance singleton du registre
+registry = MetricsRegistry()
+
+JOB_DURATION = registry.histogram(
+    "pacman_job_duration_seconds", "Durée des tâches longues (tâches de fond, entraînements, restaurations)",
+    ("kind", "outcome"), buckets=JOB_BUCKETS
+)
+
+def track_job(kind: str):
+    """
+    Décorateur mesurant la durée d'une tâche longue.
+
+    L'issue est « error » si la fonction lève une exception ou retourne un
+    dictionnaire avec ``success`` faux, « success » sinon.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = function(*args, **kwargs)
+                if not (isinstance(result, dict) and result.get("success") is False):
+                    outcome = "success"
+                return result
+            finally:
+                JOB_DURATION.labels(kind, outcome).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,26 @@
+"""
+Vérification bon marché de la présence des dépendances optionnelles.
+
+Les modules lourds (torch, onnx, stable_baselines3, scipy, l'environnement
+gymnasium / pettingzoo) ne sont plus importés au démarrage de l'API mais au
+premier usage. `modules_available` permet de garder des indicateurs de
+disponibilité (endpoints de capacités, messages 503) sans les charger : il
+interroge seulement les chercheurs de modules (`importlib.util.find_spec`).
+"""
+import importlib.util
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def modules_available(*names: str) -> bool:
+    """
+    Indique si tous les modules donnés sont importables, sans les importer.
+
+    Pour un sous-module (``paquet.module``) seul le paquet parent est importé.
+    """
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
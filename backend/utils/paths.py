@@ -0,0 +1,38 @@
+"""
+Résolution des chemins fournis par les clients de l'API.
+
+Un chemin reçu dans une requête n'est utilisé que s'il désigne un fichier
+sous le répertoire autorisé (modèles, archives), liens symboliques résolus.
+"""
+import os
+
+
+def resolve_under(root: str, path: str) -> str:
+    """
+    Chemin réel de `path` (absolu, ou relatif à `root`), obligatoirement sous `root`.
+
+    Raises:
+        ValueError: chemin hors de `root`
+    """
+    root = os.path.realpath(root)
+    for candidate in (path, os.path.join(root, path)):
+        resolved = os.path.realpath(candidate)
+        if os.path.commonpath([root, resolved]) == root:
+            return resolved
+    raise ValueError(f"Le chemin doit se trouver dans {root}: {path}")
+
+
+def resolve_model_path(models_dir: str, policy_path: str) -> str:
+    """
+    Chemin réel d'un modèle Stable-Baselines3, obligatoirement sous `models_dir`.
+
+    Raises:
+        ValueError: chemin hors du répertoire des modèles
+        FileNotFoundError: modèle absent
+    """
+    path = resolve_under(models_dir, policy_path)
+    # Comme SB3, accepte le chemin sans l'extension .zip
+    for existing in (path, path + ".zip"):
+        if os.path.isfile(existing):
+            return existing
+    raise FileNotFoundError(f"Modèle non trouvé: {policy_path}")
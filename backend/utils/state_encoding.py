@@ -0,0 +1,99 @@
+"""
+Encodages compacts de la grille de jeu.
+
+Fournit deux représentations de la grille (codes -1: mur, 0: vide, 1: point,
+2: power pellet) plus légères que les listes imbriquées de `GameState` :
+
+- ``bitmap`` : un bitmap par couche (murs, points, power pellets), compacté
+  avec `numpy.packbits` puis encodé en base64 ;
+- ``rle`` : encodage par plages de la grille aplatie (ordre ligne par ligne),
+  sous la forme d'une liste plate ``[valeur, longueur, valeur, longueur, ...]``.
+"""
+import base64
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+# Codes de cellule de la grille
+WALL = -1
+EMPTY = 0
+DOT = 1
+POWER_PELLET = 2
+
+GRID_ENCODINGS = ("full", "bitmap", "rle")
+
+def encode_bitmap(mask: np.ndarray) -> str:
+    """Encode un masque booléen en base64 (8 cellules par octet)."""
+    return base64.b64encode(np.packbits(mask, axis=None).tobytes()).decode("ascii")
+
+def decode_bitmap(data: str, shape: Tuple[int, int]) -> np.ndarray:
+    """Décode un masque booléen produit par `encode_bitmap`."""
+    count = int(np.prod(shape))
+    packed = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    return np.unpackbits(packed, count=count).astype(bool).reshape(shape)
+
+def encode_rle(grid: np.ndarray) -> List[int]:
+    """Encode une grille par plages : ``[valeur, longueur, ...]`` en ordre ligne par ligne."""
+    flat = np.asarray(grid).ravel()
+    if flat.size == 0:
+        return []
+    boundaries = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((starts, [flat.size])))
+    runs = np.empty(2 * len(starts), dtype=np.int64)
+    runs[0::2] = flat[starts]
+    runs[1::2] = lengths
+    return runs.tolist()
+
+def decode_rle(runs: List[int], shape: Tuple[int, int]) -> np.ndarray:
+    """Décode une grille produite par `encode_rle`."""
+    values = np.asarray(runs[0::2], dtype=np.int8)
+    lengths = np.asarray(runs[1::2], dtype=np.int64)
+    return np.repeat(values, lengths).reshape(shape)
+
+def encode_grid(grid: np.ndarray, encoding: str = "bitmap") -> Dict[str, Any]:
+    """
+    Encode la grille de jeu dans une représentation compacte.
+
+    Args:
+        grid: Grille 2D de codes de cellule (int8)
+        encoding: "bitmap" ou "rle"
+
+    Returns:
+        Dictionnaire sérialisable en JSON décrivant la grille.
+    """
+    shape = [int(grid.shape[0]), int(grid.shape[1])]
+    if encoding == "bitmap":
+        return {
+            "encoding": "bitmap",
+            "shape": shape,
+            "walls": encode_bitmap(grid == WALL),
+            "dots": encode_bitmap(grid == DOT),
+            "power_pellets": encode_bitmap(grid == POWER_PELLET)
+        }
+    if encoding == "rle":
+        return {
+            "encoding": "rle",
+            "shape": shape,
+            "runs": encode_rle(grid)
+        }
+    raise ValueError(f"Encodage de grille inconnu: {encoding}")
+
+def grid_from_state(state: Dict[str, Any]) -> np.ndarray:
+    """Grille de codes d'un état de jeu, qu'il soit complet ou encodé."""
+    if "grid_encoded" in state:
+        return decode_grid(state["grid_encoded"])
+    return np.asarray(state["grid"], dtype=np.int8)
+
+def decode_grid(payload: Dict[str, Any]) -> np.ndarray:
+    """Reconstruit la grille de codes à partir d'un encodage compact."""
+    shape = tuple(payload["shape"])
+    if payload["encoding"] == "bitmap":
+        grid = np.zeros(shape, dtype=np.int8)
+        grid[decode_bitmap(payload["dots"], shape)] = DOT
+        grid[decode_bitmap(payload["power_pellets"], shape)] = POWER_PELLET
+        grid[decode_bitmap(payload["walls"], shape)] = WALL
+        return grid
+    if payload["encoding"] == "rle":
+        return decode_rle(payload["runs"], shape)
+    raise ValueError(f"Encodage de grille inconnu: {payload['encoding']}")
@@ -0,0 +1,238 @@
+"""
+Protocole binaire de diffusion des états de jeu (canal `game_state`).
+
+Chaque flux (une simulation, identifiée par `simulation_id`) est encodé en
+trames binaires numérotées. Une trame clé (keyframe) transporte la grille
+complète ; les trames delta intermédiaires ne transportent que les cellules
+modifiées (points mangés, power pellets consommés) et les agents qui ont
+bougé. Une trame clé est émise toutes les `keyframe_interval` trames, à chaque
+changement de dimensions, ou sur demande de resynchronisation.
+
+Format d'une trame (petit-boutiste) ::
+
+    en-tête   : magic "PM" (2s) | version (B) | type (B: 0 clé, 1 delta)
+                | séquence (I) | longueur de l'id de flux (B) | id (utf-8)
+    méta      : step (I) | episode (I) | score (i) | vies (B) | flags (B)
+                | hauteur (B) | largeur (B) | nb. fantômes (B) | masque agents (B)
+    agents    : pour chaque bit du masque (bit 0 = Pac-Man, bit i = fantôme i-1)
+                x (B) | y (B) | mode (B: 0 normal, 1 vulnérable)
+    clé       : grille sur 2 bits par cellule (code + 1), 4 cellules par octet
+    delta     : nb. de changements (H) puis (index de cellule (H), code (b))
+
+Le bit 0 de `flags` indique la fin d'une partie (`done`).
+"""
+import struct
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+
+from backend.utils.state_encoding import grid_from_state
+
+MAGIC = b"PM"
+VERSION = 1
+KEYFRAME = 0
+DELTA = 1
+
+_HEADER = struct.Struct("<2sBBIB")
+_META = struct.Struct("<IIiBBBBBB")
+_AGENT = struct.Struct("<BBB")
+_COUNT = struct.Struct("<H")
+_CHANGE = struct.Struct("<Hb")
+
+FLAG_DONE = 0x01
+
+class StreamResyncRequired(Exception):
+    """Levée par le décodeur lorsqu'une trame manque (il faut une trame clé)."""
+
+def _pack_grid(grid: np.ndarray) -> bytes:
+    """Compacte une grille de codes (-1..2) sur 2 bits par cellule."""
+    codes = (grid.ravel() + 1).astype(np.uint8)
+    padded = np.zeros(-(-codes.size // 4) * 4, dtype=np.uint8)
+    padded[:codes.size] = codes
+    packed = padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)
+    return packed.tobytes()
+
+def _unpack_grid(data: bytes, shape: Tuple[int, int]) -> np.ndarray:
+    """Opération inverse de `_pack_grid`."""
+    packed = np.frombuffer(data, dtype=np.uint8)
+    codes = np.empty(packed.size * 4, dtype=np.uint8)
+    for i in range(4):
+        codes[i::4] = (packed >> (2 * i)) & 0x03
+    count = shape[0] * shape[1]
+    return (codes[:count].astype(np.int8) - 1).reshape(shape)
+
+def _state_agents(state: Dict[str, Any]) -> List[Tuple[int, int, int]]:
+    """Agents d'un état sous forme (x, y, mode), Pac-Man en premier."""
+    pacman = state["pacman"]
+    agents = [(int(pacman["x"]), int(pacman["y"]), 0)]
+    for ghost in state.get("ghosts", []):
+        agents.append((int(ghost["x"]), int(ghost["y"]),
+                       1 if ghost.get("mode") == "vulnerable" else 0))
+    return agents
+
+class _StreamState:
+    """État de référence d'un flux côté encodeur."""
+
+    def __init__(self):
+        self.sequence = 0
+        self.frames_since_keyframe = 0
+        self.grid: Optional[np.ndarray] = None
+        self.agents: List[Tuple[int, int, int]] = []
+        self.force_keyframe = True
+
+class GameStateStreamEncoder:
+    """Encodeur des trames clés / delta, avec un état de référence par flux."""
+
+    def __init__(self, keyframe_interval: int = 30):
+        """Initialise l'encodeur (une trame clé toutes les `keyframe_interval` trames)."""
+        self.keyframe_interval = keyframe_interval
+        self.streams: Dict[str, _StreamState] = {}
+        self.stats = {"keyframes": 0, "deltas": 0, "keyframe_bytes": 0, "delta_bytes": 0}
+
+    def request_keyframe(self, stream_id: Optional[str] = None):
+        """Force une trame clé au prochain état (d'un flux ou de tous les flux)."""
+        streams = [self.streams[stream_id]] if stream_id in self.streams else (
+            self.streams.values() if stream_id is None else []
+        )
+        for stream in streams:
+            stream.force_keyframe = True
+
+    def forget(self, stream_id: str):
+        """Oublie l'état de référence d'un flux terminé."""
+        self.streams.pop(stream_id, None)
+
+    def encode(self, state: Dict[str, Any]) -> bytes:
+        """Encode un état de jeu en trame binaire (clé ou delta)."""
+        stream_id = str(state.get("simulation_id") or "default")
+        stream = self.streams.setdefault(stream_id, _StreamState())
+
+        grid = grid_from_state(state)
+        agents = _state_agents(state)
+
+        keyframe = (
+            stream.force_keyframe
+            or stream.grid is None
+            or stream.grid.shape != grid.shape
+            or len(stream.agents) != len(agents)
+            or stream.frames_since_keyframe + 1 >= self.keyframe_interval
+        )
+
+        if not keyframe:
+            changed = np.flatnonzero(grid.ravel() != stream.grid.ravel())
+            # Une trame clé est plus petite qu'un delta massif (ex. nouvelle partie)
+            if len(changed) * _CHANGE.size >= (grid.size + 3) // 4:
+                keyframe = True
+
+        if keyframe:
+            agent_mask = (1 << len(agents)) - 1
+            body = _pack_grid(grid)
+            frame_type = KEYFRAME
+        else:
+            agent_mask = 0
+            for i, agent in enumerate(agents):
+                if agent != stream.agents[i]:
+                    agent_mask |= 1 << i
+            flat = grid.ravel()
+            body = _COUNT.pack(len(changed)) + b"".join(
+                _CHANGE.pack(int(index), int(flat[index])) for index in changed
+            )
+            frame_type = DELTA
+
+        stream_bytes = stream_id.encode("utf-8")
+        header = _HEADER.pack(MAGIC, VERSION, frame_type, stream.sequence, len(stream_bytes)) + stream_bytes
+        meta = _META.pack(
+            int(state.get("step", 0)),
+            int(state.get("episode", 0)),
+            int(state.get("score", 0)),
+            int(state.get("lives", 0)),
+            FLAG_DONE if state.get("done") else 0,
+            grid.shape[0],
+            grid.shape[1],
+            len(agents) - 1,
+            agent_mask
+        )
+        agent_bytes = b"".join(
+            _AGENT.pack(*agent) for i, agent in enumerate(agents) if agent_mask & (1 << i)
+        )
+        frame = header + meta + agent_bytes + body
+
+        stream.sequence = (stream.sequence + 1) & 0xFFFFFFFF
+        stream.grid = grid
+        stream.agents = agents
+        if keyframe:
+            stream.force_keyframe = False
+            stream.frames_since_keyframe = 0
+            self.stats["keyframes"] += 1
+            self.stats["keyframe_bytes"] += len(frame)
+        else:
+            stream.frames_since_keyframe += 1
+            self.stats["deltas"] += 1
+            self.stats["delta_bytes"] += len(frame)
+        return frame
+
+class GameStateStreamDecoder:
+    """Décodeur de référence (clients Python, tests) reconstruisant les états complets."""
+
+    def __init__(self):
+        self.streams: Dict[str, Dict[str, Any]] = {}
+
+    def decode(self, frame: bytes) -> Dict[str, Any]:
+        """
+        Décode une trame et retourne l'état complet du flux.
+
+        Raises:
+            StreamResyncRequired: si une trame delta arrive sans état de
+                référence ou avec un numéro de séquence inattendu.
+        """
+        magic, version, frame_type, sequence, id_length = _HEADER.unpack_from(frame, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Trame game_state invalide")
+        offset = _HEADER.size
+        stream_id = frame[offset:offset + id_length].decode("utf-8")
+        offset += id_length
+
+        (step, episode, score, lives, flags, height, width,
+         num_ghosts, agent_mask) = _META.unpack_from(frame, offset)
+        offset += _META.size
+
+        previous = self.streams.get(stream_id)
+        if frame_type == DELTA and (previous is None or previous["sequence"] + 1 != sequence):
+            self.streams.pop(stream_id, None)
+            raise StreamResyncRequired(stream_id)
+
+        agents = list(previous["agents"]) if frame_type == DELTA else [None] * (num_ghosts + 1)
+        for i in range(num_ghosts + 1):
+            if agent_mask & (1 << i):
+                agents[i] = _AGENT.unpack_from(frame, offset)
+                offset += _AGENT.size
+
+        shape = (height, width)
+        if frame_type == KEYFRAME:
+            grid = _unpack_grid(frame[offset:offset + (height * width + 3) // 4], shape)
+        else:
+            grid = previous["grid"].copy()
+            (count,) = _COUNT.unpack_from(frame, offset)
+            offset += _COUNT.size
+            flat = grid.ravel()
+            for _ in range(count):
+                index, code = _CHANGE.unpack_from(frame, offset)
+                offset += _CHANGE.size
+                flat[index] = code
+
+        self.streams[stream_id] = {"sequence": sequence, "grid": grid, "agents": agents}
+        return {
+            "simulation_id": stream_id,
+            "sequence": sequence,
+            "keyframe": frame_type == KEYFRAME,
+            "grid": grid,
+            "pacman": {"x": agents[0][0], "y": agents[0][1]},
+            "ghosts": [
+                {"x": x, "y": y, "mode": "vulnerable" if mode else "normal"}
+                for x, y, mode in agents[1:]
+            ],
+            "step": step,
+            "episode": episode,
+            "score": score,
+            "lives": lives,
+            "done": bool(flags & FLAG_DONE)
+        }
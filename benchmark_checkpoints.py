@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Mesure de la compression différentielle des checkpoints (octets par checkpoint
+et latence de restauration).
+
+Sans argument, génère une série de checkpoints au format SB3 (ZIP stocké
+contenant ``data`` et un ``policy.pth`` au format ``torch.save``) dont les
+poids évoluent par petites mises à jour, comme pendant un entraînement ; avec
+``--from-dir``, utilise des checkpoints réels (triés par nom).
+
+Exemples :
+    python benchmark_checkpoints.py
+    python benchmark_checkpoints.py --checkpoints 50 --params 2000000 --keyframe-interval 20
+    python benchmark_checkpoints.py --from-dir logs/checkpoints --codec lzma
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from experiments.checkpoint_delta import CheckpointDeltaStore
+
+def _write_sb3_checkpoint(path: str, tensors: List[np.ndarray], step: int) -> None:
+    """Écrit un checkpoint à la disposition d'un ``model.save`` SB3 (membres stockés)."""
+    policy = io.BytesIO()
+    with zipfile.ZipFile(policy, "w") as pth:
+        pth.writestr("archive/data.pkl", json.dumps([t.shape for t in tensors]).encode())
+        for i, tensor in enumerate(tensors):
+            pth.writestr(f"archive/data/{i}", tensor.tobytes())
+        pth.writestr("archive/version", b"3\n")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("data", json.dumps({"num_timesteps": step, "learning_rate": 0.0003}))
+        archive.writestr("policy.pth", policy.getvalue())
+        archive.writestr("_stable_baselines3_version", "2.2.1")
+
+def generate_checkpoints(directory: str, count: int, params: int, seed: int = 0) -> List[str]:
+    """Série de checkpoints synthétiques : poids initiaux puis mises à jour de type SGD."""
+    rng = np.random.default_rng(seed)
+    sizes = [params // 2, params // 4, params // 4]
+    tensors = [rng.normal(0, 0.1, size).astype(np.float32) for size in sizes]
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"checkpoint_{i:04d}.zip")
+        _write_sb3_checkpoint(path, tensors, step=i * 10_000)
+        paths.append(path)
+        tensors = [t + rng.normal(0, 1e-4, t.size).astype(np.float32) for t in tensors]
+    return paths
+
+def run_benchmark(paths: List[str], keyframe_interval: int, codec: str) -> dict:
+    """Ajoute la série au magasin puis restaure chaque checkpoint."""
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = CheckpointDeltaStore(store_dir, keyframe_interval, codec=codec)
+        add_times = []
+        for path in paths:
+            start = time.perf_counter()
+            store.add(path)
+            add_times.append(time.perf_counter() - start)
+
+        entries = store.list_checkpoints()
+        restore_times = []
+        for entry, path in zip(entries, paths):
+            start = time.perf_counter()
+            data = store.restore(entry["id"])
+            restore_times.append(time.perf_counter() - start)
+            if data != Path(path).read_bytes():
+                raise AssertionError(f"Restauration incorrecte: {entry['id']}")
+
+        stats = store.get_statistics()
+    return {
+        "entries": entries,
+        "stats": stats,
+        "add_seconds": add_times,
+        "restore_seconds": restore_times
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression différentielle des checkpoints")
+    parser.add_argument("--from-dir", help="Répertoire de checkpoints réels (sinon série synthétique)")
+    parser.add_argument("--checkpoints", type=int, default=20, help="Checkpoints synthétiques")
+    parser.add_argument("--params", type=int, default=500_000, help="Paramètres float32 par checkpoint synthétique")
+    parser.add_argument("--keyframe-interval", type=int, default=10, help="Checkpoint complet tous les N")
+    parser.add_argument("--codec", choices=["zlib", "lzma"], default="zlib", help="Compression des segments")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.from_dir:
+            paths = sorted(str(p) for p in Path(args.from_dir).iterdir() if p.is_file())
+        else:
+            paths = generate_checkpoints(work_dir, args.checkpoints, args.params)
+        if not paths:
+            print("Aucun checkpoint à mesurer")
+            sys.exit(1)
+        summary = run_benchmark(paths, args.keyframe_interval, args.codec)
+
+    print(f"{'checkpoint':<16}{'type':<7}{'taille':>12}{'stocké':>12}{'ratio':>8}{'ajout':>10}{'restaur.':>10}")
+    for entry, added, restored in zip(summary["entries"], summary["add_seconds"], summary["restore_seconds"]):
+        print(f"{entry['id']:<16}{entry['kind']:<7}{entry['size']:>12,}{entry['stored_size']:>12,}"
+              f"{entry['stored_size'] / entry['size']:>8.3f}{added * 1000:>8.1f}ms{restored * 1000:>8.1f}ms")
+
+    stats = summary["stats"]
+    deltas = [e["stored_size"] for e in summary["entries"] if e["kind"] == "delta"]
+    keyframes = [e["stored_size"] for e in summary["entries"] if e["kind"] == "full"]
+    print(f"\n{stats['checkpoint_count']} checkpoints, {stats['keyframe_count']} keyframes "
+          f"(intervalle {stats['keyframe_interval']}, codec {args.codec})")
+    print(f"Octets par checkpoint: {stats['original_bytes'] / stats['checkpoint_count']:,.0f} -> "
+          f"{stats['stored_bytes'] / stats['checkpoint_count']:,.0f} "
+          f"(ratio {stats['compression_ratio']:.3f})")
+    if keyframes:
+        print(f"  keyframe moyenne: {statistics.mean(keyframes):,.0f} octets")
+    if deltas:
+        print(f"  delta moyen:      {statistics.mean(deltas):,.0f} octets")
+    print(f"Latence de restauration: moyenne {statistics.mean(summary['restore_seconds']) * 1000:.1f} ms, "
+          f"max {max(summary['restore_seconds']) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
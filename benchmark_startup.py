@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Mesure du temps de démarrage du backend (``python -X importtime``).
+
+Importe `backend.app` dans un processus neuf, résume la sortie de
+``-X importtime`` (temps total, temps propre par paquet, imports les plus
+lents) et échoue si le budget est dépassé ou si une dépendance lourde
+(torch, onnx, stable_baselines3, scipy, gymnasium, pettingzoo...) est chargée
+au démarrage au lieu de l'être au premier usage.
+
+Exemples :
+    python benchmark_startup.py
+    python benchmark_startup.py --budget 2.0 --top 30
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List
+
+# Budget du démarrage (import de backend.app, meilleur de plusieurs mesures)
+DEFAULT_BUDGET_SECONDS = 3.0
+
+# Paquets qui ne doivent être importés qu'au premier usage
+LAZY_MODULES = (
+    "torch", "onnx", "onnxruntime", "stable_baselines3", "scipy",
+    "gymnasium", "pettingzoo", "onnx_export", "intelligence",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)\s*$")
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Lignes de ``-X importtime`` : module, temps propre et cumulé (µs), profondeur."""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2
+            })
+    return entries
+
+def measure_startup(module: str = "backend.app", runs: int = 3) -> Dict[str, Any]:
+    """
+    Importe `module` dans `runs` processus neufs et résume la mesure la plus rapide.
+
+    Un premier import préalable compile le bytecode pour ne pas le compter.
+    """
+    root = Path(__file__).parent
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    subprocess.run(command, cwd=root, capture_output=True, check=True)
+    best = None
+    for _ in range(max(1, runs)):
+        result = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+        entries = parse_importtime(result.stderr)
+        total = sum(entry["self_us"] for entry in entries)
+        if best is None or total < best[0]:
+            best = (total, entries)
+
+    total, entries = best
+    by_package = Counter()
+    for entry in entries:
+        by_package[entry["module"].split(".")[0]] += entry["self_us"]
+    imported = {entry["module"] for entry in entries}
+    return {
+        "module": module,
+        "total_seconds": total / 1e6,
+        "modules": len(entries),
+        "by_package": [(name, us / 1e6) for name, us in by_package.most_common()],
+        "slowest": sorted(entries, key=lambda e: e["cumulative_us"], reverse=True),
+        "lazy_violations": sorted(
+            name for name in LAZY_MODULES
+            if any(m == name or m.startswith(name + ".") for m in imported)
+        )
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage du backend (python -X importtime)")
+    parser.add_argument("--module", default="backend.app", help="Module importé au démarrage")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="Budget en secondes")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures (la plus rapide est retenue)")
+    parser.add_argument("--top", type=int, default=15, help="Lignes affichées par section")
+    args = parser.parse_args()
+
+    summary = measure_startup(args.module, args.runs)
+    print(f"Import de {summary['module']}: {summary['total_seconds']:.3f}s "
+          f"({summary['modules']} modules, budget {args.budget:.3f}s)")
+    print("\nTemps propre par paquet:")
+    for name, seconds in summary["by_package"][:args.top]:
+        print(f"  {seconds * 1000:9.1f} ms  {name}")
+    print("\nImports les plus lents (cumulé):")
+    for entry in summary["slowest"][:args.top]:
+        print(f"  {entry['cumulative_us'] / 1000:9.1f} ms  {'  ' * entry['depth']}{entry['module']}")
+
+    failed = False
+    if summary["lazy_violations"]:
+        print(f"\nÉCHEC: importés au démarrage au lieu du premier usage: {', '.join(summary['lazy_violations'])}")
+        failed = True
+    if summary["total_seconds"] > args.budget:
+        print(f"\nÉCHEC: démarrage {summary['total_seconds']:.3f}s > budget {args.budget:.3f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Catalogue persistant des archives de session.
+
+Fonctionnalités :
+- Une ligne par archive : chemin, taille, mtime, hash MD5, manifeste des
+  membres, métadonnées analysées et score
+- Mise à jour à la création, la suppression et l'import d'une archive
+- Rapprochement incrémental avec le disque : seules les archives dont la
+  taille ou le mtime a changé sont relues
+- Listing, meilleures archives et nettoyage par requêtes indexées (ORDER BY
+  / LIMIT), sans ouvrir les ZIP
+"""
+
+import os
+import re
+import json
+import fnmatch
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from experiments.archive_reader import open_archive
+from experiments.file_hasher import cached_file_hash
+from experiments.sqlite_utils import resolve_db_path
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Métrique utilisée comme score (meilleures archives)
+SCORE_METRIC = "win_rate"
+
+# Format: pacman_run_047_20260103_1632_DQN_pacman.zip
+ARCHIVE_NAME_PATTERN = re.compile(r'pacman_run_(\d+)_(\d+)_(\d+)_([^_]+)_([^_]+)\.zip')
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archives (
+        path TEXT PRIMARY KEY,
+        directory TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        hash TEXT,
+        members TEXT NOT NULL,
+        metadata TEXT NOT NULL,
+        session_number INTEGER,
+        model_type TEXT,
+        agent_type TEXT,
+        score REAL,
+        file_count INTEGER NOT NULL,
+        uncompressed_bytes INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_archives_session ON archives (directory, session_number)",
+    "CREATE INDEX IF NOT EXISTS idx_archives_mtime ON archives (directory, mtime_ns)",
+    "CREATE INDEX IF NOT EXISTS idx_archives_score ON archives (directory, score)",
+    """
+    CREATE TABLE IF NOT EXISTS session_counters (
+        directory TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """
+]
+
+# Colonnes des listings (le manifeste des membres n'est lu que par `get`)
+_LIST_COLUMNS = ("path, directory, filename, size, mtime_ns, hash, metadata, session_number, "
+                 "model_type, agent_type, score, file_count, uncompressed_bytes")
+
+def parse_archive_filename(filename: str) -> Dict[str, Any]:
+    """Extrait numéro de session, date, heure, modèle et agent du nom d'une archive."""
+    match = ARCHIVE_NAME_PATTERN.match(filename)
+
+    if match:
+        session_num, date, time, model_type, agent_type = match.groups()
+        return {
+            'session_number': int(session_num),
+            'date': date,
+            'time': time,
+            'model_type': model_type,
+            'agent_type': agent_type,
+            'filename': filename
+        }
+    else:
+        return {'filename': filename}
+
+def _score(metadata: Dict[str, Any]) -> Optional[float]:
+    """Score d'une archive : `win_rate` des métadonnées (niveau racine ou `metrics`)."""
+    value = metadata.get(SCORE_METRIC, (metadata.get('metrics') or {}).get(SCORE_METRIC))
+    return float(value) if isinstance(value, (int, float)) else None
+
+class ArchiveCatalog:
+    """
+    Catalogue SQLite des archives.
+
+    Le catalogue est partagé entre threads et processus (pool de tâches du
+    backend) ; chaque écriture est une transaction.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = resolve_db_path(db_path)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _describe(path: str, archive_hash: Optional[str] = None) -> Tuple:
+        """Ligne du catalogue d'une archive (répertoire central et metadata.json seulement)."""
+        stat = os.stat(path)
+        filename = os.path.basename(path)
+        members: Dict[str, int] = {}
+        metadata: Dict[str, Any] = {}
+        try:
+            with open_archive(path) as reader:
+                members = reader.structure()['members']
+                metadata = reader.metadata()
+        except Exception as e:
+            logger.warning(f"Archive illisible cataloguée sans contenu: {path} ({e})")
+
+        if archive_hash is None:
+            # Le fichier .md5 écrit avec l'archive évite de la relire en entier
+            sidecar = path + ".md5"
+            if os.path.exists(sidecar) and os.stat(sidecar).st_mtime_ns >= stat.st_mtime_ns:
+                with open(sidecar, 'r') as f:
+                    archive_hash = (f.read().split() or [None])[0]
+            else:
+                archive_hash = cached_file_hash(path, "md5")
+
+        name_info = parse_archive_filename(filename)
+        return (
+            path, os.path.dirname(path), filename, stat.st_size, stat.st_mtime_ns, archive_hash,
+            json.dumps(members), json.dumps(metadata),
+            name_info.get('session_number', metadata.get('session_number')),
+            name_info.get('model_type', metadata.get('model_type')),
+            name_info.get('agent_type', metadata.get('agent_type')),
+            _score(metadata), len(members), sum(members.values())
+        )
+
+    @staticmethod
+    def _to_entry(row: Sequence[Any]) -> Dict[str, Any]:
+        """Entrée de listing (mêmes clés que l'ancien listing par nom de fichier)."""
+        (path, directory, filename, size, mtime_ns, archive_hash, metadata, session_number,
+         model_type, agent_type, score, file_count, uncompressed_bytes) = row[:13]
+        entry = parse_archive_filename(filename)
+        entry.update({
+            'path': path,
+            'directory': directory,
+            'size_bytes': size,
+            'size_mb': size / (1024 * 1024),
+            'modified': datetime.fromtimestamp(mtime_ns / 1e9).isoformat(),
+            'mtime_ns': mtime_ns,
+            'hash': archive_hash,
+            'metadata': json.loads(metadata),
+            'model_type': model_type,
+            'agent_type': agent_type,
+            'score': score,
+            'file_count': file_count,
+            'uncompressed_bytes': uncompressed_bytes
+        })
+        if session_number is not None:
+            entry['session_number'] = session_number
+        return entry
+
+    def add(self, archive_path: str, archive_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Catalogue (ou recatalogue) une archive ; retourne son entrée."""
+        row = self._describe(os.path.abspath(archive_path), archive_hash)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO archives VALUES ({','.join('?' * len(row))})", row)
+        return self._to_entry(row[:6] + row[7:])
+
+    def next_session_number(self, directory: str, seed: int = 0) -> int:
+        """
+        Alloue le prochain numéro de session d'un répertoire d'archives.
+
+        L'allocation est une transaction `BEGIN IMMEDIATE` : deux processus du
+        pool ne peuvent pas obtenir le même numéro (et donc le même nom
+        d'archive). `seed` est le dernier numéro connu par ailleurs (ancien
+        compteur JSON) ; les archives déjà cataloguées sont aussi prises en
+        compte.
+        """
+        directory = os.path.abspath(directory)
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT value FROM session_counters WHERE directory = ?",
+                                       (directory,)).fetchone()
+                    (highest,) = conn.execute("SELECT MAX(session_number) FROM archives WHERE directory = ?",
+                                              (directory,)).fetchone()
+                    number = max(row[0] if row else 0, seed, highest or 0) + 1
+                    conn.execute("INSERT OR REPLACE INTO session_counters VALUES (?, ?)", (directory, number))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+        return number
+
+    def remove(self, archive_path: str) -> bool:
+        """Retire une archive du catalogue."""
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM archives WHERE path = ?",
+                                (os.path.abspath(archive_path),)).rowcount > 0
+
+    def get(self, archive_path: str) -> Optional[Dict[str, Any]]:
+        """Entrée d'une archive, avec le manifeste de ses membres (nom -> taille)."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {_LIST_COLUMNS}, members FROM archives WHERE path = ?",
+                               (os.path.abspath(archive_path),)).fetchone()
+        if row is None:
+            return None
+        entry = self._to_entry(row)
+        entry['members'] = json.loads(row[-1])
+        return entry
+
+    def get_many(self, archive_paths: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Entrées de plusieurs archives en une requête, indexées par le chemin demandé."""
+        requested = {os.path.abspath(path): path for path in archive_paths}
+        entries = {}
+        paths = list(requested)
+        with self._connect() as conn:
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                for row in conn.execute(
+                    f"SELECT {_LIST_COLUMNS} FROM archives WHERE path IN ({','.join('?' * len(batch))})", batch
+                ):
+                    entries[requested[row[0]]] = self._to_entry(row)
+        return entries
+
+    def sync(self, directory: str, pattern: str = "*.zip") -> Dict[str, int]:
+        """
+        Rapproche le catalogue du contenu d'un répertoire.
+
+        Un seul parcours du répertoire (taille et mtime_ns) ; seules les
+        archives nouvelles ou modifiées sont relues, les disparues sont
+        retirées.
+
+        Returns:
+            Nombre d'archives ajoutées, mises à jour, retirées et inchangées
+        """
+        directory = os.path.abspath(directory)
+        with self._connect() as conn:
+            known = {path: (size, mtime_ns) for path, size, mtime_ns in conn.execute(
+                "SELECT path, size, mtime_ns FROM archives WHERE directory = ?", (directory,)
+            )}
+
+        seen = set()
+        changed = []
+        if os.path.isdir(directory):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not fnmatch.fnmatch(entry.name, pattern) or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    seen.add(entry.path)
+                    if known.get(entry.path) != (stat.st_size, stat.st_mtime_ns):
+                        changed.append(entry.path)
+
+        rows = []
+        for path in changed:
+            try:
+                rows.append(self._describe(path))
+            except OSError:
+                continue  # Supprimée pendant le parcours
+        removed = [(path,) for path in known
+                   if path not in seen and fnmatch.fnmatch(os.path.basename(path), pattern)]
+
+        if rows or removed:
+            with self._lock, self._connect() as conn:
+                conn.executemany(f"INSERT OR REPLACE INTO archives VALUES ({','.join('?' * 14)})", rows)
+                conn.executemany("DELETE FROM archives WHERE path = ?", removed)
+
+        added = sum(1 for row in rows if row[0] not in known)
+        result = {
+            'added': added,
+            'updated': len(rows) - added,
+            'removed': len(removed),
+            'unchanged': len(seen) - len(changed)
+        }
+        if rows or removed:
+            logger.info(f"Catalogue synchronisé ({directory}): {result}")
+        return result
+
+    def list_archives(self, directory: str, limit: int = 20, offset: int = 0,
+                      order_by: str = "session_number") -> List[Dict[str, Any]]:
+        """
+        Archives d'un répertoire, triées par ordre décroissant.
+
+        Args:
+            order_by: ``session_number``, ``mtime_ns`` ou ``score``
+        """
+        if order_by not in ("session_number", "mtime_ns", "score"):
+            raise ValueError(f"Tri non supporté: {order_by}")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_LIST_COLUMNS} FROM archives WHERE directory = ? "
+                f"ORDER BY {order_by} DESC, mtime_ns DESC LIMIT ? OFFSET ?",
+                (os.path.abspath(directory), limit, offset)
+            ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def best(self, directory: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Archives au meilleur score (les archives sans score sont exclues)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_LIST_COLUMNS} FROM archives WHERE directory = ? AND score IS NOT NULL "
+                f"ORDER BY score DESC, mtime_ns DESC LIMIT ?",
+                (os.path.abspath(directory), limit)
+            ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def excess(self, directory: str, keep: int) -> List[str]:
+        """Chemins des archives au-delà des `keep` plus récentes (plus anciennes d'abord)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path FROM archives WHERE directory = ? ORDER BY mtime_ns DESC LIMIT -1 OFFSET ?",
+                (os.path.abspath(directory), keep)
+            ).fetchall()
+        return [path for (path,) in reversed(rows)]
+
+    def older_than(self, directory: str, cutoff: datetime) -> List[str]:
+        """Chemins des archives modifiées avant `cutoff` (plus anciennes d'abord)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path FROM archives WHERE directory = ? AND mtime_ns < ? ORDER BY mtime_ns",
+                (os.path.abspath(directory), int(cutoff.timestamp() * 1e9))
+            ).fetchall()
+        return [path for (path,) in rows]
+
+    def count(self, directory: str) -> int:
+        """Nombre d'archives cataloguées dans un répertoire."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM archives WHERE directory = ?",
+                                (os.path.abspath(directory),)).fetchone()[0]
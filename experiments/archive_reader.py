@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Accès paresseux aux archives de session.
+
+Fonctionnalités :
+- Répertoire central lu une seule fois par archive (cache invalidé par
+  taille, mtime_ns et inode)
+- Accès direct à un membre sans extraire l'archive
+- Membres stockés (non compressés) projetés en mémoire (mmap) : lecture et
+  vues sans copie
+- Chargement d'un modèle SB3 ou des octets d'un modèle ONNX directement
+  depuis le flux du membre
+- Extraction membre par membre vers un répertoire cible
+"""
+
+import io
+import os
+import json
+import mmap
+import shutil
+import struct
+import zipfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+import yaml
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Lecteurs gardés ouverts (les plus récemment utilisés)
+READER_CACHE_SIZE = 16
+
+# Extensions des fichiers de modèle, par ordre de préférence
+MODEL_EXTENSIONS = (".zip", ".onnx", ".pth", ".pt", ".h5")
+
+# Longueur de l'aperçu de params.md
+PARAMS_PREVIEW_LENGTH = 500
+
+# Taille des blocs copiés lors de l'extraction
+COPY_SIZE = 1024 * 1024
+
+_LOCAL_HEADER = b"PK\x03\x04"
+
+class MemberStream(io.RawIOBase):
+    """Flux en lecture seule et positionnable sur la vue mémoire d'un membre stocké."""
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._view) - self._position)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"whence invalide: {whence}")
+        if position < 0:
+            raise ValueError("Position négative")
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+class ArchiveReader:
+    """
+    Lecteur d'une archive ZIP de session.
+
+    Le répertoire central est analysé à l'ouverture ; chaque membre est
+    ensuite lu à la demande. Utiliser `open_archive` pour partager les
+    lecteurs entre les appels (listing, comparaison, reprise).
+    """
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self._file = open(archive_path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.stat_key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        try:
+            self._zip = zipfile.ZipFile(self._file, 'r')
+        except Exception:
+            self._file.close()
+            raise
+        self._infos = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets: Dict[str, int] = {}
+        self._parsed: Dict[str, Any] = {}
+        # Utilisations en cours via `open_archive` ; un lecteur retiré du cache
+        # n'est fermé qu'une fois la dernière rendue
+        self._leases = 0
+        self._retired = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """Ferme l'archive (les vues encore ouvertes empêchent la fermeture du mmap)."""
+        with self._lock:
+            self._close_mmap()
+            self._zip.close()
+            self._file.close()
+
+    def _close_mmap(self) -> None:
+        """Libère la projection mémoire (appelé sous `_lock`)."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Une vue est encore détenue : la projection sera libérée avec elle
+                pass
+            self._mmap = None
+
+    def _acquire(self) -> None:
+        with self._lock:
+            self._leases += 1
+
+    def _release(self) -> None:
+        """Rend une utilisation ; le mmap est libéré au repos, le lecteur fermé s'il est retiré."""
+        with self._lock:
+            self._leases -= 1
+            if self._leases == 0:
+                self._close_mmap()
+            close = self._leases == 0 and self._retired
+        if close:
+            self.close()
+
+    def _retire(self) -> None:
+        """Retire le lecteur du cache : fermeture immédiate s'il est inutilisé, sinon au dernier rendu."""
+        with self._lock:
+            self._retired = True
+            idle = self._leases == 0
+        if idle:
+            self.close()
+
+    # -- Répertoire central --------------------------------------------------
+
+    def names(self) -> List[str]:
+        """Noms des membres (fichiers seulement), dans l'ordre de l'archive."""
+        return list(self._infos)
+
+    def has(self, name: str) -> bool:
+        return name in self._infos
+
+    def info(self, name: str) -> zipfile.ZipInfo:
+        try:
+            return self._infos[name]
+        except KeyError:
+            raise KeyError(f"Membre absent de l'archive: {name}") from None
+
+    def is_stored(self, name: str) -> bool:
+        """Vrai si le membre est stocké sans compression ni chiffrement (accès par mmap)."""
+        info = self.info(name)
+        return info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1
+
+    def structure(self) -> Dict[str, Any]:
+        """Membres et tailles, lus dans le répertoire central seulement."""
+        infos = list(self._infos.values())
+        return {
+            "file_count": len(infos),
+            "uncompressed_bytes": sum(info.file_size for info in infos),
+            "compressed_bytes": sum(info.compress_size for info in infos),
+            "stored_members": sum(1 for info in infos if info.compress_type == zipfile.ZIP_STORED),
+            "members": {info.filename: info.file_size for info in infos}
+        }
+
+    # -- Accès aux membres ---------------------------------------------------
+
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        """Position des données d'un membre (après son en-tête local)."""
+        offset = self._offsets.get(info.filename)
+        if offset is None:
+            header = self._mmap[info.header_offset:info.header_offset + 30]
+            if len(header) < 30 or not header.startswith(_LOCAL_HEADER):
+                raise zipfile.BadZipFile(f"En-tête local invalide: {info.filename}")
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            offset = info.header_offset + 30 + name_length + extra_length
+            if offset + info.compress_size > len(self._mmap):
+                raise zipfile.BadZipFile(f"Membre tronqué: {info.filename}")
+            self._offsets[info.filename] = offset
+        return offset
+
+    def view(self, name: str) -> memoryview:
+        """
+        Vue mémoire (sans copie) d'un membre stocké.
+
+        Le CRC n'est pas contrôlé : l'intégrité relève du validateur
+        (`ArchiveValidator.verify_members`).
+        """
+        info = self.info(name)
+        if not self.is_stored(name):
+            raise ValueError(f"Membre compressé, pas de vue directe: {name}")
+        with self._lock:
+            if self._mmap is None:
+                if self.stat_key[0] == 0:
+                    raise zipfile.BadZipFile(f"Archive vide: {self.archive_path}")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            start = self._data_offset(info)
+            return memoryview(self._mmap)[start:start + info.compress_size]
+
+    def open(self, name: str) -> BinaryIO:
+        """Flux binaire positionnable d'un membre (mmap si stocké, décompression sinon)."""
+        if self.is_stored(name):
+            return io.BufferedReader(MemberStream(self.view(name)))
+        return self._zip.open(self.info(name))
+
+    def read(self, name: str) -> bytes:
+        """Contenu complet d'un membre."""
+        if self.is_stored(name):
+            view = self.view(name)
+            try:
+                return bytes(view)
+            finally:
+                view.release()
+        return self._zip.read(self.info(name))
+
+    def read_text(self, name: str, limit: Optional[int] = None) -> str:
+        """Texte UTF-8 d'un membre, éventuellement limité aux `limit` premiers caractères."""
+        with self.open(name) as stream:
+            data = stream.read() if limit is None else stream.read(limit * 4)
+        text = data.decode('utf-8', errors='replace')
+        return text if limit is None else text[:limit]
+
+    def read_json(self, name: str) -> Any:
+        """Membre JSON analysé (mis en cache pour la durée de vie du lecteur)."""
+        if name not in self._parsed:
+            self._parsed[name] = json.loads(self.read(name))
+        return self._parsed[name]
+
+    def read_yaml(self, name: str) -> Any:
+        """Membre YAML analysé (mis en cache pour la durée de vie du lecteur)."""
+        if name not in self._parsed:
+            self._parsed[name] = yaml.safe_load(self.read(name))
+        return self._parsed[name]
+
+    def metadata(self) -> Dict[str, Any]:
+        """Contenu de metadata.json (dictionnaire vide si absent)."""
+        if not self.has("metadata.json"):
+            return {}
+        return self.read_json("metadata.json")
+
+    def params_preview(self, length: int = PARAMS_PREVIEW_LENGTH) -> Optional[str]:
+        """Début de params.md, suivi de "..." s'il est tronqué."""
+        if not self.has("params.md"):
+            return None
+        content = self.read_text("params.md", limit=length + 1)
+        return content[:length] + "..." if len(content) > length else content
+
+    # -- Modèles -------------------------------------------------------------
+
+    def find_model(self, extensions: Tuple[str, ...] = MODEL_EXTENSIONS) -> Optional[str]:
+        """Premier fichier de modèle de l'archive (sous ``model/`` de préférence)."""
+        for extension in extensions:
+            candidates = [name for name in self._infos if name.lower().endswith(extension)]
+            candidates.sort(key=lambda name: not name.startswith("model/"))
+            if candidates:
+                return candidates[0]
+        return None
+
+    def load_sb3_model(self, name: Optional[str] = None, algorithm: Any = None, **kwargs) -> Any:
+        """
+        Charge un modèle Stable-Baselines3 depuis le flux du membre, sans extraction.
+
+        Args:
+            name: Membre du modèle (défaut: premier ``.zip`` de l'archive)
+            algorithm: Classe SB3 ou nom (défaut: ``model_type`` des métadonnées)
+            **kwargs: Arguments transmis à ``Algorithm.load`` (env, device...)
+        """
+        try:
+            import stable_baselines3
+        except ImportError:
+            raise ImportError("Module stable_baselines3 non installé, chargement du modèle impossible") from None
+
+        name = name or self.find_model((".zip",))
+        if name is None:
+            raise KeyError(f"Aucun modèle SB3 dans l'archive: {self.archive_path}")
+        algorithm = algorithm or self.metadata().get("model_type", "PPO")
+        if isinstance(algorithm, str):
+            algorithm_class = getattr(stable_baselines3, algorithm.upper(), None)
+            if algorithm_class is None:
+                raise ValueError(f"Algorithme SB3 inconnu: {algorithm}")
+        else:
+            algorithm_class = algorithm
+
+        with self.open(name) as stream:
+            return algorithm_class.load(stream, **kwargs)
+
+    def onnx_bytes(self, name: Optional[str] = None) -> bytes:
+        """Octets d'un modèle ONNX (pour ``onnx.load_from_string`` ou onnxruntime)."""
+        name = name or self.find_model((".onnx",))
+        if name is None:
+            raise KeyError(f"Aucun modèle ONNX dans l'archive: {self.archive_path}")
+        return self.read(name)
+
+    def load_onnx_session(self, name: Optional[str] = None, providers: Optional[List[str]] = None) -> Any:
+        """Session onnxruntime créée depuis les octets du membre, sans fichier temporaire."""
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("Module onnxruntime non installé, chargement du modèle ONNX impossible") from None
+        return onnxruntime.InferenceSession(
+            self.onnx_bytes(name), providers=providers or onnxruntime.get_available_providers()
+        )
+
+    # -- Extraction ----------------------------------------------------------
+
+    def extract(self, name: str, output_path: str) -> str:
+        """Écrit un membre dans `output_path` par blocs."""
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with self.open(name) as src, open(output_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_SIZE)
+        return output_path
+
+    def extract_members(self, names: Iterable[str], target_dir: str) -> List[str]:
+        """Extrait les membres demandés sous `target_dir` ; retourne leurs chemins relatifs."""
+        root = os.path.abspath(target_dir)
+        extracted = []
+        for name in names:
+            output_path = os.path.abspath(os.path.join(root, name))
+            if os.path.commonpath([root, output_path]) != root:
+                logger.warning(f"Membre hors du répertoire cible ignoré: {name}")
+                continue
+            self.extract(name, output_path)
+            extracted.append(name)
+        return extracted
+
+_readers: "OrderedDict[str, ArchiveReader]" = OrderedDict()
+_readers_lock = threading.Lock()
+
+@contextmanager
+def open_archive(archive_path: str) -> Iterator[ArchiveReader]:
+    """
+    Lecteur partagé d'une archive, à utiliser dans un bloc ``with``.
+
+    Le lecteur est réutilisé tant que l'archive n'a pas changé sur le disque.
+    Un lecteur remplacé, évincé ou invalidé n'est fermé qu'à la sortie du
+    dernier bloc qui l'utilise ; sa projection mémoire est libérée dès qu'il
+    n'est plus utilisé.
+    """
+    path = os.path.abspath(archive_path)
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    retired = []
+    with _readers_lock:
+        reader = _readers.get(path)
+        if reader is not None and reader.stat_key == key:
+            _readers.move_to_end(path)
+        else:
+            if reader is not None:
+                retired.append(_readers.pop(path))
+            reader = ArchiveReader(path)
+            _readers[path] = reader
+            while len(_readers) > READER_CACHE_SIZE:
+                retired.append(_readers.popitem(last=False)[1])
+        # Pris sous le verrou du cache : le lecteur ne peut être fermé entre-temps
+        reader._acquire()
+    for old in retired:
+        old._retire()
+    try:
+        yield reader
+    finally:
+        reader._release()
+
+def invalidate_archive(archive_path: str) -> None:
+    """Oublie le lecteur partagé d'une archive (avant suppression ou réécriture) ; il est fermé dès qu'inutilisé."""
+    with _readers_lock:
+        reader = _readers.pop(os.path.abspath(archive_path), None)
+    if reader is not None:
+        reader._retire()
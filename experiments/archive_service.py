@@ -9,23 +9,30 @@ Fonctionnalités :
 - Intégration avec le backend FastAPI
 - Gestion des versions et métadonnées
 - Compression optimisée pour gros modèles (100MB+)
+- Déduplication par contenu entre sessions (magasin de blocs optionnel)
+- Checkpoints d'auto_save stockés en delta du précédent (keyframes périodiques)
+- Lecture paresseuse des archives (métadonnées et membres sans extraction complète)
+- Catalogue persistant des archives (listing, meilleures archives et nettoyage sans parcours des ZIP)
 """
 
 import os
 import json
 import yaml
-import zipfile
-import shutil
-import tempfile
 import threading
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, asdict
-import hashlib
 import time
 
+from experiments.archive_catalog import ArchiveCatalog, parse_archive_filename
+from experiments.archive_reader import invalidate_archive, open_archive
+from experiments.archive_writer import ArchiveWriteResult, StreamingArchiveWriter
+from experiments.chunk_store import ChunkStore
+from experiments.checkpoint_delta import CHECKPOINT_REF_NAME, CheckpointDeltaStore
+from experiments.file_hasher import cached_file_hash, get_hash_cache
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -59,12 +66,19 @@ class ArchiveConfig:
     save_on_improvement: bool = True
     improvement_threshold: float = 0.05  # 5% d'amélioration
     compression_level: int = 9
+    compression_codec: str = "deflate"  # Codec des membres compressibles (deflate, bz2, lzma)
+    compression_workers: Optional[int] = None  # Threads de compression des gros membres (None = nombre de cœurs)
     include_model: bool = True
     include_logs: bool = True
     include_metrics: bool = True
     include_config: bool = True
     backup_to_cloud: bool = False
     cloud_endpoint: Optional[str] = None
+    chunk_store_dir: Optional[str] = None  # Magasin dédupliqué alimenté à l'écriture (None = désactivé)
+    checkpoint_store_dir: Optional[str] = None  # Deltas des checkpoints d'auto_save (None = modèle complet)
+    checkpoint_keyframe_interval: int = 10  # Checkpoint complet tous les N checkpoints
+    catalog_path: str = "experiments/metadata/archive_catalog.db"  # Catalogue SQLite des archives
+    catalog_sync_interval: float = 30.0  # Secondes minimum entre deux rapprochements du catalogue avec le disque
 
 class IntelligentArchiveService:
     """
@@ -76,9 +90,19 @@ class IntelligentArchiveService:
     def __init__(self, config: Optional[ArchiveConfig] = None):
         self.config = config or ArchiveConfig()
         self._ensure_directories()
-        self._session_counter = self._load_session_counter()
         self._lock = threading.RLock()
         self._active_archives: Dict[str, Dict] = {}
+        # Les ZIP restent la copie de travail (bornée par max_archives) ; le
+        # magasin garde toute la série en ne stockant que les blocs nouveaux
+        self.chunk_store = ChunkStore(self.config.chunk_store_dir) if self.config.chunk_store_dir else None
+        self.checkpoint_store = None
+        if self.config.checkpoint_store_dir:
+            self.checkpoint_store = CheckpointDeltaStore(self.config.checkpoint_store_dir,
+                                                         self.config.checkpoint_keyframe_interval)
+        # Listing, meilleures archives et nettoyage interrogent le catalogue
+        # au lieu de rouvrir les ZIP du répertoire
+        self.catalog = ArchiveCatalog(self.config.catalog_path)
+        self._catalog_synced_at: Optional[float] = None
         
         logger.info(f"Service d'archivage initialisé (répertoire: {self.config.archive_dir})")
     
@@ -89,7 +113,7 @@ class IntelligentArchiveService:
         os.makedirs("experiments/metadata", exist_ok=True)
     
     def _load_session_counter(self) -> int:
-        """Charge le compteur de sessions depuis le fichier de persistance."""
+        """Charge l'ancien compteur de sessions (fichier JSON), point de départ de l'allocation."""
         counter_file = "experiments/session_counter.json"
         if os.path.exists(counter_file):
             try:
@@ -100,14 +124,14 @@ class IntelligentArchiveService:
                 logger.warning(f"Erreur lors du chargement du compteur: {e}")
         return 0
     
-    def _save_session_counter(self) -> None:
-        """Sauvegarde le compteur de sessions."""
-        counter_file = "experiments/session_counter.json"
-        try:
-            with open(counter_file, 'w') as f:
-                json.dump({'counter': self._session_counter, 'updated': datetime.now().isoformat()}, f)
-        except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde du compteur: {e}")
+    def _next_session_number(self) -> int:
+        """
+        Alloue un numéro de session unique.
+        
+        Les archives sont créées depuis plusieurs processus (pool de tâches) :
+        le compteur est tenu dans le catalogue partagé, pas en mémoire.
+        """
+        return self.catalog.next_session_number(self.config.archive_dir, seed=self._load_session_counter())
     
     def _generate_archive_name(self, session_number: int, metadata: ArchiveMetadata) -> str:
         """
@@ -250,51 +274,37 @@ class IntelligentArchiveService:
         else:
             return "Régression significative. Revoir la configuration d'entraînement."
     
-    def _collect_model_files(self, model_path: str, temp_dir: str) -> List[str]:
-        """Collecte les fichiers de modèle dans le répertoire temporaire."""
-        collected = []
-        
+    def _add_model_files(self, writer: StreamingArchiveWriter, model_path: str) -> int:
+        """Ajoute les fichiers de modèle à l'archive en cours d'écriture."""
         if not os.path.exists(model_path):
             logger.warning(f"Chemin de modèle non trouvé: {model_path}")
-            return collected
+            return 0
         
-        try:
-            if os.path.isfile(model_path):
-                # Fichier unique
-                dest = os.path.join(temp_dir, "model", os.path.basename(model_path))
-                os.makedirs(os.path.dirname(dest), exist_ok=True)
-                shutil.copy2(model_path, dest)
-                collected.append(dest)
-            elif os.path.isdir(model_path):
-                # Répertoire de modèle
-                model_dir = os.path.join(temp_dir, "model")
-                shutil.copytree(model_path, model_dir, dirs_exist_ok=True)
-                collected.append(model_dir)
-            
-            logger.info(f"Fichiers de modèle collectés: {len(collected)}")
-        except Exception as e:
-            logger.error(f"Erreur lors de la collecte des fichiers de modèle: {e}")
+        if os.path.isfile(model_path):
+            # Fichier unique
+            writer.add_file(f"model/{os.path.basename(model_path)}", model_path)
+            added = 1
+        else:
+            # Répertoire de modèle
+            added = len(writer.add_tree("model", model_path))
         
-        return collected
+        logger.info(f"Fichiers de modèle archivés: {added}")
+        return added
     
-    def _collect_log_files(self, log_patterns: List[str], temp_dir: str) -> List[str]:
-        """Collecte les fichiers de logs correspondant aux patterns."""
-        collected = []
-        logs_dir = os.path.join(temp_dir, "logs")
-        os.makedirs(logs_dir, exist_ok=True)
-        
+    def _add_log_files(self, writer: StreamingArchiveWriter, log_patterns: List[str]) -> int:
+        """Ajoute les fichiers de logs correspondant aux patterns."""
+        added = 0
         for pattern in log_patterns:
             try:
                 for log_file in Path(".").glob(pattern):
                     if log_file.is_file():
-                        dest = os.path.join(logs_dir, log_file.name)
-                        shutil.copy2(log_file, dest)
-                        collected.append(dest)
-            except Exception as e:
+                        writer.add_file(f"logs/{log_file.name}", str(log_file))
+                        added += 1
+            except OSError as e:
                 logger.warning(f"Erreur lors de la collecte des logs avec pattern {pattern}: {e}")
         
-        logger.info(f"Fichiers de logs collectés: {len(collected)}")
-        return collected
+        logger.info(f"Fichiers de logs archivés: {added}")
+        return added
     
     def create_archive(self, metadata: ArchiveMetadata, model_path: Optional[str] = None, 
                       log_patterns: Optional[List[str]] = None) -> Optional[str]:
@@ -309,33 +319,50 @@ class IntelligentArchiveService:
         Returns:
             Chemin de l'archive créée ou None en cas d'erreur
         """
+        result = self.write_archive(metadata, model_path, log_patterns)
+        return result.archive_path if result else None
+    
+    def write_archive(self, metadata: ArchiveMetadata, model_path: Optional[str] = None,
+                      log_patterns: Optional[List[str]] = None,
+                      checkpoint: Optional[Dict[str, Any]] = None) -> Optional[ArchiveWriteResult]:
+        """
+        Crée une archive en une seule passe et retourne son rapport.
+        
+        Les fichiers générés sont écrits directement dans le ZIP, le modèle et
+        les logs y sont recopiés par blocs ; hash, statistiques de compression
+        et validation sont calculés pendant l'écriture.
+        
+        Args:
+            checkpoint: Référence au magasin de checkpoints, écrite à la place
+                du modèle complet (voir `auto_save`)
+        
+        Returns:
+            Résultat de l'écriture (chemin, hash, statistiques, validation) ou None
+        """
         with self._lock:
             try:
-                # Incrémenter le compteur de sessions
-                self._session_counter += 1
-                metadata.session_number = self._session_counter
+                # Allouer le numéro de session
+                metadata.session_number = self._next_session_number()
                 metadata.timestamp = datetime.now().isoformat()
                 
-                # Créer un répertoire temporaire
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    archive_contents = []
-                    
-                    # 1. Générer et sauvegarder params.md
+                archive_name = self._generate_archive_name(metadata.session_number, metadata)
+                archive_path = os.path.join(self.config.archive_dir, archive_name)
+                
+                sink = None
+                if self.chunk_store is not None:
+                    sink = self.chunk_store.begin_archive(os.path.splitext(archive_name)[0])
+                
+                with StreamingArchiveWriter(archive_path, self.config.compression_level, sink=sink,
+                                            codec=self.config.compression_codec,
+                                            workers=self.config.compression_workers) as writer:
+                    # 1. params.md
                     previous_metadata = self._get_previous_session_metadata()
-                    params_content = self._generate_params_md(metadata, previous_metadata)
-                    params_path = os.path.join(temp_dir, "params.md")
-                    with open(params_path, 'w', encoding='utf-8') as f:
-                        f.write(params_content)
-                    archive_contents.append(("params.md", params_path))
+                    writer.add_text("params.md", self._generate_params_md(metadata, previous_metadata))
                     
-                    # 2. Sauvegarder les métadonnées au format JSON
-                    metadata_path = os.path.join(temp_dir, "metadata.json")
-                    with open(metadata_path, 'w') as f:
-                        json.dump(asdict(metadata), f, indent=2)
-                    archive_contents.append(("metadata.json", metadata_path))
+                    # 2. Métadonnées au format JSON
+                    writer.add_text("metadata.json", json.dumps(asdict(metadata), indent=2))
                     
-                    # 3. Sauvegarder la configuration au format YAML
-                    config_path = os.path.join(temp_dir, "config.yaml")
+                    # 3. Configuration au format YAML
                     config_data = {
                         'session_id': metadata.session_id,
                         'session_number': metadata.session_number,
@@ -348,58 +375,38 @@ class IntelligentArchiveService:
                             'buffer_size': metadata.buffer_size
                         }
                     }
-                    with open(config_path, 'w') as f:
-                        yaml.dump(config_data, f, default_flow_style=False)
-                    archive_contents.append(("config.yaml", config_path))
+                    writer.add_text("config.yaml", yaml.dump(config_data, default_flow_style=False))
                     
-                    # 4. Collecter les fichiers de modèle
-                    if model_path and self.config.include_model:
-                        model_files = self._collect_model_files(model_path, temp_dir)
-                        for file_path in model_files:
-                            rel_path = os.path.relpath(file_path, temp_dir)
-                            archive_contents.append((rel_path, file_path))
+                    # 4. Fichiers de modèle (ou référence au checkpoint stocké en delta)
+                    if checkpoint is not None:
+                        writer.add_text(CHECKPOINT_REF_NAME, json.dumps(checkpoint, indent=2))
+                    elif model_path and self.config.include_model:
+                        self._add_model_files(writer, model_path)
                     
-                    # 5. Collecter les logs
+                    # 5. Logs
                     if log_patterns and self.config.include_logs:
-                        log_files = self._collect_log_files(log_patterns, temp_dir)
-                        for file_path in log_files:
-                            rel_path = os.path.relpath(file_path, temp_dir)
-                            archive_contents.append((rel_path, file_path))
-                    
-                    # 6. Générer le nom de l'archive
-                    archive_name = self._generate_archive_name(metadata.session_number, metadata)
-                    archive_path = os.path.join(self.config.archive_dir, archive_name)
-                    
-                    # 7. Créer l'archive ZIP
-                    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                        for arcname, filepath in archive_contents:
-                            if os.path.exists(filepath):
-                                zipf.write(filepath, arcname)
-                    
-                    # 8. Calculer le hash MD5 pour vérification d'intégrité
-                    archive_hash = self._calculate_file_hash(archive_path)
-                    hash_path = archive_path + ".md5"
-                    with open(hash_path, 'w') as f:
-                        f.write(f"{archive_hash}  {archive_name}")
-                    
-                    # 9. Sauvegarder le compteur
-                    self._save_session_counter()
-                    
-                    # 10. Enregistrer dans la liste des archives actives
-                    self._active_archives[metadata.session_id] = {
-                        'path': archive_path,
-                        'metadata': asdict(metadata),
-                        'created': datetime.now().isoformat(),
-                        'hash': archive_hash
-                    }
-                    
-                    logger.info(f"Archive créée: {archive_path} (hash: {archive_hash[:8]}...)")
-                    logger.info(f"Session {metadata.session_number} archivée avec succès")
-                    
-                    # 11. Nettoyer les anciennes archives si nécessaire
-                    self._cleanup_old_archives()
-                    
-                    return archive_path
+                        self._add_log_files(writer, log_patterns)
+                
+                # Archive finalisée : manifeste, hash MD5 et fichier .md5 écrits par le writer
+                result = writer.result
+                
+                # Enregistrer dans la liste des archives actives
+                self._active_archives[metadata.session_id] = {
+                    'path': archive_path,
+                    'metadata': asdict(metadata),
+                    'created': datetime.now().isoformat(),
+                    'hash': result.archive_hash
+                }
+                
+                self.catalog.add(archive_path, archive_hash=result.archive_hash)
+                
+                logger.info(f"Archive créée: {archive_path} (hash: {result.archive_hash[:8]}...)")
+                logger.info(f"Session {metadata.session_number} archivée avec succès")
+                
+                # Nettoyer les anciennes archives si nécessaire
+                self._cleanup_old_archives()
+                
+                return result
                     
             except Exception as e:
                 logger.error(f"Erreur lors de la création de l'archive: {e}")
@@ -414,123 +421,131 @@ class IntelligentArchiveService:
         return None
     
     def _calculate_file_hash(self, filepath: str) -> str:
-        """Calcule le hash MD5 d'un fichier."""
-        hash_md5 = hashlib.md5()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """Calcule le hash MD5 d'un fichier (relu depuis le cache s'il est inchangé)."""
+        return cached_file_hash(filepath, "md5")
+    
+    def sync_catalog(self, force: bool = False) -> Optional[Dict[str, int]]:
+        """
+        Rapproche le catalogue du répertoire des archives (taille et mtime seulement).
+        
+        Sans `force`, le parcours n'est refait qu'après `catalog_sync_interval`
+        secondes : les archives créées, importées ou supprimées par ce service
+        sont déjà à jour dans le catalogue.
+        """
+        now = time.monotonic()
+        if not force and self._catalog_synced_at is not None and \
+                now - self._catalog_synced_at < self.config.catalog_sync_interval:
+            return None
+        result = self.catalog.sync(self.config.archive_dir)
+        self._catalog_synced_at = now
+        return result
+    
+    def register_archive(self, archive_path: str) -> Dict[str, Any]:
+        """Ajoute au catalogue une archive déposée dans le répertoire (import, upload)."""
+        return self.catalog.add(archive_path)
+    
+    def _release_checkpoint(self, archive_path: str) -> None:
+        """Libère dans le magasin le checkpoint référencé par une archive (avant sa suppression)."""
+        if self.checkpoint_store is None or not os.path.exists(archive_path):
+            return
+        try:
+            with open_archive(archive_path) as reader:
+                if not reader.has(CHECKPOINT_REF_NAME):
+                    return
+                reference = reader.read_json(CHECKPOINT_REF_NAME)
+            entry = self.checkpoint_store.get_entry(reference.get('checkpoint_id'))
+            # Seul un checkpoint de ce magasin, au contenu identique, est libéré
+            if entry is not None and entry['sha256'] == reference.get('sha256'):
+                self.checkpoint_store.release(entry['id'])
+        except Exception as e:
+            logger.warning(f"Checkpoint de {archive_path} non libéré: {e}")
+    
+    def delete_archive(self, archive_path: str) -> bool:
+        """Supprime une archive, son fichier .md5, son entrée du catalogue et son checkpoint en delta."""
+        try:
+            self._release_checkpoint(archive_path)
+            invalidate_archive(archive_path)
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+            # Supprimer aussi le fichier .md5 associé
+            md5_file = archive_path + ".md5"
+            if os.path.exists(md5_file):
+                os.remove(md5_file)
+            self.catalog.remove(archive_path)
+            get_hash_cache().invalidate(archive_path)
+            logger.info(f"Archive supprimée: {os.path.basename(archive_path)}")
+            return True
+        except Exception as e:
+            logger.warning(f"Erreur lors de la suppression de {archive_path}: {e}")
+            return False
     
     def _cleanup_old_archives(self) -> None:
         """Nettoie les anciennes archives si le nombre maximal est dépassé."""
         try:
-            archive_files = []
-            for file in os.listdir(self.config.archive_dir):
-                if file.endswith('.zip'):
-                    filepath = os.path.join(self.config.archive_dir, file)
-                    if os.path.isfile(filepath):
-                        mtime = os.path.getmtime(filepath)
-                        archive_files.append((filepath, mtime))
-            
-            if len(archive_files) <= self.config.max_archives:
-                return
-            
-            # Trier par date de modification (plus ancien en premier)
-            archive_files.sort(key=lambda x: x[1])
+            self.sync_catalog()
             
-            # Supprimer les plus anciens
-            files_to_remove = len(archive_files) - self.config.max_archives
-            for i in range(files_to_remove):
-                filepath, _ = archive_files[i]
-                try:
-                    os.remove(filepath)
-                    # Supprimer aussi le fichier .md5 associé
-                    md5_file = filepath + ".md5"
-                    if os.path.exists(md5_file):
-                        os.remove(md5_file)
-                    logger.info(f"Archive ancienne supprimée: {os.path.basename(filepath)}")
-                except Exception as e:
-                    logger.warning(f"Erreur lors de la suppression de {filepath}: {e}")
+            # Les plus anciennes au-delà de max_archives (par date de modification)
+            for filepath in self.catalog.excess(self.config.archive_dir, self.config.max_archives):
+                self.delete_archive(filepath)
                     
         except Exception as e:
             logger.error(f"Erreur lors du nettoyage des archives: {e}")
     
-    def list_archives(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """Liste les archives disponibles avec leurs métadonnées."""
-        archives = []
-        
+    def list_archives(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Liste les archives disponibles avec leurs métadonnées (par numéro de session décroissant)."""
         try:
-            for file in os.listdir(self.config.archive_dir):
-                if file.endswith('.zip'):
-                    filepath = os.path.join(self.config.archive_dir, file)
-                    if os.path.isfile(filepath):
-                        # Extraire les métadonnées du nom de fichier
-                        metadata = self._extract_metadata_from_filename(file)
-                        metadata['path'] = filepath
-                        metadata['size_mb'] = os.path.getsize(filepath) / (1024 * 1024)
-                        metadata['modified'] = datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat()
-                        
-                        archives.append(metadata)
-            
-            # Trier par numéro de session (décroissant)
-            archives.sort(key=lambda x: x.get('session_number', 0), reverse=True)
-            
-            return archives[:limit]
+            self.sync_catalog()
+            return self.catalog.list_archives(self.config.archive_dir, limit, offset)
             
         except Exception as e:
             logger.error(f"Erreur lors de la liste des archives: {e}")
             return []
     
+    def get_best_archives(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Archives au meilleur score (win_rate des métadonnées)."""
+        try:
+            self.sync_catalog()
+            return self.catalog.best(self.config.archive_dir, limit)
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche des meilleures archives: {e}")
+            return []
+    
     def _extract_metadata_from_filename(self, filename: str) -> Dict[str, Any]:
         """Extrait les métadonnées du nom de fichier d'archive."""
-        # Format: pacman_run_047_20260103_1632_DQN_pacman.zip
-        import re
-        
-        pattern = r'pacman_run_(\d+)_(\d+)_(\d+)_([^_]+)_([^_]+)\.zip'
-        match = re.match(pattern, filename)
-        
-        if match:
-            session_num, date, time, model_type, agent_type = match.groups()
-            return {
-                'session_number': int(session_num),
-                'date': date,
-                'time': time,
-                'model_type': model_type,
-                'agent_type': agent_type,
-                'filename': filename
-            }
-        else:
-            return {'filename': filename}
+        return parse_archive_filename(filename)
     
     def get_archive_info(self, archive_path: str) -> Optional[Dict[str, Any]]:
-        """Récupère les informations détaillées d'une archive."""
+        """Récupère les informations détaillées d'une archive (répertoire central et métadonnées seulement)."""
         if not os.path.exists(archive_path):
             logger.error(f"Archive non trouvée: {archive_path}")
             return None
         
         try:
+            size_bytes = os.path.getsize(archive_path)
+            modified = datetime.fromtimestamp(os.path.getmtime(archive_path)).isoformat()
             info = {
                 'path': archive_path,
-                'size_bytes': os.path.getsize(archive_path),
-                'modified': datetime.fromtimestamp(os.path.getmtime(archive_path)).isoformat(),
+                'size_bytes': size_bytes,
+                'size_mb': size_bytes / (1024 * 1024),
+                'modified': modified,
                 'hash': self._calculate_file_hash(archive_path)
             }
             
-            # Extraire les métadonnées si possible
-            with zipfile.ZipFile(archive_path, 'r') as zipf:
-                # Vérifier la présence des fichiers clés
-                file_list = zipf.namelist()
-                info['files'] = file_list
+            # Lecteur partagé : le répertoire central n'est analysé qu'une fois
+            with open_archive(archive_path) as reader:
+                structure = reader.structure()
+                info['files'] = reader.names()
+                info['file_count'] = structure['file_count']
+                info['structure'] = structure
                 
-                if 'metadata.json' in file_list:
-                    with zipf.open('metadata.json') as f:
-                        metadata = json.load(f)
-                        info['metadata'] = metadata
+                if reader.has('metadata.json'):
+                    info['metadata'] = reader.metadata()
+                    info['created_at'] = info['metadata'].get('timestamp', modified)
                 
-                if 'params.md' in file_list:
-                    with zipf.open('params.md') as f:
-                        params_content = f.read().decode('utf-8')
-                        info['params_preview'] = params_content[:500] + "..." if len(params_content) > 500 else params_content
+                params_preview = reader.params_preview()
+            if params_preview is not None:
+                info['params_preview'] = params_preview
             
             return info
             
@@ -538,13 +553,20 @@ class IntelligentArchiveService:
             logger.error(f"Erreur lors de la lecture de l'archive: {e}")
             return None
     
-    def restore_session(self, archive_path: str, target_dir: str) -> Optional[str]:
+    def extract_metadata(self, archive_path: str) -> Dict[str, Any]:
+        """Contenu de metadata.json d'une archive, lu sans extraction."""
+        with open_archive(archive_path) as reader:
+            return dict(reader.metadata())
+    
+    def restore_session(self, archive_path: str, target_dir: str,
+                        members: Optional[List[str]] = None) -> Optional[str]:
         """
         Restaure une session depuis une archive.
         
         Args:
             archive_path: Chemin vers l'archive
             target_dir: Répertoire de destination
+            members: Membres à restaurer (défaut: tous), par exemple ``['metadata.json', 'model/model.zip']``
             
         Returns:
             Chemin du répertoire restauré ou None en cas d'erreur
@@ -556,8 +578,8 @@ class IntelligentArchiveService:
         try:
             os.makedirs(target_dir, exist_ok=True)
             
-            with zipfile.ZipFile(archive_path, 'r') as zipf:
-                zipf.extractall(target_dir)
+            with open_archive(archive_path) as reader:
+                reader.extract_members(reader.names() if members is None else members, target_dir)
             
             logger.info(f"Session restaurée depuis {archive_path} vers {target_dir}")
             
@@ -622,7 +644,25 @@ class IntelligentArchiveService:
             notes=f"Sauvegarde automatique à l'épisode {episode}"
         )
         
-        return self.create_archive(metadata, model_path, ['logs/*.log', 'logs/*.json'])
+        log_patterns = ['logs/*.log', 'logs/*.json']
+        checkpoint = None
+        if (self.checkpoint_store is not None and self.config.include_model
+                and model_path and os.path.isfile(model_path)):
+            # Le checkpoint rejoint la série en delta ; l'archive n'en garde que la référence
+            try:
+                entry = self.checkpoint_store.add(model_path, metadata.session_id)
+                checkpoint = {
+                    "store_dir": str(self.checkpoint_store.root),
+                    "checkpoint_id": entry["id"],
+                    "file_name": entry["source_name"],
+                    "size": entry["size"],
+                    "sha256": entry["sha256"]
+                }
+            except Exception as e:
+                logger.warning(f"Checkpoint non stocké en delta, archivage complet: {e}")
+        
+        result = self.write_archive(metadata, model_path, log_patterns, checkpoint=checkpoint)
+        return result.archive_path if result else None
     
     def integrate_with_backend(self, backend_url: str, archive_path: str) -> bool:
         """
@@ -3,7 +3,10 @@
 Validation d'archives pour le système d'archivage intelligent.
 
 Fonctionnalités :
-- Vérification d'intégrité (hash MD5, SHA256)
+- Vérification d'intégrité (hash MD5 mis en cache, empreintes BLAKE2b par membre)
+- Localisation des membres corrompus via la racine de Merkle du manifeste
+- Validation en place des ZIP (lecture en flux, sans extraction sur disque)
+- Validation par lot d'un répertoire d'archives dans un pool de processus
 - Validation de structure et de contenu
 - Détection d'anomalies et de corruption
 - Signature numérique et vérification
@@ -17,16 +20,25 @@ import zipfile
 import tarfile
 import hashlib
 import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import logging
 
+from experiments.file_hasher import HASH_ALGORITHM, READ_SIZE, cached_file_hash, new_hasher, merkle_root
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Taille maximale des fichiers JSON/YAML analysés lors de la validation en place
+PARSE_MAX_BYTES = 1024 * 1024
+
 @dataclass
 class ValidationResult:
     """Résultat de la validation d'une archive."""
@@ -94,7 +106,10 @@ class ArchiveValidator:
                         structure: Optional[ArchiveStructure] = None,
                         check_integrity: bool = True,
                         check_structure: bool = True,
-                        check_content: bool = True) -> ValidationResult:
+                        check_content: bool = True,
+                        in_place: bool = True,
+                        save_report: bool = True,
+                        quarantine: bool = True) -> ValidationResult:
         """
         Valide une archive selon plusieurs critères.
         
@@ -104,6 +119,9 @@ class ArchiveValidator:
             check_integrity: Vérifier l'intégrité du fichier
             check_structure: Vérifier la structure de l'archive
             check_content: Vérifier le contenu des fichiers
+            in_place: Valider les ZIP en flux, sans extraction (les TAR sont extraits)
+            save_report: Sauvegarder le rapport de validation
+            quarantine: Mettre l'archive en quarantaine si elle est invalide
             
         Returns:
             Résultat de la validation
@@ -126,10 +144,12 @@ class ArchiveValidator:
         statistics = {}
         
         try:
+            in_place_zip = in_place and archive_path.endswith('.zip')
+            
             # Vérifier l'intégrité du fichier
             if check_integrity:
                 checks_performed.append("integrity_check")
-                integrity_result = self._check_integrity(archive_path)
+                integrity_result = self._check_integrity(archive_path, in_place_zip and check_content)
                 
                 if not integrity_result["is_valid"]:
                     errors.extend(integrity_result["errors"])
@@ -138,6 +158,20 @@ class ArchiveValidator:
                 
                 warnings.extend(integrity_result["warnings"])
             
+            # ZIP : structure et contenu vérifiés en une seule lecture, sans extraction
+            if in_place_zip and (check_structure or check_content) and not errors:
+                checks_performed.extend(
+                    name for name, enabled in (("structure_check", check_structure), ("content_check", check_content))
+                    if enabled
+                )
+                in_place_result = self._check_zip_in_place(
+                    archive_path, structure or self.PACMAN_ARCHIVE_STRUCTURE, check_structure, check_content
+                )
+                errors.extend(in_place_result["errors"])
+                warnings.extend(in_place_result["warnings"])
+                statistics.update(in_place_result["statistics"])
+                check_structure = check_content = False
+            
             # Vérifier la structure de l'archive
             if check_structure and not errors:
                 checks_performed.append("structure_check")
@@ -182,10 +216,11 @@ class ArchiveValidator:
             )
             
             # Sauvegarder le rapport
-            self._save_validation_report(result)
+            if save_report:
+                self._save_validation_report(result)
             
             # Mettre en quarantaine si invalide
-            if not is_valid:
+            if not is_valid and quarantine:
                 self._quarantine_archive(archive_path, result)
             
             logger.info(f"Validation terminée: {archive_path} - {'VALIDE' if is_valid else 'INVALIDE'}")
@@ -211,8 +246,15 @@ class ArchiveValidator:
                 statistics=statistics
             )
     
-    def _check_integrity(self, archive_path: str) -> Dict[str, Any]:
-        """Vérifie l'intégrité du fichier d'archive."""
+    def _check_integrity(self, archive_path: str, members_checked_later: bool = False) -> Dict[str, Any]:
+        """
+        Vérifie l'intégrité du fichier d'archive.
+        
+        Args:
+            members_checked_later: La passe en place qui suit compare déjà
+                chaque membre au manifeste ; sans fichier .md5, les membres ne
+                sont alors pas relus ici
+        """
         result = {
             "is_valid": True,
             "errors": [],
@@ -242,10 +284,20 @@ class ArchiveValidator:
                 if expected_hash != md5_hash:
                     result["is_valid"] = False
                     result["errors"].append("Hash MD5 ne correspond pas")
+                    # Le manifeste permet de désigner les membres corrompus
+                    members = self.verify_members(archive_path)
+                    if members["supported"]:
+                        result["errors"].extend(f"Membre corrompu: {name}" for name in members["corrupted"])
                 else:
                     result["warnings"].append("Hash MD5 vérifié avec succès")
             else:
                 result["warnings"].append("Aucun fichier de hash trouvé")
+                # Sans fichier .md5, les empreintes du manifeste tiennent lieu de contrôle
+                if not members_checked_later:
+                    members = self.verify_members(archive_path)
+                    if members["supported"] and not members["is_valid"]:
+                        result["is_valid"] = False
+                        result["errors"].extend(members["errors"])
             
             # Vérifier que l'archive peut être ouverte
             if not self._can_open_archive(archive_path):
@@ -259,14 +311,81 @@ class ArchiveValidator:
         return result
     
     def _compute_file_hash(self, file_path: str, algorithm: str) -> str:
-        """Calcule le hash d'un fichier."""
-        hash_func = hashlib.new(algorithm)
+        """Calcule le hash d'un fichier (relu depuis le cache s'il est inchangé)."""
+        return cached_file_hash(file_path, algorithm)
+    
+    @staticmethod
+    def verify_members(archive_path: str, members: Optional[List[str]] = None,
+                       expected_root: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Vérifie les membres d'une archive d'après les empreintes de son manifeste.
         
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_func.update(chunk)
+        Seuls les membres demandés sont relus : vérifier un membre ne coûte
+        que sa décompression, pas le hachage de toute l'archive. La racine de
+        Merkle recalculée depuis le manifeste est comparée à celle qu'il
+        déclare et, si elle est fournie, à `expected_root` (racine conservée
+        hors de l'archive, par exemple dans le registre des versions).
+        
+        Args:
+            archive_path: Chemin de l'archive ZIP
+            members: Membres à vérifier (None = tous)
+            expected_root: Racine de Merkle de référence
+            
+        Returns:
+            Dictionnaire avec supported, is_valid, verified, corrupted, missing et errors
+        """
+        result = {
+            "supported": False,
+            "is_valid": True,
+            "merkle_root": None,
+            "verified": [],
+            "corrupted": [],
+            "missing": [],
+            "errors": []
+        }
+        try:
+            with zipfile.ZipFile(archive_path, 'r') as zipf:
+                try:
+                    manifest = json.loads(zipf.read("manifest.json"))
+                except KeyError:
+                    return result
+                merkle = manifest.get("merkle")
+                if not merkle or merkle.get("algorithm") != HASH_ALGORITHM:
+                    return result
+                result["supported"] = True
+                
+                digests = {entry["path"]: entry[HASH_ALGORITHM] for entry in manifest["files"]}
+                root = merkle_root([(entry["path"], entry[HASH_ALGORITHM]) for entry in manifest["files"]])
+                result["merkle_root"] = root
+                if root != merkle["root"] or (expected_root is not None and root != expected_root):
+                    result["errors"].append("Racine de Merkle invalide : manifeste altéré")
+                
+                names = set(zipf.namelist())
+                for name in (members if members is not None else list(digests)):
+                    if name not in digests or name not in names:
+                        result["missing"].append(name)
+                        continue
+                    hasher = new_hasher(HASH_ALGORITHM)
+                    try:
+                        with zipf.open(name) as member:
+                            for chunk in iter(lambda: member.read(READ_SIZE), b""):
+                                hasher.update(chunk)
+                    except Exception as e:
+                        # CRC ou flux compressé invalide : membre corrompu
+                        logger.debug(f"Lecture impossible de {name}: {e}")
+                        result["corrupted"].append(name)
+                        continue
+                    if hasher.hexdigest() == digests[name]:
+                        result["verified"].append(name)
+                    else:
+                        result["corrupted"].append(name)
+        except Exception as e:
+            result["errors"].append(f"Erreur lors de la vérification des membres: {e}")
         
-        return hash_func.hexdigest()
+        result["errors"].extend(f"Membre corrompu: {name}" for name in result["corrupted"])
+        result["errors"].extend(f"Membre absent: {name}" for name in result["missing"])
+        result["is_valid"] = not result["errors"]
+        return result
     
     def _can_open_archive(self, archive_path: str) -> bool:
         """Vérifie si une archive peut être ouverte."""
@@ -303,19 +422,7 @@ class ArchiveValidator:
         }
         
         try:
-            # Vérifier le format
-            file_ext = os.path.splitext(archive_path)[1].lower()
-            if file_ext not in structure.allowed_formats:
-                result["is_valid"] = False
-                result["errors"].append(f"Format non autorisé: {file_ext}")
-            
-            # Vérifier la taille
-            file_size_mb = os.path.getsize(archive_path) / (1024 * 1024)
-            result["statistics"]["file_size_mb"] = file_size_mb
-            
-            if file_size_mb > structure.max_size_mb:
-                result["is_valid"] = False
-                result["errors"].append(f"Taille excessive: {file_size_mb:.1f}MB > {structure.max_size_mb}MB")
+            self._check_format_and_size(archive_path, structure, result)
             
             # Extraire et analyser la structure
             with tempfile.TemporaryDirectory() as temp_dir:
@@ -326,33 +433,7 @@ class ArchiveValidator:
                     result["errors"].append("Impossible d'extraire l'archive")
                     return result
                 
-                result["statistics"]["file_count"] = len(extracted_files)
-                
-                # Vérifier les fichiers requis
-                missing_required = []
-                for required_file in structure.required_files:
-                    if not any(f.endswith(required_file) or required_file in f for f in extracted_files):
-                        missing_required.append(required_file)
-                
-                if missing_required:
-                    result["is_valid"] = False
-                    result["errors"].append(f"Fichiers requis manquants: {missing_required}")
-                
-                # Vérifier les patterns de fichiers
-                for pattern, description in structure.file_patterns.items():
-                    import re
-                    matching_files = [f for f in extracted_files if re.match(pattern, f)]
-                    
-                    if matching_files:
-                        result["statistics"][f"files_{description.replace(' ', '_').lower()}"] = len(matching_files)
-                
-                # Vérifier la hiérarchie des répertoires
-                dir_structure = self._analyze_directory_structure(extracted_files)
-                result["statistics"]["directory_depth"] = dir_structure.get("max_depth", 0)
-                result["statistics"]["directory_count"] = dir_structure.get("dir_count", 0)
-                
-                if dir_structure.get("max_depth", 0) > 5:
-                    result["warnings"].append("Structure de répertoires trop profonde")
+                self._check_file_list(extracted_files, structure, result)
                 
         except Exception as e:
             result["is_valid"] = False
@@ -360,6 +441,182 @@ class ArchiveValidator:
         
         return result
     
+    def _check_format_and_size(self, archive_path: str, structure: ArchiveStructure, result: Dict[str, Any]) -> None:
+        """Vérifie le format et la taille du fichier d'archive."""
+        # Vérifier le format
+        file_ext = os.path.splitext(archive_path)[1].lower()
+        if file_ext not in structure.allowed_formats:
+            result["is_valid"] = False
+            result["errors"].append(f"Format non autorisé: {file_ext}")
+        
+        # Vérifier la taille
+        file_size_mb = os.path.getsize(archive_path) / (1024 * 1024)
+        result["statistics"]["file_size_mb"] = file_size_mb
+        
+        if file_size_mb > structure.max_size_mb:
+            result["is_valid"] = False
+            result["errors"].append(f"Taille excessive: {file_size_mb:.1f}MB > {structure.max_size_mb}MB")
+    
+    def _check_file_list(self, file_list: List[str], structure: ArchiveStructure, result: Dict[str, Any]) -> None:
+        """Vérifie la liste des fichiers (requis, patterns, profondeur)."""
+        result["statistics"]["file_count"] = len(file_list)
+        
+        # Vérifier les fichiers requis
+        missing_required = []
+        for required_file in structure.required_files:
+            if not any(f.endswith(required_file) or required_file in f for f in file_list):
+                missing_required.append(required_file)
+        
+        if missing_required:
+            result["is_valid"] = False
+            result["errors"].append(f"Fichiers requis manquants: {missing_required}")
+        
+        # Vérifier les patterns de fichiers
+        for pattern, description in structure.file_patterns.items():
+            import re
+            matching_files = [f for f in file_list if re.match(pattern, f)]
+            
+            if matching_files:
+                result["statistics"][f"files_{description.replace(' ', '_').lower()}"] = len(matching_files)
+        
+        # Vérifier la hiérarchie des répertoires
+        dir_structure = self._analyze_directory_structure(file_list)
+        result["statistics"]["directory_depth"] = dir_structure.get("max_depth", 0)
+        result["statistics"]["directory_count"] = dir_structure.get("dir_count", 0)
+        
+        if dir_structure.get("max_depth", 0) > 5:
+            result["warnings"].append("Structure de répertoires trop profonde")
+    
+    def _check_zip_in_place(self, archive_path: str, structure: ArchiveStructure,
+                            check_structure: bool = True, check_content: bool = True) -> Dict[str, Any]:
+        """
+        Vérifie structure et contenu d'un ZIP sans l'extraire.
+        
+        La liste des membres vient du répertoire central. Chaque membre est
+        lu une seule fois en flux : `zipfile` contrôle le CRC en fin de
+        lecture, l'empreinte est comparée au manifeste, et les fichiers
+        reconnus passent par une analyse légère (JSON, YAML, ZIP imbriqué
+        des modèles SB3). Rien n'est écrit sur disque.
+        """
+        result = {
+            "is_valid": True,
+            "errors": [],
+            "warnings": [],
+            "statistics": {}
+        }
+        
+        try:
+            if check_structure:
+                self._check_format_and_size(archive_path, structure, result)
+            
+            with zipfile.ZipFile(archive_path, 'r') as zipf:
+                infos = [info for info in zipf.infolist() if not info.is_dir()]
+                if check_structure:
+                    self._check_file_list([info.filename for info in infos], structure, result)
+                if check_content:
+                    self._check_members_in_place(zipf, infos, result)
+                    
+        except zipfile.BadZipFile as e:
+            result["errors"].append(f"Archive corrompue ou format invalide: {e}")
+        except Exception as e:
+            result["errors"].append(f"Erreur lors de la validation en place: {e}")
+        
+        result["is_valid"] = not result["errors"]
+        return result
+    
+    def _check_members_in_place(self, zipf: zipfile.ZipFile, infos: List[zipfile.ZipInfo],
+                                result: Dict[str, Any]) -> None:
+        """
+        Lit chaque membre en flux : CRC, empreinte du manifeste et analyse du contenu.
+        
+        Les contrôles de `verify_members` (racine de Merkle, membres absents,
+        empreintes) sont faits dans cette même passe.
+        """
+        digests = {}
+        if "manifest.json" in zipf.NameToInfo:
+            try:
+                manifest = json.loads(zipf.read("manifest.json"))
+                merkle = manifest.get("merkle") or {}
+                if merkle.get("algorithm") == HASH_ALGORITHM:
+                    digests = {entry["path"]: entry[HASH_ALGORITHM] for entry in manifest["files"]}
+                    root = merkle_root([(entry["path"], entry[HASH_ALGORITHM]) for entry in manifest["files"]])
+                    if root != merkle.get("root"):
+                        result["errors"].append("Racine de Merkle invalide : manifeste altéré")
+                    names = {info.filename for info in infos}
+                    result["errors"].extend(f"Membre absent: {name}" for name in digests if name not in names)
+            except Exception as e:
+                result["errors"].append(f"Manifeste illisible: {e}")
+        
+        log_stats = {"log_count": 0, "log_total_size_bytes": 0, "log_files": []}
+        sb3_models = 0
+        verified = 0
+        for info in infos:
+            name = info.filename
+            lower = name.lower()
+            parsed = lower.endswith(('metadata.json', '.yaml', '.yml'))
+            hasher = new_hasher(HASH_ALGORITHM) if name in digests else None
+            content = bytearray()
+            try:
+                with zipf.open(info) as member:
+                    for chunk in iter(lambda: member.read(READ_SIZE), b""):
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        if parsed and len(content) <= PARSE_MAX_BYTES:
+                            content += chunk
+            except Exception as e:
+                # CRC ou flux compressé invalide
+                result["errors"].append(f"Membre corrompu: {name} ({e})")
+                continue
+            
+            if hasher is not None:
+                if hasher.hexdigest() != digests[name]:
+                    result["errors"].append(f"Membre corrompu: {name} (empreinte différente du manifeste)")
+                    continue
+                verified += 1
+            
+            # Analyse légère selon le type de fichier
+            if parsed and len(content) > PARSE_MAX_BYTES:
+                result["warnings"].append(f"Fichier trop volumineux pour analyse: {name}")
+            elif lower.endswith('metadata.json'):
+                try:
+                    result["errors"].extend(self.check_metadata(json.loads(bytes(content)), name))
+                except ValueError as e:
+                    result["errors"].append(f"Fichier JSON invalide {name}: {e}")
+            elif parsed:
+                try:
+                    yaml.safe_load(bytes(content))
+                except yaml.YAMLError as e:
+                    result["errors"].append(f"Fichier YAML invalide {name}: {e}")
+            
+            if lower.endswith(('.zip', '.pth', '.h5')):
+                if info.file_size == 0:
+                    result["warnings"].append(f"Fichier de modèle vide: {name}")
+                elif info.file_size > 100 * 1024 * 1024:  # 100MB
+                    result["warnings"].append(
+                        f"Fichier de modèle très volumineux: {name} ({info.file_size / (1024*1024):.1f}MB)"
+                    )
+                if lower.endswith('.zip') and info.file_size > 0:
+                    # ZIP dans le ZIP : seul le répertoire central du modèle est lu
+                    try:
+                        with zipf.open(info) as member, zipfile.ZipFile(member) as model:
+                            model_members = set(model.namelist())
+                        if {"data", "policy.pth"} <= model_members:
+                            sb3_models += 1
+                    except Exception:
+                        result["warnings"].append(f"Fichier ZIP de modèle corrompu: {name}")
+            
+            if lower.endswith(('.log', '.txt', '.json')):
+                log_stats["log_count"] += 1
+                log_stats["log_total_size_bytes"] += info.file_size
+                log_stats["log_files"].append({"name": name, "size_bytes": info.file_size})
+                if info.file_size == 0:
+                    log_stats.setdefault("empty_logs", []).append(name)
+        
+        result["statistics"].update(log_stats)
+        result["statistics"]["members_verified"] = verified
+        result["statistics"]["sb3_models"] = sb3_models
+        result["statistics"]["uncompressed_bytes"] = sum(info.file_size for info in infos)
+    
     def _extract_archive(self, archive_path: str, extract_dir: str) -> List[str]:
         """Extrait une archive et retourne la liste des fichiers."""
         try:
@@ -457,18 +714,7 @@ class ArchiveValidator:
                 with open(metadata_path, 'r') as f:
                     metadata = json.load(f)
                 
-                # Vérifier les champs requis
-                required_fields = ['session_id', 'timestamp', 'model_type']
-                for field in required_fields:
-                    if field not in metadata:
-                        errors.append(f"Champ '{field}' manquant dans {metadata_file}")
-                
-                # Vérifier les types de données
-                if 'total_episodes' in metadata and not isinstance(metadata['total_episodes'], (int, float)):
-                    errors.append(f"Champ 'total_episodes' doit être numérique dans {metadata_file}")
-                
-                if 'win_rate' in metadata and not isinstance(metadata['win_rate'], (int, float)):
-                    errors.append(f"Champ 'win_rate' doit être numérique dans {metadata_file}")
+                errors.extend(self.check_metadata(metadata, metadata_file))
                 
             except json.JSONDecodeError as e:
                 errors.append(f"Fichier JSON invalide {metadata_file}: {e}")
@@ -477,6 +723,26 @@ class ArchiveValidator:
         
         return errors
     
+    @staticmethod
+    def check_metadata(metadata: Dict[str, Any], metadata_file: str = "metadata.json") -> List[str]:
+        """Vérifie les champs requis et leurs types dans un metadata.json décodé."""
+        errors = []
+        
+        # Vérifier les champs requis
+        required_fields = ['session_id', 'timestamp', 'model_type']
+        for field in required_fields:
+            if field not in metadata:
+                errors.append(f"Champ '{field}' manquant dans {metadata_file}")
+        
+        # Vérifier les types de données
+        if 'total_episodes' in metadata and not isinstance(metadata['total_episodes'], (int, float)):
+            errors.append(f"Champ 'total_episodes' doit être numérique dans {metadata_file}")
+        
+        if 'win_rate' in metadata and not isinstance(metadata['win_rate'], (int, float)):
+            errors.append(f"Champ 'win_rate' doit être numérique dans {metadata_file}")
+        
+        return errors
+    
     def _check_model_files(self, extract_dir: str, file_list: List[str]) -> List[str]:
         """Vérifie les fichiers de modèle."""
         warnings = []
@@ -539,6 +805,66 @@ class ArchiveValidator:
         
         return stats
     
+    def validate_directory(self, directory: str, pattern: str = "*.zip",
+                           max_workers: Optional[int] = None, quarantine: bool = False) -> Dict[str, Any]:
+        """
+        Valide toutes les archives d'un répertoire dans un pool de processus.
+        
+        Chaque archive est validée en place par un processus ; un seul
+        rapport regroupe les résultats.
+        
+        Args:
+            directory: Répertoire des archives
+            pattern: Motif des fichiers à valider
+            max_workers: Processus du pool (None = nombre de cœurs, ou validation
+                séquentielle si l'appelant est déjà un processus de pool)
+            quarantine: Mettre en quarantaine les archives invalides
+            
+        Returns:
+            Rapport de validation du lot (chemin du rapport sauvegardé compris)
+        """
+        start = time.perf_counter()
+        archives = sorted(str(path) for path in Path(directory).glob(pattern) if path.is_file())
+        cpu_count = os.cpu_count() or 1
+        if multiprocessing.parent_process() is not None:
+            # Déjà dans un processus du pool de tâches : pas de pool imbriqué
+            # par défaut, et jamais plus de processus que de cœurs
+            workers = min(max_workers or 1, cpu_count)
+        else:
+            workers = max_workers or cpu_count
+        workers = max(1, min(workers, len(archives)))
+        
+        if workers == 1:
+            results = [_validate_in_worker(self.work_dir, path, quarantine) for path in archives]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_validate_in_worker, repeat(self.work_dir), archives, repeat(quarantine)))
+        
+        invalid = [result for result in results if not result["is_valid"]]
+        report = {
+            "directory": directory,
+            "pattern": pattern,
+            "validation_time": datetime.now().isoformat(),
+            "duration_seconds": time.perf_counter() - start,
+            "workers": workers,
+            "archive_count": len(results),
+            "valid_count": len(results) - len(invalid),
+            "invalid_count": len(invalid),
+            "invalid_archives": [result["archive_path"] for result in invalid],
+            "results": results
+        }
+        
+        report_dir = os.path.join(self.work_dir, "reports")
+        os.makedirs(report_dir, exist_ok=True)
+        report_file = os.path.join(report_dir, f"batch_validation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        report["report_path"] = report_file
+        
+        logger.info(f"Validation par lot terminée: {directory} - {report['valid_count']}/{len(results)} valides "
+                    f"({workers} processus, {report['duration_seconds']:.2f}s)")
+        return report
+    
     def _save_validation_report(self, result: ValidationResult) -> None:
         """Sauvegarde un rapport de validation."""
         try:
@@ -583,4 +909,10 @@ class ArchiveValidator:
             logger.warning(f"Archive mise en quarantaine: {archive_path} -> {quarantine_path}")
         
         except Exception as e:
-            logger.error(f"Erreur lors de la mise en quarantaine: {e}")
\ No newline at end of file
+            logger.error(f"Erreur lors de la mise en quarantaine: {e}")
+
+def _validate_in_worker(work_dir: str, archive_path: str, quarantine: bool) -> Dict[str, Any]:
+    """Valide une archive dans un processus du pool (rapport individuel non sauvegardé)."""
+    validator = ArchiveValidator(work_dir)
+    result = validator.validate_archive(archive_path, save_report=False, quarantine=quarantine)
+    return asdict(result)
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Écriture d'archives en une seule passe pour le système d'archivage intelligent.
+
+Fonctionnalités :
+- Membres écrits directement dans le ZIP (contenus générés sans fichier temporaire)
+- Choix du codec par membre d'après un échantillon (stockage brut des contenus déjà compressés)
+- Codecs deflate, bz2 ou lzma ; gros membres compressés en parallèle par des threads
+- Empreinte BLAKE2b de chaque membre et MD5 de l'archive calculés au fil de l'écriture
+- Racine de Merkle des membres dans le manifeste (vérification d'un seul membre)
+- Manifeste de validation (structure, métadonnées) construit pendant l'écriture
+- Alimentation optionnelle du magasin dédupliqué (`ChunkStore`) dans la même passe
+
+L'archive est écrite dans un fichier ``.part`` puis renommée : une fois
+`close()` terminé elle est définitive et vérifiée, sans relecture, extraction
+ni recompression.
+
+Les membres volumineux sont compressés par un pool de threads (zlib, bz2 et
+lzma libèrent le GIL) dans des fichiers temporaires, puis recopiés tels quels
+dans le ZIP par le thread principal : l'archive reste écrite séquentiellement,
+seul le travail de compression est réparti sur les cœurs.
+"""
+
+import os
+import bz2
+import json
+import time
+import zlib
+import shutil
+import zipfile
+import hashlib
+import tempfile
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, BinaryIO, Iterable
+from dataclasses import dataclass, asdict
+import logging
+
+from experiments.compression_optimizer import CompressionStats, SAMPLE_SIZE, estimate_compressibility
+from experiments.archive_validator import ArchiveValidator, ValidationResult
+from experiments.file_hasher import HASH_ALGORITHM, new_hasher, merkle_root
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus et écrits
+CHUNK_SIZE = 1024 * 1024
+
+# Nom du manifeste ajouté en dernier membre de chaque archive
+MANIFEST_NAME = "manifest.json"
+
+# Extensions déjà compressées : stockées telles quelles
+COMPRESSED_EXTENSIONS = ('.zip', '.gz', '.bz2', '.xz', '.7z', '.rar', '.jpg', '.png', '.gif', '.mp3', '.mp4', '.onnx')
+
+# Signatures de contenus déjà compressés (ZIP SB3 et torch.save, gzip, xz, bz2)
+COMPRESSED_SIGNATURES = (b"PK\x03\x04", b"\x1f\x8b", b"\xfd7zXZ", b"BZh")
+
+# Ratio estimé au-delà duquel un membre est stocké sans compression
+STORED_RATIO_THRESHOLD = 0.95
+
+# Codecs disponibles (nom de configuration -> méthode ZIP)
+CODECS = {"deflate": zipfile.ZIP_DEFLATED, "bz2": zipfile.ZIP_BZIP2, "lzma": zipfile.ZIP_LZMA}
+CODEC_NAMES = {
+    zipfile.ZIP_STORED: "stored", zipfile.ZIP_DEFLATED: "deflated",
+    zipfile.ZIP_BZIP2: "bzip2", zipfile.ZIP_LZMA: "lzma"
+}
+
+# Membres compressés en parallèle à partir de cette taille
+PARALLEL_MIN_SIZE = 4 * 1024 * 1024
+
+# Données compressées gardées en mémoire par membre avant débordement sur disque
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+@dataclass
+class ArchiveEntry:
+    """Membre écrit dans une archive."""
+    path: str
+    size: int
+    compressed_size: int
+    blake2b: str
+    compression: str
+    compress_seconds: float = 0.0
+
+@dataclass
+class ArchiveWriteResult:
+    """Résultat de l'écriture d'une archive."""
+    archive_path: str
+    archive_hash: str
+    entries: List[ArchiveEntry]
+    stats: CompressionStats
+    validation: ValidationResult
+    merkle_root: str = ""
+
+def choose_compression(arcname: str, sample: bytes, codec: int = zipfile.ZIP_DEFLATED) -> int:
+    """
+    Choisit le codec d'un membre d'après son extension et un échantillon.
+
+    Les formats déjà compressés (extension ou signature : ZIP SB3, ONNX...)
+    et les contenus dont la compressibilité estimée est trop faible sont
+    stockés (``ZIP_STORED``) : les compresser coûte du temps sans gain de
+    place. Les autres reçoivent le codec configuré.
+    """
+    if arcname.lower().endswith(COMPRESSED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    if sample.startswith(COMPRESSED_SIGNATURES):
+        return zipfile.ZIP_STORED
+    if estimate_compressibility(sample) >= STORED_RATIO_THRESHOLD:
+        return zipfile.ZIP_STORED
+    return codec
+
+def _new_compressor(compress_type: int, level: int):
+    """Compresseur produisant les données d'un membre ZIP (mêmes formats que `zipfile`)."""
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.compressobj(level, zlib.DEFLATED, -15)
+    if compress_type == zipfile.ZIP_BZIP2:
+        return bz2.BZ2Compressor(min(max(level, 1), 9))
+    if compress_type == zipfile.ZIP_LZMA:
+        return zipfile.LZMACompressor()
+    raise ValueError(f"Méthode de compression non supportée: {compress_type}")
+
+@dataclass
+class _CompressedMember:
+    """Membre compressé par un thread, en attente d'écriture dans le ZIP."""
+    crc: int
+    size: int
+    blake2b: str
+    data: BinaryIO
+    compressed_size: int
+    seconds: float
+    ingest: Optional[Dict] = None
+
+class _HashingWriter:
+    """
+    Flux d'écriture non repositionnable qui hache les octets au passage.
+
+    Sans `seek`, `zipfile` écrit chaque membre d'un seul tenant (descripteur
+    de données après le contenu) : le MD5 obtenu est celui du fichier final.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+        self._position = 0
+        self.md5 = hashlib.md5()
+
+    def write(self, data) -> int:
+        self.md5.update(data)
+        self._raw.write(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        self._raw.flush()
+
+class StreamingArchiveWriter:
+    """
+    Écrit une archive ZIP en une seule passe.
+
+    Utilisation :
+        with StreamingArchiveWriter("run.zip") as writer:
+            writer.add_bytes("metadata.json", data)
+            writer.add_file("model/model.zip", model_path)
+        result = writer.result
+    """
+
+    def __init__(self, archive_path: str, compression_level: int = 9,
+                 validator: Optional[ArchiveValidator] = None, sink=None,
+                 codec: str = "deflate", workers: Optional[int] = None):
+        """
+        Args:
+            archive_path: Chemin de l'archive finale
+            compression_level: Niveau des membres compressés (deflate et bz2)
+            validator: Validateur dont le répertoire reçoit le rapport de validation
+            sink: `ArchiveIngest` du magasin dédupliqué alimenté pendant l'écriture
+            codec: Codec des membres compressibles (``deflate``, ``bz2`` ou ``lzma``)
+            workers: Threads de compression des gros membres (None = nombre de cœurs)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Codec non supporté: {codec} (attendu: {', '.join(CODECS)})")
+        self.archive_path = archive_path
+        self.compression_level = compression_level
+        self.codec = codec
+        self.compress_type = CODECS[codec]
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.structure = ArchiveValidator.PACMAN_ARCHIVE_STRUCTURE
+        self.entries: List[ArchiveEntry] = []
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.result: Optional[ArchiveWriteResult] = None
+        self._validator = validator
+        self._sink = sink
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = deque()
+        self._parallel_members = 0
+        self._part_path = archive_path + ".part"
+        self._start = time.perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+        self._raw = open(self._part_path, 'wb')
+        self._stream = _HashingWriter(self._raw)
+        self._zip = zipfile.ZipFile(self._stream, 'w', self.compress_type,
+                                    compresslevel=compression_level)
+
+    def __enter__(self) -> "StreamingArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            try:
+                self.close()
+            except BaseException:
+                # Échec d'une compression en parallèle : pas d'archive partielle
+                self.abort()
+                raise
+        else:
+            self.abort()
+
+    def add_bytes(self, arcname: str, data: bytes, compress_type: Optional[int] = None) -> ArchiveEntry:
+        """Ajoute un contenu généré en mémoire (params.md, metadata.json...)."""
+        if arcname.endswith("metadata.json"):
+            self._check_metadata(arcname, data)
+        if compress_type is None:
+            compress_type = choose_compression(arcname, data[:SAMPLE_SIZE], self.compress_type)
+        return self._write_member(arcname, [data], len(data), compress_type)
+
+    def add_text(self, arcname: str, text: str) -> ArchiveEntry:
+        """Ajoute un contenu texte encodé en UTF-8."""
+        return self.add_bytes(arcname, text.encode('utf-8'), zipfile.ZIP_DEFLATED)
+
+    def add_file(self, arcname: str, file_path: str) -> ArchiveEntry:
+        """
+        Ajoute un fichier lu par blocs, sans copie intermédiaire.
+
+        Un gros fichier compressible est confié au pool de threads : l'entrée
+        retournée est complétée (hash, taille compressée) lorsqu'il est écrit.
+        """
+        size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            sample = f.read(SAMPLE_SIZE)
+            f.seek(0)
+            compress_type = choose_compression(arcname, sample, self.compress_type)
+            if (size >= PARALLEL_MIN_SIZE and compress_type != zipfile.ZIP_STORED
+                    and self.workers > 1 and not arcname.endswith("metadata.json")):
+                return self._submit_parallel(arcname, file_path, size, compress_type)
+            if arcname.endswith("metadata.json"):
+                data = f.read()
+                self._check_metadata(arcname, data)
+                return self._write_member(arcname, [data], size, compress_type)
+            chunks = iter(lambda: f.read(CHUNK_SIZE), b"")
+            return self._write_member(arcname, chunks, size, compress_type)
+
+    def add_chunks(self, arcname: str, chunks: Iterable[bytes], size: int,
+                   compress_type: Optional[int] = None) -> ArchiveEntry:
+        """Ajoute un membre fourni par morceaux (export depuis le magasin dédupliqué)."""
+        chunks = iter(chunks)
+        first = next(chunks, b"")
+        if arcname.endswith("metadata.json"):
+            return self.add_bytes(arcname, first + b"".join(chunks), compress_type)
+        if compress_type is None:
+            compress_type = choose_compression(arcname, first[:SAMPLE_SIZE], self.compress_type)
+        return self._write_member(arcname, itertools.chain([first], chunks), size, compress_type)
+
+    def add_tree(self, prefix: str, directory: str) -> List[ArchiveEntry]:
+        """Ajoute récursivement un répertoire sous `prefix`."""
+        added = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                rel_path = Path(os.path.relpath(file_path, directory)).as_posix()
+                added.append(self.add_file(f"{prefix.rstrip('/')}/{rel_path}", file_path))
+        return added
+
+    def _write_member(self, arcname: str, chunks, size: int, compress_type: int) -> ArchiveEntry:
+        start = time.perf_counter()
+        info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        info.compress_type = compress_type
+        info._compresslevel = self.compression_level
+        info.file_size = size  # permet à zipfile de choisir ZIP64 sans repositionnement
+        info.external_attr = 0o644 << 16
+        digest = new_hasher(HASH_ALGORITHM)
+        written = 0
+        stored = self._sink.member(arcname) if self._sink is not None and arcname != MANIFEST_NAME else None
+        with self._zip.open(info, 'w') as member:
+            for chunk in chunks:
+                digest.update(chunk)
+                member.write(chunk)
+                if stored is not None:
+                    stored.write(chunk)
+                written += len(chunk)
+        if stored is not None:
+            self._sink.add_member(stored.close())
+        entry = ArchiveEntry(
+            path=arcname,
+            size=written,
+            compressed_size=info.compress_size,
+            blake2b=digest.hexdigest(),
+            compression=CODEC_NAMES[compress_type],
+            compress_seconds=time.perf_counter() - start
+        )
+        self.entries.append(entry)
+        return entry
+
+    def _submit_parallel(self, arcname: str, file_path: str, size: int, compress_type: int) -> ArchiveEntry:
+        """Confie la compression d'un membre au pool ; l'ordre des entrées est conservé."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="archive-compress")
+        entry = ArchiveEntry(path=arcname, size=size, compressed_size=0, blake2b="",
+                             compression=CODEC_NAMES[compress_type])
+        self.entries.append(entry)
+        self._parallel_members += 1
+        stored = self._sink.member(arcname) if self._sink is not None else None
+        future = self._executor.submit(self._compress_file, file_path, compress_type, stored)
+        self._pending.append((entry, compress_type, future))
+        # Borne la mémoire et l'espace temporaire : au plus deux membres en attente par thread
+        while len(self._pending) > 2 * self.workers:
+            self._flush_oldest()
+        return entry
+
+    def _compress_file(self, file_path: str, compress_type: int, stored) -> _CompressedMember:
+        """Compresse un fichier dans un tampon temporaire (exécuté dans un thread du pool)."""
+        start = time.perf_counter()
+        compressor = _new_compressor(compress_type, self.compression_level)
+        digest = new_hasher(HASH_ALGORITHM)
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        crc = 0
+        size = 0
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    crc = zlib.crc32(chunk, crc)
+                    digest.update(chunk)
+                    spool.write(compressor.compress(chunk))
+                    if stored is not None:
+                        stored.write(chunk)
+                    size += len(chunk)
+            spool.write(compressor.flush())
+            compressed_size = spool.tell()
+            spool.seek(0)
+            return _CompressedMember(
+                crc=crc, size=size, blake2b=digest.hexdigest(), data=spool,
+                compressed_size=compressed_size, seconds=time.perf_counter() - start,
+                ingest=stored.close() if stored is not None else None
+            )
+        except BaseException:
+            spool.close()
+            raise
+
+    def _flush_oldest(self) -> None:
+        """Écrit dans le ZIP le plus ancien membre compressé par le pool."""
+        entry, compress_type, future = self._pending.popleft()
+        member = future.result()
+        try:
+            info = zipfile.ZipInfo(entry.path, date_time=time.localtime()[:6])
+            info.compress_type = compress_type
+            info.external_attr = 0o644 << 16
+            # CRC et tailles sont connus : en-tête complet, sans descripteur de données
+            info.flag_bits = 0x02 if compress_type == zipfile.ZIP_LZMA else 0x00
+            info.file_size = member.size
+            info.compress_size = member.compressed_size
+            info.CRC = member.crc
+            info.header_offset = self._stream.tell()
+            zip64 = member.size > zipfile.ZIP64_LIMIT or member.compressed_size > zipfile.ZIP64_LIMIT
+            self._stream.write(info.FileHeader(zip64))
+            shutil.copyfileobj(member.data, self._stream, CHUNK_SIZE)
+            self._zip.filelist.append(info)
+            self._zip.NameToInfo[info.filename] = info
+            self._zip.start_dir = self._stream.tell()
+        finally:
+            member.data.close()
+        if member.ingest is not None:
+            self._sink.add_member(member.ingest)
+        entry.size = member.size
+        entry.compressed_size = member.compressed_size
+        entry.blake2b = member.blake2b
+        entry.compress_seconds = member.seconds
+
+    def _shutdown_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _check_metadata(self, arcname: str, data: bytes) -> None:
+        try:
+            metadata = json.loads(data)
+        except ValueError as e:
+            self.errors.append(f"Fichier JSON invalide {arcname}: {e}")
+            return
+        self.errors.extend(ArchiveValidator.check_metadata(metadata, arcname))
+
+    def _build_validation(self) -> ValidationResult:
+        names = [entry.path for entry in self.entries]
+        missing = [
+            required for required in self.structure.required_files
+            if not any(name.endswith(required) for name in names)
+        ]
+        if missing:
+            self.errors.append(f"Fichiers requis manquants: {missing}")
+        total_size = sum(entry.size for entry in self.entries)
+        if total_size > self.structure.max_size_mb * 1024 * 1024:
+            self.warnings.append(f"Contenu volumineux: {total_size / (1024 * 1024):.1f}MB")
+        return ValidationResult(
+            archive_path=self.archive_path,
+            is_valid=not self.errors,
+            validation_time=datetime.now().isoformat(),
+            checks_performed=["structure_check", "content_check", "member_hashes"],
+            errors=list(self.errors),
+            warnings=list(self.warnings),
+            statistics={"file_count": len(self.entries), "uncompressed_bytes": total_size}
+        )
+
+    def close(self) -> ArchiveWriteResult:
+        """Ajoute le manifeste, finalise l'archive et son fichier ``.md5``."""
+        if self.result is not None:
+            return self.result
+        while self._pending:
+            self._flush_oldest()
+        self._shutdown_executor()
+        validation = self._build_validation()
+        root = merkle_root([(entry.path, entry.blake2b) for entry in self.entries])
+        manifest = {
+            "format": 2,
+            "created_at": datetime.now().isoformat(),
+            "files": [asdict(entry) for entry in self.entries],
+            "merkle": {"algorithm": HASH_ALGORITHM, "root": root},
+            "validation": {
+                "is_valid": validation.is_valid,
+                "errors": validation.errors,
+                "warnings": validation.warnings
+            }
+        }
+        self.add_bytes(MANIFEST_NAME, json.dumps(manifest, indent=2).encode('utf-8'), zipfile.ZIP_DEFLATED)
+        self._zip.close()
+        self._raw.close()
+        os.replace(self._part_path, self.archive_path)
+
+        archive_hash = self._stream.md5.hexdigest()
+        with open(self.archive_path + ".md5", 'w') as f:
+            f.write(f"{archive_hash}  {os.path.basename(self.archive_path)}")
+        if self._sink is not None:
+            self._sink.commit({"archive_name": os.path.basename(self.archive_path), "archive_hash": archive_hash})
+
+        original_size = sum(entry.size for entry in self.entries)
+        compressed_size = self._stream.tell()
+        validation.integrity_hash = archive_hash
+        validation.statistics["file_size_mb"] = compressed_size / (1024 * 1024)
+        stats = CompressionStats(
+            original_size=original_size,
+            compressed_size=compressed_size,
+            compression_ratio=compressed_size / original_size if original_size > 0 else 0,
+            time_taken=time.perf_counter() - self._start,
+            algorithm=f"zip_streaming_{self.codec}",
+            files_processed=len(self.entries),
+            duplicate_files_found=len(self.entries) - len({entry.blake2b for entry in self.entries}),
+            space_saved=original_size - compressed_size,
+            workers=self.workers if self._parallel_members else 1,
+            codec_breakdown=self._codec_breakdown()
+        )
+        self.result = ArchiveWriteResult(
+            archive_path=self.archive_path,
+            archive_hash=archive_hash,
+            entries=self.entries,
+            stats=stats,
+            validation=validation,
+            merkle_root=root
+        )
+        if self._validator is not None:
+            self._validator._save_validation_report(validation)
+        logger.info(f"Archive écrite en une passe: {self.archive_path} "
+                    f"({len(self.entries)} fichiers, {compressed_size / 1024 / 1024:.2f} MB)")
+        return self.result
+
+    def _codec_breakdown(self) -> Dict[str, Dict[str, float]]:
+        """Compromis temps / ratio par codec (temps de compression cumulé des membres)."""
+        breakdown: Dict[str, Dict[str, float]] = {}
+        for entry in self.entries:
+            codec = breakdown.setdefault(entry.compression, {
+                "files": 0, "original_size": 0, "compressed_size": 0, "seconds": 0.0
+            })
+            codec["files"] += 1
+            codec["original_size"] += entry.size
+            codec["compressed_size"] += entry.compressed_size
+            codec["seconds"] += entry.compress_seconds
+        for codec in breakdown.values():
+            codec["ratio"] = codec["compressed_size"] / codec["original_size"] if codec["original_size"] else 0
+            codec["mb_per_second"] = (codec["original_size"] / (1024 * 1024) / codec["seconds"]
+                                      if codec["seconds"] > 0 else 0)
+        return breakdown
+
+    def abort(self) -> None:
+        """Abandonne l'écriture et supprime le fichier partiel."""
+        for _, _, future in self._pending:
+            if not future.cancel():
+                try:
+                    future.result().data.close()
+                except Exception:
+                    pass
+        self._pending.clear()
+        self._shutdown_executor()
+        try:
+            self._zip.close()
+        except Exception:
+            pass
+        self._raw.close()
+        if os.path.exists(self._part_path):
+            os.remove(self._part_path)
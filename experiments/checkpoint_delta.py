@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Compression différentielle des checkpoints successifs d'un entraînement.
+
+Fonctionnalités :
+- Premier checkpoint stocké en entier, les suivants en delta du précédent
+- Delta par tenseur : XOR des motifs binaires puis compression (zlib ou lzma)
+- Keyframes complètes périodiques pour borner le coût de reconstruction
+- Reconstruction à l'octet près, vérifiée par SHA256
+- Index SQLite partagé entre processus ; checkpoints effacés avec leur archive
+
+Un checkpoint SB3 est un ZIP dont les membres sont stockés sans compression
+(``policy.pth`` est lui-même un ZIP ``torch.save`` dont chaque tenseur est un
+membre ``archive/data/<n>`` brut). Le fichier est découpé en segments : un
+par membre stocké (récursivement dans les ZIP imbriqués) et un par intervalle
+d'en-têtes. Chaque segment est comparé au segment de même nom du checkpoint
+précédent : d'un checkpoint à l'autre seuls les bits de poids faible des
+flottants changent, le XOR est donc essentiellement nul sur les octets de
+signe et d'exposant, que le regroupement des octets par rang rend
+compressibles. Le codec ne dépend ni de torch ni du format des tenseurs :
+tout fichier (``.npz``, ``.pth`` seul, binaire quelconque) est accepté, au pire
+comme un unique segment.
+"""
+
+import io
+import os
+import json
+import lzma
+import zlib
+import struct
+import zipfile
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+import logging
+
+import numpy as np
+
+from experiments.sqlite_utils import resolve_db_path
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# En-tête des fichiers encodés
+MAGIC = b"CKD1"
+
+# Nom de la référence placée dans une archive à la place du modèle complet
+CHECKPOINT_REF_NAME = "model/checkpoint.json"
+
+# Membres explorés récursivement lorsqu'ils sont eux-mêmes des ZIP
+NESTED_EXTENSIONS = ('.pth', '.pt', '.zip', '.npz')
+
+_LOCAL_HEADER = b"PK\x03\x04"
+
+_INDEX_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        file TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        base TEXT,
+        chain_position INTEGER NOT NULL,
+        source_name TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        stored_size INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        released INTEGER NOT NULL DEFAULT 0
+    )
+    """
+]
+
+# Colonnes d'une entrée de l'index (ordre des dictionnaires retournés)
+_ENTRY_COLUMNS = ("id", "file", "kind", "base", "chain_position", "source_name",
+                  "size", "stored_size", "sha256", "created_at")
+
+def split_segments(data: bytes) -> List[Tuple[str, int, int]]:
+    """
+    Découpe un checkpoint en segments contigus ``(nom, début, fin)``.
+
+    Les membres stockés d'un ZIP (et des ZIP imbriqués) forment chacun un
+    segment nommé par leur chemin ; les en-têtes et le répertoire central
+    forment des segments ``~<n>`` numérotés dans l'ordre.
+    """
+    members = sorted(_stored_members(data, "", 0))
+    segments = []
+    position = 0
+    gaps = 0
+    for start, end, name in members:
+        if start < position:
+            continue
+        if start > position:
+            segments.append((f"~{gaps}", position, start))
+            gaps += 1
+        if end > start:
+            segments.append((name, start, end))
+        position = end
+    if position < len(data) or not segments:
+        segments.append((f"~{gaps}", position, len(data)))
+    return segments
+
+def _stored_members(data: bytes, prefix: str, base: int) -> List[Tuple[int, int, str]]:
+    """Positions absolues des membres stockés d'un ZIP (liste vide si ce n'en est pas un)."""
+    if not data.startswith(_LOCAL_HEADER):
+        return []
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            infos = archive.infolist()
+    except (zipfile.BadZipFile, ValueError):
+        return []
+
+    members = []
+    for info in infos:
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            continue
+        header = data[info.header_offset:info.header_offset + 30]
+        if len(header) < 30 or not header.startswith(_LOCAL_HEADER):
+            continue
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        start = info.header_offset + 30 + name_length + extra_length
+        end = start + info.compress_size
+        if end > len(data):
+            continue
+        name = prefix + info.filename
+        content = data[start:end]
+        nested = []
+        if info.filename.lower().endswith(NESTED_EXTENSIONS):
+            nested = _stored_members(content, name + "!/", base + start)
+        if nested:
+            # Le ZIP imbriqué est découpé à son tour ; ses en-têtes deviennent des intervalles
+            members.extend(nested)
+        else:
+            members.append((base + start, base + end, name))
+    return members
+
+def _shuffle(data: bytes, width: int) -> bytes:
+    """Regroupe les octets par rang (tous les octets 0, puis tous les octets 1...)."""
+    if width <= 1:
+        return data
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width).T.tobytes()
+
+def _unshuffle(data: bytes, width: int) -> bytes:
+    if width <= 1:
+        return data
+    return np.frombuffer(data, dtype=np.uint8).reshape(width, -1).T.tobytes()
+
+def _xor(a: bytes, b: bytes) -> bytes:
+    return np.bitwise_xor(np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8)).tobytes()
+
+class CheckpointDeltaCodec:
+    """
+    Encode un checkpoint en entier ou en delta d'un checkpoint de référence.
+
+    Format : ``MAGIC``, longueur de l'en-tête (4 octets), en-tête JSON, puis
+    les charges utiles compressées de chaque segment, dans l'ordre.
+    """
+
+    def __init__(self, codec: str = "zlib", level: int = 6, word_size: int = 4):
+        """
+        Args:
+            codec: Compression des segments (``zlib`` ou ``lzma``)
+            level: Niveau de compression
+            word_size: Largeur des mots regroupés par rang d'octet (4 pour float32)
+        """
+        if codec not in ("zlib", "lzma"):
+            raise ValueError(f"Codec non supporté: {codec}")
+        self.codec = codec
+        self.level = level
+        self.word_size = word_size
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "lzma":
+            return lzma.compress(data, preset=self.level)
+        return zlib.compress(data, self.level)
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == "lzma":
+            return lzma.decompress(data)
+        return zlib.decompress(data)
+
+    def encode(self, data: bytes, reference: Optional[bytes] = None) -> bytes:
+        """
+        Encode `data`, en delta de `reference` si elle est fournie.
+
+        Un segment sans homologue de même nom et de même taille dans la
+        référence est stocké en entier ; si aucun segment n'a d'homologue,
+        l'encodage est complet et ne dépend plus de la référence.
+        """
+        reference_segments = {}
+        if reference is not None:
+            reference_segments = {name: (start, end) for name, start, end in split_segments(reference)}
+
+        header_segments = []
+        payloads = []
+        for name, start, end in split_segments(data):
+            content = data[start:end]
+            length = end - start
+            width = self.word_size if length % self.word_size == 0 else 1
+            entry = {"name": name, "length": length, "width": width}
+            base = reference_segments.get(name)
+            if base is not None and base[1] - base[0] == length:
+                content = _xor(content, reference[base[0]:base[1]])
+                entry["base"] = base[0]
+            payload = self._compress(_shuffle(content, width))
+            entry["stored"] = len(payload)
+            header_segments.append(entry)
+            payloads.append(payload)
+
+        header = {
+            "kind": "delta" if any("base" in entry for entry in header_segments) else "full",
+            "codec": self.codec,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "segments": header_segments
+        }
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        return b"".join([MAGIC, struct.pack("<I", len(header_bytes)), header_bytes] + payloads)
+
+    @staticmethod
+    def read_header(blob: bytes) -> Dict[str, Any]:
+        """Lit l'en-tête d'un checkpoint encodé."""
+        if not blob.startswith(MAGIC):
+            raise ValueError("Checkpoint encodé invalide (en-tête absent)")
+        (length,) = struct.unpack("<I", blob[4:8])
+        return json.loads(blob[8:8 + length])
+
+    @classmethod
+    def decode(cls, blob: bytes, reference: Optional[bytes] = None) -> bytes:
+        """Reconstruit le checkpoint ; `reference` est requise pour un delta."""
+        header = cls.read_header(blob)
+        if header["kind"] == "delta" and reference is None:
+            raise ValueError("Checkpoint de référence requis pour décoder un delta")
+        position = 8 + struct.unpack("<I", blob[4:8])[0]
+        parts = []
+        for entry in header["segments"]:
+            payload = blob[position:position + entry["stored"]]
+            position += entry["stored"]
+            content = _unshuffle(cls._decompress(header["codec"], payload), entry["width"])
+            if "base" in entry:
+                content = _xor(content, reference[entry["base"]:entry["base"] + entry["length"]])
+            parts.append(content)
+        data = b"".join(parts)
+        if hashlib.sha256(data).hexdigest() != header["sha256"]:
+            raise ValueError("Checkpoint reconstruit corrompu (SHA256 différent)")
+        return data
+
+class CheckpointDeltaStore:
+    """
+    Série de checkpoints stockés en delta avec keyframes périodiques.
+
+    Chaque checkpoint est encodé par rapport au précédent ; tous les
+    `keyframe_interval` checkpoints (et dès que la structure du modèle change)
+    un checkpoint complet démarre une nouvelle chaîne. Restaurer un checkpoint
+    décode au plus `keyframe_interval` fichiers.
+
+    L'index est une base SQLite (``index.db``) : un ajout est une transaction
+    `BEGIN IMMEDIATE`, les processus et instances partageant le magasin
+    s'ordonnent donc sans perdre d'entrée. Un checkpoint libéré (archive
+    supprimée) est effacé dès qu'aucun checkpoint conservé n'en dépend.
+    """
+
+    INDEX_NAME = "index.db"
+
+    def __init__(self, root: str = "experiments/checkpoints", keyframe_interval: int = 10,
+                 codec: str = "zlib", level: int = 6):
+        self.root = Path(root).resolve()
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.codec = CheckpointDeltaCodec(codec, level)
+        self._lock = threading.RLock()
+        # Dernier checkpoint ajouté, pour encoder le suivant sans reconstruction
+        self._last: Optional[Tuple[str, bytes]] = None
+        self.db_path = resolve_db_path(str(self.root / self.INDEX_NAME))
+        self._init_index()
+
+    @contextmanager
+    def _connect(self):
+        """Connexion en lecture (les écritures passent par `_transaction`)."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Transaction d'écriture : verrou pris dès le début, annulée en cas d'erreur."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _init_index(self) -> None:
+        """Crée l'index s'il n'existe pas."""
+        with self._transaction() as conn:
+            for statement in _INDEX_SCHEMA:
+                conn.execute(statement)
+
+    @staticmethod
+    def _to_entry(row: Tuple) -> Dict[str, Any]:
+        return dict(zip(_ENTRY_COLUMNS, row))
+
+    def add(self, checkpoint_path: str, checkpoint_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ajoute un checkpoint à la série.
+
+        Returns:
+            Entrée de l'index (id, type, base, tailles, SHA256)
+        """
+        with open(checkpoint_path, 'rb') as f:
+            data = f.read()
+
+        with self._lock, self._transaction() as conn:
+            if checkpoint_id is None:
+                # Numéros AUTOINCREMENT : jamais réutilisés, même après suppression
+                row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'checkpoints'").fetchone()
+                checkpoint_id = f"ckpt_{(row[0] if row else 0) + 1:06d}"
+            if conn.execute("SELECT 1 FROM checkpoints WHERE id = ?", (checkpoint_id,)).fetchone():
+                raise ValueError(f"Checkpoint déjà présent: {checkpoint_id}")
+
+            row = conn.execute(f"SELECT {', '.join(_ENTRY_COLUMNS)} FROM checkpoints "
+                               f"ORDER BY seq DESC LIMIT 1").fetchone()
+            previous = self._to_entry(row) if row else None
+            reference = None
+            if previous is not None and previous["chain_position"] + 1 < self.keyframe_interval:
+                reference = self._reference_bytes(conn, previous["id"])
+
+            blob = self.codec.encode(data, reference)
+            kind = self.codec.read_header(blob)["kind"]
+            file_name = f"{checkpoint_id}.{kind}.ckd"
+            tmp_path = self.root / (file_name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self.root / file_name)
+
+            entry = {
+                "id": checkpoint_id,
+                "file": file_name,
+                "kind": kind,
+                "base": previous["id"] if kind == "delta" else None,
+                "chain_position": previous["chain_position"] + 1 if kind == "delta" else 0,
+                "source_name": os.path.basename(checkpoint_path),
+                "size": len(data),
+                "stored_size": len(blob),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "created_at": datetime.now().isoformat()
+            }
+            conn.execute(f"INSERT INTO checkpoints ({', '.join(_ENTRY_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' * len(_ENTRY_COLUMNS))})",
+                         tuple(entry[column] for column in _ENTRY_COLUMNS))
+            self._last = (checkpoint_id, data)
+
+        logger.info(f"Checkpoint {checkpoint_id} stocké ({kind}): "
+                    f"{len(data) / 1024:.1f} KB -> {len(blob) / 1024:.1f} KB")
+        return entry
+
+    def _reference_bytes(self, conn: sqlite3.Connection, checkpoint_id: str) -> bytes:
+        if self._last is not None and self._last[0] == checkpoint_id:
+            return self._last[1]
+        return self._restore(conn, checkpoint_id)
+
+    def get_entry(self, checkpoint_id: str) -> Optional[Dict[str, Any]]:
+        """Entrée de l'index d'un checkpoint."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_ENTRY_COLUMNS)} FROM checkpoints WHERE id = ?",
+                               (checkpoint_id,)).fetchone()
+        return self._to_entry(row) if row else None
+
+    def list_checkpoints(self) -> List[Dict[str, Any]]:
+        """Checkpoints de la série, du plus ancien au plus récent."""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(_ENTRY_COLUMNS)} FROM checkpoints ORDER BY seq").fetchall()
+        return [self._to_entry(row) for row in rows]
+
+    def restore(self, checkpoint_id: str) -> bytes:
+        """Reconstruit un checkpoint depuis la keyframe qui le précède."""
+        with self._connect() as conn:
+            return self._restore(conn, checkpoint_id)
+
+    def _restore(self, conn: sqlite3.Connection, checkpoint_id: str) -> bytes:
+        chain = []
+        current = checkpoint_id
+        while current is not None:
+            row = conn.execute("SELECT file, base FROM checkpoints WHERE id = ?", (current,)).fetchone()
+            if row is None:
+                raise KeyError(f"Checkpoint non trouvé: {current}")
+            chain.append(row[0])
+            current = row[1]
+
+        data = None
+        for file_name in reversed(chain):
+            with open(self.root / file_name, 'rb') as f:
+                data = self.codec.decode(f.read(), data)
+        return data
+
+    def restore_to(self, checkpoint_id: str, output_path: str) -> str:
+        """Reconstruit un checkpoint dans `output_path` (écriture atomique)."""
+        data = self.restore(checkpoint_id)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def release(self, checkpoint_id: str) -> List[str]:
+        """
+        Libère un checkpoint (son archive a été supprimée).
+
+        Le checkpoint reste stocké tant qu'un checkpoint conservé en dépend
+        (delta dont il est la base) ; retourne les checkpoints effacés.
+        """
+        with self._lock:
+            with self._transaction() as conn:
+                conn.execute("UPDATE checkpoints SET released = 1 WHERE id = ?", (checkpoint_id,))
+                removed = self._collectable(conn)
+                conn.executemany("DELETE FROM checkpoints WHERE id = ?", [(rid,) for rid, _ in removed])
+            # Fichiers effacés une fois l'index validé
+            for removed_id, file_name in removed:
+                try:
+                    os.remove(self.root / file_name)
+                except FileNotFoundError:
+                    pass
+                if self._last is not None and self._last[0] == removed_id:
+                    self._last = None
+        if removed:
+            logger.info(f"{len(removed)} checkpoint(s) libéré(s) supprimé(s) de {self.root}")
+        return [removed_id for removed_id, _ in removed]
+
+    @staticmethod
+    def _collectable(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+        """Checkpoints libérés ``(id, fichier)`` dont aucun checkpoint conservé ne dépend."""
+        rows = conn.execute("SELECT id, file, base, released FROM checkpoints").fetchall()
+        bases = {checkpoint_id: base for checkpoint_id, _, base, _ in rows}
+        needed = set()
+        for checkpoint_id, _, _, released in rows:
+            current = None if released else checkpoint_id
+            while current is not None and current not in needed:
+                needed.add(current)
+                current = bases.get(current)
+        return [(checkpoint_id, file_name) for checkpoint_id, file_name, _, _ in rows
+                if checkpoint_id not in needed]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Tailles d'origine et stockées de la série."""
+        with self._connect() as conn:
+            count, keyframes, original, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(kind = 'full'), 0), COALESCE(SUM(size), 0), "
+                "COALESCE(SUM(stored_size), 0) FROM checkpoints"
+            ).fetchone()
+        return {
+            "checkpoint_count": count,
+            "keyframe_count": keyframes,
+            "keyframe_interval": self.keyframe_interval,
+            "original_bytes": original,
+            "stored_bytes": stored,
+            "compression_ratio": stored / original if original > 0 else 0,
+            "space_saved": original - stored
+        }
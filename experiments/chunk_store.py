@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Stockage dédupliqué des archives par contenu.
+
+Fonctionnalités :
+- Découpage des fichiers en blocs définis par le contenu (hash glissant « gear »)
+- Blocs adressés par leur SHA256, stockés une seule fois (compressés si utile)
+- Archive = manifeste léger listant les blocs de chaque fichier
+- Comptage de références et ramasse-miettes des blocs orphelins
+- Export d'une archive en ZIP autonome pour le partage
+
+Les frontières de blocs dépendent du contenu et non des positions : un octet
+inséré dans un fichier ne décale que le bloc qui le contient, les autres sont
+retrouvés tels quels. L'espace disque d'une série d'archives croît donc avec
+les octets réellement nouveaux, pas avec le nombre d'archives.
+
+Les compteurs de références et les manifestes sont dans une base SQLite
+(``store.db``) pour rester cohérents entre les processus du pool de tâches.
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator, Iterable, BinaryIO
+import logging
+
+import numpy as np
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Taille des blocs de lecture
+READ_SIZE = 4 * 1024 * 1024
+
+# Codecs des blocs stockés (premier octet du fichier)
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+# Table « gear » : 256 valeurs 32 bits dérivées de SHA256 (stables entre versions)
+GEAR = np.array(
+    [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)],
+    dtype=np.uint32
+)
+
+class ContentDefinedChunker:
+    """
+    Découpage en blocs définis par le contenu.
+
+    Le hash gear d'une position ne dépend que des 32 octets précédents ; il
+    est calculé pour tout un tampon avec numpy. Une frontière est posée là où
+    les `bits` bits de poids fort du hash sont nuls, en respectant les tailles
+    minimale et maximale des blocs.
+    """
+
+    def __init__(self, min_size: int = 16 * 1024, avg_size: int = 64 * 1024, max_size: int = 256 * 1024):
+        if not 0 < min_size <= avg_size <= max_size:
+            raise ValueError("Tailles de blocs incohérentes")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.bits = max(1, (avg_size - min_size).bit_length() - 1)
+        self._buffer = b""
+
+    def _candidates(self, data: bytes) -> np.ndarray:
+        """Positions (exclusives) où le hash glissant autorise une frontière."""
+        # hash[i] = somme des GEAR[octet[i - k]] << k pour k < 32, calculée par
+        # doublements successifs de la fenêtre (1, 2, 4, 8, 16 puis 32 octets)
+        rolling = GEAR[np.frombuffer(data, dtype=np.uint8)]
+        width = 1
+        while width < 32:
+            shifted = np.zeros_like(rolling)
+            shifted[width:] = rolling[:-width] << np.uint32(width)
+            rolling += shifted
+            width *= 2
+        return np.flatnonzero((rolling >> np.uint32(32 - self.bits)) == 0) + 1
+
+    def _cut(self, candidates: np.ndarray, start: int, limit: int) -> int:
+        """Fin du bloc commençant à `start` (première frontière après la taille minimale)."""
+        index = np.searchsorted(candidates, start + self.min_size, side="left")
+        if index < len(candidates) and candidates[index] <= limit:
+            return int(candidates[index])
+        return limit
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Ajoute des octets et produit les blocs complets."""
+        self._buffer += data
+        if len(self._buffer) < self.max_size:
+            return
+        buffer = self._buffer
+        candidates = self._candidates(buffer)
+        start = 0
+        while len(buffer) - start >= self.max_size:
+            end = self._cut(candidates, start, start + self.max_size)
+            yield buffer[start:end]
+            start = end
+        self._buffer = buffer[start:]
+
+    def flush(self) -> Iterator[bytes]:
+        """Produit les blocs restants en fin de flux."""
+        buffer, self._buffer = self._buffer, b""
+        if not buffer:
+            return
+        candidates = self._candidates(buffer)
+        start = 0
+        while start < len(buffer):
+            end = self._cut(candidates, start, min(len(buffer), start + self.max_size))
+            yield buffer[start:end]
+            start = end
+
+    def split(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Découpe un flux complet."""
+        for data in chunks:
+            yield from self.feed(data)
+        yield from self.flush()
+
+class _MemberIngest:
+    """Fichier en cours d'ajout au magasin (les blocs sont écrits au fil de l'eau)."""
+
+    def __init__(self, ingest: "ArchiveIngest", path: str):
+        self.ingest = ingest
+        self.store = ingest.store
+        self.path = path
+        self.chunker = ContentDefinedChunker(self.store.min_chunk, self.store.avg_chunk, self.store.max_chunk)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.chunks: List[str] = []
+
+    def write(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.size += len(data)
+        for chunk in self.chunker.feed(data):
+            self._put(chunk)
+
+    def _put(self, chunk: bytes) -> None:
+        chunk_hash, size, stored_size = self.store._put_chunk(chunk)
+        self.ingest.chunk_sizes[chunk_hash] = (size, stored_size)
+        self.chunks.append(chunk_hash)
+
+    def close(self) -> Dict[str, Any]:
+        for chunk in self.chunker.flush():
+            self._put(chunk)
+        return {"path": self.path, "size": self.size, "sha256": self.digest.hexdigest(), "chunks": self.chunks}
+
+class ArchiveIngest:
+    """
+    Archive en cours d'ajout au magasin.
+
+    Les fichiers sont ajoutés un par un (`add_stream`, ou `member` pour un
+    flux alimenté par morceaux) ; `commit` enregistre le manifeste et
+    incrémente les références en une transaction.
+    """
+
+    def __init__(self, store: "ChunkStore", archive_id: str):
+        self.store = store
+        self.archive_id = archive_id
+        self.files: List[Dict[str, Any]] = []
+        self.chunk_sizes: Dict[str, tuple] = {}  # hash -> (taille, taille stockée)
+
+    def member(self, path: str) -> _MemberIngest:
+        return _MemberIngest(self, path)
+
+    def add_member(self, entry: Dict[str, Any]) -> None:
+        self.files.append(entry)
+
+    def add_stream(self, path: str, stream: BinaryIO) -> Dict[str, Any]:
+        member = self.member(path)
+        for data in iter(lambda: stream.read(READ_SIZE), b""):
+            member.write(data)
+        entry = member.close()
+        self.add_member(entry)
+        return entry
+
+    def commit(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.store._commit(self.archive_id, self.files, self.chunk_sizes, metadata or {})
+
+class ChunkStore:
+    """
+    Magasin de blocs adressés par contenu.
+
+    Structure :
+        store.db                 manifestes et compteurs de références
+        chunks/ab/abcdef...      blocs (1 octet de codec + données)
+    """
+
+    def __init__(self, root: str = "experiments/store", min_chunk: int = 16 * 1024,
+                 avg_chunk: int = 64 * 1024, max_chunk: int = 256 * 1024):
+        self.root = Path(root)
+        self.chunks_dir = self.root / "chunks"
+        self.db_path = self.root / "store.db"
+        self.min_chunk = min_chunk
+        self.avg_chunk = avg_chunk
+        self.max_chunk = max_chunk
+        self._lock = threading.RLock()
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    # ------------------------------------------------------------------
+    # Base d'index
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    refs INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archives (
+                    id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    metadata TEXT NOT NULL,
+                    files TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_refs ON chunks(refs)")
+
+    # ------------------------------------------------------------------
+    # Blocs
+    # ------------------------------------------------------------------
+
+    def _chunk_path(self, chunk_hash: str) -> Path:
+        return self.chunks_dir / chunk_hash[:2] / chunk_hash
+
+    def _put_chunk(self, data: bytes) -> tuple:
+        """
+        Écrit un bloc s'il est absent ; retourne (hash, taille, taille stockée).
+
+        Un bloc déjà présent est seulement « touché » : le ramasse-miettes ne
+        supprime pas un bloc récent, même sans référence, pour ne pas retirer
+        un bloc qu'un ajout en cours va référencer.
+        """
+        chunk_hash = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(chunk_hash)
+        try:
+            os.utime(path)
+            return chunk_hash, len(data), path.stat().st_size
+        except FileNotFoundError:
+            pass
+        compressed = zlib.compress(data, 6)
+        payload = _ZLIB + compressed if len(compressed) < len(data) * 0.9 else _RAW + data
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{chunk_hash}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        return chunk_hash, len(data), len(payload)
+
+    def read_chunk(self, chunk_hash: str) -> bytes:
+        """Lit un bloc et vérifie son hash."""
+        payload = self._chunk_path(chunk_hash).read_bytes()
+        data = zlib.decompress(payload[1:]) if payload[:1] == _ZLIB else payload[1:]
+        if hashlib.sha256(data).hexdigest() != chunk_hash:
+            raise ValueError(f"Bloc corrompu: {chunk_hash}")
+        return data
+
+    # ------------------------------------------------------------------
+    # Archives
+    # ------------------------------------------------------------------
+
+    def begin_archive(self, archive_id: str) -> ArchiveIngest:
+        """Commence l'ajout d'une archive (fichiers ajoutés puis `commit`)."""
+        if self.get_manifest(archive_id) is not None:
+            raise ValueError(f"Archive déjà présente dans le magasin: {archive_id}")
+        return ArchiveIngest(self, archive_id)
+
+    def _commit(self, archive_id: str, files: List[Dict[str, Any]], chunk_sizes: Dict[str, tuple],
+                metadata: Dict[str, Any]) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for entry in files:
+            for chunk_hash in entry["chunks"]:
+                counts[chunk_hash] = counts.get(chunk_hash, 0) + 1
+        manifest = {
+            "id": archive_id,
+            "created_at": datetime.now().isoformat(),
+            "size": sum(entry["size"] for entry in files),
+            "metadata": metadata,
+            "files": files
+        }
+        missing = [chunk_hash for chunk_hash in counts if not self._chunk_path(chunk_hash).exists()]
+        if missing:
+            raise RuntimeError(f"{len(missing)} bloc(s) supprimé(s) pendant l'ajout de {archive_id}")
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunks (hash, size, stored_size, refs) VALUES (?, ?, ?, 0)",
+                [(chunk_hash, *chunk_sizes[chunk_hash]) for chunk_hash in counts]
+            )
+            conn.execute(
+                "INSERT INTO archives (id, created_at, size, metadata, files) VALUES (?, ?, ?, ?, ?)",
+                (archive_id, manifest["created_at"], manifest["size"], json.dumps(metadata, default=str),
+                 json.dumps(files))
+            )
+            conn.executemany("UPDATE chunks SET refs = refs + ? WHERE hash = ?",
+                             [(count, chunk_hash) for chunk_hash, count in counts.items()])
+        logger.info(f"Archive ajoutée au magasin: {archive_id} ({len(files)} fichiers, {len(counts)} blocs)")
+        return manifest
+
+    def import_zip(self, zip_path: str, archive_id: Optional[str] = None,
+                   metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Ajoute une archive ZIP existante (lue membre par membre, sans extraction)."""
+        import zipfile
+
+        archive_id = archive_id or Path(zip_path).stem
+        ingest = self.begin_archive(archive_id)
+        with zipfile.ZipFile(zip_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    ingest.add_stream(info.filename, member)
+        return ingest.commit(metadata or {"source": os.path.basename(zip_path)})
+
+    def get_manifest(self, archive_id: str) -> Optional[Dict[str, Any]]:
+        """Manifeste d'une archive du magasin."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, created_at, size, metadata, files FROM archives WHERE id = ?", (archive_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "created_at": row[1], "size": row[2],
+                "metadata": json.loads(row[3]), "files": json.loads(row[4])}
+
+    def list_archives(self) -> List[Dict[str, Any]]:
+        """Archives du magasin (sans la liste des blocs)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, size, metadata FROM archives ORDER BY created_at DESC"
+            ).fetchall()
+        return [{"id": r[0], "created_at": r[1], "size": r[2], "metadata": json.loads(r[3])} for r in rows]
+
+    def iter_file(self, archive_id: str, path: str) -> Iterator[bytes]:
+        """Contenu d'un fichier d'une archive, bloc par bloc."""
+        manifest = self.get_manifest(archive_id)
+        if manifest is None:
+            raise KeyError(archive_id)
+        entry = next((f for f in manifest["files"] if f["path"] == path), None)
+        if entry is None:
+            raise KeyError(path)
+        return (self.read_chunk(chunk_hash) for chunk_hash in entry["chunks"])
+
+    def read_file(self, archive_id: str, path: str) -> bytes:
+        """Contenu complet d'un fichier d'une archive."""
+        return b"".join(self.iter_file(archive_id, path))
+
+    def export_zip(self, archive_id: str, output_path: str):
+        """
+        Reconstruit une archive ZIP autonome (manifeste et .md5 régénérés).
+
+        Returns:
+            ArchiveWriteResult de l'archive écrite
+        """
+        from experiments.archive_writer import MANIFEST_NAME, StreamingArchiveWriter
+
+        manifest = self.get_manifest(archive_id)
+        if manifest is None:
+            raise KeyError(archive_id)
+        with StreamingArchiveWriter(output_path) as writer:
+            for entry in manifest["files"]:
+                if entry["path"] == MANIFEST_NAME:
+                    continue
+                chunks = (self.read_chunk(chunk_hash) for chunk_hash in entry["chunks"])
+                writer.add_chunks(entry["path"], chunks, entry["size"])
+        return writer.result
+
+    def delete_archive(self, archive_id: str) -> bool:
+        """Retire une archive et décrémente les références de ses blocs."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT files FROM archives WHERE id = ?", (archive_id,)).fetchone()
+            if row is None:
+                return False
+            counts: Dict[str, int] = {}
+            for entry in json.loads(row[0]):
+                for chunk_hash in entry["chunks"]:
+                    counts[chunk_hash] = counts.get(chunk_hash, 0) + 1
+            conn.executemany("UPDATE chunks SET refs = MAX(refs - ?, 0) WHERE hash = ?",
+                             [(count, chunk_hash) for chunk_hash, count in counts.items()])
+            conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+        return True
+
+    def collect_garbage(self, min_age_seconds: float = 3600.0) -> Dict[str, Any]:
+        """
+        Supprime les blocs sans référence.
+
+        Les fichiers de blocs absents de l'index (ajout interrompu avant
+        `commit`) sont aussi supprimés. Un bloc écrit ou réutilisé depuis moins
+        de `min_age_seconds` est conservé : un ajout en cours peut le référencer.
+        """
+        cutoff = time.time() - min_age_seconds
+        removed = 0
+        freed = 0
+
+        def remove_if_old(path: Path) -> bool:
+            nonlocal removed, freed
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return True
+            if stat.st_mtime > cutoff:
+                return False
+            path.unlink()
+            removed += 1
+            freed += stat.st_size
+            return True
+
+        with self._lock, self._connect() as conn:
+            orphans = [row[0] for row in conn.execute("SELECT hash FROM chunks WHERE refs <= 0")]
+            deleted = [(chunk_hash,) for chunk_hash in orphans if remove_if_old(self._chunk_path(chunk_hash))]
+            conn.executemany("DELETE FROM chunks WHERE hash = ? AND refs <= 0", deleted)
+            known = {row[0] for row in conn.execute("SELECT hash FROM chunks")}
+        for path in self.chunks_dir.glob("*/*"):
+            if path.name not in known and not path.name.endswith(".tmp"):
+                remove_if_old(path)
+        logger.info(f"Ramasse-miettes du magasin: {removed} blocs supprimés ({freed / 1024 / 1024:.2f} MB)")
+        return {"chunks_removed": removed, "bytes_freed": freed}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Volume logique des archives et volume réellement stocké."""
+        with self._connect() as conn:
+            archives, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM archives").fetchone()
+            chunks, unique, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM chunks"
+            ).fetchone()
+        return {
+            "archive_count": archives,
+            "chunk_count": chunks,
+            "logical_bytes": logical,
+            "unique_bytes": unique,
+            "stored_bytes": stored,
+            "deduplication_ratio": logical / unique if unique else 0.0,
+            "storage_ratio": stored / logical if logical else 0.0
+        }
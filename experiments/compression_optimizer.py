@@ -8,6 +8,7 @@ Fonctionnalités :
 - Optimisation d'espace avec suppression des doublons
 - Export multi-format (ZIP, TAR, dossier décompressé)
 - Détection de redondance et déduplication
+- Estimation de la compressibilité sur un échantillon (entropie, compression d'essai)
 """
 
 import os
@@ -18,12 +19,17 @@ import tarfile
 import shutil
 import hashlib
 import tempfile
+import zlib
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple, Set
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import logging
 
+import numpy as np
+
+from experiments.file_hasher import hash_file, hash_file_multi
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -39,6 +45,28 @@ class CompressionStats:
     files_processed: int
     duplicate_files_found: int
     space_saved: int
+    workers: int = 1  # Threads de compression utilisés
+    codec_breakdown: Dict[str, Dict[str, float]] = field(default_factory=dict)  # Par codec : fichiers, tailles, ratio, temps, débit
+
+# Taille de l'échantillon utilisé pour estimer la compressibilité
+SAMPLE_SIZE = 64 * 1024
+
+def estimate_compressibility(sample: bytes) -> float:
+    """
+    Estime le ratio de compression (taille compressée / taille) d'un contenu.
+
+    Une entropie proche de 8 bits par octet indique un contenu déjà compressé
+    ou aléatoire (ratio 1.0) ; sinon l'échantillon est compressé à l'essai
+    avec zlib niveau 1, ce qui coûte une fraction de milliseconde.
+    """
+    if not sample:
+        return 1.0
+    counts = np.bincount(np.frombuffer(sample, dtype=np.uint8), minlength=256)
+    probabilities = counts[counts > 0] / len(sample)
+    entropy = float(-(probabilities * np.log2(probabilities)).sum())
+    if entropy > 7.95:
+        return 1.0
+    return min(1.0, len(zlib.compress(sample, 1)) / len(sample))
 
 @dataclass
 class FileFingerprint:
@@ -210,9 +238,10 @@ class CompressionOptimizer:
                     file_size = os.path.getsize(file_path)
                     last_modified = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
                     
-                    # Calculer les hashs
-                    md5_hash = self._compute_file_hash(file_path, 'md5')
-                    sha256_hash = self._compute_file_hash(file_path, 'sha256')
+                    # Calculer les hashs en une seule lecture
+                    hashes = hash_file_multi(file_path, ('md5', 'sha256'))
+                    md5_hash = hashes['md5']
+                    sha256_hash = hashes['sha256']
                     
                     # Déterminer si le fichier est adapté à la compression
                     compression_suitable = self._is_compression_suitable(file_path, file_size)
@@ -239,13 +268,7 @@ class CompressionOptimizer:
     
     def _compute_file_hash(self, file_path: str, algorithm: str) -> str:
         """Calcule le hash d'un fichier."""
-        hash_func = hashlib.new(algorithm)
-        
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_func.update(chunk)
-        
-        return hash_func.hexdigest()
+        return hash_file(file_path, algorithm)
     
     def _is_compression_suitable(self, file_path: str, file_size: int) -> bool:
         """Déterminine si un fichier est adapté à la compression."""
@@ -259,17 +282,10 @@ class CompressionOptimizer:
         if file_size < 1024:  # < 1KB
             return False
         
-        # Analyser le contenu pour estimer la compressibilité
+        # Estimer la compressibilité sur un échantillon
         try:
             with open(file_path, 'rb') as f:
-                sample = f.read(4096)
-                
-                # Vérifier l'entropie (approximation simple)
-                unique_bytes = len(set(sample))
-                entropy_ratio = unique_bytes / len(sample) if sample else 0
-                
-                # Faible entropie = bonne compressibilité
-                return entropy_ratio < 0.8
+                return estimate_compressibility(f.read(SAMPLE_SIZE)) < 0.9
                 
         except Exception:
             return True  # Par défaut, essayer la compression
@@ -423,6 +439,12 @@ class CompressionOptimizer:
         try:
             original_size = os.path.getsize(file_path)
             
+            # Un échantillon suffit à écarter les contenus incompressibles
+            with open(file_path, 'rb') as f:
+                if estimate_compressibility(f.read(SAMPLE_SIZE)) >= 0.9:
+                    logger.debug(f"Compression non bénéfique pour {file_path} (estimation)")
+                    return False
+            
             # Créer un fichier temporaire compressé
             with tempfile.NamedTemporaryFile(suffix='.gz', delete=False) as tmp:
                 tmp_path = tmp.name
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Hachage rapide des fichiers pour le système d'archivage intelligent.
+
+Fonctionnalités :
+- Lecture par grands blocs réutilisés, ou par mmap pour les gros fichiers
+- BLAKE2b par défaut (plus rapide que SHA256 et MD5 en logiciel), autres
+  algorithmes de `hashlib` disponibles (MD5 des fichiers ``.md5`` existants)
+- Plusieurs algorithmes calculés en une seule lecture
+- Cache persistant indexé par (chemin, taille, mtime_ns, inode) : un fichier
+  inchangé n'est jamais relu
+- Arbre de Merkle des membres d'une archive (vérification membre par membre)
+"""
+
+import os
+import mmap
+import sqlite3
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Sequence
+import logging
+
+from experiments.sqlite_utils import resolve_db_path
+
+# Configuration du logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Algorithme par défaut (empreintes des membres et racine de Merkle)
+HASH_ALGORITHM = "blake2b"
+
+# Taille des empreintes BLAKE2b (octets)
+BLAKE2B_DIGEST_SIZE = 32
+
+# Taille des blocs lus
+READ_SIZE = 1024 * 1024
+
+# Fichiers lus par mmap au-delà de cette taille
+MMAP_MIN_SIZE = 16 * 1024 * 1024
+
+# Base du cache par défaut
+DEFAULT_CACHE_PATH = "experiments/hash_cache.db"
+
+# Un fichier modifié moins de 2 s avant son hachage est rehaché à la lecture
+# suivante : une réécriture de même taille dans le même tick de mtime ne
+# serait pas visible dans la clé du cache
+RACY_WINDOW_NS = 2_000_000_000
+
+def new_hasher(algorithm: str = HASH_ALGORITHM):
+    """Objet `hashlib` de l'algorithme (BLAKE2b sur 256 bits)."""
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=BLAKE2B_DIGEST_SIZE)
+    return hashlib.new(algorithm)
+
+def hash_bytes(data: bytes, algorithm: str = HASH_ALGORITHM) -> str:
+    """Empreinte hexadécimale d'un contenu en mémoire."""
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+def hash_file_multi(file_path: str, algorithms: Sequence[str]) -> Dict[str, str]:
+    """
+    Calcule plusieurs empreintes d'un fichier en une seule lecture.
+
+    Les gros fichiers sont projetés en mémoire (mmap) et hachés par tranches ;
+    les autres sont lus dans un tampon réutilisé. `hashlib` libère le GIL
+    pendant le calcul, plusieurs fichiers peuvent être hachés en parallèle.
+    """
+    hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, size, 16 * READ_SIZE):
+                        block = view[start:start + 16 * READ_SIZE]
+                        for hasher in hashers.values():
+                            hasher.update(block)
+                        block.release()
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(READ_SIZE)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(view[:read])
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+def hash_file(file_path: str, algorithm: str = HASH_ALGORITHM) -> str:
+    """Empreinte hexadécimale d'un fichier (sans cache)."""
+    return hash_file_multi(file_path, [algorithm])[algorithm]
+
+class HashCache:
+    """
+    Cache persistant des empreintes de fichiers.
+
+    Une entrée est valide tant que taille, mtime_ns et inode du fichier sont
+    inchangés. La base SQLite est partagée entre threads et processus (pool
+    de tâches du backend).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = resolve_db_path(db_path)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    path TEXT NOT NULL,
+                    algorithm TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    hashed_at_ns INTEGER NOT NULL,
+                    PRIMARY KEY (path, algorithm)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_hashes(self, file_path: str, algorithms: Sequence[str] = (HASH_ALGORITHM,)) -> Dict[str, str]:
+        """Empreintes d'un fichier, relues depuis le cache si le fichier est inchangé."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        placeholders = ",".join("?" * len(algorithms))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT algorithm, size, mtime_ns, inode, digest, hashed_at_ns FROM file_hashes "
+                f"WHERE path = ? AND algorithm IN ({placeholders})",
+                (path, *algorithms)
+            ).fetchall()
+        digests = {
+            algorithm: digest for algorithm, size, mtime_ns, inode, digest, hashed_at_ns in rows
+            if (size, mtime_ns, inode) == key and mtime_ns < hashed_at_ns - RACY_WINDOW_NS
+        }
+        missing = [algorithm for algorithm in algorithms if algorithm not in digests]
+        if not missing:
+            return digests
+
+        hashed_at_ns = time.time_ns()
+        computed = hash_file_multi(path, missing)
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, algorithm, *key, digest, hashed_at_ns) for algorithm, digest in computed.items()]
+            )
+        digests.update(computed)
+        return digests
+
+    def get_hash(self, file_path: str, algorithm: str = HASH_ALGORITHM) -> str:
+        """Empreinte d'un fichier, relue depuis le cache si le fichier est inchangé."""
+        return self.get_hashes(file_path, [algorithm])[algorithm]
+
+    def invalidate(self, file_path: str) -> None:
+        """Oublie les empreintes d'un fichier (suppression, réécriture)."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM file_hashes WHERE path = ?", (os.path.abspath(file_path),))
+
+    def prune(self) -> int:
+        """Supprime les entrées des fichiers disparus ; retourne leur nombre."""
+        with self._connect() as conn:
+            paths = [row[0] for row in conn.execute("SELECT DISTINCT path FROM file_hashes")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        if missing:
+            with self._lock, self._connect() as conn:
+                conn.executemany("DELETE FROM file_hashes WHERE path = ?", missing)
+        return len(missing)
+
+_default_cache: Optional[HashCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_hash_cache() -> HashCache:
+    """Cache partagé (créé au premier usage dans `DEFAULT_CACHE_PATH`)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HashCache()
+        return _default_cache
+
+def cached_file_hash(file_path: str, algorithm: str = HASH_ALGORITHM) -> str:
+    """Empreinte d'un fichier via le cache partagé."""
+    return get_hash_cache().get_hash(file_path, algorithm)
+
+def merkle_leaf(path: str, digest: str) -> bytes:
+    """Feuille de Merkle d'un membre : nom et empreinte de son contenu."""
+    hasher = new_hasher()
+    hasher.update(b"\x00" + path.encode('utf-8') + b"\x00" + bytes.fromhex(digest))
+    return hasher.digest()
+
+def merkle_root(leaves: List[Tuple[str, str]]) -> str:
+    """
+    Racine de Merkle d'une liste de membres ``(chemin, empreinte BLAKE2b)``.
+
+    Les préfixes 0x00 (feuille) et 0x01 (nœud) séparent les deux niveaux ;
+    un nœud sans voisin remonte tel quel.
+    """
+    level = [merkle_leaf(path, digest) for path, digest in leaves]
+    if not level:
+        return hash_bytes(b"")
+    while len(level) > 1:
+        parents = []
+        for i in range(0, len(level) - 1, 2):
+            hasher = new_hasher()
+            hasher.update(b"\x01" + level[i] + level[i + 1])
+            parents.append(hasher.digest())
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+    return level[0].hex()
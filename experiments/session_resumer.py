@@ -3,7 +3,8 @@
 Système de reprise de sessions pour le laboratoire scientifique IA Pac-Man.
 
 Fonctionnalités :
-- Chargement d'archives existantes
+- Chargement d'archives existantes (checkpoints stockés en delta reconstruits)
+- Lecture des métadonnées et extraction membre par membre, sans extraction complète
 - Continuation d'entraînement à partir d'un point de sauvegarde
 - Comparaison de sessions (diff de paramètres)
 - Fusion de sessions pour méta-analyse
@@ -13,9 +14,6 @@ Fonctionnalités :
 import os
 import json
 import yaml
-import zipfile
-import shutil
-import tempfile
 import hashlib
 from datetime import datetime
 from pathlib import Path
@@ -23,6 +21,11 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import logging
 
+from experiments.archive_reader import ArchiveReader, open_archive
+from experiments.checkpoint_delta import CHECKPOINT_REF_NAME, CheckpointDeltaStore
+from experiments.file_hasher import cached_file_hash
+from experiments.archive_validator import ArchiveValidator
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -38,6 +41,7 @@ class ResumeConfig:
     extract_config: bool = True
     merge_with_current: bool = False
     continuation_prefix: str = "resumed_"
+    checkpoint_store_dir: Optional[str] = None  # Magasin des checkpoints en delta (None = reconstruction désactivée)
 
 @dataclass 
 class SessionComparison:
@@ -67,12 +71,44 @@ class SessionResumer:
         os.makedirs("experiments/comparisons", exist_ok=True)
         os.makedirs("experiments/merged", exist_ok=True)
     
-    def load_archive(self, archive_path: str) -> Optional[Dict[str, Any]]:
+    def read_archive(self, archive_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Lit les métadonnées et l'inventaire d'une archive sans rien extraire.
+        
+        Seuls le répertoire central et les petits fichiers de métadonnées sont
+        lus ; le lecteur est partagé entre les appels.
+        
+        Args:
+            archive_path: Chemin vers l'archive ZIP
+            
+        Returns:
+            Dictionnaire contenant les métadonnées et la liste des fichiers par catégorie
+        """
+        with open_archive(archive_path) as reader:
+            metadata = self._load_metadata(reader)
+            names = reader.names()
+        if not metadata:
+            logger.error(f"Métadonnées non trouvées dans l'archive: {archive_path}")
+            return None
+        
+        return {
+            'metadata': metadata,
+            'archive_path': archive_path,
+            'files': self._identify_important_files(names)
+        }
+    
+    def load_archive(self, archive_path: str, target_dir: Optional[str] = None,
+                     members: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
-        Charge une archive et extrait ses métadonnées.
+        Charge une archive et extrait ses fichiers vers le répertoire cible.
+        
+        Les membres sont écrits directement depuis l'archive, sans
+        extraction intermédiaire.
         
         Args:
             archive_path: Chemin vers l'archive ZIP
+            target_dir: Répertoire de destination (défaut: sous-répertoire de session de `target_dir` de la configuration)
+            members: Membres à extraire (défaut: tous)
             
         Returns:
             Dictionnaire contenant les métadonnées et chemins des fichiers extraits
@@ -87,37 +123,33 @@ class SessionResumer:
                 if not self._validate_archive_integrity(archive_path):
                     logger.warning(f"Intégrité de l'archive non vérifiée: {archive_path}")
             
-            # Créer un répertoire temporaire pour l'extraction
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extraire l'archive
-                with zipfile.ZipFile(archive_path, 'r') as zipf:
-                    zipf.extractall(temp_dir)
-                
-                # Charger les métadonnées
-                metadata = self._load_metadata(temp_dir)
-                if not metadata:
-                    logger.error(f"Métadonnées non trouvées dans l'archive: {archive_path}")
-                    return None
-                
-                # Préparer la structure de retour
-                result = {
-                    'metadata': metadata,
-                    'extracted_dir': temp_dir,
-                    'archive_path': archive_path,
-                    'files': {}
-                }
-                
-                # Identifier les fichiers importants
-                important_files = self._identify_important_files(temp_dir)
-                result['files'] = important_files
-                
-                # Copier les fichiers vers le répertoire cible si demandé
-                if self.config.extract_model or self.config.extract_logs or self.config.extract_config:
-                    target_subdir = self._copy_to_target(temp_dir, metadata.get('session_id', 'unknown'))
-                    result['target_dir'] = target_subdir
+            result = self.read_archive(archive_path)
+            if result is None:
+                return None
+            metadata = result['metadata']
+            
+            # Écrire les fichiers vers le répertoire cible si demandé
+            if self.config.extract_model or self.config.extract_logs or self.config.extract_config:
+                with open_archive(archive_path) as reader:
+                    target_subdir, extracted = self._copy_to_target(
+                        reader, metadata.get('session_id', 'unknown'), target_dir, members
+                    )
+                    
+                    # Reconstruire le modèle si l'archive ne contient que la référence du checkpoint
+                    restored = None
+                    if CHECKPOINT_REF_NAME in extracted:
+                        restored = self._restore_checkpoint(reader, target_subdir)
+                if restored:
+                    rel_path = os.path.relpath(restored, target_subdir).replace(os.sep, '/')
+                    extracted.append(rel_path)
+                    result['files']['model_files'].append(rel_path)
+                    metadata['model_files'].append(rel_path)
                 
-                logger.info(f"Archive chargée: {archive_path} (session: {metadata.get('session_id', 'unknown')})")
-                return result
+                result['target_dir'] = target_subdir
+                result['extracted_files'] = extracted
+            
+            logger.info(f"Archive chargée: {archive_path} (session: {metadata.get('session_id', 'unknown')})")
+            return result
                 
         except Exception as e:
             logger.error(f"Erreur lors du chargement de l'archive: {e}")
@@ -125,11 +157,47 @@ class SessionResumer:
             logger.error(traceback.format_exc())
             return None
     
+    def _restore_checkpoint(self, reader: ArchiveReader, target_dir: str) -> Optional[str]:
+        """
+        Reconstruit le checkpoint référencé par l'archive (sauvegardes automatiques).
+        
+        Le magasin est celui de la configuration, jamais le chemin écrit dans
+        l'archive ; la référence doit y désigner un checkpoint de même SHA256.
+        Le modèle est écrit à côté de la référence, sous ``model/``, comme s'il
+        avait été archivé en entier.
+        """
+        if not reader.has(CHECKPOINT_REF_NAME):
+            return None
+        if not self.config.checkpoint_store_dir:
+            logger.warning("Archive à checkpoint en delta : magasin non configuré (checkpoint_store_dir)")
+            return None
+        
+        reference = reader.read_json(CHECKPOINT_REF_NAME)
+        store = CheckpointDeltaStore(self.config.checkpoint_store_dir)
+        entry = store.get_entry(str(reference.get('checkpoint_id')))
+        if entry is None or entry['sha256'] != reference.get('sha256'):
+            logger.warning(f"Checkpoint {reference.get('checkpoint_id')} absent du magasin {store.root}")
+            return None
+        
+        file_name = os.path.basename(str(reference.get('file_name') or entry['source_name']))
+        if file_name in ('', '.', '..'):
+            file_name = entry['source_name']
+        output_path = os.path.join(target_dir, os.path.dirname(CHECKPOINT_REF_NAME), file_name)
+        store.restore_to(entry['id'], output_path)
+        logger.info(f"Checkpoint {entry['id']} reconstruit depuis {store.root}")
+        return output_path
+    
     def _validate_archive_integrity(self, archive_path: str) -> bool:
         """Valide l'intégrité de l'archive via son hash MD5."""
         hash_file = archive_path + ".md5"
         
         if not os.path.exists(hash_file):
+            # Sans fichier .md5, les empreintes du manifeste sont vérifiées en flux
+            members = ArchiveValidator.verify_members(archive_path)
+            if members["supported"]:
+                if not members["is_valid"]:
+                    logger.error(f"Échec de vérification d'intégrité: {archive_path} {members['errors']}")
+                return members["is_valid"]
             logger.warning(f"Fichier de hash non trouvé: {hash_file}")
             return True  # Continuer sans validation
         
@@ -137,12 +205,8 @@ class SessionResumer:
             with open(hash_file, 'r') as f:
                 expected_hash = f.read().strip().split()[0]
             
-            # Calculer le hash actuel
-            hash_md5 = hashlib.md5()
-            with open(archive_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            actual_hash = hash_md5.hexdigest()
+            # Calculer le hash actuel (relu depuis le cache si l'archive est inchangée)
+            actual_hash = cached_file_hash(archive_path, "md5")
             
             if expected_hash == actual_hash:
                 logger.info(f"Vérification d'intégrité OK: {archive_path}")
@@ -157,43 +221,28 @@ class SessionResumer:
             logger.warning(f"Erreur lors de la validation d'intégrité: {e}")
             return True  # Continuer malgré l'erreur
     
-    def _load_metadata(self, extracted_dir: str) -> Optional[Dict[str, Any]]:
-        """Charge les métadonnées depuis le répertoire extrait."""
-        metadata_files = [
-            os.path.join(extracted_dir, "metadata.json"),
-            os.path.join(extracted_dir, "config.yaml"),
-            os.path.join(extracted_dir, "params.md")
-        ]
-        
+    def _load_metadata(self, reader: ArchiveReader) -> Optional[Dict[str, Any]]:
+        """Charge les métadonnées depuis l'archive (metadata.json, config.yaml, params.md)."""
         metadata = {}
         
         # Charger metadata.json
-        metadata_json_path = metadata_files[0]
-        if os.path.exists(metadata_json_path):
+        if reader.has("metadata.json"):
             try:
-                with open(metadata_json_path, 'r') as f:
-                    metadata.update(json.load(f))
+                metadata.update(reader.metadata())
             except Exception as e:
                 logger.warning(f"Erreur lors du chargement de metadata.json: {e}")
         
         # Charger config.yaml
-        config_yaml_path = metadata_files[1]
-        if os.path.exists(config_yaml_path):
+        if reader.has("config.yaml"):
             try:
-                with open(config_yaml_path, 'r') as f:
-                    config_data = yaml.safe_load(f)
-                    metadata['config'] = config_data
+                metadata['config'] = reader.read_yaml("config.yaml")
             except Exception as e:
                 logger.warning(f"Erreur lors du chargement de config.yaml: {e}")
         
         # Extraire des informations de params.md
-        params_md_path = metadata_files[2]
-        if os.path.exists(params_md_path):
+        if reader.has("params.md"):
             try:
-                with open(params_md_path, 'r', encoding='utf-8') as f:
-                    params_content = f.read()
-                    # Extraire des informations basiques
-                    metadata['params_preview'] = params_content[:500]
+                metadata['params_preview'] = reader.read_text("params.md", limit=500)
             except Exception as e:
                 logger.warning(f"Erreur lors du chargement de params.md: {e}")
         
@@ -201,23 +250,19 @@ class SessionResumer:
         model_files = []
         log_files = []
         
-        for root, dirs, files in os.walk(extracted_dir):
-            for file in files:
-                filepath = os.path.join(root, file)
-                rel_path = os.path.relpath(filepath, extracted_dir)
-                
-                if 'model' in rel_path.lower():
-                    model_files.append(rel_path)
-                elif 'log' in rel_path.lower():
-                    log_files.append(rel_path)
+        for rel_path in reader.names():
+            if 'model' in rel_path.lower():
+                model_files.append(rel_path)
+            elif 'log' in rel_path.lower():
+                log_files.append(rel_path)
         
         metadata['model_files'] = model_files
         metadata['log_files'] = log_files
         
         return metadata if metadata else None
     
-    def _identify_important_files(self, extracted_dir: str) -> Dict[str, List[str]]:
-        """Identifie les fichiers importants dans le répertoire extrait."""
+    def _identify_important_files(self, file_list: List[str]) -> Dict[str, List[str]]:
+        """Classe les fichiers de l'archive par catégorie."""
         important = {
             'model_files': [],
             'config_files': [],
@@ -226,63 +271,57 @@ class SessionResumer:
             'other_files': []
         }
         
-        for root, dirs, files in os.walk(extracted_dir):
-            for file in files:
-                filepath = os.path.join(root, file)
-                rel_path = os.path.relpath(filepath, extracted_dir)
-                
-                # Catégoriser le fichier
-                if any(keyword in rel_path.lower() for keyword in ['model', 'checkpoint', 'weights', '.pth', '.pt', '.h5']):
-                    important['model_files'].append(rel_path)
-                elif any(keyword in rel_path.lower() for keyword in ['config', 'params', 'settings', '.yaml', '.yml', '.json']):
-                    important['config_files'].append(rel_path)
-                elif any(keyword in rel_path.lower() for keyword in ['log', 'metric', 'history', '.log', '.csv', '.txt']):
-                    important['log_files'].append(rel_path)
-                elif any(keyword in rel_path.lower() for keyword in ['data', 'dataset', 'buffer', '.npz', '.npy']):
-                    important['data_files'].append(rel_path)
-                else:
-                    important['other_files'].append(rel_path)
+        for rel_path in file_list:
+            # Catégoriser le fichier
+            if any(keyword in rel_path.lower() for keyword in ['model', 'checkpoint', 'weights', '.pth', '.pt', '.h5']):
+                important['model_files'].append(rel_path)
+            elif any(keyword in rel_path.lower() for keyword in ['config', 'params', 'settings', '.yaml', '.yml', '.json']):
+                important['config_files'].append(rel_path)
+            elif any(keyword in rel_path.lower() for keyword in ['log', 'metric', 'history', '.log', '.csv', '.txt']):
+                important['log_files'].append(rel_path)
+            elif any(keyword in rel_path.lower() for keyword in ['data', 'dataset', 'buffer', '.npz', '.npy']):
+                important['data_files'].append(rel_path)
+            else:
+                important['other_files'].append(rel_path)
         
         return important
     
-    def _copy_to_target(self, extracted_dir: str, session_id: str) -> str:
-        """Copie les fichiers extraits vers le répertoire cible."""
-        # Créer un sous-répertoire pour cette session
-        safe_session_id = "".join(c for c in session_id if c.isalnum() or c in '_-')
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        target_subdir = os.path.join(self.config.target_dir, f"{self.config.continuation_prefix}{safe_session_id}_{timestamp}")
+    def _copy_to_target(self, reader: ArchiveReader, session_id: str, target_dir: Optional[str] = None,
+                        members: Optional[List[str]] = None) -> Tuple[str, List[str]]:
+        """Écrit les membres de l'archive vers le répertoire cible ; retourne ce répertoire et les membres écrits."""
+        if target_dir:
+            target_subdir = target_dir
+        else:
+            # Créer un sous-répertoire pour cette session
+            safe_session_id = "".join(c for c in session_id if c.isalnum() or c in '_-')
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+            target_subdir = os.path.join(self.config.target_dir, f"{self.config.continuation_prefix}{safe_session_id}_{timestamp}")
         
         os.makedirs(target_subdir, exist_ok=True)
         
-        # Copier les fichiers selon la configuration
-        files_copied = 0
+        # Sélectionner les fichiers selon la configuration
+        selected = []
         
-        for root, dirs, files in os.walk(extracted_dir):
-            for file in files:
-                src_path = os.path.join(root, file)
-                rel_path = os.path.relpath(src_path, extracted_dir)
-                dst_path = os.path.join(target_subdir, rel_path)
-                
-                # Vérifier si on doit copier ce type de fichier
-                should_copy = False
-                
-                if self.config.extract_model and any(keyword in rel_path.lower() for keyword in ['model', 'checkpoint', 'weights']):
-                    should_copy = True
-                elif self.config.extract_config and any(keyword in rel_path.lower() for keyword in ['config', 'params', 'metadata']):
-                    should_copy = True
-                elif self.config.extract_logs and any(keyword in rel_path.lower() for keyword in ['log', 'metric', 'history']):
-                    should_copy = True
-                else:
-                    # Copier les autres fichiers importants
-                    should_copy = True
-                
-                if should_copy:
-                    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-                    shutil.copy2(src_path, dst_path)
-                    files_copied += 1
+        for rel_path in (members if members is not None else reader.names()):
+            # Vérifier si on doit copier ce type de fichier
+            should_copy = False
+            
+            if self.config.extract_model and any(keyword in rel_path.lower() for keyword in ['model', 'checkpoint', 'weights']):
+                should_copy = True
+            elif self.config.extract_config and any(keyword in rel_path.lower() for keyword in ['config', 'params', 'metadata']):
+                should_copy = True
+            elif self.config.extract_logs and any(keyword in rel_path.lower() for keyword in ['log', 'metric', 'history']):
+                should_copy = True
+            else:
+                # Copier les autres fichiers importants
+                should_copy = True
+            
+            if should_copy:
+                selected.append(rel_path)
         
-        logger.info(f"{files_copied} fichiers copiés vers {target_subdir}")
-        return target_subdir
+        extracted = reader.extract_members(selected, target_subdir)
+        logger.info(f"{len(extracted)} fichiers copiés vers {target_subdir}")
+        return target_subdir, extracted
     
     def resume_training(self, archive_path: str, new_session_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -442,9 +481,9 @@ if __name__ == "__main__":
         Returns:
             Objet SessionComparison avec les différences et recommandations
         """
-        # Charger les deux archives
-        archive_a = self.load_archive(archive_path_a)
-        archive_b = self.load_archive(archive_path_b)
+        # Lire les métadonnées des deux archives (sans extraction)
+        archive_a = self.read_archive(archive_path_a) if os.path.exists(archive_path_a) else None
+        archive_b = self.read_archive(archive_path_b) if os.path.exists(archive_path_b) else None
         
         if not archive_a or not archive_b:
             logger.error("Impossible de charger une ou les deux archives")
@@ -633,10 +672,10 @@ if __name__ == "__main__":
             return None
         
         try:
-            # Charger toutes les archives
+            # Lire les métadonnées de toutes les archives
             archives = []
             for path in archive_paths:
-                archive_data = self.load_archive(path)
+                archive_data = self.read_archive(path) if os.path.exists(path) else None
                 if archive_data:
                     archives.append(archive_data)
                 else:
@@ -659,14 +698,12 @@ if __name__ == "__main__":
                 session_dir = os.path.join(merge_dir, f"session_{i}_{session_id}")
                 os.makedirs(session_dir, exist_ok=True)
                 
-                # Copier les fichiers importants
-                for file_type, files in archive_data['files'].items():
-                    for file in files:
-                        src_path = os.path.join(archive_data['extracted_dir'], file)
-                        dst_path = os.path.join(session_dir, file)
-                        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-                        shutil.copy2(src_path, dst_path)
-                        merged_files.append(dst_path)
+                # Écrire les fichiers importants directement depuis l'archive
+                files = [file for files in archive_data['files'].values() for file in files]
+                with open_archive(archive_data['archive_path']) as reader:
+                    extracted = reader.extract_members(files, session_dir)
+                for file in extracted:
+                    merged_files.append(os.path.join(session_dir, file))
             
             # Créer un fichier de métadonnées de fusion
             merge_metadata = {
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Outils communs aux bases SQLite du système d'archivage (cache des
+empreintes, registre des versions, catalogue des archives).
+"""
+
+import os
+
+def resolve_db_path(db_path: str) -> str:
+    """
+    Chemin absolu d'une base SQLite, dont le répertoire est créé au besoin.
+
+    Les services gardent ce chemin pour toute leur durée de vie : un chemin
+    relatif ouvrirait une autre base (vide) après un changement du
+    répertoire courant.
+    """
+    path = os.path.abspath(db_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -5,26 +5,75 @@ Gestionnaire de versions pour le système d'archivage intelligent.
 Fonctionnalités :
 - Numérotation automatique des runs
 - Tags et catégories (best, experimental, baseline)
-- Recherche et filtrage par métriques
+- Recherche et filtrage par métriques (requêtes SQLite indexées)
 - Gestion des métadonnées de version
+- Registre transactionnel : une écriture par enregistrement ou modification
 - Migration depuis l'ancien système
 """
 
 import os
 import json
+import math
 import yaml
 import re
 import shutil
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple, Set
 from dataclasses import dataclass, asdict, field
 import logging
 
+from experiments.sqlite_utils import resolve_db_path
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Base SQLite du registre (dans le répertoire des métadonnées)
+REGISTRY_DB_NAME = "versions.db"
+
+# Ancien registre JSON, importé au premier lancement
+LEGACY_REGISTRY_NAME = "version_registry.json"
+
+# Identifiants par requête IN (...) lors de la lecture des tags et catégories
+QUERY_BATCH_SIZE = 500
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS versions (
+        session_id TEXT PRIMARY KEY,
+        session_number INTEGER NOT NULL UNIQUE,
+        timestamp TEXT NOT NULL,
+        model_type TEXT NOT NULL,
+        agent_type TEXT NOT NULL,
+        archive_path TEXT,
+        parent_version TEXT,
+        notes TEXT NOT NULL DEFAULT '',
+        parameters TEXT NOT NULL DEFAULT '{}',
+        metrics TEXT NOT NULL DEFAULT '{}'
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS tags (tag TEXT NOT NULL, session_id TEXT NOT NULL, UNIQUE (tag, session_id))",
+    "CREATE TABLE IF NOT EXISTS categories (category TEXT NOT NULL, session_id TEXT NOT NULL, UNIQUE (category, session_id))",
+    # Métriques numériques seulement (le dictionnaire complet reste dans versions.metrics)
+    "CREATE TABLE IF NOT EXISTS metrics (session_id TEXT NOT NULL, name TEXT NOT NULL, value REAL NOT NULL, "
+    "PRIMARY KEY (session_id, name))",
+    "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_timestamp ON versions (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_model_type ON versions (model_type)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_agent_type ON versions (agent_type)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_archive_path ON versions (archive_path)",
+    "CREATE INDEX IF NOT EXISTS idx_versions_parent ON versions (parent_version)",
+    "CREATE INDEX IF NOT EXISTS idx_tags_session ON tags (session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_categories_session ON categories (session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_metrics_name_value ON metrics (name, value)"
+]
+
+_VERSION_COLUMNS = ("v.session_id, v.session_number, v.timestamp, v.model_type, v.agent_type, "
+                    "v.archive_path, v.parent_version, v.notes, v.parameters, v.metrics")
+
 @dataclass
 class VersionMetadata:
     """Métadonnées de version pour une session."""
@@ -62,84 +111,160 @@ class VersionManager:
     Gestionnaire de versions pour le système d'archivage intelligent.
     
     Gère la numérotation automatique, les tags, les catégories et la recherche
-    de sessions archivées.
+    de sessions archivées. Le registre est une base SQLite indexée : chaque
+    enregistrement ou modification est une écriture transactionnelle unique,
+    et les recherches sont des requêtes indexées.
     """
     
     def __init__(self, archive_dir: str = "experiments/archives"):
         self.archive_dir = archive_dir
         self.metadata_dir = os.path.join(archive_dir, "metadata")
+        self.db_path = resolve_db_path(os.path.join(self.metadata_dir, REGISTRY_DB_NAME))
         self._ensure_directories()
-        self._load_version_registry()
+        self._init_registry()
     
     def _ensure_directories(self) -> None:
         """Crée les répertoires nécessaires."""
         os.makedirs(self.archive_dir, exist_ok=True)
         os.makedirs(self.metadata_dir, exist_ok=True)
-        os.makedirs("experiments/tags", exist_ok=True)
-        os.makedirs("experiments/categories", exist_ok=True)
     
-    def _load_version_registry(self) -> None:
-        """Charge ou crée le registre des versions."""
-        registry_path = os.path.join(self.metadata_dir, "version_registry.json")
-        
-        if os.path.exists(registry_path):
+    @contextmanager
+    def _connect(self):
+        """Connexion en lecture (les écritures passent par `_transaction`)."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _transaction(self):
+        """Transaction d'écriture : verrou pris dès le début, annulée en cas d'erreur."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
             try:
-                with open(registry_path, 'r') as f:
-                    self.registry = json.load(f)
-                logger.info(f"Registre des versions chargé: {len(self.registry.get('versions', {}))} versions")
-            except Exception as e:
-                logger.warning(f"Erreur lors du chargement du registre: {e}")
-                self.registry = self._create_new_registry()
-        else:
-            self.registry = self._create_new_registry()
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
     
-    def _create_new_registry(self) -> Dict[str, Any]:
-        """Crée un nouveau registre des versions."""
-        return {
-            'next_session_number': 1,
-            'versions': {},
-            'tags': {},
-            'categories': {},
-            'statistics': {
-                'total_sessions': 0,
-                'by_model_type': {},
-                'by_agent_type': {},
-                'by_tag': {},
-                'by_category': {}
-            }
-        }
+    def _init_registry(self) -> None:
+        """Crée le schéma du registre et importe l'ancien registre JSON s'il existe."""
+        with self._transaction() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('next_session_number', 1)")
+            version_count = conn.execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+        
+        legacy_path = os.path.join(self.metadata_dir, LEGACY_REGISTRY_NAME)
+        if version_count == 0 and os.path.exists(legacy_path):
+            self._import_legacy_registry(legacy_path)
+        else:
+            logger.info(f"Registre des versions chargé: {version_count} versions")
     
-    def _save_registry(self) -> None:
-        """Sauvegarde le registre des versions."""
-        registry_path = os.path.join(self.metadata_dir, "version_registry.json")
+    def _import_legacy_registry(self, legacy_path: str) -> None:
+        """Importe le registre JSON de l'ancien format (une seule fois, base vide)."""
+        try:
+            with open(legacy_path, 'r') as f:
+                registry = json.load(f)
+        except Exception as e:
+            logger.warning(f"Erreur lors du chargement du registre: {e}")
+            return
         
+        # Un registre illisible ne doit pas empêcher le démarrage : la base reste vide
         try:
-            with open(registry_path, 'w') as f:
-                json.dump(self.registry, f, indent=2)
-            logger.debug("Registre des versions sauvegardé")
+            versions = [VersionMetadata(**data) for data in registry.get('versions', {}).values()]
+            with self._transaction() as conn:
+                for version in versions:
+                    self._insert_version(conn, version)
+                next_number = max([registry.get('next_session_number', 1)] + [v.session_number + 1 for v in versions])
+                conn.execute("UPDATE counters SET value = ? WHERE name = 'next_session_number'", (next_number,))
         except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde du registre: {e}")
+            logger.error(f"Erreur lors de l'import du registre JSON {legacy_path}: {e}")
+            return
+        logger.info(f"Registre JSON importé: {len(versions)} versions ({legacy_path})")
+    
+    @staticmethod
+    def _insert_version(conn: sqlite3.Connection, version: VersionMetadata) -> None:
+        """Insère une version et ses tags, catégories et métriques numériques finies (NaN et inf restent dans le JSON)."""
+        conn.execute(
+            "INSERT INTO versions (session_id, session_number, timestamp, model_type, agent_type, "
+            "archive_path, parent_version, notes, parameters, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (version.session_id, version.session_number, version.timestamp, version.model_type,
+             version.agent_type, version.archive_path, version.parent_version, version.notes,
+             json.dumps(version.parameters), json.dumps(version.metrics))
+        )
+        conn.executemany("INSERT OR IGNORE INTO tags VALUES (?, ?)",
+                         [(tag, version.session_id) for tag in version.tags])
+        conn.executemany("INSERT OR IGNORE INTO categories VALUES (?, ?)",
+                         [(category, version.session_id) for category in version.categories])
+        conn.executemany("INSERT INTO metrics VALUES (?, ?, ?)", [
+            (version.session_id, name, float(value)) for name, value in version.metrics.items()
+            if isinstance(value, (int, float)) and math.isfinite(value)
+        ])
+    
+    def _load_versions(self, conn: sqlite3.Connection, rows: List[Tuple]) -> List[VersionMetadata]:
+        """Reconstruit les versions des lignes de `versions` (tags, catégories et enfants lus par lots)."""
+        session_ids = [row[0] for row in rows]
+        tags: Dict[str, List[str]] = {session_id: [] for session_id in session_ids}
+        categories: Dict[str, List[str]] = {session_id: [] for session_id in session_ids}
+        children: Dict[str, List[str]] = {session_id: [] for session_id in session_ids}
+        
+        for start in range(0, len(session_ids), QUERY_BATCH_SIZE):
+            batch = session_ids[start:start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            for session_id, tag in conn.execute(
+                f"SELECT session_id, tag FROM tags WHERE session_id IN ({placeholders}) ORDER BY rowid", batch
+            ):
+                tags[session_id].append(tag)
+            for session_id, category in conn.execute(
+                f"SELECT session_id, category FROM categories WHERE session_id IN ({placeholders}) ORDER BY rowid", batch
+            ):
+                categories[session_id].append(category)
+            for parent, child in conn.execute(
+                f"SELECT parent_version, session_id FROM versions WHERE parent_version IN ({placeholders}) "
+                f"ORDER BY session_number", batch
+            ):
+                children[parent].append(child)
+        
+        return [
+            VersionMetadata(
+                session_id=session_id,
+                session_number=session_number,
+                timestamp=timestamp,
+                model_type=model_type,
+                agent_type=agent_type,
+                tags=tags[session_id],
+                categories=categories[session_id],
+                metrics=json.loads(metrics),
+                parameters=json.loads(parameters),
+                archive_path=archive_path,
+                parent_version=parent_version,
+                child_versions=children[session_id],
+                notes=notes
+            )
+            for (session_id, session_number, timestamp, model_type, agent_type,
+                 archive_path, parent_version, notes, parameters, metrics) in rows
+        ]
     
-    def register_new_version(self, archive_path: str, metadata: Dict[str, Any]) -> Optional[VersionMetadata]:
+    def register_new_version(self, archive_path: str, metadata: Dict[str, Any],
+                             tags: Optional[List[str]] = None) -> Optional[VersionMetadata]:
         """
         Enregistre une nouvelle version dans le système.
         
         Args:
             archive_path: Chemin vers l'archive
             metadata: Métadonnées de la session
+            tags: Tags ajoutés aux tags automatiques
             
         Returns:
             Métadonnées de version enregistrées ou None en cas d'erreur
         """
         try:
-            # Générer un numéro de session
-            session_number = self.registry['next_session_number']
-            self.registry['next_session_number'] += 1
-            
-            # Créer l'ID de session
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            session_id = f"session_{session_number:03d}_{timestamp}"
-            
             # Extraire les informations de base
             model_type = metadata.get('model_type', 'unknown')
             agent_type = metadata.get('agent_type', 'unknown')
@@ -151,41 +276,43 @@ class VersionManager:
             parameters = metadata.get('parameters', {})
             
             # Déterminer les tags automatiques
-            tags = self._generate_automatic_tags(metrics, parameters)
+            version_tags = self._generate_automatic_tags(metrics, parameters)
+            for tag in tags or []:
+                if tag not in version_tags:
+                    version_tags.append(tag)
             
             # Déterminer les catégories automatiques
             categories = self._generate_automatic_categories(metrics, parameters)
             
-            # Créer l'objet VersionMetadata
-            version_metadata = VersionMetadata(
-                session_id=session_id,
-                session_number=session_number,
-                timestamp=timestamp,
-                model_type=model_type,
-                agent_type=agent_type,
-                tags=tags,
-                categories=categories,
-                metrics=metrics,
-                parameters=parameters,
-                archive_path=archive_path,
-                notes=metadata.get('notes', '')
-            )
-            
-            # Mettre à jour le registre
-            self._update_registry_with_version(version_metadata)
-            
-            # Sauvegarder les métadonnées de version
-            self._save_version_metadata(version_metadata)
-            
-            # Mettre à jour les index de tags et catégories
-            self._update_tag_index(version_metadata)
-            self._update_category_index(version_metadata)
-            
-            # Sauvegarder le registre
-            self._save_registry()
+            with self._transaction() as conn:
+                # Générer un numéro de session (dans la même transaction que l'insertion)
+                session_number = conn.execute(
+                    "SELECT value FROM counters WHERE name = 'next_session_number'"
+                ).fetchone()[0]
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'next_session_number'")
+                
+                # Créer l'ID de session
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                session_id = f"session_{session_number:03d}_{timestamp}"
+                
+                # Créer l'objet VersionMetadata
+                version_metadata = VersionMetadata(
+                    session_id=session_id,
+                    session_number=session_number,
+                    timestamp=timestamp,
+                    model_type=model_type,
+                    agent_type=agent_type,
+                    tags=version_tags,
+                    categories=categories,
+                    metrics=metrics,
+                    parameters=parameters,
+                    archive_path=archive_path,
+                    notes=metadata.get('notes') or ''
+                )
+                self._insert_version(conn, version_metadata)
             
             logger.info(f"Nouvelle version enregistrée: {session_id} (#{session_number})")
-            logger.info(f"Tags: {tags}")
+            logger.info(f"Tags: {version_tags}")
             logger.info(f"Catégories: {categories}")
             
             return version_metadata
@@ -258,339 +385,210 @@ class VersionManager:
         
         return list(set(categories))
     
-    def _update_registry_with_version(self, version: VersionMetadata) -> None:
-        """Met à jour le registre avec une nouvelle version."""
-        # Ajouter la version au registre
-        self.registry['versions'][version.session_id] = asdict(version)
-        
-        # Mettre à jour les statistiques
-        stats = self.registry['statistics']
-        stats['total_sessions'] += 1
-        
-        # Statistiques par type de modèle
-        model_type = version.model_type
-        stats['by_model_type'][model_type] = stats['by_model_type'].get(model_type, 0) + 1
-        
-        # Statistiques par type d'agent
-        agent_type = version.agent_type
-        stats['by_agent_type'][agent_type] = stats['by_agent_type'].get(agent_type, 0) + 1
-        
-        # Statistiques par tag
-        for tag in version.tags:
-            stats['by_tag'][tag] = stats['by_tag'].get(tag, 0) + 1
-        
-        # Statistiques par catégorie
-        for category in version.categories:
-            stats['by_category'][category] = stats['by_category'].get(category, 0) + 1
-    
-    def _save_version_metadata(self, version: VersionMetadata) -> None:
-        """Sauvegarde les métadonnées de version dans un fichier séparé."""
-        version_path = os.path.join(self.metadata_dir, f"{version.session_id}.json")
-        
-        try:
-            with open(version_path, 'w') as f:
-                json.dump(asdict(version), f, indent=2)
-            logger.debug(f"Métadonnées de version sauvegardées: {version_path}")
-        except Exception as e:
-            logger.error(f"Erreur lors de la sauvegarde des métadonnées de version: {e}")
-    
-    def _update_tag_index(self, version: VersionMetadata) -> None:
-        """Met à jour l'index des tags."""
-        for tag in version.tags:
-            tag_file = os.path.join("experiments/tags", f"{tag}.json")
-            
-            # Charger ou créer l'index du tag
-            if os.path.exists(tag_file):
-                with open(tag_file, 'r') as f:
-                    tag_index = json.load(f)
-            else:
-                tag_index = {'sessions': [], 'description': '', 'created': datetime.now().isoformat()}
-            
-            # Ajouter la session à l'index
-            if version.session_id not in tag_index['sessions']:
-                tag_index['sessions'].append(version.session_id)
-                
-                # Sauvegarder l'index
-                with open(tag_file, 'w') as f:
-                    json.dump(tag_index, f, indent=2)
-    
-    def _update_category_index(self, version: VersionMetadata) -> None:
-        """Met à jour l'index des catégories."""
-        for category in version.categories:
-            category_file = os.path.join("experiments/categories", f"{category}.json")
-            
-            # Charger ou créer l'index de la catégorie
-            if os.path.exists(category_file):
-                with open(category_file, 'r') as f:
-                    category_index = json.load(f)
-            else:
-                category_index = {'sessions': [], 'description': '', 'created': datetime.now().isoformat()}
-            
-            # Ajouter la session à l'index
-            if version.session_id not in category_index['sessions']:
-                category_index['sessions'].append(version.session_id)
-                
-                # Sauvegarder l'index
-                with open(category_file, 'w') as f:
-                    json.dump(category_index, f, indent=2)
-    
-    def search_versions(self, filter_criteria: VersionFilter) -> List[VersionMetadata]:
+    def search_versions(self, filter_criteria: Optional[VersionFilter] = None,
+                        limit: Optional[int] = None, offset: int = 0) -> List[VersionMetadata]:
         """
         Recherche des versions selon des critères de filtrage.
         
         Args:
-            filter_criteria: Critères de filtrage
+            filter_criteria: Critères de filtrage (défaut: aucun)
+            limit: Nombre maximum de versions retournées
+            offset: Nombre de versions sautées (pagination)
             
         Returns:
-            Liste des versions correspondantes
+            Liste des versions correspondantes, par numéro de session décroissant
         """
-        matching_versions = []
-        
-        for version_id, version_data in self.registry['versions'].items():
-            version = VersionMetadata(**version_data)
-            
-            # Appliquer les filtres
-            if not self._matches_filter(version, filter_criteria):
-                continue
-            
-            matching_versions.append(version)
+        where, params = self._build_filter(filter_criteria or VersionFilter())
+        query = f"SELECT {_VERSION_COLUMNS} FROM versions v"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY v.session_number DESC LIMIT ? OFFSET ?"
+        params += [limit if limit is not None else -1, offset]
         
-        # Trier par numéro de session (décroissant par défaut)
-        matching_versions.sort(key=lambda v: v.session_number, reverse=True)
+        with self._connect() as conn:
+            matching_versions = self._load_versions(conn, conn.execute(query, params).fetchall())
         
         logger.info(f"Recherche trouvée: {len(matching_versions)} versions correspondantes")
         return matching_versions
     
-    def _matches_filter(self, version: VersionMetadata, filter_criteria: VersionFilter) -> bool:
-        """Vérifie si une version correspond aux critères de filtrage."""
+    @staticmethod
+    def _build_filter(filter_criteria: VersionFilter) -> Tuple[List[str], List[Any]]:
+        """Traduit les critères de filtrage en clauses SQL (index de `versions`, `tags`, `categories`, `metrics`)."""
+        where: List[str] = []
+        params: List[Any] = []
+        
         # Filtre par numéro de session
         if filter_criteria.min_session_number is not None:
-            if version.session_number < filter_criteria.min_session_number:
-                return False
+            where.append("v.session_number >= ?")
+            params.append(filter_criteria.min_session_number)
         
         if filter_criteria.max_session_number is not None:
-            if version.session_number > filter_criteria.max_session_number:
-                return False
+            where.append("v.session_number <= ?")
+            params.append(filter_criteria.max_session_number)
         
         # Filtre par date
         if filter_criteria.start_date is not None:
-            if version.timestamp < filter_criteria.start_date:
-                return False
+            where.append("v.timestamp >= ?")
+            params.append(filter_criteria.start_date)
         
         if filter_criteria.end_date is not None:
-            if version.timestamp > filter_criteria.end_date:
-                return False
+            where.append("v.timestamp <= ?")
+            params.append(filter_criteria.end_date)
         
-        # Filtre par tags
+        # Filtre par tags (au moins un)
         if filter_criteria.tags is not None:
-            if not any(tag in version.tags for tag in filter_criteria.tags):
-                return False
+            where.append(f"v.session_id IN (SELECT session_id FROM tags WHERE tag IN ({','.join('?' * len(filter_criteria.tags))}))")
+            params.extend(filter_criteria.tags)
         
-        # Filtre par catégories
+        # Filtre par catégories (au moins une)
         if filter_criteria.categories is not None:
-            if not any(category in version.categories for category in filter_criteria.categories):
-                return False
-        
-        # Filtre par métriques
-        if filter_criteria.min_metric_value is not None:
-            for metric_name, min_value in filter_criteria.min_metric_value.items():
-                if metric_name in version.metrics:
-                    if version.metrics[metric_name] < min_value:
-                        return False
-        
-        if filter_criteria.max_metric_value is not None:
-            for metric_name, max_value in filter_criteria.max_metric_value.items():
-                if metric_name in version.metrics:
-                    if version.metrics[metric_name] > max_value:
-                        return False
+            where.append(f"v.session_id IN (SELECT session_id FROM categories "
+                         f"WHERE category IN ({','.join('?' * len(filter_criteria.categories))}))")
+            params.extend(filter_criteria.categories)
+        
+        # Filtre par métriques (une version sans la métrique n'est pas exclue)
+        for metric_name, min_value in (filter_criteria.min_metric_value or {}).items():
+            where.append("v.session_id NOT IN (SELECT session_id FROM metrics WHERE name = ? AND value < ?)")
+            params.extend([metric_name, min_value])
+        
+        for metric_name, max_value in (filter_criteria.max_metric_value or {}).items():
+            where.append("v.session_id NOT IN (SELECT session_id FROM metrics WHERE name = ? AND value > ?)")
+            params.extend([metric_name, max_value])
         
         # Filtre par type de modèle
         if filter_criteria.model_type is not None:
-            if version.model_type != filter_criteria.model_type:
-                return False
+            where.append("v.model_type = ?")
+            params.append(filter_criteria.model_type)
         
         # Filtre par type d'agent
         if filter_criteria.agent_type is not None:
-            if version.agent_type != filter_criteria.agent_type:
-                return False
+            where.append("v.agent_type = ?")
+            params.append(filter_criteria.agent_type)
         
-        # Filtre par texte de recherche
+        # Filtre par texte de recherche (identifiant, notes, paramètres, tags, catégories)
         if filter_criteria.search_text is not None:
-            search_text = filter_criteria.search_text.lower()
-            
-            # Rechercher dans différents champs
-            search_fields = [
-                version.session_id.lower(),
-                version.notes.lower(),
-                str(version.parameters).lower(),
-                ' '.join(version.tags).lower(),
-                ' '.join(version.categories).lower()
-            ]
-            
-            if not any(search_text in field for field in search_fields):
-                return False
+            pattern = "%" + re.sub(r"([\\%_])", r"\\\1", filter_criteria.search_text) + "%"
+            like = "LIKE ? ESCAPE '\\'"
+            where.append(
+                f"(v.session_id {like} OR v.notes {like} OR v.parameters {like}"
+                f" OR v.session_id IN (SELECT session_id FROM tags WHERE tag {like})"
+                f" OR v.session_id IN (SELECT session_id FROM categories WHERE category {like}))"
+            )
+            params.extend([pattern] * 5)
         
-        return True
+        return where, params
     
     def get_version(self, session_id: str) -> Optional[VersionMetadata]:
         """Récupère une version par son ID."""
-        version_data = self.registry['versions'].get(session_id)
-        
-        if version_data:
-            return VersionMetadata(**version_data)
-        else:
-            # Essayer de charger depuis le fichier de métadonnées
-            version_path = os.path.join(self.metadata_dir, f"{session_id}.json")
-            
-            if os.path.exists(version_path):
-                try:
-                    with open(version_path, 'r') as f:
-                        version_data = json.load(f)
-                    return VersionMetadata(**version_data)
-                except Exception as e:
-                    logger.error(f"Erreur lors du chargement de la version {session_id}: {e}")
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_VERSION_COLUMNS} FROM versions v WHERE v.session_id = ?", (session_id,)
+            ).fetchall()
+            versions = self._load_versions(conn, rows)
+        return versions[0] if versions else None
+    
+    def get_version_info(self, archive_path: str) -> Optional[Dict[str, Any]]:
+        """Version enregistrée pour une archive (la plus récente), sous forme de dictionnaire."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_VERSION_COLUMNS} FROM versions v WHERE v.archive_path = ? "
+                f"ORDER BY v.session_number DESC LIMIT 1", (archive_path,)
+            ).fetchall()
+            versions = self._load_versions(conn, rows)
+        return asdict(versions[0]) if versions else None
+    
+    def _set_label(self, table: str, column: str, session_id: str, label: str, add: bool) -> Optional[bool]:
+        """
+        Ajoute ou retire un tag ou une catégorie en une transaction.
         
-        return None
+        Returns:
+            None si la version n'existe pas, sinon vrai si la ligne a changé
+        """
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM versions WHERE session_id = ?", (session_id,)).fetchone() is None:
+                return None
+            if add:
+                cursor = conn.execute(f"INSERT OR IGNORE INTO {table} ({column}, session_id) VALUES (?, ?)",
+                                      (label, session_id))
+            else:
+                cursor = conn.execute(f"DELETE FROM {table} WHERE {column} = ? AND session_id = ?",
+                                      (label, session_id))
+            return cursor.rowcount > 0
     
     def add_tag(self, session_id: str, tag: str) -> bool:
         """Ajoute un tag à une version."""
-        version = self.get_version(session_id)
+        changed = self._set_label("tags", "tag", session_id, tag, add=True)
         
-        if not version:
+        if changed is None:
             logger.error(f"Version non trouvée: {session_id}")
             return False
         
-        if tag not in version.tags:
-            version.tags.append(tag)
-            
-            # Mettre à jour le registre
-            self.registry['versions'][session_id]['tags'] = version.tags
-            
-            # Mettre à jour l'index des tags
-            self._update_tag_index(version)
-            
-            # Mettre à jour les statistiques
-            self.registry['statistics']['by_tag'][tag] = self.registry['statistics']['by_tag'].get(tag, 0) + 1
-            
-            # Sauvegarder les métadonnées
-            self._save_version_metadata(version)
-            self._save_registry()
-            
+        if changed:
             logger.info(f"Tag '{tag}' ajouté à {session_id}")
-            return True
-        
-        return False  # Tag déjà présent
+        return changed  # Faux si le tag était déjà présent
     
     def remove_tag(self, session_id: str, tag: str) -> bool:
         """Supprime un tag d'une version."""
-        version = self.get_version(session_id)
+        changed = self._set_label("tags", "tag", session_id, tag, add=False)
         
-        if not version:
+        if changed is None:
             logger.error(f"Version non trouvée: {session_id}")
             return False
         
-        if tag in version.tags:
-            version.tags.remove(tag)
-            
-            # Mettre à jour le registre
-            self.registry['versions'][session_id]['tags'] = version.tags
-            
-            # Mettre à jour les statistiques
-            if tag in self.registry['statistics']['by_tag']:
-                self.registry['statistics']['by_tag'][tag] -= 1
-                if self.registry['statistics']['by_tag'][tag] <= 0:
-                    del self.registry['statistics']['by_tag'][tag]
-            
-            # Sauvegarder les métadonnées
-            self._save_version_metadata(version)
-            self._save_registry()
-            
+        if changed:
             logger.info(f"Tag '{tag}' supprimé de {session_id}")
-            return True
-        
-        return False  # Tag non présent
+        return changed  # Faux si le tag n'était pas présent
     
     def add_category(self, session_id: str, category: str) -> bool:
         """Ajoute une catégorie à une version."""
-        version = self.get_version(session_id)
+        changed = self._set_label("categories", "category", session_id, category, add=True)
         
-        if not version:
+        if changed is None:
             logger.error(f"Version non trouvée: {session_id}")
             return False
         
-        if category not in version.categories:
-            version.categories.append(category)
-            
-            # Mettre à jour le registre
-            self.registry['versions'][session_id]['categories'] = version.categories
-            
-            # Mettre à jour l'index des catégories
-            self._update_category_index(version)
-            
-            # Mettre à jour les statistiques
-            self.registry['statistics']['by_category'][category] = self.registry['statistics']['by_category'].get(category, 0) + 1
-            
-            # Sauvegarder les métadonnées
-            self._save_version_metadata(version)
-            self._save_registry()
-            
+        if changed:
             logger.info(f"Catégorie '{category}' ajoutée à {session_id}")
-            return True
-        
-        return False  # Catégorie déjà présente
+        return changed  # Faux si la catégorie était déjà présente
     
     def remove_category(self, session_id: str, category: str) -> bool:
         """Supprime une catégorie d'une version."""
-        version = self.get_version(session_id)
+        changed = self._set_label("categories", "category", session_id, category, add=False)
         
-        if not version:
+        if changed is None:
             logger.error(f"Version non trouvée: {session_id}")
             return False
         
-        if category in version.categories:
-            version.categories.remove(category)
-            
-            # Mettre à jour le registre
-            self.registry['versions'][session_id]['categories'] = version.categories
-            
-            # Mettre à jour les statistiques
-            if category in self.registry['statistics']['by_category']:
-                self.registry['statistics']['by_category'][category] -= 1
-                if self.registry['statistics']['by_category'][category] <= 0:
-                    del self.registry['statistics']['by_category'][category]
-            
-            # Sauvegarder les métadonnées
-            self._save_version_metadata(version)
-            self._save_registry()
-            
+        if changed:
             logger.info(f"Catégorie '{category}' supprimée de {session_id}")
-            return True
-        
-        return False  # Catégorie non présente
+        return changed  # Faux si la catégorie n'était pas présente
     
     def update_notes(self, session_id: str, notes: str) -> bool:
         """Met à jour les notes d'une version."""
-        version = self.get_version(session_id)
+        with self._transaction() as conn:
+            updated = conn.execute("UPDATE versions SET notes = ? WHERE session_id = ?",
+                                   (notes, session_id)).rowcount
         
-        if not version:
+        if not updated:
             logger.error(f"Version non trouvée: {session_id}")
             return False
         
-        version.notes = notes
-        
-        # Mettre à jour le registre
-        self.registry['versions'][session_id]['notes'] = notes
-        
-        # Sauvegarder les métadonnées
-        self._save_version_metadata(version)
-        self._save_registry()
-        
         logger.info(f"Notes mises à jour pour {session_id}")
         return True
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Récupère les statistiques du système de versions."""
-        return self.registry['statistics']
+        """Récupère les statistiques du système de versions (agrégats indexés)."""
+        with self._connect() as conn:
+            return {
+                'total_sessions': conn.execute("SELECT COUNT(*) FROM versions").fetchone()[0],
+                'by_model_type': dict(conn.execute(
+                    "SELECT model_type, COUNT(*) FROM versions GROUP BY model_type")),
+                'by_agent_type': dict(conn.execute(
+                    "SELECT agent_type, COUNT(*) FROM versions GROUP BY agent_type")),
+                'by_tag': dict(conn.execute("SELECT tag, COUNT(*) FROM tags GROUP BY tag")),
+                'by_category': dict(conn.execute(
+                    "SELECT category, COUNT(*) FROM categories GROUP BY category"))
+            }
     
     def get_best_versions(self, metric: str = 'win_rate', limit: int = 5) -> List[VersionMetadata]:
         """
@@ -603,22 +601,16 @@ class VersionManager:
         Returns:
             Liste des meilleures versions
         """
-        versions_with_metric = []
-        
-        for version_id, version_data in self.registry['versions'].items():
-            version = VersionMetadata(**version_data)
-            
-            if metric in version.metrics:
-                metric_value = version.metrics[metric]
-                if isinstance(metric_value, (int, float)):
-                    versions_with_metric.append((version, metric_value))
-        
-        # Trier par métrique (décroissant pour win_rate, croissant pour loss)
-        reverse = metric not in ['loss', 'error', 'cost']
-        versions_with_metric.sort(key=lambda x: x[1], reverse=reverse)
-        
-        # Retourner les meilleures versions
-        best_versions = [v[0] for v in versions_with_metric[:limit]]
+        # Trier par métrique (décroissant pour win_rate, croissant pour loss) ;
+        # l'index (name, value) de `metrics` sert le tri et la limite
+        order = "ASC" if metric in ['loss', 'error', 'cost'] else "DESC"
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {_VERSION_COLUMNS} FROM metrics m JOIN versions v ON v.session_id = m.session_id "
+                f"WHERE m.name = ? ORDER BY m.value {order}, v.session_number LIMIT ?",
+                (metric, limit)
+            ).fetchall()
+            best_versions = self._load_versions(conn, rows)
         
         logger.info(f"Meilleures versions par {metric}: {len(best_versions)} trouvées")
         return best_versions
@@ -638,7 +630,7 @@ class VersionManager:
         if filter_criteria:
             versions = self.search_versions(filter_criteria)
         else:
-            versions = [VersionMetadata(**v) for v in self.registry['versions'].values()]
+            versions = self.search_versions()
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
@@ -779,26 +771,17 @@ class VersionManager:
         Returns:
             Nombre de métadonnées nettoyées
         """
-        cleaned_count = 0
+        with self._connect() as conn:
+            rows = conn.execute("SELECT session_id, archive_path FROM versions WHERE archive_path IS NOT NULL").fetchall()
         
-        # Vérifier chaque version dans le registre
-        for session_id in list(self.registry['versions'].keys()):
-            version_data = self.registry['versions'][session_id]
-            archive_path = version_data.get('archive_path')
-            
-            if archive_path and not os.path.exists(archive_path):
-                # Archive manquante, supprimer la métadonnée
-                del self.registry['versions'][session_id]
-                
-                # Supprimer le fichier de métadonnées
-                metadata_path = os.path.join(self.metadata_dir, f"{session_id}.json")
-                if os.path.exists(metadata_path):
-                    os.remove(metadata_path)
-                
-                cleaned_count += 1
-                logger.info(f"Métadonnées orphelines nettoyées: {session_id}")
+        # Archive manquante, supprimer la version et ses index
+        orphaned = [(session_id,) for session_id, archive_path in rows if archive_path and not os.path.exists(archive_path)]
+        if orphaned:
+            with self._transaction() as conn:
+                for table in ('tags', 'categories', 'metrics', 'versions'):
+                    conn.executemany(f"DELETE FROM {table} WHERE session_id = ?", orphaned)
         
-        if cleaned_count > 0:
-            self._save_registry()
+        for (session_id,) in orphaned:
+            logger.info(f"Métadonnées orphelines nettoyées: {session_id}")
         
-        return cleaned_count
\ No newline at end of file
+        return len(orphaned)
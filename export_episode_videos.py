@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Export vidéo hors ligne d'épisodes Pac-Man (GIF ou MP4), sans affichage.
+
+Contrairement à visual_pacman_multiagent.py et visual_pacman_advanced.py, qui
+rendent en direct à la vitesse d'affichage, ce script joue les épisodes à
+pleine vitesse, les répartit sur plusieurs processus et écrit les vidéos à
+côté de l'archive de session.
+
+Exemples :
+    python export_episode_videos.py --episodes 20 --archive experiments/archives/run.zip
+    python export_episode_videos.py --replay episodes.json --format mp4
+"""
+import argparse
+import json
+
+from backend.config import GameParameters
+from backend.models.experiment import EpisodeVideoExportRequest
+from backend.services.video_export_service import video_export_service
+
+def main():
+    parser = argparse.ArgumentParser(description="Export vidéo hors ligne d'épisodes Pac-Man")
+    parser.add_argument("--env_type", default="configurable", choices=["configurable", "multiagent"],
+                        help="Type d'environnement")
+    parser.add_argument("--size", type=int, default=10, help="Taille de la grille")
+    parser.add_argument("--num_ghosts", type=int, default=2, help="Nombre de fantômes")
+    parser.add_argument("--num_power", type=int, default=2, help="Nombre de power pellets")
+    parser.add_argument("--lives", type=int, default=3, help="Vies de Pac-Man")
+    parser.add_argument("--episodes", type=int, default=4, help="Nombre d'épisodes à jouer")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du premier épisode")
+    parser.add_argument("--replay", type=str, default=None,
+                        help="Fichier JSON d'épisodes enregistrés ({\"seeds\": [...], \"actions\": [...]})")
+    parser.add_argument("--pacman_model", type=str, default=None, help="Chemin du modèle pour Pac-Man")
+    parser.add_argument("--pacman_algorithm", default="DQN", help="Algorithme du modèle Pac-Man")
+    parser.add_argument("--max_steps", type=int, default=500, help="Steps maximum par épisode")
+    parser.add_argument("--format", default="gif", choices=["gif", "mp4"], help="Format vidéo")
+    parser.add_argument("--fps", type=int, default=10, help="Images par seconde de la vidéo")
+    parser.add_argument("--cell_size", type=int, default=12, help="Taille d'une cellule en pixels")
+    parser.add_argument("--archive", type=str, default=None, help="Archive de session (vidéos écrites à côté)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus de rendu")
+    args = parser.parse_args()
+
+    seeds = list(range(args.seed, args.seed + args.episodes))
+    actions = None
+    if args.replay:
+        with open(args.replay, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        actions = recorded["actions"]
+        seeds = recorded.get("seeds") or list(range(args.seed, args.seed + len(actions)))
+
+    request = EpisodeVideoExportRequest(
+        environment_type=args.env_type,
+        game=GameParameters(grid_size=args.size, num_ghosts=args.num_ghosts,
+                            power_pellets=args.num_power, lives=args.lives),
+        episodes=len(seeds),
+        seeds=seeds,
+        actions=actions,
+        policy_path=args.pacman_model,
+        policy_algorithm=args.pacman_algorithm,
+        max_steps=args.max_steps,
+        format=args.format,
+        fps=args.fps,
+        cell_size=args.cell_size,
+        archive_path=args.archive,
+        workers=args.workers
+    )
+    result = video_export_service.export_episodes(request)
+
+    for episode in result["episodes"]:
+        print(f"Épisode {episode['episode']:3d} (graine {episode['seed']}): {episode['steps']} steps, "
+              f"score {episode['score']}, {episode['bytes'] / 1024:.1f} Ko -> {episode['path']}")
+    print(f"{len(result['episodes'])} vidéo(s), {result['total_frames']} frames en "
+          f"{result['elapsed_seconds']}s ({result['workers']} processus) dans {result['output_dir']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,38 @@
 """
 Package des environnements Pac‑Man pour le laboratoire IA.
+
+Les sous-modules sont chargés au premier accès à l'un de leurs noms
+(``from pacman_env import PacManConfigurableEnv``) : importer le paquet, ou
+seulement `pacman_env.rendering`, n'importe ni gymnasium ni pettingzoo.
 """
+import importlib
+from typing import TYPE_CHECKING
+
+# Nom exporté -> sous-module qui le définit
+_LAZY_ATTRIBUTES = {
+    "PacManDuelEnv": "duel_env",
+    "PacManConfigurableEnv": "configurable_env",
+    "PacManMultiAgentEnv": "multiagent_env",
+    "EpisodeRecorder": "recording",
+    "EpisodeRecording": "recording",
+    "EpisodeReplayer": "recording",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .duel_env import PacManDuelEnv
+    from .configurable_env import PacManConfigurableEnv
+    from .multiagent_env import PacManMultiAgentEnv
+    from .recording import EpisodeRecorder, EpisodeRecording, EpisodeReplayer
 
-from .duel_env import PacManDuelEnv
-from .configurable_env import PacManConfigurableEnv
-from .multiagent_env import PacManMultiAgentEnv
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # les accès suivants ne repassent plus par ici
+    return value
 
-__all__ = [
-    "PacManDuelEnv",
-    "PacManConfigurableEnv",
-    "PacManMultiAgentEnv",
-]
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
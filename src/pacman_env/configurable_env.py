@@ -7,6 +7,8 @@ from gymnasium import spaces
 import numpy as np
 from typing import List, Tuple, Optional, Dict, Any
 
+from .rendering import grid_codes, render_ansi, render_frame
+
 
 class PacManConfigurableEnv(gym.Env):
     """Environnement Pac-Man configurable pour le laboratoire IA.
@@ -33,6 +35,12 @@ class PacManConfigurableEnv(gym.Env):
         Comportement des fantômes : 'random' (aléatoire), 'chase' (poursuite), 'scatter' (dispersion).
     reward_structure : Dict[str, float]
         Récompenses personnalisées : dot, ghost_caught, death, step.
+    render_mode : str
+        Mode de rendu par défaut de `render()` ('ansi' ou 'rgb_array'). Par défaut None.
+    render_cell_size : int
+        Taille d'une cellule en pixels pour le mode 'rgb_array'. Par défaut 16.
+    seed : int
+        Graine du générateur propre à l'environnement (`rng`). Si None, graine aléatoire.
     """
     metadata = {'render_modes': ['human', 'ansi', 'rgb_array'], 'render_fps': 10}
 
@@ -46,11 +54,20 @@ class PacManConfigurableEnv(gym.Env):
                  lives: int = 3,
                  max_steps: int = 200,
                  ghost_behavior: str = 'random',
-                 reward_structure: Optional[Dict[str, float]] = None):
+                 reward_structure: Optional[Dict[str, float]] = None,
+                 render_mode: Optional[str] = None,
+                 render_cell_size: int = 16,
+                 seed: Optional[int] = None):
         super().__init__()
+        # Générateur propre à l'environnement : le générateur global de NumPy
+        # est partagé avec les autres threads du processus
+        self.rng = np.random.RandomState(seed)
+
         self.size = size
         self.walls = walls if walls is not None else []
         self.num_ghosts = num_ghosts
+        self.render_mode = render_mode
+        self.render_cell_size = render_cell_size
         self.num_dots = num_dots
         self.ghost_start_positions = ghost_start_positions
         self.pacman_start_position = pacman_start_position
@@ -106,8 +123,8 @@ class PacManConfigurableEnv(gym.Env):
             self.ghost_start_positions = []
             for _ in range(self.num_ghosts):
                 while True:
-                    r = np.random.randint(0, self.size)
-                    c = np.random.randint(0, self.size)
+                    r = self.rng.randint(0, self.size)
+                    c = self.rng.randint(0, self.size)
                     if (r, c) != (pr, pc) and (r, c) not in self.walls and (r, c) not in self.ghost_start_positions:
                         self.ghost_start_positions.append((r, c))
                         break
@@ -137,7 +154,7 @@ class PacManConfigurableEnv(gym.Env):
                 self.dots[r, c] = 0
             # Placer aléatoirement les points
             available = np.argwhere(self.dots == 1)
-            chosen = available[np.random.choice(len(available), self.num_dots, replace=False)]
+            chosen = available[self.rng.choice(len(available), self.num_dots, replace=False)]
             self.dots[:, :] = 0
             for (r, c) in chosen:
                 self.dots[r, c] = 1
@@ -149,6 +166,8 @@ class PacManConfigurableEnv(gym.Env):
     def reset(self, seed=None, options=None):
         """Réinitialise l'environnement à l'état initial."""
         super().reset(seed=seed)
+        if seed is not None:
+            self.rng.seed(seed)
         self.pacman_pos = list(self.pacman_start_position)
         self.ghost_positions = list(self.ghost_start_positions)
         self.current_step = 0
@@ -228,7 +247,7 @@ class PacManConfigurableEnv(gym.Env):
                     if 0 <= nr < self.size and 0 <= nc < self.size and (nr, nc) not in self.walls:
                         possible_moves.append((nr, nc))
                 if possible_moves:
-                    self.ghost_positions[i] = possible_moves[np.random.randint(len(possible_moves))]
+                    self.ghost_positions[i] = possible_moves[self.rng.randint(len(possible_moves))]
             elif self.ghost_behavior == 'chase':
                 # Poursuite de Pac-Man (mouvement vers lui)
                 pr, pc = self.pacman_pos
@@ -262,30 +281,22 @@ class PacManConfigurableEnv(gym.Env):
             obs[r, c, 3] = 1.0
         return obs
 
-    def render(self, mode='human'):
-        """Affiche la grille dans la console (mode 'ansi') ou retourne un array RGB (mode 'rgb_array')."""
+    def render(self, mode: Optional[str] = None):
+        """Retourne la grille en texte (mode 'ansi') ou une image RGB (mode 'rgb_array').
+
+        Sans argument, utilise `render_mode` (compatible avec les wrappers
+        d'enregistrement vidéo de gymnasium). L'image est un tableau uint8 de
+        forme (size * render_cell_size, size * render_cell_size, 3).
+        """
+        mode = mode or self.render_mode or 'human'
         if mode == 'ansi':
-            grid = []
-            for r in range(self.size):
-                row = []
-                for c in range(self.size):
-                    if (r, c) in self.walls:
-                        row.append('#')
-                    elif (r, c) == tuple(self.pacman_pos):
-                        row.append('P')
-                    elif (r, c) in self.ghost_positions:
-                        row.append('G')
-                    elif self.dots[r, c] == 1:
-                        row.append('.')
-                    else:
-                        row.append(' ')
-                grid.append(''.join(row))
-            output = '\n'.join(grid)
+            output = render_ansi(grid_codes(self.dots, self.walls), self.pacman_pos,
+                                 self.ghost_positions, ())
             output += f"\nStep: {self.current_step}, Lives: {self.current_lives}, Dots left: {np.sum(self.dots == 1)}"
             return output
         elif mode == 'rgb_array':
-            # Retourne un array RGB simple (pour visualisation future)
-            raise NotImplementedError("Le mode rgb_array sera implémenté avec Pygame")
+            return render_frame(grid_codes(self.dots, self.walls), self.pacman_pos,
+                                self.ghost_positions, (), self.render_cell_size)
         else:
             super().render(mode=mode)
 
@@ -7,6 +7,8 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 from typing import List, Tuple, Optional, Dict, Any, Union
+
+from .rendering import grid_codes, render_ansi, render_frame
 from pettingzoo import ParallelEnv
 
 
@@ -44,6 +46,12 @@ class PacManMultiAgentEnv(ParallelEnv):
             "pacman": {"dot": 10.0, "ghost_eaten": 50.0, "death": -100.0, "step": -0.1},
             "ghost": {"eat_pacman": 100.0, "eaten": -50.0, "step": -0.1}
         }
+    render_mode : str
+        Mode de rendu par défaut de `render()` ('ansi' ou 'rgb_array'). Par défaut None.
+    render_cell_size : int
+        Taille d'une cellule en pixels pour le mode 'rgb_array'. Par défaut 16.
+    seed : int
+        Graine du générateur propre à l'environnement (`rng`). Si None, graine aléatoire.
     """
     metadata = {'render_modes': ['human', 'ansi', 'rgb_array'], 'render_fps': 10}
 
@@ -59,12 +67,20 @@ class PacManMultiAgentEnv(ParallelEnv):
                  ghost_behavior: str = 'random',
                  power_pellets: int = 2,
                  power_duration: int = 10,
-                 reward_config: Optional[Dict[str, Dict[str, float]]] = None):
+                 reward_config: Optional[Dict[str, Dict[str, float]]] = None,
+                 render_mode: Optional[str] = None,
+                 render_cell_size: int = 16,
+                 seed: Optional[int] = None):
         super().__init__()
+        # Générateur propre à l'environnement : le générateur global de NumPy
+        # est partagé avec les autres threads du processus
+        self.rng = np.random.RandomState(seed)
 
         self.size = size
         self.walls = walls if walls is not None else []
         self.num_ghosts = num_ghosts
+        self.render_mode = render_mode
+        self.render_cell_size = render_cell_size
         self.num_dots = num_dots
         self.ghost_start_positions = ghost_start_positions
         self.pacman_start_position = pacman_start_position
@@ -114,15 +130,6 @@ class PacManMultiAgentEnv(ParallelEnv):
             agent: spaces.Box(low=0, high=1, shape=obs_shape, dtype=np.float32)
             for agent in self.agents
         }
-        
-        # Méthodes requises par PettingZoo ParallelEnv
-    def observation_space(self, agent):
-        """Retourne l'espace d'observation pour un agent donné."""
-        return self.observation_spaces[agent]
-    
-    def action_space(self, agent):
-        """Retourne l'espace d'action pour un agent donné."""
-        return self.action_spaces[agent]
 
         # État interne (sera initialisé dans reset)
         self.pacman_pos = None
@@ -135,6 +142,15 @@ class PacManMultiAgentEnv(ParallelEnv):
         self.current_lives = None
         self.vulnerable_ghosts = set()  # indices des fantômes vulnérables
 
+    # Méthodes requises par PettingZoo ParallelEnv
+    def observation_space(self, agent):
+        """Retourne l'espace d'observation pour un agent donné."""
+        return self.observation_spaces[agent]
+    
+    def action_space(self, agent):
+        """Retourne l'espace d'action pour un agent donné."""
+        return self.action_spaces[agent]
+
     def _initialize_grid(self):
         """Initialise la grille avec murs, points, power pellets et positions des agents."""
         # Réinitialiser les structures
@@ -153,8 +169,8 @@ class PacManMultiAgentEnv(ParallelEnv):
             self.ghost_start_positions = []
             for _ in range(self.num_ghosts):
                 while True:
-                    r = np.random.randint(0, self.size)
-                    c = np.random.randint(0, self.size)
+                    r = self.rng.randint(0, self.size)
+                    c = self.rng.randint(0, self.size)
                     if (r, c) != (pr, pc) and (r, c) not in self.walls and (r, c) not in self.ghost_start_positions:
                         self.ghost_start_positions.append((r, c))
                         break
@@ -184,7 +200,7 @@ class PacManMultiAgentEnv(ParallelEnv):
                 self.dots[r, c] = 0
             # Placer aléatoirement les points
             available = np.argwhere(self.dots == 1)
-            chosen = available[np.random.choice(len(available), self.num_dots, replace=False)]
+            chosen = available[self.rng.choice(len(available), self.num_dots, replace=False)]
             self.dots[:, :] = 0
             for (r, c) in chosen:
                 self.dots[r, c] = 1
@@ -200,7 +216,7 @@ class PacManMultiAgentEnv(ParallelEnv):
                          if self.dots[r, c] == 1 and (r, c) not in self.walls]
             if len(available) < self.power_pellets:
                 raise ValueError("Pas assez de cases libres pour placer les power pellets")
-            chosen = np.random.choice(len(available), self.power_pellets, replace=False)
+            chosen = self.rng.choice(len(available), self.power_pellets, replace=False)
             for idx in chosen:
                 r, c = available[idx]
                 self.power_pellet_positions.append((r, c))
@@ -214,7 +230,7 @@ class PacManMultiAgentEnv(ParallelEnv):
     def reset(self, seed=None, options=None):
         """Réinitialise l'environnement à l'état initial."""
         if seed is not None:
-            np.random.seed(seed)
+            self.rng.seed(seed)
         self.pacman_pos = list(self.pacman_start_position)
         self.ghost_positions = list(self.ghost_start_positions) if self.ghost_start_positions else []
         self.current_step = 0
@@ -339,7 +355,7 @@ class PacManMultiAgentEnv(ParallelEnv):
                 if 0 <= nr < self.size and 0 <= nc < self.size and (nr, nc) not in self.walls:
                     possible_moves.append((nr, nc))
             if possible_moves:
-                self.ghost_positions[ghost_idx] = possible_moves[np.random.randint(len(possible_moves))]
+                self.ghost_positions[ghost_idx] = possible_moves[self.rng.randint(len(possible_moves))]
         elif self.ghost_behavior == 'chase':
             pr, pc = self.pacman_pos
             best_move = None
@@ -402,8 +418,8 @@ class PacManMultiAgentEnv(ParallelEnv):
     def _respawn_ghost(self, ghost_idx):
         """Replace un fantôme à une position aléatoire libre."""
         while True:
-            r = np.random.randint(0, self.size)
-            c = np.random.randint(0, self.size)
+            r = self.rng.randint(0, self.size)
+            c = self.rng.randint(0, self.size)
             if (r, c) not in self.walls and (r, c) != tuple(self.pacman_pos) and (r, c) not in self.ghost_positions:
                 self.ghost_positions[ghost_idx] = (r, c)
                 break
@@ -447,36 +463,22 @@ class PacManMultiAgentEnv(ParallelEnv):
             obs[r, c, 5] = 1.0
         return obs
 
-    def render(self, mode='human'):
-        """Affiche la grille dans la console (mode 'ansi') ou retourne un array RGB."""
+    def render(self, mode: Optional[str] = None):
+        """Retourne la grille en texte (mode 'ansi') ou une image RGB (mode 'rgb_array').
+
+        Sans argument, utilise `render_mode` (compatible avec les wrappers
+        d'enregistrement vidéo de gymnasium). L'image est un tableau uint8 de
+        forme (size * render_cell_size, size * render_cell_size, 3).
+        """
+        mode = mode or self.render_mode or 'human'
         if mode == 'ansi':
-            grid = []
-            for r in range(self.size):
-                row = []
-                for c in range(self.size):
-                    if (r, c) in self.walls:
-                        row.append('#')
-                    elif (r, c) == tuple(self.pacman_pos):
-                        row.append('P')
-                    elif (r, c) in self.ghost_positions:
-                        idx = self.ghost_positions.index((r, c))
-                        if idx in self.vulnerable_ghosts:
-                            row.append('V')
-                        else:
-                            row.append('G')
-                    elif (r, c) in self.power_pellet_positions:
-                        row.append('O')
-                    elif self.dots[r, c] == 1:
-                        row.append('.')
-                    else:
-                        row.append(' ')
-                grid.append(''.join(row))
-            output = '\n'.join(grid)
+            output = render_ansi(grid_codes(self.dots, self.walls), self.pacman_pos,
+                                 self.ghost_positions, self.vulnerable_ghosts)
             output += f"\nStep: {self.current_step}, Lives: {self.current_lives}, Power active: {self.power_active}"
             return output
         elif mode == 'rgb_array':
-            # À implémenter avec Pygame
-            raise NotImplementedError("Le mode rgb_array sera implémenté avec Pygame")
+            return render_frame(grid_codes(self.dots, self.walls), self.pacman_pos,
+                                self.ghost_positions, self.vulnerable_ghosts, self.render_cell_size)
         else:
             super().render(mode=mode)
 
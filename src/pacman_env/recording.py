@@ -0,0 +1,306 @@
+"""
+Enregistrement et rejeu déterministes des épisodes Pac-Man.
+
+`EpisodeRecorder` enveloppe un `PacManConfigurableEnv` ou un
+`PacManMultiAgentEnv` et ne conserve que le strict nécessaire pour rejouer
+l'épisode : l'empreinte de la configuration, la graine, les positions de
+départ des fantômes et un flux d'actions par agent (2 bits par action, soit
+4 actions par octet). Des instantanés de l'état (keyframes) sont pris tous les
+`keyframe_interval` steps.
+
+Les environnements tirent leur hasard de leur propre générateur (`env.rng`).
+L'enregistreur le réinitialise avant le reset (graine ``[seed]``) et avant
+chaque step (graine ``[seed, step]``) : l'état du générateur ne dépend donc
+que de la graine et du numéro de step, et une keyframe n'a pas à le stocker.
+`EpisodeReplayer` peut ainsi se placer à n'importe quel step en restaurant la
+keyframe la plus proche puis en rejouant au plus K steps.
+
+Un épisode de 200 steps à 5 agents tient dans environ 250 octets d'actions,
+plus une cinquantaine d'octets par keyframe sur une grille 10 x 10.
+"""
+import hashlib
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"PR"
+VERSION = 1
+
+ENV_CONFIGURABLE = 0
+ENV_MULTIAGENT = 1
+
+_HEADER = struct.Struct("<2sBB8sIBBHI")  # magic, version, type, empreinte, graine, agents, fantômes, K, steps
+_KEYFRAME = struct.Struct("<IBBBBBB")  # step, pacman (ligne, colonne), vies, flags, timer, masque vulnérables
+_COUNT = struct.Struct("<H")
+
+FLAG_DONE = 0x01
+FLAG_POWER = 0x02
+
+def env_kind(env) -> int:
+    """Type d'environnement enregistré (configurable ou multi-agent)."""
+    return ENV_MULTIAGENT if hasattr(env, "possible_agents") else ENV_CONFIGURABLE
+
+def env_fingerprint(env) -> bytes:
+    """
+    Empreinte (8 octets) de la configuration d'un environnement.
+
+    Couvre tout ce qui influence la dynamique (grille, murs, nombre d'agents,
+    récompenses...), sauf les positions de départ des fantômes, tirées au
+    hasard et stockées à part dans l'enregistrement.
+    """
+    config = {
+        "type": type(env).__name__,
+        "size": env.size,
+        "walls": sorted([int(r), int(c)] for r, c in env.walls),
+        "num_ghosts": env.num_ghosts,
+        "num_dots": env.num_dots,
+        "pacman_start_position": [int(v) for v in env.pacman_start_position],
+        "lives": env.lives,
+        "max_steps": env.max_steps,
+        "ghost_behavior": env.ghost_behavior,
+        "rewards": getattr(env, "reward_config", None) or getattr(env, "reward_structure", None),
+        "power_pellets": getattr(env, "power_pellets", None),
+        "power_duration": getattr(env, "power_duration", None),
+    }
+    payload = json.dumps(config, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).digest()
+
+def _seed_step(env, seed: int, step: Optional[int] = None):
+    """Réinitialise le générateur de `env` pour le reset (`step` None) ou un step donné."""
+    env.rng.seed([seed] if step is None else [seed, step])
+
+def _pack_codes(values: np.ndarray) -> bytes:
+    """Compacte des valeurs 0..3 sur 2 bits, 4 par octet."""
+    padded = np.zeros(-(-values.size // 4) * 4, dtype=np.uint8)
+    padded[:values.size] = values
+    return (padded[0::4] | (padded[1::4] << 2) | (padded[2::4] << 4) | (padded[3::4] << 6)).tobytes()
+
+def _unpack_codes(data: bytes, count: int) -> np.ndarray:
+    """Opération inverse de `_pack_codes`."""
+    packed = np.frombuffer(data, dtype=np.uint8)
+    values = np.empty(packed.size * 4, dtype=np.uint8)
+    for i in range(4):
+        values[i::4] = (packed >> (2 * i)) & 0x03
+    return values[:count]
+
+def _snapshot(env) -> bytes:
+    """Instantané compact de l'état dynamique d'un environnement."""
+    flags = FLAG_DONE if getattr(env, "done", False) else 0
+    if getattr(env, "power_active", False):
+        flags |= FLAG_POWER
+    vulnerable = 0
+    for i in getattr(env, "vulnerable_ghosts", ()):
+        vulnerable |= 1 << i
+    head = _KEYFRAME.pack(env.current_step, env.pacman_pos[0], env.pacman_pos[1],
+                          env.current_lives, flags, getattr(env, "power_timer", 0), vulnerable)
+    ghosts = bytes(int(v) for pos in env.ghost_positions for v in pos)
+    return head + ghosts + _pack_codes((np.asarray(env.dots).ravel() + 1).astype(np.uint8))
+
+def _restore(env, snapshot: bytes):
+    """Restaure dans `env` un instantané produit par `_snapshot`."""
+    step, pr, pc, lives, flags, timer, vulnerable = _KEYFRAME.unpack_from(snapshot, 0)
+    offset = _KEYFRAME.size
+    ghosts = snapshot[offset:offset + 2 * env.num_ghosts]
+    offset += 2 * env.num_ghosts
+    dots = (_unpack_codes(snapshot[offset:], env.size * env.size).astype(np.int8) - 1)
+
+    env.current_step = step
+    env.pacman_pos = [pr, pc]
+    env.current_lives = lives
+    env.ghost_positions = [(ghosts[2 * i], ghosts[2 * i + 1]) for i in range(env.num_ghosts)]
+    env.dots = dots.reshape(env.size, env.size)
+    if hasattr(env, "done"):
+        env.done = bool(flags & FLAG_DONE)
+    if hasattr(env, "power_active"):
+        env.power_active = bool(flags & FLAG_POWER)
+        env.power_timer = timer
+        env.vulnerable_ghosts = {i for i in range(env.num_ghosts) if vulnerable & (1 << i)}
+        env.power_pellet_positions = [(int(r), int(c)) for r, c in np.argwhere(env.dots == 2)]
+
+class EpisodeRecording:
+    """Enregistrement d'un épisode : configuration, graine, actions et keyframes."""
+
+    def __init__(self, kind: int, fingerprint: bytes, seed: int, num_agents: int,
+                 ghost_starts: List[Tuple[int, int]], keyframe_interval: int):
+        self.kind = kind
+        self.fingerprint = fingerprint
+        self.seed = seed
+        self.num_agents = num_agents
+        self.ghost_starts = [tuple(int(v) for v in pos) for pos in ghost_starts]
+        self.keyframe_interval = keyframe_interval
+        self.actions: List[List[int]] = []
+        self.keyframes: Dict[int, bytes] = {}
+
+    def __len__(self) -> int:
+        """Nombre de steps enregistrés."""
+        return len(self.actions)
+
+    def action_array(self) -> np.ndarray:
+        """Actions sous forme de tableau uint8 ``(steps, agents)``."""
+        return np.asarray(self.actions, dtype=np.uint8).reshape(len(self.actions), self.num_agents)
+
+    def to_bytes(self) -> bytes:
+        """Sérialise l'enregistrement (flux d'actions compacté par agent)."""
+        actions = self.action_array()
+        parts = [
+            _HEADER.pack(MAGIC, VERSION, self.kind, self.fingerprint, self.seed & 0xFFFFFFFF,
+                         self.num_agents, len(self.ghost_starts), self.keyframe_interval, len(actions)),
+            bytes(v for pos in self.ghost_starts for v in pos),
+        ]
+        parts.extend(_pack_codes(actions[:, agent]) for agent in range(self.num_agents))
+        parts.append(_COUNT.pack(len(self.keyframes)))
+        for snapshot in self.keyframes.values():
+            parts.append(_COUNT.pack(len(snapshot)) + snapshot)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EpisodeRecording":
+        """Désérialise un enregistrement produit par `to_bytes`."""
+        (magic, version, kind, fingerprint, seed, num_agents, num_ghosts,
+         keyframe_interval, steps) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Enregistrement d'épisode invalide")
+        offset = _HEADER.size
+        starts = data[offset:offset + 2 * num_ghosts]
+        offset += 2 * num_ghosts
+
+        recording = cls(kind, fingerprint, seed, num_agents,
+                        [(starts[2 * i], starts[2 * i + 1]) for i in range(num_ghosts)],
+                        keyframe_interval)
+        stream_size = (steps + 3) // 4
+        columns = []
+        for _ in range(num_agents):
+            columns.append(_unpack_codes(data[offset:offset + stream_size], steps))
+            offset += stream_size
+        recording.actions = np.stack(columns, axis=1).tolist() if steps else []
+
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        for _ in range(count):
+            (size,) = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            snapshot = data[offset:offset + size]
+            offset += size
+            recording.keyframes[_KEYFRAME.unpack_from(snapshot, 0)[0]] = snapshot
+        return recording
+
+def _action_row(env, kind: int, action) -> List[int]:
+    """Actions d'un step sous forme de liste (Pac-Man puis fantômes)."""
+    if kind == ENV_MULTIAGENT:
+        return [int(action.get(agent, 0)) for agent in env.possible_agents]
+    return [int(action)]
+
+def _step_env(env, kind: int, row: List[int]):
+    """Exécute un step à partir d'une liste d'actions."""
+    if kind == ENV_MULTIAGENT:
+        return env.step({agent: row[i] for i, agent in enumerate(env.possible_agents)})
+    return env.step(row[0])
+
+class EpisodeRecorder:
+    """
+    Enveloppe d'enregistrement d'un environnement Pac-Man (configurable ou multi-agent).
+
+    S'utilise comme l'environnement enveloppé (`reset`, `step` et les autres
+    attributs sont délégués) ; l'épisode en cours est disponible dans
+    `recording`.
+    """
+
+    def __init__(self, env, keyframe_interval: int = 50):
+        """
+        Args:
+            env: environnement à enregistrer
+            keyframe_interval: steps entre deux keyframes (0 = aucune keyframe)
+        """
+        self.env = env
+        self.keyframe_interval = keyframe_interval
+        self.kind = env_kind(env)
+        self.recording: Optional[EpisodeRecording] = None
+
+    def __getattr__(self, name):
+        return getattr(self.env, name)
+
+    def reset(self, seed: Optional[int] = None, options=None):
+        """Démarre un nouvel enregistrement (graine aléatoire si absente)."""
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy)
+        seed = int(seed) & 0xFFFFFFFF
+        if self.env.ghost_start_positions is None:
+            # Positions de départ tirées au premier reset : on les fixe avant
+            # de semer, pour que le rejeu consomme le même hasard
+            self.env.reset()
+        _seed_step(self.env, seed)
+        result = self.env.reset(seed=seed, options=options)
+
+        num_agents = len(self.env.possible_agents) if self.kind == ENV_MULTIAGENT else 1
+        self.recording = EpisodeRecording(self.kind, env_fingerprint(self.env), seed, num_agents,
+                                          self.env.ghost_start_positions, self.keyframe_interval)
+        return result
+
+    def step(self, action):
+        """Exécute et enregistre un step (action entière, ou dictionnaire par agent)."""
+        if self.recording is None:
+            raise RuntimeError("Appelez reset() avant step()")
+        row = _action_row(self.env, self.kind, action)
+        if any(not 0 <= a <= 3 for a in row):
+            raise ValueError(f"Action hors de l'intervalle 0..3: {row}")
+
+        step = len(self.recording.actions)
+        _seed_step(self.env, self.recording.seed, step + 1)
+        result = self.env.step(action)
+        self.recording.actions.append(row)
+        if self.keyframe_interval and (step + 1) % self.keyframe_interval == 0:
+            self.recording.keyframes[step + 1] = _snapshot(self.env)
+        return result
+
+class EpisodeReplayer:
+    """
+    Rejeu d'un enregistrement dans un environnement de même configuration.
+
+    `seek(step)` place l'environnement dans l'état atteint après `step` steps,
+    en repartant de la keyframe la plus proche (ou de la position courante si
+    elle est plus proche) : au plus `keyframe_interval` steps sont re-simulés.
+    """
+
+    def __init__(self, env, recording: EpisodeRecording):
+        """
+        Raises:
+            ValueError: si l'environnement ne correspond pas à l'enregistrement
+        """
+        if env_kind(env) != recording.kind or env_fingerprint(env) != recording.fingerprint:
+            raise ValueError("La configuration de l'environnement ne correspond pas à l'enregistrement")
+        self.env = env
+        self.recording = recording
+        self.step = None
+
+    def __len__(self) -> int:
+        return len(self.recording)
+
+    def seek(self, step: int):
+        """Place l'environnement après `step` steps et le retourne."""
+        if not 0 <= step <= len(self.recording):
+            raise IndexError(f"Step hors de l'enregistrement: {step}")
+
+        base = max((k for k in self.recording.keyframes if k <= step), default=0)
+        if self.step is None or not base <= self.step <= step:
+            if base == 0:
+                self.env.ghost_start_positions = list(self.recording.ghost_starts)
+                _seed_step(self.env, self.recording.seed)
+                self.env.reset(seed=self.recording.seed)
+            else:
+                _restore(self.env, self.recording.keyframes[base])
+            self.step = base
+
+        actions = self.recording.actions
+        while self.step < step:
+            _seed_step(self.env, self.recording.seed, self.step + 1)
+            _step_env(self.env, self.recording.kind, actions[self.step])
+            self.step += 1
+        return self.env
+
+    def frames(self, start: int = 0, stop: Optional[int] = None):
+        """Itère sur les steps ``start..stop`` (inclus) en produisant l'environnement à chaque step."""
+        stop = len(self.recording) if stop is None else stop
+        for step in range(start, stop + 1):
+            yield step, self.seek(step)
@@ -0,0 +1,205 @@
+"""
+Rendu matriciel (NumPy) des environnements Pac-Man, sans Pygame.
+
+Les sprites (mur, point, power pellet, Pac-Man, un fantôme par couleur,
+fantôme vulnérable) sont dessinés une seule fois par taille de cellule dans
+un atlas de tuiles. Une frame est ensuite composée en indexant l'atlas avec
+la grille des indices de tuile : ``atlas[indices]`` puis un simple
+réarrangement des axes donne l'image ``(H * s, W * s, 3)``.
+
+Pour l'export vidéo, le même atlas existe en couleurs indexées (`PALETTE`) :
+une frame est alors un tableau ``(H * s, W * s)`` d'indices de palette,
+directement encodable en GIF sans quantification.
+
+Le rendu texte (mode ``ansi``) suit le même principe : une table de
+caractères indexée par les codes de grille, puis une seule conversion du
+tableau d'octets en chaîne.
+
+Codes de grille attendus : -1 mur, 0 vide, 1 point, 2 power pellet.
+"""
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Indices des tuiles dans l'atlas
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_DOT = 2
+TILE_POWER_PELLET = 3
+TILE_PACMAN = 4
+TILE_GHOST = 5  # 5..8 : une tuile par couleur de fantôme
+TILE_VULNERABLE_GHOST = 9
+NUM_TILES = 10
+
+BACKGROUND_COLOR = (0, 0, 0)
+WALL_COLOR = (33, 33, 222)
+DOT_COLOR = (255, 184, 151)
+PACMAN_COLOR = (255, 255, 0)
+GHOST_COLORS = ((255, 0, 0), (255, 184, 255), (0, 255, 255), (255, 184, 82))
+VULNERABLE_GHOST_COLOR = (100, 100, 255)
+GRID_LINE_COLOR = (40, 40, 40)
+
+# Palette fixe des frames indexées (toutes les couleurs de l'atlas et de la grille)
+PALETTE = np.array(
+    [BACKGROUND_COLOR, WALL_COLOR, DOT_COLOR, PACMAN_COLOR, *GHOST_COLORS,
+     VULNERABLE_GHOST_COLOR, GRID_LINE_COLOR],
+    dtype=np.uint8
+)
+_GRID_LINE_INDEX = len(PALETTE) - 1
+
+# Tuile et caractère associés à chaque code de grille (indexés par code + 1)
+_CODE_TO_TILE = np.array([TILE_WALL, TILE_EMPTY, TILE_DOT, TILE_POWER_PELLET], dtype=np.uint8)
+_CODE_TO_CHAR = np.frombuffer(b"# .O", dtype=np.uint8)
+
+def grid_codes(dots: np.ndarray, walls: Sequence[Tuple[int, int]] = ()) -> np.ndarray:
+    """Grille de codes à partir du tableau `dots` d'un environnement et de sa liste de murs."""
+    dots = np.asarray(dots)
+    grid = np.where(dots > 0, dots, 0).astype(np.int8)
+    grid[dots < 0] = -1
+    if len(walls):
+        rows, cols = np.asarray(walls, dtype=np.intp).T
+        grid[rows, cols] = -1
+    return grid
+
+def _disc(size: int, radius: float) -> np.ndarray:
+    """Masque booléen d'un disque centré dans une tuile."""
+    center = (size - 1) / 2.0
+    yy, xx = np.mgrid[0:size, 0:size]
+    return (yy - center) ** 2 + (xx - center) ** 2 <= radius ** 2
+
+def _ghost_mask(size: int) -> np.ndarray:
+    """Silhouette de fantôme : demi-disque en haut, corps rectangulaire en bas."""
+    radius = size * 0.42
+    center = (size - 1) / 2.0
+    yy, xx = np.mgrid[0:size, 0:size]
+    mask = _disc(size, radius) & (yy <= center)
+    body = (yy > center) & (yy < size - size * 0.08) & (np.abs(xx - center) <= radius)
+    return mask | body
+
+def _pacman_mask(size: int) -> np.ndarray:
+    """Disque avec une bouche orientée vers la droite."""
+    center = (size - 1) / 2.0
+    yy, xx = np.mgrid[0:size, 0:size]
+    mouth = (xx > center) & (np.abs(yy - center) < (xx - center) * 0.7)
+    return _disc(size, size * 0.42) & ~mouth
+
+@lru_cache(maxsize=16)
+def tile_atlas(cell_size: int) -> np.ndarray:
+    """
+    Atlas des tuiles pour une taille de cellule donnée (mis en cache).
+
+    Returns:
+        Tableau uint8 en lecture seule de forme ``(NUM_TILES, s, s, 3)``.
+    """
+    s = int(cell_size)
+    atlas = np.zeros((NUM_TILES, s, s, 3), dtype=np.uint8)
+    atlas[:] = BACKGROUND_COLOR
+
+    atlas[TILE_WALL] = WALL_COLOR
+    atlas[TILE_DOT][_disc(s, max(s * 0.12, 0.5))] = DOT_COLOR
+    atlas[TILE_POWER_PELLET][_disc(s, max(s * 0.3, 1.0))] = DOT_COLOR
+    atlas[TILE_PACMAN][_pacman_mask(s)] = PACMAN_COLOR
+
+    ghost = _ghost_mask(s)
+    for i, color in enumerate(GHOST_COLORS):
+        atlas[TILE_GHOST + i][ghost] = color
+    atlas[TILE_VULNERABLE_GHOST][ghost] = VULNERABLE_GHOST_COLOR
+
+    atlas.setflags(write=False)
+    return atlas
+
+@lru_cache(maxsize=16)
+def _atlas_pixels(cell_size: int) -> np.ndarray:
+    """Atlas vu comme un tableau de pixels opaques de 3 octets ``(NUM_TILES, s, s)``."""
+    return np.ascontiguousarray(tile_atlas(cell_size)).view("V3")[..., 0]
+
+@lru_cache(maxsize=16)
+def indexed_tile_atlas(cell_size: int) -> np.ndarray:
+    """Atlas en indices de `PALETTE`, de forme ``(NUM_TILES, s, s)`` (mis en cache)."""
+    atlas = tile_atlas(cell_size)
+    indexed = np.zeros(atlas.shape[:3], dtype=np.uint8)
+    for index, color in enumerate(PALETTE):
+        indexed[(atlas == color).all(axis=-1)] = index
+    indexed.setflags(write=False)
+    return indexed
+
+def tile_indices(grid: np.ndarray,
+                 pacman: Optional[Tuple[int, int]],
+                 ghosts: Sequence[Tuple[int, int]] = (),
+                 vulnerable: Iterable[int] = ()) -> np.ndarray:
+    """
+    Grille des indices de tuile : décor puis agents (positions (ligne, colonne)).
+
+    Les fantômes sont dessinés par-dessus Pac-Man, pour rendre les collisions visibles.
+    """
+    indices = _CODE_TO_TILE[np.asarray(grid, dtype=np.int64) + 1]
+    if pacman is not None:
+        indices[pacman[0], pacman[1]] = TILE_PACMAN
+    vulnerable = set(vulnerable)
+    for i, (r, c) in enumerate(ghosts):
+        indices[r, c] = TILE_VULNERABLE_GHOST if i in vulnerable else TILE_GHOST + i % len(GHOST_COLORS)
+    return indices
+
+def compose_frame(indices: np.ndarray, cell_size: int, show_grid: bool = False,
+                  indexed: bool = False) -> np.ndarray:
+    """
+    Compose une image à partir d'une grille d'indices de tuile.
+
+    Returns:
+        Image RGB ``(H * s, W * s, 3)``, ou ``(H * s, W * s)`` en indices de
+        `PALETTE` si `indexed` est vrai.
+    """
+    pixels = indexed_tile_atlas(cell_size) if indexed else _atlas_pixels(cell_size)
+    height, width = indices.shape
+    s = pixels.shape[1]
+    # Réarrangement (ligne de tuile, ligne de pixel, colonne de tuile, colonne de
+    # pixel) sur des pixels de 3 octets : la copie déplace un pixel à la fois
+    frame = np.empty((height, s, width, s), dtype=pixels.dtype)
+    frame[...] = pixels[indices].transpose(0, 2, 1, 3)
+    if indexed:
+        frame = frame.reshape(height * s, width * s)
+        line = _GRID_LINE_INDEX
+    else:
+        frame = frame.view(np.uint8).reshape(height * s, width * s, 3)
+        line = GRID_LINE_COLOR
+    if show_grid and s > 2:
+        frame[::s, :] = line
+        frame[:, ::s] = line
+    return frame
+
+def render_frame(grid: np.ndarray,
+                 pacman: Optional[Tuple[int, int]],
+                 ghosts: Sequence[Tuple[int, int]] = (),
+                 vulnerable: Iterable[int] = (),
+                 cell_size: int = 16,
+                 show_grid: bool = False,
+                 indexed: bool = False) -> np.ndarray:
+    """Rend un état (grille de codes + positions des agents) en image RGB uint8 (ou indexée)."""
+    return compose_frame(tile_indices(grid, pacman, ghosts, vulnerable), cell_size, show_grid, indexed)
+
+def render_ansi(grid: np.ndarray,
+                pacman: Optional[Tuple[int, int]],
+                ghosts: Sequence[Tuple[int, int]] = (),
+                vulnerable: Iterable[int] = ()) -> str:
+    """
+    Rend un état en texte : '#' mur, 'P' Pac-Man, 'G' fantôme, 'V' fantôme
+    vulnérable, 'O' power pellet, '.' point.
+
+    Priorité d'affichage : mur > Pac-Man > fantôme (le premier de la liste) > décor.
+    """
+    grid = np.asarray(grid, dtype=np.int64)
+    height, width = grid.shape
+    chars = np.empty((height, width + 1), dtype=np.uint8)
+    chars[:, :width] = _CODE_TO_CHAR[grid + 1]
+    chars[:, width] = ord("\n")
+
+    vulnerable = set(vulnerable)
+    for i in reversed(range(len(ghosts))):
+        r, c = ghosts[i]
+        chars[r, c] = ord("V") if i in vulnerable else ord("G")
+    if pacman is not None:
+        chars[pacman[0], pacman[1]] = ord("P")
+    walls = grid == -1
+    chars[:, :width][walls] = ord("#")
+    return chars.tobytes()[:-1].decode("ascii")
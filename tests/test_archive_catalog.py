@@ -0,0 +1,81 @@
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from experiments.archive_catalog import ArchiveCatalog
+from experiments.archive_service import ArchiveConfig, ArchiveMetadata, IntelligentArchiveService
+
+
+def _write(path, win_rate, padding=0):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("metadata.json", json.dumps({"session_id": path.stem, "win_rate": win_rate}))
+        archive.writestr("model/model.zip", b"m" * (100 + padding))
+    return str(path)
+
+
+def test_incremental_sync_and_indexed_queries(tmp_path):
+    directory = tmp_path / "archives"
+    directory.mkdir()
+    paths = [_write(directory / f"pacman_run_00{i}_20260103_1632_DQN_pacman.zip", rate)
+             for i, rate in enumerate((0.3, 0.9, 0.6), start=1)]
+    for i, path in enumerate(paths):
+        os.utime(path, ns=(1_000_000_000 * (i + 1),) * 2)
+    catalog = ArchiveCatalog(str(tmp_path / "catalog.db"))
+
+    assert catalog.sync(str(directory)) == {"added": 3, "updated": 0, "removed": 0, "unchanged": 0}
+    assert catalog.sync(str(directory)) == {"added": 0, "updated": 0, "removed": 0, "unchanged": 3}
+
+    assert [e["session_number"] for e in catalog.list_archives(str(directory), limit=2)] == [3, 2]
+    assert [e["score"] for e in catalog.best(str(directory), 2)] == [0.9, 0.6]
+    assert catalog.excess(str(directory), keep=1) == [os.path.abspath(p) for p in paths[:2]]
+    entry = catalog.get(paths[0])
+    assert entry["members"] == {"metadata.json": len(json.dumps({"session_id": entry["metadata"]["session_id"],
+                                                                 "win_rate": 0.3})),
+                                "model/model.zip": 100}
+    assert entry["file_count"] == 2 and entry["model_type"] == "DQN"
+
+    # Modification, suppression et ajout : seules les archives concernées sont relues
+    _write(directory / os.path.basename(paths[0]), 0.95, padding=10)
+    os.remove(paths[1])
+    _write(directory / "uploaded_exp_1.zip", 0.1)
+    assert catalog.sync(str(directory)) == {"added": 1, "updated": 1, "removed": 1, "unchanged": 1}
+    assert catalog.best(str(directory), 1)[0]["path"] == os.path.abspath(paths[0])
+    assert set(catalog.get_many([paths[0], paths[1]])) == {paths[0]}
+    assert catalog.count(str(directory)) == 3
+
+
+def test_service_keeps_catalog_current_on_create_and_cleanup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = IntelligentArchiveService(ArchiveConfig(
+        archive_dir=str(tmp_path / "archives"), max_archives=2, checkpoint_store_dir=None
+    ))
+    for win_rate in (0.2, 0.8, 0.5):
+        service.write_archive(ArchiveMetadata(
+            session_id="exp", session_number=0, timestamp="", model_type="DQN", agent_type="pacman",
+            total_episodes=100, win_rate=win_rate, learning_rate=0.001, gamma=0.99, epsilon=0.1,
+            batch_size=32, buffer_size=1000, tags=["test"], metrics={"win_rate": win_rate}
+        ))
+
+    listed = service.list_archives()
+    assert [entry["session_number"] for entry in listed] == [3, 2]
+    assert all(os.path.exists(entry["path"]) for entry in listed)
+    assert len([f for f in os.listdir(tmp_path / "archives") if f.endswith(".zip")]) == 2
+    assert service.get_best_archives(1)[0]["score"] == 0.8
+
+    assert service.delete_archive(listed[0]["path"])
+    assert [entry["session_number"] for entry in service.list_archives()] == [2]
+    assert service.sync_catalog(force=True)["unchanged"] == 1
+
+
+def _allocate(db_path, directory):
+    catalog = ArchiveCatalog(db_path)
+    return [catalog.next_session_number(directory) for _ in range(10)]
+
+
+def test_session_numbers_are_unique_across_processes(tmp_path):
+    db_path, directory = str(tmp_path / "catalog.db"), str(tmp_path / "archives")
+    assert ArchiveCatalog(db_path).next_session_number(directory, seed=41) == 42
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        numbers = [n for batch in pool.map(_allocate, [db_path] * 3, [directory] * 3) for n in batch]
+    assert sorted(numbers) == list(range(43, 73))
@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import zipfile
+
+import yaml
+
+from experiments.archive_reader import READER_CACHE_SIZE, ArchiveReader, invalidate_archive, open_archive
+from experiments.archive_service import ArchiveConfig, IntelligentArchiveService
+from experiments.session_resumer import ResumeConfig, SessionResumer
+
+
+def _model_bytes(step):
+    model = io.BytesIO()
+    with zipfile.ZipFile(model, "w") as archive:
+        archive.writestr("data", json.dumps({"num_timesteps": step}))
+        archive.writestr("policy.pth", os.urandom(4096))
+    return model.getvalue()
+
+
+def _write_session(path, session_id, learning_rate, step=1000):
+    metadata = {"session_id": session_id, "timestamp": "2026-01-03T16:32:00", "model_type": "DQN",
+                "metrics": {"win_rate": step / 10000}}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("metadata.json", json.dumps(metadata))
+        archive.writestr("config.yaml", yaml.safe_dump({"learning_rate": learning_rate}))
+        archive.writestr("params.md", "# Paramètres\n" + "x" * 800)
+        archive.writestr("logs/train.log", "episode 1\n" * 100)
+        archive.writestr("model/model.zip", _model_bytes(step), compress_type=zipfile.ZIP_STORED)
+    return str(path)
+
+
+def test_reader_maps_stored_members_and_caches_directory(tmp_path):
+    path = _write_session(tmp_path / "session.zip", "run_a", 0.001)
+    with zipfile.ZipFile(path) as archive:
+        expected = archive.read("model/model.zip")
+
+    with ArchiveReader(path) as reader:
+        assert reader.is_stored("model/model.zip") and not reader.is_stored("metadata.json")
+        view = reader.view("model/model.zip")
+        assert view.tobytes() == expected
+        view.release()
+        with reader.open("model/model.zip") as stream, zipfile.ZipFile(stream) as model:
+            assert json.loads(model.read("data")) == {"num_timesteps": 1000}
+        assert reader.find_model() == "model/model.zip"
+        assert reader.metadata()["session_id"] == "run_a"
+        assert reader.params_preview().endswith("...") and len(reader.params_preview()) == 503
+        assert reader.read("logs/train.log") == b"episode 1\n" * 100
+        assert reader.structure()["file_count"] == 5
+
+    with open_archive(path) as shared, open_archive(path) as again:
+        assert again is shared
+        with shared.open("model/model.zip") as stream:
+            assert stream.read(2) == b"PK"
+    # Au repos, le lecteur mis en cache ne garde pas de projection mémoire
+    assert shared._mmap is None and not shared._file.closed
+
+    with open_archive(path) as shared:
+        # Remplacement puis invalidation pendant l'utilisation : le lecteur reste valide
+        os.replace(_write_session(tmp_path / "replacement.zip", "run_b", 0.002), path)
+        invalidate_archive(path)
+        assert shared.metadata()["session_id"] == "run_a"
+        assert shared.read("model/model.zip") == expected
+        with open_archive(path) as fresh:
+            assert fresh is not shared and fresh.metadata()["session_id"] == "run_b"
+    assert shared._file.closed and not fresh._file.closed
+
+    # Éviction : les lecteurs sortis du cache et inutilisés sont fermés
+    others = [_write_session(tmp_path / f"other_{i}.zip", f"run_{i}", 0.001) for i in range(READER_CACHE_SIZE)]
+    for other in others:
+        with open_archive(other):
+            pass
+    assert fresh._file.closed
+    for other in others:
+        invalidate_archive(other)
+
+
+def test_resumer_and_service_touch_only_requested_members(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path_a = _write_session(tmp_path / "a.zip", "run_a", 0.001)
+    path_b = _write_session(tmp_path / "b.zip", "run_b", 0.01, step=2000)
+    resumer = SessionResumer(ResumeConfig(target_dir=str(tmp_path / "resumed")))
+
+    comparison = resumer.compare_sessions(path_a, path_b)
+    assert comparison.parameter_diffs["learning_rate"]["value_b"] == 0.01
+    assert os.listdir(tmp_path / "resumed") == []
+
+    loaded = resumer.load_archive(path_a, target_dir=str(tmp_path / "only_model"),
+                                  members=["metadata.json", "model/model.zip"])
+    assert loaded["extracted_files"] == ["metadata.json", "model/model.zip"]
+    assert sorted(os.listdir(tmp_path / "only_model")) == ["metadata.json", "model"]
+    assert loaded["metadata"]["config"] == {"learning_rate": 0.001}
+
+    merged = resumer.merge_sessions([path_a, path_b], {})
+    assert os.path.exists(os.path.join(merged["merge_directory"], "session_1_run_b", "logs", "train.log"))
+
+    service = IntelligentArchiveService(ArchiveConfig(archive_dir=str(tmp_path / "archives")))
+    info = service.get_archive_info(path_b)
+    assert info["file_count"] == 5 and info["metadata"]["session_id"] == "run_b"
+    assert service.extract_metadata(path_b)["model_type"] == "DQN"
+    target = service.restore_session(path_b, str(tmp_path / "restored"), members=["config.yaml"])
+    assert os.listdir(target) == ["config.yaml"]
@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from experiments.archive_validator import ArchiveValidator
+from experiments.archive_writer import StreamingArchiveWriter
+
+
+def _sb3_model():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as model:
+        model.writestr("data", json.dumps({"policy_class": "MlpPolicy"}))
+        model.writestr("policy.pth", b"\x00" * 1000)
+    return buffer.getvalue()
+
+
+def _write_archive(path, config="gamma: 0.99\n", sidecar=True):
+    with StreamingArchiveWriter(str(path)) as writer:
+        writer.add_text("metadata.json", json.dumps({"session_id": "s", "timestamp": "t", "model_type": "PPO"}))
+        writer.add_text("params.md", "# Paramètres\n")
+        writer.add_text("config.yaml", config)
+        writer.add_bytes("model/model.zip", _sb3_model())
+        writer.add_text("logs/train.log", "episode=1 reward=2\n" * 500)
+    if not sidecar:
+        os.remove(str(path) + ".md5")
+    return str(path)
+
+
+def test_in_place_validation_streams_members_without_extraction(tmp_path, monkeypatch):
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("la validation en place ne doit rien extraire")
+
+    monkeypatch.setattr(tempfile, "TemporaryDirectory", no_extraction)
+    monkeypatch.setattr(ArchiveValidator, "_extract_archive", no_extraction)
+    validator = ArchiveValidator(work_dir=str(tmp_path / "validation"))
+
+    result = validator.validate_archive(_write_archive(tmp_path / "ok.zip"))
+    assert result.is_valid, result.errors
+    assert result.statistics["sb3_models"] == 1
+    assert result.statistics["members_verified"] == 5
+    assert result.statistics["log_count"] >= 1
+
+    bad_yaml = validator.validate_archive(_write_archive(tmp_path / "yaml.zip", config="a: [1, 2\n"),
+                                          quarantine=False)
+    assert any("YAML invalide" in error for error in bad_yaml.errors)
+
+    # Octet modifié dans un membre stocké, sans fichier .md5 : CRC et empreinte le signalent
+    path = _write_archive(tmp_path / "corrupt.zip", sidecar=False)
+    data = bytearray(open(path, "rb").read())
+    data[data.index(b"\x00" * 1000) + 10] = 0xFF
+    open(path, "wb").write(data)
+    corrupted = validator.validate_archive(path, quarantine=False)
+    assert not corrupted.is_valid
+    assert any("model/model.zip" in error for error in corrupted.errors)
+    assert os.path.exists(path)
+
+
+def test_manifest_is_checked_in_the_single_streaming_pass(tmp_path, monkeypatch):
+    def second_pass(*args, **kwargs):
+        raise AssertionError("les membres ne doivent être lus qu'une fois")
+
+    monkeypatch.setattr(ArchiveValidator, "verify_members", staticmethod(second_pass))
+    validator = ArchiveValidator(work_dir=str(tmp_path / "validation"))
+    assert validator.validate_archive(_write_archive(tmp_path / "ok.zip", sidecar=False)).is_valid
+
+    # Manifeste réécrit (racine altérée, membre retiré de l'archive) sans fichier .md5
+    source = _write_archive(tmp_path / "source.zip", sidecar=False)
+    tampered = str(tmp_path / "tampered.zip")
+    with zipfile.ZipFile(source) as original, zipfile.ZipFile(tampered, "w") as copy:
+        manifest = json.loads(original.read("manifest.json"))
+        manifest["merkle"]["root"] = "0" * 64
+        for name in original.namelist():
+            if name == "manifest.json":
+                copy.writestr(name, json.dumps(manifest))
+            elif name != "params.md":
+                copy.writestr(name, original.read(name))
+    result = validator.validate_archive(tampered, quarantine=False)
+    assert "Racine de Merkle invalide : manifeste altéré" in result.errors
+    assert "Membre absent: params.md" in result.errors
+
+
+def test_batch_validation_uses_process_pool_and_writes_one_report(tmp_path):
+    archives = tmp_path / "archives"
+    archives.mkdir()
+    for i in range(3):
+        _write_archive(archives / f"run_{i}.zip")
+    (archives / "broken.zip").write_bytes(b"pas une archive")
+
+    validator = ArchiveValidator(work_dir=str(tmp_path / "validation"))
+    report = validator.validate_directory(str(archives), max_workers=2)
+
+    assert report["archive_count"] == 4 and report["workers"] == 2
+    assert report["valid_count"] == 3
+    assert report["invalid_archives"] == [str(archives / "broken.zip")]
+    # Un seul rapport pour le lot, aucune quarantaine par défaut
+    reports = os.listdir(tmp_path / "validation" / "reports")
+    assert reports == [os.path.basename(report["report_path"])]
+    assert (archives / "broken.zip").exists()
+    with open(report["report_path"]) as f:
+        assert json.load(f)["valid_count"] == 3
+
+
+def _validate_directory_in_worker(work_dir, directory):
+    return ArchiveValidator(work_dir=work_dir).validate_directory(directory)["workers"]
+
+
+def test_batch_validation_inside_a_pool_worker_is_sequential(tmp_path):
+    archives = tmp_path / "archives"
+    archives.mkdir()
+    for i in range(2):
+        _write_archive(archives / f"run_{i}.zip")
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        workers = pool.submit(_validate_directory_in_worker, str(tmp_path / "validation"), str(archives)).result()
+    assert workers == 1
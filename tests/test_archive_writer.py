@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import zipfile
+
+from experiments.archive_service import ArchiveMetadata, ArchiveConfig, IntelligentArchiveService
+from experiments.archive_validator import ArchiveValidator
+from experiments.archive_writer import MANIFEST_NAME, StreamingArchiveWriter
+from experiments.file_hasher import hash_bytes
+
+
+def _metadata():
+    return ArchiveMetadata(
+        session_id="exp-1", session_number=0, timestamp="", model_type="DQN", agent_type="pacman",
+        total_episodes=100, win_rate=0.4, learning_rate=0.001, gamma=0.99, epsilon=0.1,
+        batch_size=32, buffer_size=1000, tags=["test"], metrics={"win_rate": 0.4}
+    )
+
+
+def test_single_pass_archive_hashes_codecs_and_manifest(tmp_path):
+    model = tmp_path / "model.zip"
+    model.write_bytes(os.urandom(300_000))
+    archive_path = str(tmp_path / "run.zip")
+
+    with StreamingArchiveWriter(archive_path) as writer:
+        writer.add_text("params.md", "# Paramètres\n" * 200)
+        writer.add_text("metadata.json", json.dumps({"session_id": "s", "timestamp": "t", "model_type": "DQN"}))
+        writer.add_text("config.yaml", "gamma: 0.99\n")
+        writer.add_file("model/model.zip", str(model))
+    result = writer.result
+
+    # Fichier définitif (pas de .part) et hash MD5 du fichier réellement écrit
+    assert not os.path.exists(archive_path + ".part")
+    with open(archive_path, "rb") as f:
+        assert hashlib.md5(f.read()).hexdigest() == result.archive_hash
+    with open(archive_path + ".md5") as f:
+        assert f.read().split()[0] == result.archive_hash
+
+    with zipfile.ZipFile(archive_path) as archive:
+        assert archive.testzip() is None
+        infos = {info.filename: info for info in archive.infolist()}
+        assert infos["model/model.zip"].compress_type == zipfile.ZIP_STORED
+        assert infos["params.md"].compress_type == zipfile.ZIP_DEFLATED
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+        for entry in manifest["files"]:
+            assert hash_bytes(archive.read(entry["path"])) == entry["blake2b"]
+    assert manifest["validation"]["is_valid"] and result.validation.is_valid
+    model_entry = next(entry for entry in result.entries if entry.path == "model/model.zip")
+    assert model_entry.compression == "stored" and model_entry.compressed_size == 300_000
+    assert result.stats.files_processed == len(result.entries) == 5
+
+    # Le validateur historique accepte l'archive (hash .md5 compris)
+    validator = ArchiveValidator(work_dir=str(tmp_path / "validation"))
+    checked = validator.validate_archive(archive_path)
+    assert checked.is_valid, checked.errors
+    assert checked.integrity_hash == result.archive_hash
+
+
+def test_writer_reports_missing_files_and_bad_metadata(tmp_path):
+    with StreamingArchiveWriter(str(tmp_path / "bad.zip")) as writer:
+        writer.add_text("metadata.json", json.dumps({"session_id": "s", "win_rate": "haut"}))
+    validation = writer.result.validation
+    assert not validation.is_valid
+    assert any("timestamp" in error for error in validation.errors)
+    assert any("win_rate" in error for error in validation.errors)
+    assert any("params.md" in error for error in validation.errors)
+
+
+def test_failed_write_leaves_no_partial_archive(tmp_path):
+    archive_path = str(tmp_path / "aborted.zip")
+    try:
+        with StreamingArchiveWriter(archive_path) as writer:
+            writer.add_text("params.md", "x")
+            writer.add_file("model/absent.zip", str(tmp_path / "absent.zip"))
+    except FileNotFoundError:
+        pass
+    assert os.listdir(tmp_path) == []
+
+
+def test_intelligent_archive_service_writes_in_one_pass(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model_dir = tmp_path / "model_dir"
+    (model_dir / "sub").mkdir(parents=True)
+    (model_dir / "policy.pth").write_bytes(os.urandom(10_000))
+    (model_dir / "sub" / "notes.txt").write_text("notes\n" * 100)
+
+    service = IntelligentArchiveService(ArchiveConfig(archive_dir=str(tmp_path / "archives")))
+    result = service.write_archive(_metadata(), model_path=str(model_dir))
+
+    assert result is not None and result.validation.is_valid
+    with zipfile.ZipFile(result.archive_path) as archive:
+        names = set(archive.namelist())
+    assert {"params.md", "metadata.json", "config.yaml", "model/policy.pth",
+            "model/sub/notes.txt", MANIFEST_NAME} <= names
+    name = os.path.basename(result.archive_path)
+    assert sorted(os.listdir(tmp_path / "archives")) == [name, name + ".md5"]
+
+
+def test_backend_create_archive_reports_stats_without_extra_passes(tmp_path, monkeypatch):
+    from backend.services.archive_service import ArchiveService
+
+    monkeypatch.chdir(tmp_path)
+    model = tmp_path / "model.zip"
+    model.write_bytes(os.urandom(5_000))
+    service = ArchiveService()
+    monkeypatch.setattr(service.compression_optimizer, "optimize_archive", None)
+    monkeypatch.setattr(service.archive_validator, "validate_archive", None)
+
+    result = service.create_archive("exp-42", model_path=str(model), metrics={"win_rate": 0.5},
+                                    config={"algorithm": "PPO"}, tags=["ppo"])
+    assert result["success"], result
+    assert result["validation_result"] is True and result["version_id"]
+    assert result["compression_stats"]["files_processed"] == 5
+
+
+def test_parallel_members_with_bz2_and_lzma(tmp_path, monkeypatch):
+    import experiments.archive_writer as archive_writer
+
+    # Seuil abaissé pour passer par le pool sans écrire de gros fichiers
+    monkeypatch.setattr(archive_writer, "PARALLEL_MIN_SIZE", 64 * 1024)
+    logs = []
+    for i in range(5):
+        log = tmp_path / f"train_{i}.log"
+        log.write_text("".join(f"episode={j} reward={j % 17}\n" for j in range(i * 1000, i * 1000 + 20_000)))
+        logs.append(log)
+    model = tmp_path / "model.zip"
+    with zipfile.ZipFile(model, "w") as sb3:
+        sb3.writestr("policy.pth", os.urandom(200_000))
+    renamed = tmp_path / "weights.bin"
+    renamed.write_bytes(model.read_bytes())
+
+    for codec, expected in (("bz2", "bzip2"), ("lzma", "lzma")):
+        archive_path = str(tmp_path / f"run_{codec}.zip")
+        with StreamingArchiveWriter(archive_path, codec=codec, workers=3) as writer:
+            for log in logs:
+                writer.add_file(f"logs/{log.name}", str(log))
+            writer.add_text("params.md", "# Paramètres\n")
+            writer.add_file("model/model.zip", str(model))
+            writer.add_file("model/weights.bin", str(renamed))
+        result = writer.result
+
+        entries = {entry.path: entry for entry in result.entries}
+        # Ordre d'ajout conservé dans le manifeste, ZIP SB3 stocké même sans extension connue
+        assert [entry.path for entry in result.entries][:5] == [f"logs/{log.name}" for log in logs]
+        assert entries["logs/train_0.log"].compression == expected
+        assert entries["model/weights.bin"].compression == "stored"
+        assert result.stats.workers == 3 and result.stats.algorithm == f"zip_streaming_{codec}"
+        assert result.stats.codec_breakdown[expected]["files"] == 5
+        assert result.stats.codec_breakdown[expected]["ratio"] < 0.5
+
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.testzip() is None
+            for log in logs:
+                data = archive.read(f"logs/{log.name}")
+                assert data == log.read_bytes()
+                assert hash_bytes(data) == entries[f"logs/{log.name}"].blake2b
+        with open(archive_path, "rb") as f:
+            assert hashlib.md5(f.read()).hexdigest() == result.archive_hash
+
+
+def test_compressibility_estimate_skips_incompressible_content():
+    from experiments.archive_writer import choose_compression
+    from experiments.compression_optimizer import estimate_compressibility
+
+    assert estimate_compressibility(os.urandom(65536)) == 1.0
+    assert estimate_compressibility(b"reward=1.0 loss=0.2\n" * 3000) < 0.1
+    assert choose_compression("data.bin", os.urandom(65536)) == zipfile.ZIP_STORED
+    assert choose_compression("export/model.onnx", b"a" * 1000) == zipfile.ZIP_STORED
+    assert choose_compression("run.log", b"a" * 1000, zipfile.ZIP_LZMA) == zipfile.ZIP_LZMA
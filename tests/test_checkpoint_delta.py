@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import zipfile
+
+import numpy as np
+
+from experiments.archive_service import ArchiveConfig, IntelligentArchiveService
+from experiments.checkpoint_delta import CHECKPOINT_REF_NAME, CheckpointDeltaCodec, CheckpointDeltaStore, split_segments
+from experiments.session_resumer import ResumeConfig, SessionResumer
+
+
+def _write_checkpoint(path, weights, step):
+    # Même disposition qu'un model.save SB3 : membres stockés, policy.pth au format torch.save
+    policy = io.BytesIO()
+    with zipfile.ZipFile(policy, "w") as pth:
+        pth.writestr("archive/data.pkl", b"\x80\x02}q\x00.")
+        pth.writestr("archive/data/0", weights.tobytes())
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("data", json.dumps({"num_timesteps": step}))
+        archive.writestr("policy.pth", policy.getvalue())
+    return str(path)
+
+
+def _series(tmp_path, count, size=20_000):
+    rng = np.random.default_rng(0)
+    weights = rng.normal(0, 0.1, size).astype(np.float32)
+    paths = []
+    for i in range(count):
+        paths.append(_write_checkpoint(tmp_path / f"ckpt_{i}.zip", weights, i * 1000))
+        weights = weights + rng.normal(0, 1e-4, size).astype(np.float32)
+    return paths
+
+
+def test_delta_round_trip_is_exact_and_smaller(tmp_path):
+    first, second = (open(p, "rb").read() for p in _series(tmp_path, 2))
+    names = [name for name, _, _ in split_segments(second)]
+    assert "policy.pth!/archive/data/0" in names
+
+    codec = CheckpointDeltaCodec()
+    full = codec.encode(first)
+    delta = codec.encode(second, first)
+    assert codec.read_header(full)["kind"] == "full"
+    assert codec.read_header(delta)["kind"] == "delta"
+    assert len(delta) < len(full)
+    assert codec.decode(full) == first
+    assert codec.decode(delta, first) == second
+
+    # Fichier quelconque (pas un ZIP) : un seul segment, toujours réversible
+    raw = os.urandom(1001)
+    assert split_segments(raw) == [("~0", 0, 1001)]
+    reference = os.urandom(1001)
+    assert codec.decode(codec.encode(raw, reference), reference) == raw
+    assert codec.read_header(codec.encode(raw, os.urandom(50)))["kind"] == "full"
+    assert CheckpointDeltaCodec("lzma").decode(CheckpointDeltaCodec("lzma").encode(raw)) == raw
+
+
+def test_keyframes_bound_chains_and_restore(tmp_path):
+    paths = _series(tmp_path, 7)
+    store = CheckpointDeltaStore(str(tmp_path / "store"), keyframe_interval=3)
+    for path in paths:
+        store.add(path)
+
+    entries = store.list_checkpoints()
+    assert [entry["kind"] for entry in entries] == ["full", "delta", "delta"] * 2 + ["full"]
+    assert max(entry["chain_position"] for entry in entries) == 2
+
+    # Nouvelle instance : restauration depuis le disque seulement
+    reopened = CheckpointDeltaStore(str(tmp_path / "store"), keyframe_interval=3)
+    for entry, path in zip(entries, paths):
+        assert reopened.restore(entry["id"]) == open(path, "rb").read()
+    stats = reopened.get_statistics()
+    assert stats["keyframe_count"] == 3 and stats["stored_bytes"] < stats["original_bytes"]
+
+
+def test_auto_save_stores_delta_and_resumer_rebuilds_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    paths = _series(tmp_path, 2)
+    service = IntelligentArchiveService(ArchiveConfig(
+        archive_dir=str(tmp_path / "archives"), checkpoint_store_dir=str(tmp_path / "checkpoints")
+    ))
+    archives = [service.auto_save(episode, {"win_rate": 0.5}, path, force=True)
+                for episode, path in zip((1000, 2000), paths)]
+
+    with zipfile.ZipFile(archives[1]) as archive:
+        names = archive.namelist()
+        reference = json.loads(archive.read(CHECKPOINT_REF_NAME))
+    assert not any(name.endswith(".zip") for name in names)
+    assert service.checkpoint_store.get_entry(reference["checkpoint_id"])["kind"] == "delta"
+
+    # Le magasin vient de la configuration du resumer, pas du chemin écrit dans l'archive
+    unconfigured = SessionResumer(ResumeConfig(target_dir=str(tmp_path / "plain")))
+    assert not any(name.startswith("model/") and name != CHECKPOINT_REF_NAME
+                   for name in unconfigured.load_archive(archives[1])["extracted_files"])
+    resumer = SessionResumer(ResumeConfig(target_dir=str(tmp_path / "resumed"),
+                                          checkpoint_store_dir=str(tmp_path / "checkpoints")))
+    loaded = resumer.load_archive(archives[1])
+    assert loaded is not None
+    restored = os.path.join(loaded["target_dir"], "model", os.path.basename(paths[1]))
+    assert open(restored, "rb").read() == open(paths[1], "rb").read()
+
+    # Le premier checkpoint sert de base au second : il survit à son archive
+    store = service.checkpoint_store
+    first, second = [entry["id"] for entry in store.list_checkpoints()]
+    assert service.delete_archive(archives[0])
+    assert [entry["id"] for entry in store.list_checkpoints()] == [first, second]
+    assert service.delete_archive(archives[1])
+    assert store.list_checkpoints() == [] and os.listdir(store.root) == ["index.db"]
+
+
+def test_store_instances_share_the_index(tmp_path):
+    paths = _series(tmp_path, 4)
+    first = CheckpointDeltaStore(str(tmp_path / "store"), keyframe_interval=3)
+    second = CheckpointDeltaStore(str(tmp_path / "store"), keyframe_interval=3)
+    for i, path in enumerate(paths):
+        (first if i % 2 else second).add(path)
+    entries = first.list_checkpoints()
+    assert [entry["id"] for entry in entries] == [f"ckpt_{i:06d}" for i in range(1, 5)]
+    assert [entry["kind"] for entry in entries] == ["full", "delta", "delta", "full"]
+    for entry, path in zip(entries, paths):
+        assert second.restore(entry["id"]) == open(path, "rb").read()
@@ -0,0 +1,71 @@
+import json
+import os
+import zipfile
+
+from experiments.archive_writer import MANIFEST_NAME, StreamingArchiveWriter
+from experiments.chunk_store import ChunkStore, ContentDefinedChunker
+
+
+def _write_archive(path, store, archive_id, model_bytes, params="# Paramètres\n"):
+    with StreamingArchiveWriter(str(path), sink=store.begin_archive(archive_id)) as writer:
+        writer.add_text("params.md", params)
+        writer.add_text("metadata.json", json.dumps({"session_id": archive_id, "timestamp": "t", "model_type": "DQN"}))
+        writer.add_text("config.yaml", "gamma: 0.99\n")
+        writer.add_bytes("model/policy.pth", model_bytes)
+    return writer.result
+
+
+def test_content_defined_boundaries_survive_insertions():
+    data = os.urandom(2_000_000)
+    shifted = data[:1_000_000] + b"insertion!" + data[1_000_000:]
+    chunker = ContentDefinedChunker()
+    original = list(chunker.split([data[i:i + 300_000] for i in range(0, len(data), 300_000)]))
+    edited = list(ContentDefinedChunker().split([shifted]))
+
+    assert b"".join(original) == data and b"".join(edited) == shifted
+    assert all(16 * 1024 <= len(chunk) <= 256 * 1024 for chunk in original[:-1])
+    # Seuls les blocs autour de l'insertion changent
+    assert len(set(original) - set(edited)) <= 2
+
+
+def test_store_grows_with_new_bytes_and_exports_standalone_zip(tmp_path):
+    store = ChunkStore(str(tmp_path / "store"))
+    model = os.urandom(1_500_000)
+    edited = bytearray(model)
+    edited[700_000:700_100] = os.urandom(100)
+
+    _write_archive(tmp_path / "run1.zip", store, "run1", model)
+    _write_archive(tmp_path / "run2.zip", store, "run2", bytes(edited), params="# Paramètres v2\n")
+    stats = store.get_statistics()
+    assert stats["archive_count"] == 2
+    assert stats["logical_bytes"] > 2 * len(model)
+    assert stats["unique_bytes"] < 1.3 * len(model)
+
+    # Export autonome identique à l'archive d'origine (membre par membre)
+    result = store.export_zip("run2", str(tmp_path / "shared.zip"))
+    assert result.validation.is_valid
+    with zipfile.ZipFile(tmp_path / "run2.zip") as source, zipfile.ZipFile(result.archive_path) as exported:
+        names = [name for name in source.namelist() if name != MANIFEST_NAME]
+        assert [name for name in exported.namelist() if name != MANIFEST_NAME] == names
+        for name in names:
+            assert exported.read(name) == source.read(name)
+
+    # Retirer run1 puis ramasser : seuls ses blocs propres sont libérés
+    assert store.delete_archive("run1")
+    freed = store.collect_garbage(min_age_seconds=0)
+    assert 0 < freed["bytes_freed"] < 0.5 * len(model)
+    assert store.read_file("run2", "model/policy.pth") == bytes(edited)
+    assert store.get_statistics()["archive_count"] == 1
+
+
+def test_recent_orphan_chunks_survive_garbage_collection(tmp_path):
+    store = ChunkStore(str(tmp_path / "store"))
+    ingest = store.begin_archive("in-progress")
+    member = ingest.member("model.bin")
+    member.write(os.urandom(300_000))
+    ingest.add_member(member.close())
+
+    # Ajout non encore validé : les blocs récents ne sont pas supprimés
+    assert store.collect_garbage()["chunks_removed"] == 0
+    manifest = ingest.commit()
+    assert store.read_file("in-progress", "model.bin") and manifest["size"] == 300_000
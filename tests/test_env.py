@@ -67,5 +67,55 @@ def test_random_agent_reset():
     assert True
 
 
+def _reference_ansi(env):
+    """Rendu ANSI cellule par cellule (ancienne implémentation)."""
+    rows = []
+    for r in range(env.size):
+        row = []
+        for c in range(env.size):
+            if (r, c) in env.walls:
+                row.append('#')
+            elif (r, c) == tuple(env.pacman_pos):
+                row.append('P')
+            elif (r, c) in env.ghost_positions:
+                idx = env.ghost_positions.index((r, c))
+                row.append('V' if idx in getattr(env, 'vulnerable_ghosts', set()) else 'G')
+            elif (r, c) in (getattr(env, 'power_pellet_positions', None) or []):
+                row.append('O')
+            elif env.dots[r, c] == 1:
+                row.append('.')
+            else:
+                row.append(' ')
+        rows.append(''.join(row))
+    return '\n'.join(rows)
+
+
+@pytest.mark.parametrize("multiagent", [False, True])
+def test_headless_render_modes(multiagent):
+    """Les modes 'ansi' et 'rgb_array' fonctionnent sans Pygame."""
+    from src.pacman_env.configurable_env import PacManConfigurableEnv
+    from src.pacman_env.multiagent_env import PacManMultiAgentEnv
+
+    walls = [(0, c) for c in range(3, 8)]
+    if multiagent:
+        env = PacManMultiAgentEnv(size=12, walls=walls, num_ghosts=3, render_mode="rgb_array",
+                                  render_cell_size=8)
+        env.reset()
+        env.vulnerable_ghosts = {1}
+        for _ in range(5):
+            env.step({agent: np.random.randint(4) for agent in env.agents})
+    else:
+        env = PacManConfigurableEnv(size=12, walls=walls, num_ghosts=3, render_mode="rgb_array",
+                                    render_cell_size=8)
+        env.reset()
+        for _ in range(5):
+            env.step(np.random.randint(4))
+
+    frame = env.render()
+    assert frame.shape == (96, 96, 3) and frame.dtype == np.uint8
+    text = env.render(mode="ansi")
+    assert text.split("\nStep:")[0] == _reference_ansi(env)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,74 @@
+import pytest
+
+from backend.config import GameParameters
+from backend.services.environment_service import (
+    EnvironmentPool, EnvironmentService, environment_fingerprint
+)
+
+
+class _FakeEnv:
+    def __init__(self):
+        self.resets = 0
+        self.closed = False
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_fingerprint_is_canonical():
+    """L'empreinte dépend du type et des paramètres, pas de l'instance."""
+    a = environment_fingerprint("configurable", GameParameters(grid_size=12))
+    b = environment_fingerprint("configurable", GameParameters(grid_size=12))
+    assert a == b
+    assert a != environment_fingerprint("multiagent", GameParameters(grid_size=12))
+    assert a != environment_fingerprint("configurable", GameParameters(grid_size=13))
+
+
+def test_pool_reuses_and_resets_released_instances():
+    pool = EnvironmentPool(max_size=4, max_idle_per_key=2)
+    assert pool.acquire("k") is None
+    env = _FakeEnv()
+    pool.release("k", env)
+    assert env.resets == 1
+    assert pool.acquire("k") is env
+    stats = pool.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_checked_out_is_released_when_reset_fails():
+    class _BrokenEnv(_FakeEnv):
+        def reset(self):
+            raise RuntimeError("état corrompu")
+
+    pool = EnvironmentPool()
+    pool.acquire("k")
+    env = _BrokenEnv()
+    pool.release("k", env)
+    assert env.closed and pool.get_stats()["checked_out"] == 0
+    assert pool.acquire("k") is None
+
+
+def test_pool_evicts_least_recently_used_configuration():
+    pool = EnvironmentPool(max_size=2, max_idle_per_key=2)
+    old, newer, newest = _FakeEnv(), _FakeEnv(), _FakeEnv()
+    for key, env in (("old", old), ("newer", newer), ("newest", newest)):
+        pool.acquire(key)
+        pool.release(key, env)
+    assert old.closed
+    assert not newer.closed and not newest.closed
+    assert pool.get_stats()["evictions"] == 1
+
+
+@pytest.mark.parametrize("env_type", ["configurable", "multiagent"])
+def test_checkout_env_skips_construction_on_reuse(env_type):
+    service = EnvironmentService()
+    params = GameParameters(grid_size=10, num_ghosts=2, power_pellets=2)
+    with service.checkout_env(env_type, params) as first:
+        assert first is not None
+    with service.checkout_env(env_type, params) as second:
+        assert second is first
+        assert service.get_game_state(second, env_type) is not None
+    assert service.get_pool_stats()["hits"] == 1
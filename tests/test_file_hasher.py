@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import zipfile
+
+import experiments.file_hasher as file_hasher
+from experiments.archive_validator import ArchiveValidator
+from experiments.archive_writer import MANIFEST_NAME, StreamingArchiveWriter
+from experiments.file_hasher import HashCache, hash_file, hash_file_multi, merkle_root
+
+
+def test_hash_file_matches_hashlib_for_buffered_and_mmap_reads(tmp_path, monkeypatch):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path = tmp_path / "model.bin"
+    path.write_bytes(data)
+    expected = hashlib.blake2b(data, digest_size=32).hexdigest()
+    assert hash_file(str(path)) == expected
+
+    monkeypatch.setattr(file_hasher, "MMAP_MIN_SIZE", 1024)
+    hashes = hash_file_multi(str(path), ("blake2b", "md5"))
+    assert hashes == {"blake2b": expected, "md5": hashlib.md5(data).hexdigest()}
+
+
+def test_cache_skips_unchanged_files_and_detects_changes(tmp_path, monkeypatch):
+    path = tmp_path / "archive.zip"
+    path.write_bytes(b"a" * 1000)
+    old = 1_600_000_000_000_000_000
+    os.utime(path, ns=(old, old))
+    cache = HashCache(str(tmp_path / "cache.db"))
+    first = cache.get_hash(str(path), "md5")
+
+    calls = []
+    real = file_hasher.hash_file_multi
+    monkeypatch.setattr(file_hasher, "hash_file_multi", lambda *args: calls.append(args) or real(*args))
+    assert HashCache(str(tmp_path / "cache.db")).get_hash(str(path), "md5") == first
+    assert calls == []
+
+    # Même taille, nouvelle date : l'entrée n'est plus valide
+    path.write_bytes(b"b" * 1000)
+    os.utime(path, ns=(old + 1, old + 1))
+    assert cache.get_hash(str(path), "md5") == hashlib.md5(b"b" * 1000).hexdigest()
+    assert len(calls) == 1
+
+    path.unlink()
+    assert cache.prune() == 1
+
+
+def test_merkle_manifest_locates_corrupted_member(tmp_path):
+    archive_path = str(tmp_path / "run.zip")
+    with StreamingArchiveWriter(archive_path) as writer:
+        writer.add_text("metadata.json", json.dumps({"session_id": "s", "timestamp": "t", "model_type": "DQN"}))
+        writer.add_text("params.md", "# Paramètres\n")
+        writer.add_text("config.yaml", "gamma: 0.99\n")
+        writer.add_bytes("model/model.zip", b"m" * 5000, zipfile.ZIP_STORED)
+    result = writer.result
+    with zipfile.ZipFile(archive_path) as archive:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+    assert manifest["merkle"]["root"] == result.merkle_root
+    assert merkle_root([(e["path"], e["blake2b"]) for e in manifest["files"]]) == result.merkle_root
+
+    validator = ArchiveValidator(work_dir=str(tmp_path / "validation"))
+    single = validator.verify_members(archive_path, ["params.md"], expected_root=result.merkle_root)
+    assert single["is_valid"] and single["verified"] == ["params.md"]
+
+    # Corruption d'un octet au milieu du modèle stocké
+    data = bytearray(open(archive_path, "rb").read())
+    offset = data.index(b"m" * 5000) + 2500
+    data[offset] ^= 0xFF
+    with open(archive_path, "wb") as f:
+        f.write(data)
+    checked = validator.verify_members(archive_path)
+    assert checked["corrupted"] == ["model/model.zip"]
+    assert "params.md" in checked["verified"] and not checked["is_valid"]
+    assert validator.verify_members(archive_path, ["params.md"], expected_root="0" * 64)["errors"]
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pacman_env.rendering import (
+    GHOST_COLORS, PACMAN_COLOR, VULNERABLE_GHOST_COLOR, WALL_COLOR, render_frame, tile_atlas
+)
+from backend.api.v1.endpoints import visualization
+from backend.services.frame_service import FrameRenderService
+
+
+def _state():
+    grid = np.ones((6, 8), dtype=np.int8)
+    grid[0, :] = -1
+    return {
+        "grid": grid.tolist(),
+        "pacman": {"x": 2, "y": 3},
+        "ghosts": [{"x": 5, "y": 1, "mode": "normal"}, {"x": 6, "y": 4, "mode": "vulnerable"}],
+        "step": 7, "score": 10, "lives": 3
+    }
+
+
+def test_frame_is_composed_from_tiles():
+    """Chaque cellule de la frame est exactement la tuile de l'atlas correspondante."""
+    s = 10
+    grid = np.asarray(_state()["grid"])
+    frame = render_frame(grid, (3, 2), [(1, 5), (4, 6)], [1], cell_size=s)
+    assert frame.shape == (60, 80, 3) and frame.dtype == np.uint8
+
+    def cell(r, c):
+        return frame[r * s:(r + 1) * s, c * s:(c + 1) * s]
+
+    atlas = tile_atlas(s)
+    assert np.array_equal(cell(0, 0), atlas[1])
+    assert (cell(0, 3) == WALL_COLOR).all()
+    center = s // 2
+    assert tuple(cell(3, 2)[center, center - 2]) == PACMAN_COLOR
+    assert tuple(cell(1, 5)[center, center]) == GHOST_COLORS[0]
+    assert tuple(cell(4, 6)[center, center]) == VULNERABLE_GHOST_COLOR
+
+
+def test_encoded_frames_are_cached_by_state_and_options():
+    service = FrameRenderService(max_entries=2)
+    png, etag, media_type = service.render_state(_state(), cell_size=8)
+    assert media_type == "image/png" and png.startswith(b"\x89PNG")
+    again, same_etag, _ = service.render_state(_state(), cell_size=8)
+    assert again is png and same_etag == etag
+
+    moved = _state()
+    moved["pacman"]["x"] = 3
+    assert service.render_state(moved, cell_size=8)[1] != etag
+    assert service.render_state(_state(), cell_size=8, format="jpeg")[2] == "image/jpeg"
+    assert service.get_stats()["hits"] == 1 and service.get_stats()["cached_frames"] == 2
+
+
+def test_frame_endpoint_honours_if_none_match(monkeypatch):
+    monkeypatch.setattr(visualization, "_resolve_state", lambda *args: _state())
+    app = FastAPI()
+    app.include_router(visualization.router, prefix="/visualization")
+    client = TestClient(app)
+
+    response = client.get("/visualization/frame", params={"cell_size": 12, "format": "png"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    etag = response.headers["etag"]
+
+    cached = client.get("/visualization/frame", params={"cell_size": 12, "format": "png"},
+                        headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+
+    exported = client.get("/visualization/export/frame", params={"cell_size": 12}).json()
+    assert exported["width"] == 8 * 12 and exported["data"].startswith("data:image/png;base64,")
@@ -0,0 +1,70 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.services.training_service import TRAINING_SPS, TRAINING_STEPS, TrainingCallback
+from backend.utils.instrumentation import MetricsRegistry, track_job, registry
+
+
+def test_registry_renders_prometheus_text():
+    metrics = MetricsRegistry()
+    requests = metrics.counter("demo_requests_total", "Requêtes", ("path",))
+    depth = metrics.gauge("demo_queue_depth", "Profondeur")
+    latency = metrics.histogram("demo_seconds", "Latence", ("op",), buckets=(0.1, 1.0))
+
+    threads = [threading.Thread(target=lambda: [requests.labels('a"b').inc() for _ in range(1000)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("write").observe(value)
+
+    assert metrics.counter("demo_requests_total", "Requêtes", ("path",)) is requests
+    text = metrics.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{path="a\\"b"} 4000' in text
+    assert "demo_queue_depth 7" in text
+    # Buckets cumulés, bornes incluses
+    assert 'demo_seconds_bucket{op="write",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{op="write",le="1"} 3' in text
+    assert 'demo_seconds_bucket{op="write",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{op="write"} 4' in text
+    assert text.endswith("\n")
+
+
+def test_track_job_outcome():
+    @track_job("demo_job")
+    def job(success):
+        return {"success": success}
+
+    job(True)
+    job(False)
+    text = registry.render()
+    assert 'pacman_job_duration_seconds_count{kind="demo_job",outcome="success"} 1' in text
+    assert 'pacman_job_duration_seconds_count{kind="demo_job",outcome="error"} 1' in text
+
+
+def test_training_series_are_removed_at_end_of_training():
+    callback = TrainingCallback.__new__(TrainingCallback)
+    callback.session_id = "demo_session"
+    TRAINING_STEPS.labels("demo_session").inc(128)
+    TRAINING_SPS.labels("demo_session").set(64.0)
+    callback._on_training_end()
+    assert 'session_id="demo_session"' not in registry.render()
+
+
+def test_metrics_endpoint_labels_requests_by_route():
+    client = TestClient(app)
+    assert client.get("/api/v1/visualization/replay/absent-session/episodes").status_code == 200
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert ('pacman_http_requests_total{method="GET",'
+            'route="/api/v1/visualization/replay/{session_id}/episodes",status="200"} 1') in text
+    assert "pacman_websocket_queue_depth 0" in text
+    assert "# TYPE pacman_env_step_phase_seconds histogram" in text
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import zipfile
+
+from backend.db.database import DatabaseManager
+from backend.services.job_service import JobService
+from backend.services.websocket_service import websocket_manager
+
+
+def _make_archive(path):
+    # Archive valide : une archive invalide serait déplacée en quarantaine
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("metadata.json", json.dumps({
+            "session_id": "s1", "timestamp": "2026-01-01T00:00:00", "model_type": "DQN"
+        }))
+        archive.writestr("params.md", "# Paramètres\n")
+        archive.writestr("config.yaml", "session_id: s1\n")
+    return str(path)
+
+
+async def _wait_finished(service, job_id, timeout=60.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        job = service.get_job(job_id)
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"tâche {job_id} non terminée")
+
+
+def test_job_runs_in_process_pool_and_persists(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "jobs.db"))
+    archive_path = _make_archive(tmp_path / "archive.zip")
+    updates = []
+
+    async def record(job_data):
+        updates.append(job_data)
+
+    monkeypatch.setattr(websocket_manager, "broadcast_job_update", record)
+
+    async def scenario():
+        service = JobService(db=db, max_workers=1, poll_interval=0.05)
+        try:
+            job = service.submit("archive_validate", {"archive_path": archive_path})
+            assert job["status"] == "queued" and job["status_url"] == f"/api/v1/jobs/{job['id']}"
+            return await _wait_finished(service, job["id"])
+        finally:
+            await service.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "succeeded" and job["progress"] == 1.0
+    assert job["result"]["validation_result"]["archive_path"] == archive_path
+    assert job["result"]["validation_result"]["is_valid"]
+    assert [update["status"] for update in updates][-1] == "succeeded"
+    assert "running" in [update["status"] for update in updates]
+
+    # Le résultat survit à un redémarrage (nouveau service, même base)
+    restarted = JobService(db=DatabaseManager(db.db_path))
+    assert restarted.get_job(job["id"])["result"] == job["result"]
+    assert [entry["id"] for entry in restarted.list_jobs(job_type="archive_validate")] == [job["id"]]
+
+
+def test_concurrency_limit_queue_and_cancel(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "jobs.db"))
+    archive_path = _make_archive(tmp_path / "archive.zip")
+
+    async def ignore(job_data):
+        pass
+
+    monkeypatch.setattr(websocket_manager, "broadcast_job_update", ignore)
+
+    async def scenario():
+        service = JobService(db=db, max_workers=2, concurrency={"archive": 1})
+        try:
+            first = service.submit("archive_validate", {"archive_path": archive_path})
+            second = service.submit("archive_validate", {"archive_path": archive_path})
+            await asyncio.sleep(0)
+            assert service.get_job(first["id"])["status"] == "running"
+            assert service.get_job(second["id"])["status"] == "queued"
+            cancelled = service.cancel(second["id"])
+            assert cancelled["status"] == "cancelled"
+            try:
+                service.cancel(first["id"])
+                raise AssertionError("une tâche en cours ne doit pas être annulable")
+            except RuntimeError:
+                pass
+            return await _wait_finished(service, first["id"]), service.get_job(second["id"])
+        finally:
+            await service.stop()
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == "succeeded"
+    assert second["status"] == "cancelled" and second["started_at"] is None
+
+
+def test_restart_requeues_pending_and_fails_interrupted(tmp_path, monkeypatch):
+    db = DatabaseManager(str(tmp_path / "jobs.db"))
+    archive_path = _make_archive(tmp_path / "archive.zip")
+
+    async def ignore(job_data):
+        pass
+
+    monkeypatch.setattr(websocket_manager, "broadcast_job_update", ignore)
+    for job_id, status in (("interrompue", "running"), ("en-attente", "queued")):
+        db.insert_job({
+            "id": job_id, "job_type": "archive_validate", "status": status,
+            "params": {"archive_path": archive_path}, "created_at": "2026-01-01T00:00:00"
+        })
+
+    async def scenario():
+        service = JobService(db=db, max_workers=1)
+        try:
+            await service.start()
+            return await _wait_finished(service, "en-attente"), service.get_job("interrompue")
+        finally:
+            await service.stop()
+
+    requeued, interrupted = asyncio.run(scenario())
+    assert requeued["status"] == "succeeded"
+    assert interrupted["status"] == "failed" and "redémarrage" in interrupted["error"]
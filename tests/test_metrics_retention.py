@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+from datetime import datetime, timedelta
+
+from backend.db.database import DatabaseManager
+from backend.services.retention_service import MetricsRetentionService
+
+
+def _insert_session(db, session_id, status, updated_at):
+    db.execute_update("""
+        INSERT INTO sessions (id, experiment_id, name, algorithm_pacman, algorithm_ghosts,
+                              created_at, updated_at, status)
+        VALUES (?, 'exp', ?, 'DQN', 'DQN', ?, ?, ?)
+    """, (session_id, session_id, updated_at, updated_at, status))
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "metrics.db"))
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    _insert_session(db, "old_done", "completed", old)
+    _insert_session(db, "old_running", "running", old)
+    for session_id in ("old_done", "old_running"):
+        for episode in range(100):
+            db.insert_metric(session_id, episode, "reward", float(episode))
+    return db
+
+
+def test_retention_compacts_completed_sessions_only(db):
+    """Les sessions terminées sont agrégées par bucket, les sessions en cours restent intactes."""
+    service = MetricsRetentionService(database=db, retention_hours=1,
+                                      bucket_episodes=10, purge_batch_size=30)
+    summary = service.run_once()
+
+    assert summary["compacted_sessions"] == 1
+    assert summary["purged_rows"] == 100
+    assert len(db.get_session_metrics("old_done")) == 0
+    assert len(db.get_session_metrics("old_running")) == 100
+
+    aggregates = db.get_session_metric_aggregates("old_done", "reward")
+    assert len(aggregates) == 10
+    first = aggregates[0]
+    assert (first["bucket_start"], first["bucket_end"]) == (0, 9)
+    assert first["count"] == 10
+    assert first["min"] == 0.0 and first["max"] == 9.0
+    assert first["mean"] == pytest.approx(4.5)
+
+
+def test_retention_is_idempotent_and_reported(db):
+    """Un second passage ne recompacte pas; les statistiques exposent le taux de compaction."""
+    service = MetricsRetentionService(database=db, retention_hours=1, bucket_episodes=10)
+    service.run_once()
+    second = service.run_once()
+    assert second["compacted_sessions"] == 0
+    assert second["purged_rows"] == 0
+
+    stats = db.get_database_stats()
+    assert stats["metric_aggregates_count"] == 10
+    assert stats["retention"]["compacted_sessions"] == 1
+    assert stats["retention"]["fully_purged_sessions"] == 1
+    assert stats["retention"]["compaction_ratio"] == pytest.approx(10.0)
+
+
+def test_existing_database_is_migrated_to_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE legacy (id INTEGER)")
+    conn.close()
+
+    DatabaseManager(db_path=path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'legacy'").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.app import app
+from backend.config import settings
+from backend.services.profiling_service import ProfilingService, SamplingProfiler
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampling_profiler_collapses_stacks_of_selected_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval=0.001, thread_ids=[worker.ident]).start()
+        time.sleep(0.2)
+        profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 10
+    lines = profiler.collapsed().splitlines()
+    assert lines and all(line.startswith("busy-worker;") for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and "_busy_loop (tests/test_profiling.py:" in stack
+    assert any(entry["function"].startswith("_busy_loop") for entry in profiler.top())
+
+
+def test_memory_snapshot_diff_finds_allocating_line():
+    service = ProfilingService()
+    service.start_memory_tracing(frames=5)
+    try:
+        base = service.take_snapshot()["snapshot_id"]
+        retained = [bytearray(1024) for _ in range(2000)]  # ~2 Mo conservés
+        diff = service.diff_snapshots(base, limit=5)
+    finally:
+        service.stop_memory_tracing()
+
+    top = diff["top"][0]
+    assert "test_profiling.py" in top["location"]
+    assert top["size_diff_bytes"] >= 2000 * 1024 and top["count_diff"] >= 2000
+    assert len(retained) == 2000
+
+
+def test_admin_profile_endpoints_and_request_header(monkeypatch):
+    client = TestClient(app)
+    # Sans jeton configuré, l'administration et le profilage par en-tête sont désactivés
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.post("/api/v1/admin/profile", params={"duration": 0.1}).status_code == 404
+    assert "X-Profile-Id" not in client.get("/health", headers={settings.PROFILING_HEADER: "1"}).headers
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    response = client.post("/api/v1/admin/profile", params={"duration": 0.1, "format": "json"}, headers=admin)
+    assert response.status_code == 200 and response.json()["samples"] > 0
+
+    response = client.get("/health", headers={settings.PROFILING_HEADER: "1", **admin})
+    profile_id = response.headers["X-Profile-Id"]
+    collapsed = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=admin)
+    assert collapsed.status_code == 200 and collapsed.headers["content-type"].startswith("text/plain")
+
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    assert "X-Profile-Id" not in client.get("/health", headers={settings.PROFILING_HEADER: "1"}).headers
+    assert client.get("/api/v1/admin/profiles", headers=admin).status_code == 200
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pacman_env import (
+    EpisodeRecorder, EpisodeRecording, EpisodeReplayer, PacManConfigurableEnv, PacManMultiAgentEnv
+)
+from pacman_env.recording import _snapshot
+
+
+def _record(env, seed, steps, keyframe_interval):
+    """Joue un épisode aléatoire enregistré ; retourne l'enregistrement et l'état à chaque step."""
+    rng = np.random.default_rng(seed)
+    recorder = EpisodeRecorder(env, keyframe_interval=keyframe_interval)
+    recorder.reset(seed=seed)
+    states = [_snapshot(env)]
+    multiagent = hasattr(env, "possible_agents")
+    for _ in range(steps):
+        if multiagent:
+            _, _, terminations, truncations, _ = recorder.step(
+                {agent: int(rng.integers(4)) for agent in env.possible_agents})
+            done = terminations["pacman"] or truncations["pacman"]
+        else:
+            _, _, terminated, truncated, _ = recorder.step(int(rng.integers(4)))
+            done = terminated or truncated
+        states.append(_snapshot(env))
+        if done:
+            break
+    return recorder.recording, states
+
+
+def test_multiagent_episode_fits_in_one_kilobyte():
+    """200 steps à 5 agents : actions compactées + keyframes sous 1 Ko."""
+    env = PacManMultiAgentEnv(size=10, num_ghosts=4, lives=10, max_steps=200)
+    recording, states = _record(env, seed=7, steps=200, keyframe_interval=50)
+    assert len(recording) == 200
+    data = recording.to_bytes()
+    assert len(data) <= 1024
+
+    replay_env = PacManMultiAgentEnv(size=10, num_ghosts=4, lives=10, max_steps=200)
+    replayer = EpisodeReplayer(replay_env, EpisodeRecording.from_bytes(data))
+    for step in [120, 3, 200, 199, 0, 51, 50]:
+        replayer.seek(step)
+        assert _snapshot(replay_env) == states[step], step
+
+
+def test_configurable_replay_matches_every_step():
+    env = PacManConfigurableEnv(size=8, num_ghosts=2, num_dots=30, max_steps=80)
+    recording, states = _record(env, seed=3, steps=80, keyframe_interval=10)
+    replay_env = PacManConfigurableEnv(size=8, num_ghosts=2, num_dots=30, max_steps=80)
+    replayer = EpisodeReplayer(replay_env, EpisodeRecording.from_bytes(recording.to_bytes()))
+    # Parcours à rebours : chaque seek repart d'une keyframe
+    for step in range(len(recording), -1, -1):
+        replayer.seek(step)
+        assert _snapshot(replay_env) == states[step], step
+
+
+def test_replayer_rejects_other_configuration():
+    recording, _ = _record(PacManConfigurableEnv(size=8, num_ghosts=2), seed=1, steps=5, keyframe_interval=0)
+    with pytest.raises(ValueError):
+        EpisodeReplayer(PacManConfigurableEnv(size=9, num_ghosts=2), recording)
+
+
+def test_recording_leaves_global_generator_alone():
+    """Enregistrer et rejouer ne touchent pas au générateur global (partagé avec d'autres threads)."""
+    np.random.seed(0)
+    expected = np.random.randint(0, 4, size=100)
+    np.random.seed(0)
+    env = PacManMultiAgentEnv(size=8, num_ghosts=2, max_steps=60, seed=5)
+    recording, states = _record(env, seed=11, steps=60, keyframe_interval=0)
+    replay_env = PacManMultiAgentEnv(size=8, num_ghosts=2, max_steps=60)
+    replayer = EpisodeReplayer(replay_env, recording)
+    for step in (len(recording), 17, 0):
+        replayer.seek(step)
+        assert _snapshot(replay_env) == states[step], step
+    assert (np.random.randint(0, 4, size=100) == expected).all()
+
+    # Même graine de construction, mêmes positions de départ des fantômes
+    assert PacManConfigurableEnv(size=8, num_ghosts=2, seed=5).ghost_start_positions == \
+        PacManConfigurableEnv(size=8, num_ghosts=2, seed=5).ghost_start_positions
+
+
+@pytest.mark.parametrize("env_class", [PacManConfigurableEnv, PacManMultiAgentEnv])
+def test_reset_with_seed_reseeds_the_environment_generator(env_class):
+    """reset(seed=...) ne dépend pas des tirages précédents (instances réutilisées du pool)."""
+    kwargs = {"size": 8, "num_ghosts": 2, "seed": 1}
+    if env_class is PacManConfigurableEnv:
+        kwargs["num_dots"] = 20  # points placés au hasard
+    used, fresh = env_class(**kwargs), env_class(**kwargs)
+    used.rng.randint(0, 4, size=50)
+    used.reset(seed=0)
+    fresh.reset(seed=0)
+    assert _snapshot(used) == _snapshot(fresh)
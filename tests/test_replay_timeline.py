@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import numpy as np
+
+from backend.config import GameParameters
+from backend.services.environment_service import environment_service
+from backend.services.timeline_service import ReplayTimelineService
+from backend.services.websocket_service import websocket_manager
+from backend.utils.state_stream import GameStateStreamDecoder
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        pass
+
+
+def _episodes(count, steps):
+    """États de `count` épisodes de `steps` steps (pas de fin anticipée : 10 vies)."""
+    env = environment_service.create_configurable_env(GameParameters(grid_size=10, lives=10))
+    states = []
+    for episode in range(count):
+        env.reset()
+        for step in range(steps):
+            _, _, terminated, truncated, _ = env.step((step * 7 + episode) % 4)
+            state = environment_service.get_game_state_dict(env, "configurable")
+            state.update({"episode": episode, "score": step})
+            states.append(state)
+            if terminated or truncated:
+                break
+    return states
+
+
+def _same(stored, original):
+    return (stored["grid"] == original["grid"] and stored["step"] == original["step"]
+            and stored["pacman"] == {"x": original["pacman"]["x"], "y": original["pacman"]["y"]})
+
+
+def test_random_access_ranges_match_appended_states(tmp_path):
+    service = ReplayTimelineService(base_dir=str(tmp_path), keyframe_interval=8, max_frames_per_request=50)
+    states = _episodes(3, 40)
+    for state in states[:70]:
+        service.append("run-1", state)
+    # Reprise après redémarrage : nouvel écrivain sur les mêmes fichiers
+    service.close_session("run-1")
+    service = ReplayTimelineService(base_dir=str(tmp_path), keyframe_interval=8, max_frames_per_request=50)
+    for state in states[60:]:
+        service.append("run-1", state)  # les doublons sont ignorés
+
+    episodes = service.list_episodes("run-1")
+    assert [e["episode"] for e in episodes] == [0, 1, 2]
+    assert sum(e["frames"] for e in episodes) == len(states)
+
+    by_key = {(s["episode"], s["step"]): s for s in states}
+    for episode, start, end in [(1, 13, 21), (0, 1, 1), (2, 30, 40), (1, 25, 35)]:
+        frames = service.get_frames("run-1", episode, start, end)
+        assert [f["step"] for f in frames] == list(range(start, end + 1))
+        assert all(_same(f, by_key[(episode, f["step"])]) for f in frames)
+
+    assert len(service.get_frames("run-1", 0)) == 40
+    assert len(service.get_frames("run-1", 0, 0, 10_000)) == 40
+    assert service.get_frames("run-1", 9) == []
+
+    # Suppression : index projeté libéré, fichiers supprimés
+    view = service.views["run-1"]
+    assert service.delete_session("run-1")
+    assert view.records is None and list(tmp_path.iterdir()) == []
+    assert service.list_episodes("run-1") == []
+
+
+def test_replay_request_streams_binary_frames_over_game_state(tmp_path):
+    service = ReplayTimelineService(base_dir=str(tmp_path), keyframe_interval=8)
+    states = _episodes(2, 30)
+    for state in states:
+        service.append("run-2", state)
+
+    async def scenario():
+        client = _FakeWebSocket()
+        await websocket_manager.connect(client)
+        await websocket_manager.subscribe(client, "game_state", "binary")
+        await websocket_manager.handle_message(client, {
+            "type": "replay", "session_id": "run-2", "episode": 1, "start_step": 11, "end_step": 20
+        })
+        await asyncio.sleep(0.05)
+        await websocket_manager.disconnect_all()
+        return client.sent
+
+    sent = asyncio.run(scenario())
+    frames = [m for m in sent if isinstance(m, bytes)]
+    decoder = GameStateStreamDecoder()
+    decoded = [decoder.decode(frame) for frame in frames]
+    assert decoded[0]["keyframe"] and [d["step"] for d in decoded] == list(range(11, 21))
+    expected = [s for s in states if s["episode"] == 1 and 11 <= s["step"] <= 20]
+    assert all(np.array_equal(d["grid"], np.asarray(e["grid"])) for d, e in zip(decoded, expected))
+
+    complete = json.loads([m for m in sent if isinstance(m, str)][-1])["data"]
+    assert complete["type"] == "replay_complete" and complete["next_step"] is None
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.config import GameParameters, VisualizationParameters
+from backend.models.experiment import SimulationCreate
+from backend.services.environment_service import environment_service
+from backend.services.simulation_service import SimulationService
+
+
+def _config(env_type="configurable", fps=50):
+    return SimulationCreate(
+        environment_type=env_type,
+        game=GameParameters(grid_size=10, num_ghosts=2, power_pellets=2),
+        visualization=VisualizationParameters(fps=fps)
+    )
+
+
+def test_same_configuration_is_stepped_in_one_batch():
+    """Les simulations de même configuration partagent un groupe et un appel par tick."""
+    async def scenario():
+        service = SimulationService(max_simulations=10, idle_timeout_seconds=30)
+        sims = [await service.create_simulation(_config()) for _ in range(3)]
+        other = await service.create_simulation(_config("multiagent"))
+        await asyncio.sleep(0.3)
+        stats = service.get_stats()
+        steps = [sim.total_steps for sim in sims]
+        multi_state = other.last_state
+        await service.stop()
+        return stats, steps, multi_state
+
+    stats, steps, multi_state = asyncio.run(scenario())
+    assert stats["groups"] == 2
+    assert min(steps) > 0
+    assert len(set(steps)) == 1  # avancées ensemble
+    assert stats["batched_calls"] >= max(steps)
+    assert multi_state is not None and multi_state["simulation_id"]
+
+
+def test_idle_simulations_are_evicted():
+    async def scenario():
+        service = SimulationService(max_simulations=10, idle_timeout_seconds=0.05)
+        sim = await service.create_simulation(_config(fps=20))
+        await asyncio.sleep(0.3)
+        remaining = service.get_simulation(sim.id, touch=False)
+        await service.stop()
+        return remaining, service.get_stats()
+
+    remaining, stats = asyncio.run(scenario())
+    assert remaining is None
+    assert stats["active_simulations"] == 0
+
+
+def test_policy_paths_are_confined_to_models_dir(tmp_path):
+    models = tmp_path / "models"
+    models.mkdir()
+    (tmp_path / "outside.zip").write_bytes(b"PK")
+    service = SimulationService(max_simulations=10, models_dir=str(models))
+
+    def create(policy_path):
+        config = _config().copy(update={"policy_path": policy_path})
+        return asyncio.run(service.create_simulation(config))
+
+    for path, error in ((str(tmp_path / "outside.zip"), ValueError), ("../outside.zip", ValueError),
+                        ("absent.zip", FileNotFoundError), (str(models / "absent"), FileNotFoundError)):
+        with pytest.raises(error):
+            create(path)
+    assert service.simulations == {}
+
+
+def test_stop_waits_for_the_running_batch_before_releasing_envs(monkeypatch):
+    """Un environnement n'est rendu au pool qu'une fois le thread du lot terminé."""
+    entered, finished = threading.Event(), threading.Event()
+    released = []
+
+    def slow_batch(simulations):
+        entered.set()
+        time.sleep(0.2)
+        finished.set()
+        return []
+
+    monkeypatch.setattr(environment_service, "release_env", lambda key, env: released.append(finished.is_set()))
+
+    async def scenario():
+        service = SimulationService(max_simulations=10)
+        service._step_batch = slow_batch
+        await service.create_simulation(_config())
+        await asyncio.to_thread(entered.wait, 5)
+        await service.stop()
+
+    asyncio.run(scenario())
+    assert released == [True]
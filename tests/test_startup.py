@@ -0,0 +1,34 @@
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_startup import measure_startup
+from backend.utils.lazy_imports import modules_available
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_backend_startup_is_lazy():
+    summary = measure_startup("backend.app", runs=2)
+    assert summary["lazy_violations"] == []
+
+
+def test_pacman_env_submodules_load_on_first_use():
+    code = (
+        "import sys; sys.path.insert(0, 'src')\n"
+        "import pacman_env.rendering\n"
+        "assert 'gymnasium' not in sys.modules and 'pettingzoo' not in sys.modules\n"
+        "from pacman_env import PacManConfigurableEnv, EpisodeRecorder\n"
+        "assert 'gymnasium' in sys.modules and 'pettingzoo' not in sys.modules\n"
+        "import pacman_env\n"
+        "assert pacman_env.PacManConfigurableEnv is PacManConfigurableEnv\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_modules_available_does_not_import():
+    assert modules_available("json", "numpy")
+    assert not modules_available("numpy", "module_qui_n_existe_pas")
+    assert not modules_available("paquet_absent.sous_module")
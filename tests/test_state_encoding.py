@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from backend.config import GameParameters
+from backend.services.environment_service import EnvironmentService
+from backend.utils.state_encoding import decode_grid, decode_rle, encode_grid, encode_rle
+
+
+def _reference_grid(env):
+    """Grille construite cellule par cellule (ancienne implémentation)."""
+    return [[-1 if (r, c) in env.walls else int(env.dots[r, c]) if env.dots[r, c] > 0 else 0
+             for c in range(env.size)] for r in range(env.size)]
+
+
+@pytest.mark.parametrize("env_type", ["configurable", "multiagent"])
+def test_vectorized_grid_matches_reference(env_type):
+    service = EnvironmentService()
+    params = GameParameters(grid_size=15, num_ghosts=3, power_pellets=3)
+    create = service.create_configurable_env if env_type == "configurable" else service.create_multiagent_env
+    env = create(params)
+    # Les positions de départ (tirées à la création) ne doivent pas tomber sur un mur
+    occupied = {tuple(p) for p in env.ghost_start_positions or []} | {tuple(env.pacman_start_position)}
+    env.walls = [(4, c) for c in range(3, 12) if (4, c) not in occupied]
+    env.reset()
+
+    state = service.get_game_state_dict(env, env_type)
+    assert state["grid"] == _reference_grid(env)
+    assert len(state["pellets"]) == int(np.sum(env.dots == 1))
+    if env_type == "multiagent":
+        assert {(p["y"], p["x"]) for p in state["power_pellets"]} == set(env.power_pellet_positions)
+
+
+@pytest.mark.parametrize("encoding", ["bitmap", "rle"])
+def test_compact_encodings_round_trip(encoding):
+    rng = np.random.default_rng(0)
+    grid = rng.choice(np.array([-1, 0, 1, 2], dtype=np.int8), size=(30, 30))
+    assert np.array_equal(decode_grid(encode_grid(grid, encoding)), grid)
+
+
+def test_rle_collapses_runs():
+    grid = np.array([[1, 1, 1], [1, 0, 0]], dtype=np.int8)
+    runs = encode_rle(grid)
+    assert runs == [1, 4, 0, 2]
+    assert np.array_equal(decode_rle(runs, grid.shape), grid)
@@ -0,0 +1,103 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.config import GameParameters
+from backend.services.environment_service import environment_service
+from backend.services.websocket_service import WebSocketManager
+from backend.utils.state_stream import (
+    GameStateStreamEncoder, GameStateStreamDecoder, StreamResyncRequired, KEYFRAME, DELTA
+)
+
+
+def _states(steps=40, encodings=("full",)):
+    env = environment_service.create_configurable_env(GameParameters(grid_size=15, lives=10), seed=0)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    states = []
+    for step in range(steps):
+        _, _, terminated, truncated, _ = env.step(int(rng.integers(0, 4)))
+        if terminated or truncated:
+            # Partie perdue avant la fin : on repart d'un plateau neuf
+            env.reset()
+        variants = []
+        for encoding in encodings:
+            state = environment_service.get_game_state_dict(env, "configurable", encoding)
+            state.update({"simulation_id": "sim-1", "score": step, "episode": 0, "done": False})
+            variants.append(state)
+        states.append(variants if len(encodings) > 1 else variants[0])
+    return states
+
+
+def test_decoder_reconstructs_every_state():
+    """Les trames clés / delta reconstruisent exactement chaque état."""
+    encoder = GameStateStreamEncoder(keyframe_interval=10)
+    decoder = GameStateStreamDecoder()
+    for state, compact in _states(encodings=("full", "bitmap")):
+        decoded = decoder.decode(encoder.encode(compact))
+        assert np.array_equal(decoded["grid"], np.asarray(state["grid"]))
+        assert decoded["pacman"] == {"x": state["pacman"]["x"], "y": state["pacman"]["y"]}
+        assert [(g["x"], g["y"], g["mode"]) for g in decoded["ghosts"]] == \
+            [(g["x"], g["y"], g["mode"]) for g in state["ghosts"]]
+        assert decoded["score"] == state["score"]
+
+    assert encoder.stats["keyframes"] == 4
+    assert encoder.stats["delta_bytes"] / encoder.stats["deltas"] < 64
+
+
+def test_sequence_gap_requires_resync():
+    encoder = GameStateStreamEncoder(keyframe_interval=100)
+    decoder = GameStateStreamDecoder()
+    frames = [encoder.encode(state) for state in _states(5)]
+    assert frames[0][3] == KEYFRAME and frames[1][3] == DELTA
+
+    decoder.decode(frames[0])
+    with pytest.raises(StreamResyncRequired):
+        decoder.decode(frames[2])
+
+    encoder.request_keyframe("sim-1")
+    frame = encoder.encode(_states(6)[-1])
+    assert frame[3] == KEYFRAME
+    assert decoder.decode(frame)["keyframe"]
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        pass
+
+
+def test_game_state_is_serialized_once_per_format():
+    """Tous les abonnés d'un même format reçoivent la même charge sérialisée."""
+    async def scenario():
+        manager = WebSocketManager()
+        clients = [_FakeWebSocket() for _ in range(4)]
+        for i, websocket in enumerate(clients):
+            await manager.connect(websocket)
+            await manager.subscribe(websocket, "game_state", "binary" if i < 2 else "json")
+        for state in _states(3):
+            await manager.broadcast_game_state(state)
+        await asyncio.sleep(0.01)  # laisse les tâches d'envoi vider les files
+        stats = manager.get_connection_stats()
+        await manager.disconnect_all()
+        return stats, clients
+
+    stats, clients = asyncio.run(scenario())
+    assert all(isinstance(payload, bytes) for payload in clients[0].sent)
+    assert all(a is b for a, b in zip(clients[0].sent, clients[1].sent))
+    assert all(isinstance(payload, str) for payload in clients[2].sent)
+    assert all(a is b for a, b in zip(clients[2].sent, clients[3].sent))
+    assert len(clients[3].sent) == 3
+    assert stats["game_state_stream"]["keyframes"] == 1
@@ -0,0 +1,85 @@
+import json
+import os
+
+from experiments.version_manager import VersionFilter, VersionManager
+
+
+def _register(manager, win_rate, model_type="DQN", learning_rate=0.001, notes=""):
+    return manager.register_new_version(
+        f"/archives/{model_type}_{win_rate}.zip",
+        {"model_type": model_type, "agent_type": "pacman", "notes": notes,
+         "metrics": {"win_rate": win_rate, "observations": "converged"},
+         "parameters": {"learning_rate": learning_rate}}
+    )
+
+
+def test_registry_queries_are_indexed_and_persisted(tmp_path):
+    manager = VersionManager(str(tmp_path / "archives"))
+    versions = [_register(manager, rate, model)
+                for rate, model in ((0.2, "DQN"), (0.9, "PPO"), (0.5, "DQN"), (0.75, "PPO"))]
+    assert [v.session_number for v in versions] == [1, 2, 3, 4]
+    assert "high_performance" in versions[1].tags and "converged" in versions[1].tags
+
+    assert manager.add_tag(versions[0].session_id, "baseline_run")
+    assert not manager.add_tag(versions[0].session_id, "baseline_run")
+    assert not manager.add_tag("missing", "x")
+    assert manager.update_notes(versions[2].session_id, "Rerun with Double DQN")
+
+    # Nouvelle instance : tout est relu depuis la base
+    reopened = VersionManager(str(tmp_path / "archives"))
+    found = reopened.search_versions(VersionFilter(model_type="PPO", min_metric_value={"win_rate": 0.8}))
+    assert [v.session_id for v in found] == [versions[1].session_id]
+    assert [v.session_number for v in reopened.search_versions(limit=2)] == [4, 3]
+    assert reopened.search_versions(VersionFilter(tags=["baseline_run"]))[0].session_number == 1
+    assert reopened.search_versions(VersionFilter(search_text="double"))[0].notes == "Rerun with Double DQN"
+    assert reopened.search_versions(VersionFilter(search_text="50%")) == []
+
+    best = reopened.get_best_versions(limit=2)
+    assert [v.metrics["win_rate"] for v in best] == [0.9, 0.75]
+    assert reopened.get_version_info("/archives/PPO_0.9.zip")["session_id"] == versions[1].session_id
+
+    stats = reopened.get_statistics()
+    assert stats["total_sessions"] == 4 and stats["by_model_type"] == {"DQN": 2, "PPO": 2}
+    assert stats["by_tag"]["baseline_run"] == 1
+
+    assert reopened.remove_tag(versions[0].session_id, "baseline_run")
+    assert "baseline_run" not in reopened.get_version(versions[0].session_id).tags
+    assert reopened.cleanup_orphaned_metadata() == 4
+    assert reopened.search_versions() == []
+    assert _register(reopened, 0.1).session_number == 5
+
+
+def test_legacy_json_registry_is_imported(tmp_path):
+    metadata_dir = tmp_path / "archives" / "metadata"
+    os.makedirs(metadata_dir)
+    legacy = {
+        "next_session_number": 8,
+        "versions": {
+            "session_007_20260101_120000": {
+                "session_id": "session_007_20260101_120000", "session_number": 7,
+                "timestamp": "20260101_120000", "model_type": "PPO", "agent_type": "pacman",
+                "tags": ["best"], "categories": ["all"], "metrics": {"win_rate": 0.8},
+                "parameters": {}, "archive_path": "a.zip", "parent_version": None,
+                "child_versions": [], "notes": ""
+            }
+        }
+    }
+    (metadata_dir / "version_registry.json").write_text(json.dumps(legacy))
+
+    manager = VersionManager(str(tmp_path / "archives"))
+    assert manager.get_version("session_007_20260101_120000").tags == ["best"]
+    assert _register(manager, 0.3).session_number == 8
+
+
+def test_non_finite_metrics_and_broken_legacy_registry(tmp_path):
+    manager = VersionManager(str(tmp_path / "archives"))
+    version = _register(manager, float("nan"))
+    assert version is not None
+    assert manager.get_best_versions() == []
+    assert _register(manager, float("inf")) is not None
+
+    # Registre JSON inimportable (champ inconnu) : le gestionnaire démarre à vide
+    metadata_dir = tmp_path / "broken" / "metadata"
+    os.makedirs(metadata_dir)
+    (metadata_dir / "version_registry.json").write_text(json.dumps({"versions": {"x": {"unknown": 1}}}))
+    assert VersionManager(str(tmp_path / "broken")).search_versions() == []
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pacman_env.rendering import PALETTE, render_frame
+from backend.models.experiment import EpisodeVideoExportRequest
+from backend.services.video_export_service import VideoExportService, play_episode
+
+
+def test_indexed_frame_matches_rgb_frame():
+    """Une frame indexée, passée par la palette, est identique à la frame RGB."""
+    grid = np.ones((6, 8), dtype=np.int8)
+    grid[0, :] = -1
+    grid[2, 2] = 2
+    args = (grid, (3, 2), [(1, 5), (4, 6)], [1], 10, True)
+    indexed = render_frame(*args, indexed=True)
+    assert indexed.shape == (60, 80) and indexed.dtype == np.uint8
+    assert np.array_equal(PALETTE[indexed], render_frame(*args))
+
+
+@pytest.mark.parametrize("environment_type", ["configurable", "multiagent"])
+def test_recorded_episode_replays_identically(environment_type):
+    """Même graine et mêmes actions : même suite d'états."""
+    actions = np.random.default_rng(3).integers(0, 4, size=(40, 5)).tolist()
+    game = {"grid_size": 8, "num_ghosts": 2}
+    first, summary, _ = play_episode(environment_type, game, seed=11, actions=actions)
+    np.random.seed(99)  # l'état global précédent ne doit pas compter
+    second, _, _ = play_episode(environment_type, game, seed=11, actions=actions)
+    assert summary["steps"] == len(first) - 1 <= 40
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+
+
+def test_export_writes_gifs_next_to_archive(tmp_path):
+    archive = tmp_path / "pacman_run_001.zip"
+    archive.write_bytes(b"")
+    service = VideoExportService(max_workers=2, models_dir=str(tmp_path / "models"), archive_dir=str(tmp_path))
+    request = EpisodeVideoExportRequest(
+        game={"grid_size": 6, "num_ghosts": 1}, episodes=2, max_steps=15,
+        cell_size=6, archive_path=str(archive), workers=8
+    )
+    result = service.export_episodes(request)
+
+    assert Path(result["output_dir"]) == tmp_path / "pacman_run_001_videos"
+    # 8 processus demandés, plafonnés par le service
+    assert result["workers"] == 2 and len(result["episodes"]) == 2
+    for episode in result["episodes"]:
+        with Image.open(episode["path"]) as image:
+            assert image.format == "GIF"
+            assert image.size == (36, 36)
+        assert episode["frames"] == episode["steps"] + 1
+
+    with pytest.raises(ValueError):
+        service.export_episodes(request.copy(update={"archive_path": str(tmp_path / "absente.zip")}))
+
+
+def test_export_paths_are_confined(tmp_path):
+    """Archive hors du répertoire des archives ou modèle hors de MODELS_DIR : refusés."""
+    (tmp_path / "models").mkdir()
+    (tmp_path / "archives").mkdir()
+    outside = tmp_path / "outside.zip"
+    outside.write_bytes(b"")
+    service = VideoExportService(models_dir=str(tmp_path / "models"), archive_dir=str(tmp_path / "archives"))
+    request = EpisodeVideoExportRequest(episodes=1)
+
+    for update in ({"archive_path": str(outside)}, {"archive_path": "../outside.zip"},
+                   {"policy_path": str(outside)}, {"policy_path": "../outside"}):
+        with pytest.raises(ValueError):
+            service.check_request(request.copy(update=update))
+    with pytest.raises(FileNotFoundError):
+        service.check_request(request.copy(update={"policy_path": "absent"}))
+
+    (tmp_path / "models" / "dqn.zip").write_bytes(b"")
+    assert service.policy_path(request.copy(update={"policy_path": "dqn"})) == str(tmp_path / "models" / "dqn.zip")
@@ -0,0 +1,192 @@
+import asyncio
+import json
+
+import numpy as np
+
+from backend.config import GameParameters
+from backend.services.environment_service import environment_service
+from backend.services.websocket_service import WebSocketManager
+from backend.utils.state_stream import GameStateStreamDecoder
+
+
+class _FakeWebSocket:
+    """Client factice ; un client « lent » ne termine jamais ses envois."""
+
+    def __init__(self, slow=False):
+        self.slow = slow
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.slow:
+            await asyncio.Event().wait()
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self):
+        self.closed = True
+
+
+def _game_states(steps):
+    env = environment_service.create_configurable_env(GameParameters(grid_size=12))
+    env.reset()
+    states = []
+    for step in range(steps):
+        _, _, terminated, truncated, _ = env.step(step % 4)
+        if terminated or truncated:
+            env.reset()
+        state = environment_service.get_game_state_dict(env, "configurable")
+        state["simulation_id"] = "sim"
+        states.append(state)
+    return states
+
+
+async def _connect(manager, *clients):
+    for websocket in clients:
+        await manager.connect(websocket)
+        await manager.subscribe(websocket, "session_updates")
+
+
+def test_slow_client_does_not_delay_others():
+    """La diffusion ne fait qu'enfiler : un client bloqué ne retarde pas les autres."""
+    async def scenario():
+        manager = WebSocketManager(queue_size=8, overflow_policy="drop_oldest")
+        fast, slow = _FakeWebSocket(), _FakeWebSocket(slow=True)
+        await _connect(manager, fast, slow)
+        for i in range(50):
+            await asyncio.wait_for(manager.broadcast_session_update({"step": i}), timeout=0.1)
+        await asyncio.sleep(0.01)
+        stats = manager.get_connection_stats()["outbound_queues"]
+        await manager.disconnect_all()
+        return fast, stats
+
+    fast, stats = asyncio.run(scenario())
+    assert len(fast.sent) == 50
+    by_depth = sorted(stats["clients"], key=lambda c: c["queue_depth"])
+    assert by_depth[-1]["queue_depth"] == 8
+    assert by_depth[-1]["dropped"] == 50 - 1 - 8  # un message en cours d'envoi
+    assert stats["dropped"] == by_depth[-1]["dropped"]
+
+
+def test_coalesce_keeps_latest_message_per_key():
+    async def scenario():
+        manager = WebSocketManager(queue_size=4, overflow_policy="coalesce")
+        slow = _FakeWebSocket(slow=True)
+        await manager.connect(slow)
+        await asyncio.sleep(0)
+        for i in range(10):
+            manager._enqueue(slow, f"state-{i}", key=("game_state", "json", "sim"))
+        queue = manager.connection_info[slow]["queue"]
+        entries = [payload for _, payload in queue.entries]
+        await manager.disconnect_all()
+        return entries, queue
+
+    entries, queue = asyncio.run(scenario())
+    assert entries[-1] == "state-9"
+    assert len(entries) == 4
+    assert queue.coalesced == 6 and queue.dropped == 0
+
+
+def test_disconnect_policy_and_idle_sweeper():
+    async def scenario():
+        manager = WebSocketManager(queue_size=2, overflow_policy="disconnect",
+                                   idle_timeout_seconds=0.05, sweep_interval_seconds=0.02)
+        slow, idle = _FakeWebSocket(slow=True), _FakeWebSocket()
+        await _connect(manager, slow, idle)
+        for i in range(5):
+            await manager.broadcast_session_update({"step": i})
+            await asyncio.sleep(0)  # le client rapide vide sa file entre deux messages
+        remaining_after_overflow = list(manager.active_connections)
+        await asyncio.sleep(0.15)
+        stats = manager.get_connection_stats()["outbound_queues"]
+        await manager.disconnect_all()
+        return slow, idle, remaining_after_overflow, stats
+
+    slow, idle, remaining, stats = asyncio.run(scenario())
+    assert remaining == [idle] and slow.closed
+    assert idle.closed
+    assert stats["overflow_disconnects"] == 1 and stats["idle_disconnects"] == 1
+
+
+def test_conflation_delivers_latest_value_per_key_at_subscriber_rate():
+    """Un flot de métriques est ramené à la cadence demandée, dernière valeur par session."""
+    async def scenario():
+        manager = WebSocketManager()
+        watcher, unlimited = _FakeWebSocket(), _FakeWebSocket()
+        await manager.connect(watcher)
+        await manager.connect(unlimited)
+        await manager.subscribe(watcher, "metrics", max_hz=5)
+        await manager.subscribe(unlimited, "metrics")
+        for step in range(500):
+            for session_id in ("a", "b"):
+                await manager.broadcast_metrics({"session_id": session_id, "step": step})
+        await asyncio.sleep(0.3)
+        stats = manager.get_connection_stats()["conflation"]["metrics"]
+        await manager.disconnect_all()
+        return watcher, unlimited, stats
+
+    watcher, unlimited, stats = asyncio.run(scenario())
+    received = [json.loads(text)["data"]["data"] for text in watcher.sent]
+    # Première valeur livrée immédiatement, puis la dernière de chaque session
+    assert len(received) == 3
+    assert {(m["session_id"], m["step"]) for m in received[1:]} == {("a", 499), ("b", 499)}
+    # La fenêtre du canal (100 ms) s'applique aussi sans cadence demandée
+    assert len(unlimited.sent) == 3
+    assert sum(g["published"] for g in stats["groups"]) == 2000
+    assert sum(g["delivered"] for g in stats["groups"]) == 6
+
+
+
+def test_rate_limit_never_merges_event_channels():
+    """Les canaux sans clé de conflation livrent chaque message ; les tâches sont conflatées par id."""
+    async def scenario():
+        manager = WebSocketManager()
+        watcher = _FakeWebSocket()
+        await manager.connect(watcher)
+        await manager.subscribe(watcher, "session_updates", max_hz=5)
+        await manager.subscribe(watcher, "jobs", max_hz=5)
+        for event in ("created", "started", "stopped"):
+            await manager.broadcast_session_update({"session_id": "a", "event": event})
+        for progress in range(10):
+            for job_id in ("j1", "j2"):
+                await manager.broadcast_job_update({"id": job_id, "progress": progress})
+        await asyncio.sleep(0.3)
+        await manager.disconnect_all()
+        return [json.loads(text)["data"] for text in watcher.sent]
+
+    messages = asyncio.run(scenario())
+    events = [m["data"]["event"] for m in messages if m["type"] == "session_update"]
+    assert events == ["created", "started", "stopped"]
+    jobs = [(m["data"]["id"], m["data"]["progress"]) for m in messages if m["type"] == "job_update"]
+    assert jobs[0] == ("j1", 0) and set(jobs[1:]) == {("j1", 9), ("j2", 9)}
+
+def test_rate_limited_binary_subscriber_decodes_conflated_deltas():
+    """Chaque groupe binaire calcule ses deltas entre les valeurs qu'il reçoit réellement."""
+    async def scenario():
+        manager = WebSocketManager()
+        fast, slow = _FakeWebSocket(), _FakeWebSocket()
+        await manager.connect(fast)
+        await manager.connect(slow)
+        await manager.subscribe(fast, "game_state", "binary")
+        await manager.subscribe(slow, "game_state", "binary", max_hz=20)
+        states = _game_states(30)
+        for state in states:
+            await manager.broadcast_game_state(state)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        await manager.disconnect_all()
+        return fast, slow, states[-1]
+
+    fast, slow, last = asyncio.run(scenario())
+    assert len(fast.sent) == 30
+    assert len(slow.sent) < 30
+    for websocket in (fast, slow):
+        decoder = GameStateStreamDecoder()
+        decoded = [decoder.decode(frame) for frame in websocket.sent][-1]
+        assert np.array_equal(decoded["grid"], np.asarray(last["grid"]))
+        assert decoded["pacman"] == {"x": last["pacman"]["x"], "y": last["pacman"]["y"]}